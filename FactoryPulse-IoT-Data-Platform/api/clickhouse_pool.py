@@ -0,0 +1,256 @@
+"""Shared ClickHouse access layer for the FactoryPulse API.
+
+A single :class:`ClickHousePool` is created in the app lifespan and handed to
+routers through the :func:`get_clickhouse` dependency.  ``clickhouse_connect``
+clients are blocking and not safe for concurrent use, so the pool keeps up to
+``size`` of them, lends one out per query and runs the query on a dedicated
+thread pool.  The event loop never blocks on ClickHouse, and concurrency
+towards the server is capped at ``size``.
+
+Every query carries a timeout, enforced both client-side (``asyncio.wait_for``)
+and server-side (``max_execution_time``); raw result streams are bounded by the
+longer server-side stream timeout only.  All calls are recorded in Prometheus
+metrics on the default registry, which the app's ``Instrumentator`` exposes on
+``/metrics``.
+"""
+
+import asyncio
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional
+
+import clickhouse_connect
+from fastapi import Request
+from prometheus_client import Counter, Gauge, Histogram
+
+QUERY_DURATION = Histogram(
+    "clickhouse_query_duration_seconds",
+    "ClickHouse query latency as seen by the API, including pool wait.",
+    ["query", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+POOL_WAIT = Histogram(
+    "clickhouse_pool_wait_seconds",
+    "Time spent waiting for a free ClickHouse client.",
+    ["query"],
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+STREAM_BYTES = Counter(
+    "clickhouse_stream_bytes_total",
+    "Bytes streamed from ClickHouse in raw output formats.",
+    ["query"],
+)
+QUERY_ROWS = Counter(
+    "clickhouse_query_rows_total",
+    "Rows returned by ClickHouse queries.",
+    ["query"],
+)
+POOL_IN_USE = Gauge(
+    "clickhouse_pool_clients_in_use",
+    "ClickHouse clients currently lent out to queries.",
+)
+
+
+class QueryTimeoutError(Exception):
+    """Raised when a ClickHouse query exceeds its timeout."""
+
+
+def _client_from_env():
+    """Create a ClickHouse client from environment variables."""
+    return clickhouse_connect.get_client(
+        host=os.environ.get("CLICKHOUSE_HOST", "clickhouse"),
+        port=int(os.environ.get("CLICKHOUSE_PORT", 8123)),
+        username=os.environ.get("CLICKHOUSE_USER", "default"),
+        password=os.environ.get("CLICKHOUSE_PASSWORD", "clickhouse"),
+        database=os.environ.get("CLICKHOUSE_DB", "factory_pulse"),
+        # Sessions serialise queries server-side; pooled clients must not share one.
+        autogenerate_session_id=False,
+    )
+
+
+class ClickHousePool:
+    """Bounded pool of ClickHouse clients with async query execution.
+
+    Clients are created lazily, so the API starts even when ClickHouse is not
+    reachable yet; a failed connection attempt does not consume a pool slot.
+    """
+
+    def __init__(
+        self,
+        size: int = 16,
+        query_timeout: float = 10.0,
+        stream_timeout: float = 300.0,
+        client_factory: Callable[[], Any] = _client_from_env,
+    ):
+        self.size = size
+        self.query_timeout = query_timeout
+        self.stream_timeout = stream_timeout
+        self._client_factory = client_factory
+        self._idle: asyncio.LifoQueue = asyncio.LifoQueue()
+        self._slots = asyncio.Semaphore(size)
+        self._clients: list = []
+        self._executor = ThreadPoolExecutor(max_workers=size, thread_name_prefix="clickhouse")
+
+    @classmethod
+    def from_env(cls) -> "ClickHousePool":
+        return cls(
+            size=int(os.environ.get("CLICKHOUSE_POOL_SIZE", 16)),
+            query_timeout=float(os.environ.get("CLICKHOUSE_QUERY_TIMEOUT", 10)),
+            stream_timeout=float(os.environ.get("CLICKHOUSE_STREAM_TIMEOUT", 300)),
+        )
+
+    async def _acquire(self):
+        await self._slots.acquire()
+        try:
+            if not self._idle.empty():
+                return self._idle.get_nowait()
+            loop = asyncio.get_running_loop()
+            client = await loop.run_in_executor(self._executor, self._client_factory)
+            self._clients.append(client)
+            return client
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def _release(self, client) -> None:
+        self._idle.put_nowait(client)
+        self._slots.release()
+
+    async def _run(self, method: str, sql: str, parameters, name: str, timeout):
+        timeout = self.query_timeout if timeout is None else timeout
+        started = time.perf_counter()
+        client = await self._acquire()
+        POOL_WAIT.labels(query=name).observe(time.perf_counter() - started)
+        POOL_IN_USE.inc()
+
+        loop = asyncio.get_running_loop()
+        settings = {"max_execution_time": max(int(timeout), 1)}
+        future = loop.run_in_executor(
+            self._executor,
+            lambda: getattr(client, method)(sql, parameters=parameters, settings=settings),
+        )
+
+        def _return_client(_):
+            POOL_IN_USE.dec()
+            self._release(client)
+
+        # The worker thread keeps the client busy even after a timeout, so it
+        # is only handed back once the call has actually finished.
+        future.add_done_callback(_return_client)
+
+        status = "error"
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), timeout)
+            status = "ok"
+            rows = getattr(result, "result_rows", None)
+            if isinstance(rows, list):
+                QUERY_ROWS.labels(query=name).inc(len(rows))
+            return result
+        except asyncio.TimeoutError:
+            status = "timeout"
+            raise QueryTimeoutError(f"ClickHouse query '{name}' exceeded {timeout:g}s") from None
+        finally:
+            QUERY_DURATION.labels(query=name, status=status).observe(time.perf_counter() - started)
+
+    async def query(
+        self,
+        sql: str,
+        parameters: Optional[dict] = None,
+        *,
+        name: str,
+        timeout: Optional[float] = None,
+    ):
+        """Run a SELECT and return the ``clickhouse_connect`` QueryResult."""
+        return await self._run("query", sql, parameters, name, timeout)
+
+    async def command(
+        self,
+        sql: str,
+        parameters: Optional[dict] = None,
+        *,
+        name: str,
+        timeout: Optional[float] = None,
+    ):
+        """Run a DDL/mutation statement."""
+        return await self._run("command", sql, parameters, name, timeout)
+
+    async def raw_stream(
+        self,
+        sql: str,
+        parameters: Optional[dict] = None,
+        *,
+        fmt: str,
+        name: str,
+        settings: Optional[dict] = None,
+        chunk_size: int = 1 << 16,
+    ) -> AsyncIterator[bytes]:
+        """Yield the result of ``sql`` as raw bytes in ClickHouse output format ``fmt``.
+
+        Bytes are passed through untouched, so no Python object is built per
+        row.  The client stays checked out until the stream is exhausted or the
+        consumer closes the generator.
+        """
+        started = time.perf_counter()
+        client = await self._acquire()
+        POOL_WAIT.labels(query=name).observe(time.perf_counter() - started)
+        POOL_IN_USE.inc()
+
+        loop = asyncio.get_running_loop()
+        query_settings = {"max_execution_time": max(int(self.stream_timeout), 1)}
+        query_settings.update(settings or {})
+        opening = loop.run_in_executor(
+            self._executor,
+            lambda: client.raw_stream(sql, parameters=parameters, settings=query_settings, fmt=fmt),
+        )
+        in_flight = opening
+        status = "error"
+        try:
+            # Shielded so a cancelled consumer leaves the executor call running
+            # to completion; cleanup below waits for it before reusing the client.
+            stream = await asyncio.shield(opening)
+            while True:
+                in_flight = loop.run_in_executor(self._executor, stream.read, chunk_size)
+                chunk = await asyncio.shield(in_flight)
+                if not chunk:
+                    break
+                STREAM_BYTES.labels(query=name).inc(len(chunk))
+                yield chunk
+            status = "ok"
+        finally:
+            # No awaits here: a cancelled consumer (client disconnect) could
+            # cancel them too and leak the pool slot.  The stream is closed and
+            # the client handed back from done-callbacks instead.
+            QUERY_DURATION.labels(query=name, status=status).observe(time.perf_counter() - started)
+
+            def _return_client(closing) -> None:
+                if closing is not None and not closing.cancelled():
+                    closing.exception()
+                POOL_IN_USE.dec()
+                self._release(client)
+
+            def _close_stream(_=None) -> None:
+                if opening.cancelled() or opening.exception() is not None:
+                    _return_client(None)
+                    return
+                closing = loop.run_in_executor(self._executor, opening.result().close)
+                closing.add_done_callback(_return_client)
+
+            if in_flight.done():
+                _close_stream()
+            else:
+                in_flight.add_done_callback(_close_stream)
+
+    async def close(self) -> None:
+        for client in self._clients:
+            try:
+                client.close()
+            except Exception:
+                pass
+        self._clients.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def get_clickhouse(request: Request) -> ClickHousePool:
+    """FastAPI dependency returning the app-scoped ClickHouse pool."""
+    return request.app.state.clickhouse
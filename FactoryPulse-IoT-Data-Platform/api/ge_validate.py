@@ -3,14 +3,32 @@ Great Expectations Data Quality Validation Script
 ===================================================
 Validates FactoryPulse telemetry data in ClickHouse using programmatic GX API.
 
-Run:  python ge_validate.py
+All expectations are compiled into a single aggregate query (one
+``countIf`` per rule), so a run costs one scan of ``raw_telemetry`` however
+many rules there are.  With ``--incremental`` the scan is limited to the
+partitions that received new parts since the previous run.
+
+Every run is appended to ``dq_results`` (created by ``clickhouse/init.sql``),
+so trends can be queried, e.g.::
+
+    SELECT toDate(run_at) AS day, expectation, sum(observed)
+    FROM dq_results GROUP BY day, expectation ORDER BY day
+
+Run:  python ge_validate.py [--incremental]
 """
 
+import argparse
 import os
 import sys
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
 
 import clickhouse_connect
 
+TABLE = "raw_telemetry"
+RESULTS_TABLE = "dq_results"
+
 
 def get_ch_client():
     return clickhouse_connect.get_client(
@@ -24,60 +42,61 @@ def get_ch_client():
 
 # Define expectations as simple rule checks — avoids heavy GX dependency issues
 # while still demonstrating data quality validation concepts.
+# ``violation`` is a row predicate counted with countIf; ``aggregate`` is a
+# whole-table expression for rules that are not per-row.
 EXPECTATIONS = [
     {
         "name": "device_id_not_null",
-        "query": "SELECT count() FROM raw_telemetry WHERE device_id IS NULL OR device_id = ''",
+        "violation": "device_id IS NULL OR device_id = ''",
         "expect": 0,
         "description": "All telemetry rows must have a device_id",
     },
     {
         "name": "timestamp_not_null",
-        "query": "SELECT count() FROM raw_telemetry WHERE timestamp IS NULL",
+        "violation": "timestamp IS NULL",
         "expect": 0,
         "description": "All telemetry rows must have a timestamp",
     },
     {
         "name": "temperature_in_range",
-        "query": "SELECT count() FROM raw_telemetry WHERE temperature < -40 OR temperature > 300",
+        "violation": "temperature < -40 OR temperature > 300",
         "expect": 0,
         "description": "Temperature must be between -40 and 300 °C",
     },
     {
         "name": "vibration_non_negative",
-        "query": "SELECT count() FROM raw_telemetry WHERE vibration < 0",
+        "violation": "vibration < 0",
         "expect": 0,
         "description": "Vibration must be non-negative",
     },
     {
         "name": "pressure_in_range",
-        "query": "SELECT count() FROM raw_telemetry WHERE pressure < 0 OR pressure > 1000",
+        "violation": "pressure < 0 OR pressure > 1000",
         "expect": 0,
         "description": "Pressure must be between 0 and 1000 bar",
     },
     {
         "name": "humidity_in_range",
-        "query": "SELECT count() FROM raw_telemetry WHERE humidity < 0 OR humidity > 100",
+        "violation": "humidity < 0 OR humidity > 100",
         "expect": 0,
         "description": "Humidity must be between 0 and 100 %",
     },
     {
         "name": "power_usage_non_negative",
-        "query": "SELECT count() FROM raw_telemetry WHERE power_usage < 0",
+        "violation": "power_usage < 0",
         "expect": 0,
         "description": "Power usage must be non-negative",
     },
     {
         "name": "rpm_non_negative",
-        "query": "SELECT count() FROM raw_telemetry WHERE rpm < 0",
+        "violation": "rpm < 0",
         "expect": 0,
         "description": "RPM must be non-negative",
     },
     {
         "name": "known_device_types",
-        "query": (
-            "SELECT count() FROM raw_telemetry "
-            "WHERE device_type NOT IN "
+        "violation": (
+            "device_type NOT IN "
             "('CNC_Mill','Hydraulic_Press','Conveyor','Compressor','Welding_Robot')"
         ),
         "expect": 0,
@@ -85,73 +104,186 @@ EXPECTATIONS = [
     },
     {
         "name": "data_freshness",
-        "query": (
-            "SELECT if(max(timestamp) > now() - INTERVAL 1 HOUR, 0, 1) FROM raw_telemetry"
-        ),
+        "aggregate": "if(max(timestamp) > now() - INTERVAL 1 HOUR, 0, 1)",
         "expect": 0,
         "description": "Most recent data must be less than 1 hour old",
     },
 ]
 
+# ---------------------------------------------------------------------------
+# Query compilation
+# ---------------------------------------------------------------------------
+def _expression(exp: dict) -> str:
+    if "aggregate" in exp:
+        return exp["aggregate"]
+    return f"countIf({exp['violation']})"
 
-def main():
-    print("=" * 60)
-    print("  FactoryPulse — Data Quality Validation")
-    print("=" * 60)
 
-    client = get_ch_client()
+def compile_query(expectations: list[dict], partitions: Optional[list[str]] = None) -> str:
+    """One SELECT returning ``count()`` followed by one column per expectation."""
+    columns = ["count()"] + [_expression(exp) for exp in expectations]
+    query = f"SELECT {', '.join(columns)} FROM {TABLE}"
+    if partitions is not None:
+        query += " WHERE _partition_id IN {partitions:Array(String)}"
+    return query
 
-    # Check if table has data
-    count_result = client.query("SELECT count() FROM raw_telemetry")
-    total_rows = count_result.result_rows[0][0]
-    print(f"\n  Total rows in raw_telemetry: {total_rows}\n")
 
-    if total_rows == 0:
-        print("  No data to validate. Exiting.")
-        return
+# ---------------------------------------------------------------------------
+# Validation
+# ---------------------------------------------------------------------------
+def new_partitions(client) -> list[str]:
+    """Partitions with parts written since the last recorded validation run.
 
-    passed = 0
-    failed = 0
-    results = []
+    ``modification_time`` has whole-second precision while ``run_at`` keeps
+    milliseconds, so the comparison is against the start of the run's second:
+    a part landing in that same second is validated again rather than missed.
+    """
+    result = client.query(
+        "SELECT DISTINCT partition_id FROM system.parts "
+        "WHERE database = currentDatabase() AND table = {table:String} AND active "
+        "AND modification_time >= "
+        f"(SELECT toStartOfSecond(max(run_at)) FROM {RESULTS_TABLE} "
+        "WHERE table_name = {table:String}) "
+        "ORDER BY partition_id",
+        parameters={"table": TABLE},
+    )
+    return [row[0] for row in result.result_rows]
 
-    for exp in EXPECTATIONS:
-        try:
-            result = client.query(exp["query"])
-            violations = result.result_rows[0][0]
-            success = violations == exp["expect"]
 
-            status = "PASS" if success else "FAIL"
-            icon = "✓" if success else "✗"
+def _outcome(exp: dict, observed: int, rows_checked: int) -> dict:
+    success = observed == exp["expect"]
+    return {
+        "name": exp["name"],
+        "status": "PASS" if success else "FAIL",
+        "violations": observed,
+        "expected": exp["expect"],
+        "rows_checked": rows_checked,
+        "description": exp["description"],
+    }
 
-            if success:
-                passed += 1
-            else:
-                failed += 1
 
-            results.append(
-                {
-                    "name": exp["name"],
-                    "status": status,
-                    "violations": violations,
-                    "description": exp["description"],
-                }
-            )
+def validate(
+    client, expectations: list[dict] = EXPECTATIONS, partitions: Optional[list[str]] = None
+) -> tuple[int, list[dict]]:
+    """Evaluate all expectations in one scan; return ``(rows_checked, results)``.
 
-            print(f"  {icon} [{status}] {exp['name']}: {exp['description']}")
-            if not success:
-                print(f"           → Found {violations} violations (expected {exp['expect']})")
+    If the combined query fails, each expectation is retried on its own so a
+    single broken rule is reported as ERROR without hiding the others.
+    """
+    parameters = {"partitions": partitions} if partitions is not None else None
+    try:
+        row = client.query(compile_query(expectations, partitions), parameters=parameters)
+        row = row.result_rows[0]
+        rows_checked = row[0]
+        return rows_checked, [
+            _outcome(exp, observed, rows_checked) for exp, observed in zip(expectations, row[1:])
+        ]
+    except Exception as exc:
+        print(f"  Combined query failed ({exc}); evaluating expectations one by one")
 
+    rows_checked = 0
+    results = []
+    for exp in expectations:
+        try:
+            row = client.query(compile_query([exp], partitions), parameters=parameters)
+            rows_checked, observed = row.result_rows[0]
+            results.append(_outcome(exp, observed, rows_checked))
         except Exception as exc:
-            failed += 1
             results.append(
                 {
                     "name": exp["name"],
                     "status": "ERROR",
                     "violations": -1,
+                    "expected": exp["expect"],
+                    "rows_checked": 0,
                     "description": str(exc),
                 }
             )
-            print(f"  ✗ [ERROR] {exp['name']}: {exc}")
+    return rows_checked, results
+
+
+def store_results(
+    client, results: list[dict], run_at: datetime, partitions: Optional[list[str]]
+) -> None:
+    """Append one row per expectation to ``dq_results``."""
+    run_id = str(uuid.uuid4())
+    rows = [
+        [
+            run_id,
+            run_at,
+            TABLE,
+            r["name"],
+            r["description"],
+            r["status"],
+            r["violations"],
+            r["expected"],
+            r["rows_checked"],
+            partitions or [],
+        ]
+        for r in results
+    ]
+    client.insert(
+        RESULTS_TABLE,
+        rows,
+        column_names=[
+            "run_id", "run_at", "table_name", "expectation", "description",
+            "status", "observed", "expected", "rows_checked", "partitions",
+        ],
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate raw_telemetry data quality")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only validate partitions written since the previous run",
+    )
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("  FactoryPulse — Data Quality Validation")
+    print("=" * 60)
+
+    client = get_ch_client()
+
+    # Captured before listing partitions so parts landing mid-run are picked
+    # up by the next incremental run.
+    run_at = datetime.now(timezone.utc)
+
+    partitions = None
+    if args.incremental:
+        partitions = new_partitions(client)
+        print(f"\n  Partitions changed since last run: {', '.join(partitions) or 'none'}")
+        if not partitions:
+            print("  No new data to validate. Exiting.")
+            return
+
+    rows_checked, results = validate(client, EXPECTATIONS, partitions)
+    print(f"\n  Rows checked in {TABLE}: {rows_checked}\n")
+
+    if rows_checked == 0:
+        print("  No data to validate. Exiting.")
+        return
+
+    passed = 0
+    failed = 0
+    for r in results:
+        success = r["status"] == "PASS"
+        if success:
+            passed += 1
+        else:
+            failed += 1
+
+        if r["status"] == "ERROR":
+            print(f"  ✗ [ERROR] {r['name']}: {r['description']}")
+            continue
+        icon = "✓" if success else "✗"
+        print(f"  {icon} [{r['status']}] {r['name']}: {r['description']}")
+        if not success:
+            print(f"           → Found {r['violations']} violations (expected {r['expected']})")
+
+    store_results(client, results, run_at, partitions)
 
     print(f"\n{'=' * 60}")
     print(f"  Results: {passed} passed, {failed} failed, {len(EXPECTATIONS)} total")
@@ -0,0 +1,172 @@
+"""
+FactoryPulse API Load Test
+==========================
+Closed-loop load generator that mimics concurrent dashboard refreshes against
+the ClickHouse-backed endpoints and reports p50/p95/p99 latency per endpoint.
+
+Each virtual client loops over a mix of telemetry, alert and device requests
+for ``--duration`` seconds.  Results can be saved as JSON and compared with an
+earlier run, e.g. before and after a change to the ClickHouse access layer:
+
+    python load_test.py --clients 200 --output before.json      # old build
+    python load_test.py --clients 200 --output after.json --compare before.json
+
+Run against the local stack (``make up``, ClickHouse container included) with
+``make api-loadtest`` or directly from the host with ``--base-url``.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from collections import defaultdict
+
+import httpx
+
+ENDPOINTS = [
+    ("telemetry.list", "/api/v1/telemetry/?limit=500&hours_back=24"),
+    ("telemetry.stats", "/api/v1/telemetry/stats?hours_back=24"),
+    ("alerts.active", "/api/v1/alerts/active?limit=100"),
+    ("alerts.list", "/api/v1/alerts/?limit=100"),
+    ("devices.health", "/api/v1/devices/{device_id}"),
+]
+
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def _discover_devices(client: httpx.AsyncClient) -> list:
+    try:
+        response = await client.get("/api/v1/devices/")
+        response.raise_for_status()
+        devices = [d["device_id"] for d in response.json()]
+    except Exception:
+        devices = []
+    return devices or ["DEV-0001"]
+
+
+async def _virtual_client(
+    client: httpx.AsyncClient,
+    devices: list,
+    deadline: float,
+    latencies: dict,
+    errors: dict,
+) -> None:
+    rng = random.Random()
+    while time.perf_counter() < deadline:
+        name, path = rng.choice(ENDPOINTS)
+        url = path.format(device_id=rng.choice(devices))
+        started = time.perf_counter()
+        try:
+            response = await client.get(url)
+            ok = response.status_code < 500
+        except httpx.HTTPError:
+            ok = False
+        elapsed = time.perf_counter() - started
+        if ok:
+            latencies[name].append(elapsed)
+        else:
+            errors[name] += 1
+
+
+def _summarise(latencies: dict, errors: dict, duration: float) -> dict:
+    summary = {}
+    all_latencies = []
+    for name in sorted(set(latencies) | set(errors)):
+        values = sorted(latencies.get(name, []))
+        all_latencies.extend(values)
+        summary[name] = {
+            "requests": len(values),
+            "errors": errors.get(name, 0),
+            "p50_ms": round(_percentile(values, 50) * 1000, 2),
+            "p95_ms": round(_percentile(values, 95) * 1000, 2),
+            "p99_ms": round(_percentile(values, 99) * 1000, 2),
+            "mean_ms": round(statistics.fmean(values) * 1000, 2) if values else 0.0,
+        }
+    all_latencies.sort()
+    summary["overall"] = {
+        "requests": len(all_latencies),
+        "errors": sum(errors.values()),
+        "rps": round(len(all_latencies) / duration, 1),
+        "p50_ms": round(_percentile(all_latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(all_latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(all_latencies, 99) * 1000, 2),
+    }
+    return summary
+
+
+async def run_load_test(base_url: str, clients: int, duration: float) -> dict:
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        devices = await _discover_devices(client)
+        latencies: dict = defaultdict(list)
+        errors: dict = defaultdict(int)
+        deadline = time.perf_counter() + duration
+        started = time.perf_counter()
+        await asyncio.gather(
+            *(
+                _virtual_client(client, devices, deadline, latencies, errors)
+                for _ in range(clients)
+            )
+        )
+        elapsed = time.perf_counter() - started
+    return {
+        "base_url": base_url,
+        "clients": clients,
+        "duration_s": round(elapsed, 1),
+        "endpoints": _summarise(latencies, errors, elapsed),
+    }
+
+
+def _print_report(result: dict, baseline: dict = None) -> None:
+    print(f"\n{result['clients']} clients, {result['duration_s']}s against {result['base_url']}")
+    header = f"{'endpoint':<18}{'reqs':>8}{'errs':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'p50 Δ':>10}{'p99 Δ':>10}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in result["endpoints"].items():
+        line = (
+            f"{name:<18}{stats['requests']:>8}{stats['errors']:>6}"
+            f"{stats['p50_ms']:>10.1f}{stats['p95_ms']:>10.1f}{stats['p99_ms']:>10.1f}"
+        )
+        before = (baseline or {}).get("endpoints", {}).get(name)
+        if before:
+            line += (
+                f"{stats['p50_ms'] - before['p50_ms']:>+10.1f}"
+                f"{stats['p99_ms'] - before['p99_ms']:>+10.1f}"
+            )
+        print(line)
+    print(f"\nthroughput: {result['endpoints']['overall']['rps']} req/s")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--compare", help="JSON result of an earlier run to diff against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run_load_test(args.base_url, args.clients, args.duration))
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as fh:
+            baseline = json.load(fh)
+    _print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,22 @@
 """FactoryPulse API — Unified serving layer for IoT data platform."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from prometheus_fastapi_instrumentator import Instrumentator
 
+from clickhouse_pool import ClickHousePool
 from routers import alerts, devices, features, search, telemetry
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Own the shared ClickHouse pool for the lifetime of the app."""
+    app.state.clickhouse = ClickHousePool.from_env()
+    yield
+    await app.state.clickhouse.close()
+
+
 app = FastAPI(
     title="FactoryPulse API",
     description=(
@@ -12,6 +24,7 @@ app = FastAPI(
         "Redis/Feast (features), Qdrant (vectors), and MLflow."
     ),
     version="1.0.0",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -24,7 +37,8 @@ app.include_router(search.router)
 app.include_router(features.router)
 
 # ---------------------------------------------------------------------------
-# Prometheus instrumentation
+# Prometheus instrumentation (ClickHouse query metrics from clickhouse_pool
+# share the default registry and are exposed on the same /metrics endpoint)
 # ---------------------------------------------------------------------------
 Instrumentator().instrument(app).expose(app)
 
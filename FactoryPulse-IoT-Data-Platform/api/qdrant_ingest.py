@@ -4,29 +4,66 @@ Qdrant Vector Ingestion Script
 Embeds incident reports and maintenance manual entries using
 sentence-transformers/all-MiniLM-L6-v2, then upserts them into Qdrant.
 
+Ingestion is incremental and content-addressed:
+
+* Point ids are ``uuid5(source:doc_id)``, so a document always lands on the
+  same point and re-runs never overwrite unrelated points.
+* Each point stores a ``content_hash`` of the embedded text, its metadata and
+  the model name; documents whose hash is unchanged are not re-embedded.
+* Points whose manual or incident no longer exists are deleted, as are legacy
+  points written with positional ids (they carry no ``content_hash``).
+* Incidents are read from ClickHouse only from the newest ``ingested_at``
+  already present in Qdrant onwards.
+
+Run time therefore follows the volume of changes, not the corpus size.  Set
+``QDRANT_INGEST_FULL=1`` to ignore the incident watermark (unchanged
+documents are still skipped).
+
 Run:  python qdrant_ingest.py
 """
 
+import hashlib
 import json
 import os
 import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Optional
 
-import boto3
 import clickhouse_connect
 from qdrant_client import QdrantClient
-from qdrant_client.models import Distance, PointStruct, VectorParams
-from sentence_transformers import SentenceTransformer
+from qdrant_client.models import (
+    Distance,
+    FieldCondition,
+    Filter,
+    FilterSelector,
+    IsEmptyCondition,
+    MatchValue,
+    OrderBy,
+    PayloadField,
+    PayloadSchemaType,
+    PointIdsList,
+    PointStruct,
+    VectorParams,
+)
 
 QDRANT_HOST = os.environ.get("QDRANT_HOST", "qdrant")
 QDRANT_PORT = int(os.environ.get("QDRANT_PORT", 6333))
 COLLECTION = os.environ.get("QDRANT_COLLECTION", "incidents")
 VECTOR_SIZE = 384  # all-MiniLM-L6-v2 output dimension
+EMBEDDING_MODEL = os.environ.get("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+FULL_RESCAN = os.environ.get("QDRANT_INGEST_FULL", "0") == "1"
 
 MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "http://minio:9000")
 MINIO_BUCKET = os.environ.get("MINIO_BUCKET_RAW", "factory-raw")
 
+BATCH_SIZE = 100
+POINT_ID_NAMESPACE = uuid.UUID("3b8f0c7e-2d4a-4f6b-9c1e-5a7d8e9f0b12")
+
 
 def get_s3_client():
+    import boto3
+
     return boto3.client(
         "s3",
         endpoint_url=MINIO_ENDPOINT,
@@ -46,105 +83,225 @@ def get_ch_client():
     )
 
 
-def load_manuals_from_minio() -> list[dict]:
-    """Load incident_manuals.json from MinIO."""
+# ---------------------------------------------------------------------------
+# Identity
+# ---------------------------------------------------------------------------
+def point_id(source: str, doc_id: str) -> str:
+    """Deterministic Qdrant point id for a source document."""
+    return str(uuid.uuid5(POINT_ID_NAMESPACE, f"{source}:{doc_id}"))
+
+
+def content_hash(doc: dict, model_name: str = EMBEDDING_MODEL) -> str:
+    """Hash of everything that ends up in the point: text, metadata and model."""
+    material = json.dumps(
+        [
+            model_name,
+            doc["text"],
+            doc.get("title"),
+            doc.get("device_id"),
+            doc.get("severity"),
+        ],
+        ensure_ascii=False,
+    )
+    return hashlib.sha256(material.encode()).hexdigest()
+
+
+# ---------------------------------------------------------------------------
+# Sources
+# ---------------------------------------------------------------------------
+def load_manuals_from_minio() -> Optional[list[dict]]:
+    """Load incident_manuals.json from MinIO (None when it cannot be read)."""
     try:
         s3 = get_s3_client()
         obj = s3.get_object(Bucket=MINIO_BUCKET, Key="reference/incident_manuals.json")
         data = json.loads(obj["Body"].read())
         print(f"  Loaded {len(data)} manual entries from MinIO")
-        return data
     except Exception as exc:
         print(f"  Warning: Could not load manuals from MinIO: {exc}")
-        return []
+        return None
+
+    manuals = []
+    for m in data:
+        manuals.append(
+            {
+                "id": str(m.get("id") or ""),
+                "title": m.get("title", ""),
+                "text": m.get("content", m.get("text", "")),
+                "device_id": m.get("device_id"),
+                "severity": m.get("severity"),
+                "source": "manual",
+            }
+        )
+    return assign_manual_ids(manuals)
+
 
+def assign_manual_ids(manuals: list[dict]) -> list[dict]:
+    """Give manuals without an id a stable source key.
 
-def load_incidents_from_clickhouse() -> list[dict]:
-    """Load incident reports from ClickHouse."""
+    The title is the key, so editing a manual updates its point in place.
+    Titles shared by several manuals get a hash of the text appended, so
+    same-titled manuals do not overwrite each other.
+    """
+    titles = Counter(m["title"] for m in manuals if not m["id"])
+    for m in manuals:
+        if m["id"]:
+            continue
+        m["id"] = m["title"]
+        if titles[m["title"]] > 1:
+            m["id"] += "#" + hashlib.sha256(m["text"].encode()).hexdigest()[:16]
+    return manuals
+
+
+def load_incident_ids_from_clickhouse() -> Optional[set]:
+    """All incident ids currently in ClickHouse (None when unreachable)."""
     try:
         client = get_ch_client()
-        result = client.query(
-            "SELECT incident_id, device_id, title, description, resolution, severity "
-            "FROM raw_incidents ORDER BY created_at DESC LIMIT 1000"
+        result = client.query("SELECT DISTINCT incident_id FROM raw_incidents")
+        return {row[0] for row in result.result_rows}
+    except Exception as exc:
+        print(f"  Warning: Could not list incidents in ClickHouse: {exc}")
+        return None
+
+
+def load_incidents_from_clickhouse(since: Optional[float] = None) -> list[dict]:
+    """Load incident reports ingested at or after ``since`` (epoch seconds)."""
+    try:
+        client = get_ch_client()
+        query = (
+            "SELECT incident_id, device_id, title, description, resolution, severity, "
+            "toFloat64(ingested_at) "
+            "FROM raw_incidents"
         )
-        incidents = []
+        params = {}
+        if since is not None:
+            # Inclusive bound: rows sharing the watermark millisecond are re-read
+            # and then skipped by their content hash.
+            query += " WHERE ingested_at >= fromUnixTimestamp64Milli({since_ms:Int64})"
+            params["since_ms"] = int(since * 1000)
+        # ReplacingMergeTree-style semantics: the latest row per incident wins.
+        query += " ORDER BY ingested_at"
+        result = client.query(query, parameters=params)
+
+        latest = {}
         for row in result.result_rows:
             text = f"{row[2]}. {row[3]}"
             if row[4]:
                 text += f" Resolution: {row[4]}"
-            incidents.append(
-                {
-                    "id": row[0],
-                    "device_id": row[1],
-                    "title": row[2],
-                    "text": text,
-                    "severity": row[5],
-                    "source": "incident",
-                }
-            )
-        print(f"  Loaded {len(incidents)} incidents from ClickHouse")
+            latest[row[0]] = {
+                "id": row[0],
+                "device_id": row[1],
+                "title": row[2],
+                "text": text,
+                "severity": row[5],
+                "source": "incident",
+                "ingested_at": row[6],
+            }
+        incidents = list(latest.values())
+        print(f"  Loaded {len(incidents)} new or updated incidents from ClickHouse")
         return incidents
     except Exception as exc:
         print(f"  Warning: Could not load incidents from ClickHouse: {exc}")
         return []
 
 
-def main():
-    print("=== Qdrant Vector Ingestion ===")
+# ---------------------------------------------------------------------------
+# Qdrant state
+# ---------------------------------------------------------------------------
+def ensure_collection(client: QdrantClient) -> None:
+    """Create the collection and the payload indexes the ingest relies on."""
+    if not client.collection_exists(COLLECTION):
+        client.create_collection(
+            collection_name=COLLECTION,
+            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+        )
+        print(f"  Created Qdrant collection: {COLLECTION}")
+    client.create_payload_index(COLLECTION, "source", PayloadSchemaType.KEYWORD)
+    client.create_payload_index(COLLECTION, "ingested_at", PayloadSchemaType.FLOAT)
 
-    # Load data
-    manuals = load_manuals_from_minio()
-    incidents = load_incidents_from_clickhouse()
 
-    # Prepare documents
-    documents = []
-    for m in manuals:
-        documents.append(
-            {
-                "id": m.get("id", str(uuid.uuid4())),
-                "title": m.get("title", ""),
-                "text": m.get("content", m.get("text", "")),
-                "device_id": m.get("device_id"),
-                "severity": m.get("severity"),
-                "source": "manual",
-            }
-        )
-    documents.extend(incidents)
+def delete_legacy_points(client: QdrantClient) -> None:
+    """Remove points from the positional-id era (no ``content_hash`` payload)."""
+    client.delete(
+        collection_name=COLLECTION,
+        points_selector=FilterSelector(
+            filter=Filter(must=[IsEmptyCondition(is_empty=PayloadField(key="content_hash"))])
+        ),
+    )
+
 
-    if not documents:
-        print("No documents to ingest. Exiting.")
-        return
+def _source_filter(source: str) -> Filter:
+    return Filter(must=[FieldCondition(key="source", match=MatchValue(value=source))])
 
-    # Load embedding model
-    model_name = os.environ.get(
-        "EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+
+def incident_watermark(client: QdrantClient) -> Optional[float]:
+    """Newest ``ingested_at`` among incident points, or None if there are none."""
+    points, _ = client.scroll(
+        collection_name=COLLECTION,
+        scroll_filter=_source_filter("incident"),
+        order_by=OrderBy(key="ingested_at", direction="desc"),
+        limit=1,
+        with_payload=["ingested_at"],
+        with_vectors=False,
     )
-    print(f"  Loading embedding model: {model_name}")
-    model = SentenceTransformer(model_name)
+    if not points or points[0].payload.get("ingested_at") is None:
+        return None
+    return float(points[0].payload["ingested_at"])
 
-    # Embed all texts
-    texts = [d["text"] for d in documents]
-    print(f"  Embedding {len(texts)} documents...")
-    embeddings = model.encode(texts, show_progress_bar=True)
 
-    # Connect to Qdrant
-    client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+def existing_hashes(client: QdrantClient, ids: list[str]) -> dict[str, str]:
+    """Map point id -> stored content hash for the ids that already exist."""
+    hashes = {}
+    for i in range(0, len(ids), BATCH_SIZE):
+        for point in client.retrieve(
+            collection_name=COLLECTION,
+            ids=ids[i : i + BATCH_SIZE],
+            with_payload=["content_hash"],
+            with_vectors=False,
+        ):
+            hashes[str(point.id)] = point.payload.get("content_hash")
+    return hashes
 
-    # Create collection if it doesn't exist
-    collections = [c.name for c in client.get_collections().collections]
-    if COLLECTION not in collections:
-        client.create_collection(
+
+def delete_missing(client: QdrantClient, source: str, keep_ids: set) -> int:
+    """Delete ``source`` points whose document is not in ``keep_ids``."""
+    stale = []
+    offset = None
+    while True:
+        points, offset = client.scroll(
             collection_name=COLLECTION,
-            vectors_config=VectorParams(size=VECTOR_SIZE, distance=Distance.COSINE),
+            scroll_filter=_source_filter(source),
+            limit=1000,
+            offset=offset,
+            with_payload=False,
+            with_vectors=False,
         )
-        print(f"  Created Qdrant collection: {COLLECTION}")
+        stale.extend(str(p.id) for p in points if str(p.id) not in keep_ids)
+        if offset is None:
+            break
+    for i in range(0, len(stale), BATCH_SIZE):
+        client.delete(
+            collection_name=COLLECTION,
+            points_selector=PointIdsList(points=stale[i : i + BATCH_SIZE]),
+        )
+    return len(stale)
+
+
+def changed_documents(client: QdrantClient, documents: list[dict]) -> list[dict]:
+    """Documents that are new or whose content hash differs from Qdrant's."""
+    for doc in documents:
+        doc["point_id"] = point_id(doc["source"], doc["id"])
+        doc["content_hash"] = content_hash(doc)
+    stored = existing_hashes(client, [d["point_id"] for d in documents])
+    return [d for d in documents if stored.get(d["point_id"]) != d["content_hash"]]
+
 
-    # Upsert points
-    points = []
-    for i, (doc, embedding) in enumerate(zip(documents, embeddings)):
-        points.append(
+def upsert_documents(client: QdrantClient, model, documents: list[dict]) -> None:
+    for i in range(0, len(documents), BATCH_SIZE):
+        batch = documents[i : i + BATCH_SIZE]
+        embeddings = model.encode([d["text"] for d in batch])
+        points = [
             PointStruct(
-                id=i,
+                id=doc["point_id"],
                 vector=embedding.tolist(),
                 payload={
                     "doc_id": doc["id"],
@@ -153,18 +310,67 @@ def main():
                     "device_id": doc.get("device_id"),
                     "severity": doc.get("severity"),
                     "source": doc["source"],
+                    "content_hash": doc["content_hash"],
+                    "ingested_at": doc.get("ingested_at"),
+                    "embedded_at": datetime.now(timezone.utc).isoformat(),
                 },
             )
+            for doc, embedding in zip(batch, embeddings)
+        ]
+        client.upsert(collection_name=COLLECTION, points=points)
+        print(f"  Upserted batch {i // BATCH_SIZE + 1} ({len(batch)} points)")
+
+
+def load_embedding_model():
+    from sentence_transformers import SentenceTransformer
+
+    print(f"  Loading embedding model: {EMBEDDING_MODEL}")
+    return SentenceTransformer(EMBEDDING_MODEL)
+
+
+def run_ingest(client: QdrantClient, model_loader=load_embedding_model) -> dict:
+    """Reconcile Qdrant with MinIO manuals and ClickHouse incidents."""
+    ensure_collection(client)
+    delete_legacy_points(client)
+
+    deleted = 0
+
+    manuals = load_manuals_from_minio()
+    if manuals is not None:
+        deleted += delete_missing(
+            client, "manual", {point_id("manual", m["id"]) for m in manuals}
         )
+    else:
+        manuals = []  # unknown state: keep existing manual points
 
-    # Batch upsert
-    BATCH_SIZE = 100
-    for i in range(0, len(points), BATCH_SIZE):
-        batch = points[i : i + BATCH_SIZE]
-        client.upsert(collection_name=COLLECTION, points=batch)
-        print(f"  Upserted batch {i // BATCH_SIZE + 1} ({len(batch)} points)")
+    incident_ids = load_incident_ids_from_clickhouse()
+    if incident_ids is not None:
+        deleted += delete_missing(
+            client, "incident", {point_id("incident", i) for i in incident_ids}
+        )
+
+    since = None if FULL_RESCAN else incident_watermark(client)
+    incidents = load_incidents_from_clickhouse(since)
+
+    changed = changed_documents(client, manuals + incidents)
+    skipped = len(manuals) + len(incidents) - len(changed)
+    print(f"  {len(changed)} changed, {skipped} unchanged, {deleted} deleted")
+
+    if changed:
+        # Loading the model is the slowest step of a no-op run; skip it entirely.
+        upsert_documents(client, model_loader(), changed)
+
+    return {"embedded": len(changed), "skipped": skipped, "deleted": deleted}
 
-    print(f"\nDone. {len(points)} vectors ingested into Qdrant collection '{COLLECTION}'.")
+
+def main():
+    print("=== Qdrant Vector Ingestion ===")
+    client = QdrantClient(host=QDRANT_HOST, port=QDRANT_PORT)
+    stats = run_ingest(client)
+    print(
+        f"\nDone. {stats['embedded']} embedded, {stats['skipped']} unchanged, "
+        f"{stats['deleted']} deleted in Qdrant collection '{COLLECTION}'."
+    )
 
 
 if __name__ == "__main__":
@@ -1,27 +1,15 @@
 """Alerts router — query and manage alerts from ClickHouse."""
 
-import os
 from typing import Optional
 
-import clickhouse_connect
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 
+from clickhouse_pool import ClickHousePool, QueryTimeoutError, get_clickhouse
 from models import Alert
 
 router = APIRouter(prefix="/api/v1/alerts", tags=["alerts"])
 
 
-def _get_ch_client():
-    """Create a ClickHouse client from environment variables."""
-    return clickhouse_connect.get_client(
-        host=os.environ.get("CLICKHOUSE_HOST", "clickhouse"),
-        port=int(os.environ.get("CLICKHOUSE_PORT", 8123)),
-        username=os.environ.get("CLICKHOUSE_USER", "default"),
-        password=os.environ.get("CLICKHOUSE_PASSWORD", "clickhouse"),
-        database=os.environ.get("CLICKHOUSE_DB", "factory_pulse"),
-    )
-
-
 def _rows_to_alerts(rows: list) -> list[Alert]:
     """Convert ClickHouse result rows to Alert models."""
     alerts = []
@@ -54,11 +42,10 @@ async def get_alerts(
     device_id: Optional[str] = Query(None, description="Filter by device ID"),
     severity: Optional[str] = Query(None, description="Filter by severity (critical, warning, info)"),
     limit: int = Query(100, ge=1, le=10000, description="Max rows returned"),
+    ch: ClickHousePool = Depends(get_clickhouse),
 ):
     """Query alerts from ClickHouse."""
     try:
-        client = _get_ch_client()
-
         query = f"SELECT {_ALERT_COLUMNS} FROM raw_alerts WHERE 1=1"
         params: dict = {"limit": limit}
 
@@ -72,9 +59,11 @@ async def get_alerts(
 
         query += " ORDER BY timestamp DESC LIMIT {limit:UInt32}"
 
-        result = client.query(query, parameters=params)
+        result = await ch.query(query, params, name="alerts.list")
         return _rows_to_alerts(result.result_rows)
 
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
 
@@ -82,11 +71,10 @@ async def get_alerts(
 @router.get("/active", response_model=list[Alert])
 async def get_active_alerts(
     limit: int = Query(100, ge=1, le=10000, description="Max rows returned"),
+    ch: ClickHousePool = Depends(get_clickhouse),
 ):
     """Get unresolved (active) alerts."""
     try:
-        client = _get_ch_client()
-
         query = f"""
             SELECT {_ALERT_COLUMNS}
             FROM raw_alerts
@@ -95,15 +83,17 @@ async def get_active_alerts(
             LIMIT {{limit:UInt32}}
         """
 
-        result = client.query(query, parameters={"limit": limit})
+        result = await ch.query(query, {"limit": limit}, name="alerts.active")
         return _rows_to_alerts(result.result_rows)
 
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
 
 
 @router.post("/{alert_id}/resolve")
-async def resolve_alert(alert_id: str):
+async def resolve_alert(alert_id: str, ch: ClickHousePool = Depends(get_clickhouse)):
     """Mark an alert as resolved.
 
     ClickHouse MergeTree tables are append-only, so we insert a new row with
@@ -112,26 +102,39 @@ async def resolve_alert(alert_id: str):
     ALTER UPDATE mutation for simplicity.
     """
     try:
-        client = _get_ch_client()
-
         # Verify alert exists
-        check = client.query(
+        check = await ch.query(
             "SELECT count() FROM raw_alerts WHERE alert_id = {alert_id:String}",
-            parameters={"alert_id": alert_id},
+            {"alert_id": alert_id},
+            name="alerts.exists",
         )
         if check.result_rows[0][0] == 0:
             raise HTTPException(status_code=404, detail=f"Alert {alert_id} not found")
 
+        # Mutations bypass materialized views, so take the alert out of the
+        # device_open_alerts rollup explicitly (no-op if already resolved).
+        await ch.command(
+            "INSERT INTO device_open_alerts "
+            "SELECT device_id, -toInt64(count()) FROM raw_alerts "
+            "WHERE alert_id = {alert_id:String} AND resolved = 0 "
+            "GROUP BY device_id",
+            {"alert_id": alert_id},
+            name="alerts.resolve_rollup",
+        )
+
         # Mutate the resolved flag
-        client.command(
+        await ch.command(
             "ALTER TABLE raw_alerts UPDATE resolved = 1 "
             "WHERE alert_id = {alert_id:String}",
-            parameters={"alert_id": alert_id},
+            {"alert_id": alert_id},
+            name="alerts.resolve",
         )
 
         return {"alert_id": alert_id, "status": "resolved"}
 
     except HTTPException:
         raise
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse mutation failed: {exc}")
@@ -1,33 +1,47 @@
 """Devices router — device metadata, health scores, and maintenance recommendations."""
 
-import os
-
-import clickhouse_connect
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
+from clickhouse_pool import ClickHousePool, QueryTimeoutError, get_clickhouse
 from models import Device, DeviceHealth, MaintenanceRecommendation
 
 router = APIRouter(prefix="/api/v1/devices", tags=["devices"])
 
+# Health inputs for one device over the last 24 hours (whole-hour buckets),
+# read from the insert-time rollups.  Always returns exactly one row.
+HEALTH_INPUTS_SQL = """
+    SELECT
+        if(sum(reading_count) = 0, NULL, round(avgMerge(avg_temperature), 2)) AS avg_temperature,
+        if(sum(reading_count) = 0, NULL, round(avgMerge(avg_vibration), 4))   AS avg_vibration,
+        if(sum(reading_count) = 0, NULL, round(avgMerge(avg_pressure), 2))    AS avg_pressure,
+        if(sum(reading_count) = 0, NULL, max(last_reading))                   AS last_reading,
+        (
+            SELECT greatest(sum(open_alerts), 0)
+            FROM device_open_alerts
+            WHERE device_id = {device_id:String}
+        ) AS alert_count
+    FROM device_health_hourly
+    WHERE device_id = {device_id:String}
+      AND hour >= toStartOfHour(now() - INTERVAL 24 HOUR)
+"""
+
 
-def _get_ch_client():
-    """Create a ClickHouse client from environment variables."""
-    return clickhouse_connect.get_client(
-        host=os.environ.get("CLICKHOUSE_HOST", "clickhouse"),
-        port=int(os.environ.get("CLICKHOUSE_PORT", 8123)),
-        username=os.environ.get("CLICKHOUSE_USER", "default"),
-        password=os.environ.get("CLICKHOUSE_PASSWORD", "clickhouse"),
-        database=os.environ.get("CLICKHOUSE_DB", "factory_pulse"),
-    )
+def _health_score(avg_temp, avg_vib, alert_count) -> float:
+    """Simple health score heuristic: start at 100, deduct for anomalies."""
+    score = 100.0
+    if avg_temp is not None and (avg_temp > 150 or avg_temp < -10):
+        score -= 30
+    if avg_vib is not None and avg_vib > 0.8:
+        score -= 20
+    score -= min(alert_count * 5, 40)  # cap alert penalty at 40
+    return round(max(score, 0.0), 1)
 
 
 @router.get("/", response_model=list[Device])
-async def list_devices():
+async def list_devices(ch: ClickHousePool = Depends(get_clickhouse)):
     """List all devices from ClickHouse."""
     try:
-        client = _get_ch_client()
-
-        result = client.query(
+        result = await ch.query(
             """
             SELECT
                 device_id, device_type, manufacturer, model,
@@ -38,7 +52,8 @@ async def list_devices():
                 status
             FROM raw_devices FINAL
             ORDER BY device_id
-            """
+            """,
+            name="devices.list",
         )
 
         devices = []
@@ -59,91 +74,27 @@ async def list_devices():
             )
         return devices
 
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
 
 
 @router.get("/{device_id}", response_model=DeviceHealth)
-async def get_device_health(device_id: str):
+async def get_device_health(device_id: str, ch: ClickHousePool = Depends(get_clickhouse)):
     """Device detail with computed health score.
 
-    The health score is derived from recent telemetry and alert counts.
-    If a dbt-built ``fct_device_health`` table exists it will be used;
-    otherwise the score is computed on the fly from raw tables.
+    The health score is derived from the last 24 hours of telemetry and the
+    open alert count, both read from the rollups that ClickHouse materialized
+    views keep current at insert time (see ``clickhouse/init.sql``).
     """
     try:
-        client = _get_ch_client()
-
-        # Try the dbt fact table first; fall back to a live calculation.
-        try:
-            fct_result = client.query(
-                """
-                SELECT
-                    device_id, health_score,
-                    avg_temperature, avg_vibration, avg_pressure,
-                    alert_count, last_reading
-                FROM fct_device_health
-                WHERE device_id = {device_id:String}
-                """,
-                parameters={"device_id": device_id},
-            )
-            if fct_result.result_rows:
-                row = fct_result.result_rows[0]
-                return DeviceHealth(
-                    device_id=row[0],
-                    health_score=row[1],
-                    avg_temperature=row[2],
-                    avg_vibration=row[3],
-                    avg_pressure=row[4],
-                    alert_count=row[5],
-                    last_reading=row[6],
-                )
-        except Exception:
-            pass  # table may not exist yet; compute live
-
-        # Live calculation from raw tables
-        telemetry = client.query(
-            """
-            SELECT
-                round(avg(temperature), 2),
-                round(avg(vibration), 4),
-                round(avg(pressure), 2),
-                max(timestamp)
-            FROM raw_telemetry
-            WHERE device_id = {device_id:String}
-              AND timestamp >= now() - INTERVAL 24 HOUR
-            """,
-            parameters={"device_id": device_id},
-        )
-
-        alert_count_result = client.query(
-            """
-            SELECT count()
-            FROM raw_alerts
-            WHERE device_id = {device_id:String}
-              AND resolved = 0
-            """,
-            parameters={"device_id": device_id},
-        )
-
-        avg_temp = telemetry.result_rows[0][0] if telemetry.result_rows else None
-        avg_vib = telemetry.result_rows[0][1] if telemetry.result_rows else None
-        avg_pres = telemetry.result_rows[0][2] if telemetry.result_rows else None
-        last_reading = telemetry.result_rows[0][3] if telemetry.result_rows else None
-        alert_count = alert_count_result.result_rows[0][0] if alert_count_result.result_rows else 0
-
-        # Simple health score heuristic: start at 100, deduct for anomalies
-        score = 100.0
-        if avg_temp is not None and (avg_temp > 150 or avg_temp < -10):
-            score -= 30
-        if avg_vib is not None and avg_vib > 0.8:
-            score -= 20
-        score -= min(alert_count * 5, 40)  # cap alert penalty at 40
-        score = max(score, 0.0)
+        result = await ch.query(HEALTH_INPUTS_SQL, {"device_id": device_id}, name="devices.health")
+        avg_temp, avg_vib, avg_pres, last_reading, alert_count = result.result_rows[0]
 
         return DeviceHealth(
             device_id=device_id,
-            health_score=round(score, 1),
+            health_score=_health_score(avg_temp, avg_vib, alert_count),
             avg_temperature=avg_temp,
             avg_vibration=avg_vib,
             avg_pressure=avg_pres,
@@ -151,72 +102,53 @@ async def get_device_health(device_id: str):
             last_reading=last_reading,
         )
 
-    except HTTPException:
-        raise
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
 
 
 @router.get("/{device_id}/maintenance", response_model=MaintenanceRecommendation)
-async def get_maintenance_recommendation(device_id: str):
+async def get_maintenance_recommendation(
+    device_id: str,
+    ch: ClickHousePool = Depends(get_clickhouse),
+):
     """Maintenance recommendation for a device.
 
-    Uses ``fct_maintenance_recommendations`` if available, otherwise computes
-    a recommendation from the raw device metadata and recent telemetry.
+    Combines the device's maintenance schedule from ``raw_devices`` with the
+    same health rollups as :func:`get_device_health`, in a single query.
     """
     try:
-        client = _get_ch_client()
-
-        # Try dbt fact table first
-        try:
-            fct = client.query(
-                """
-                SELECT
-                    device_id, device_type,
-                    days_since_maintenance, maintenance_interval_days,
-                    overdue, health_score, recommendation, priority
-                FROM fct_maintenance_recommendations
-                WHERE device_id = {device_id:String}
-                """,
-                parameters={"device_id": device_id},
-            )
-            if fct.result_rows:
-                row = fct.result_rows[0]
-                if row[5] is not None:
-                    return MaintenanceRecommendation(
-                        device_id=row[0],
-                        device_type=row[1],
-                        days_since_maintenance=row[2],
-                        maintenance_interval_days=row[3],
-                        overdue=bool(row[4]),
-                        health_score=row[5],
-                        recommendation=row[6],
-                        priority=row[7],
-                    )
-        except Exception:
-            pass  # table may not exist yet
-
-        # Live calculation from raw_devices
-        dev = client.query(
+        dev = await ch.query(
             """
             SELECT
-                device_id, device_type,
-                maintenance_interval_days,
-                last_maintenance_date,
-                dateDiff('day', last_maintenance_date, today()) AS days_since
-            FROM raw_devices FINAL
-            WHERE device_id = {device_id:String}
+                d.device_type,
+                d.maintenance_interval_days,
+                dateDiff('day', d.last_maintenance_date, today()) AS days_since,
+                h.avg_temperature,
+                h.avg_vibration,
+                h.alert_count
+            FROM
+            (
+                SELECT device_type, maintenance_interval_days, last_maintenance_date
+                FROM raw_devices FINAL
+                WHERE device_id = {device_id:String}
+            ) AS d
+            CROSS JOIN
+            (
+            """
+            + HEALTH_INPUTS_SQL
+            + """
+            ) AS h
             """,
-            parameters={"device_id": device_id},
+            {"device_id": device_id},
+            name="devices.maintenance",
         )
 
         if not dev.result_rows:
             raise HTTPException(status_code=404, detail=f"Device {device_id} not found")
 
-        row = dev.result_rows[0]
-        device_type = row[1]
-        interval_days = row[2]
-        days_since = row[4]
+        device_type, interval_days, days_since, avg_temp, avg_vib, alert_count = dev.result_rows[0]
         overdue = days_since > interval_days
 
         # Build recommendation text
@@ -240,20 +172,20 @@ async def get_maintenance_recommendation(device_id: str):
             )
             priority = "low"
 
-        live_health = await get_device_health(device_id)
-
         return MaintenanceRecommendation(
             device_id=device_id,
             device_type=device_type,
             days_since_maintenance=days_since,
             maintenance_interval_days=interval_days,
             overdue=overdue,
-            health_score=live_health.health_score,
+            health_score=_health_score(avg_temp, avg_vib, alert_count),
             recommendation=recommendation,
             priority=priority,
         )
 
     except HTTPException:
         raise
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
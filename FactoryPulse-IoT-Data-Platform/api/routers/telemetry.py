@@ -1,44 +1,182 @@
-"""Telemetry router — query raw telemetry readings from ClickHouse."""
+"""Telemetry router — query raw telemetry readings from ClickHouse.
 
-import os
+``GET /api/v1/telemetry/`` negotiates its representation from the ``Accept``
+header.  Plain JSON (the default) builds a ``TelemetryReading`` per row and is
+capped at ``JSON_MAX_LIMIT`` rows.  ``application/x-ndjson`` and
+``application/vnd.apache.arrow.stream`` stream ClickHouse's own
+``JSONEachRow`` / ``ArrowStream`` output straight to the client, ordered by the
+table's sort key ``(device_id, timestamp)`` and paginated with an opaque
+cursor returned in the ``X-Next-Cursor`` header.
+"""
+
+import base64
+import json
 from typing import Optional
 
-import clickhouse_connect
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
 
+from clickhouse_pool import ClickHousePool, QueryTimeoutError, get_clickhouse
 from models import TelemetryReading
 
 router = APIRouter(prefix="/api/v1/telemetry", tags=["telemetry"])
 
+JSON_MAX_LIMIT = 10_000
+STREAM_MAX_LIMIT = 5_000_000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+# Media type -> (ClickHouse output format, format settings)
+STREAM_FORMATS = {
+    NDJSON_MEDIA_TYPE: ("JSONEachRow", {"date_time_output_format": "iso"}),
+    ARROW_MEDIA_TYPE: ("ArrowStream", {"output_format_arrow_string_as_string": 1}),
+}
+
+_TELEMETRY_COLUMNS = """
+    event_id, device_id, device_type, location,
+    timestamp, temperature, vibration, pressure,
+    humidity, power_usage, rpm, error_code
+"""
+
+
+def _negotiate_stream_format(accept: Optional[str]) -> Optional[str]:
+    """Return the streaming media type requested by ``Accept``, if any."""
+    for part in (accept or "").split(","):
+        media_type = part.split(";")[0].strip().lower()
+        if media_type in STREAM_FORMATS:
+            return media_type
+    return None
+
+
+def _encode_cursor(device_id: str, timestamp: str) -> str:
+    raw = json.dumps([device_id, timestamp]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> tuple[str, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        device_id, timestamp = json.loads(base64.urlsafe_b64decode(padded))
+        return str(device_id), str(timestamp)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid telemetry cursor")
+
+
+async def _stream_telemetry(
+    ch: ClickHousePool,
+    media_type: str,
+    device_id: Optional[str],
+    limit: int,
+    hours_back: int,
+    cursor: Optional[str],
+) -> StreamingResponse:
+    """Stream one cursor page of telemetry in ClickHouse's native output format.
 
-def _get_ch_client():
-    """Create a ClickHouse client from environment variables."""
-    return clickhouse_connect.get_client(
-        host=os.environ.get("CLICKHOUSE_HOST", "clickhouse"),
-        port=int(os.environ.get("CLICKHOUSE_PORT", 8123)),
-        username=os.environ.get("CLICKHOUSE_USER", "default"),
-        password=os.environ.get("CLICKHOUSE_PASSWORD", "clickhouse"),
-        database=os.environ.get("CLICKHOUSE_DB", "factory_pulse"),
+    A cheap boundary lookup finds the ``(device_id, timestamp)`` key of the
+    page's last row first, so the next cursor can be sent as a header before
+    the body starts streaming.  Rows sharing the boundary key stay on the same
+    page, which keeps pages disjoint without a tie-breaker column.
+    """
+    where = "timestamp >= now() - INTERVAL {hours_back:UInt32} HOUR"
+    params: dict = {"hours_back": hours_back}
+
+    if device_id:
+        where += " AND device_id = {device_id:String}"
+        params["device_id"] = device_id
+
+    if cursor:
+        params["after_device"], params["after_ts"] = _decode_cursor(cursor)
+        where += (
+            " AND (device_id > {after_device:String}"
+            " OR (device_id = {after_device:String}"
+            " AND timestamp > {after_ts:DateTime64(3)}))"
+        )
+
+    boundary = await ch.query(
+        f"""
+            SELECT device_id, toString(timestamp)
+            FROM raw_telemetry
+            WHERE {where}
+            ORDER BY device_id, timestamp
+            LIMIT 1 OFFSET {{offset:UInt64}}
+        """,
+        {**params, "offset": limit - 1},
+        name="telemetry.stream_boundary",
     )
 
+    headers = {}
+    if boundary.result_rows:
+        params["until_device"], params["until_ts"] = boundary.result_rows[0]
+        where += (
+            " AND (device_id < {until_device:String}"
+            " OR (device_id = {until_device:String}"
+            " AND timestamp <= {until_ts:DateTime64(3)}))"
+        )
+        headers["X-Next-Cursor"] = _encode_cursor(*boundary.result_rows[0])
+
+    fmt, settings = STREAM_FORMATS[media_type]
+    body = ch.raw_stream(
+        f"""
+            SELECT {_TELEMETRY_COLUMNS}
+            FROM raw_telemetry
+            WHERE {where}
+            ORDER BY device_id, timestamp
+        """,
+        params,
+        fmt=fmt,
+        settings=settings,
+        name="telemetry.stream",
+    )
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
-@router.get("/", response_model=list[TelemetryReading])
+
+@router.get(
+    "/",
+    response_model=list[TelemetryReading],
+    responses={
+        200: {
+            "content": {NDJSON_MEDIA_TYPE: {}, ARROW_MEDIA_TYPE: {}},
+            "description": "JSON list, or a streamed NDJSON / Arrow IPC page.",
+        }
+    },
+)
 async def get_telemetry(
     device_id: Optional[str] = Query(None, description="Filter by device ID"),
-    limit: int = Query(100, ge=1, le=10000, description="Max rows returned"),
+    limit: int = Query(
+        100,
+        ge=1,
+        le=STREAM_MAX_LIMIT,
+        description=f"Max rows returned ({JSON_MAX_LIMIT} for JSON, {STREAM_MAX_LIMIT} streamed)",
+    ),
     hours_back: int = Query(24, ge=1, le=720, description="Look-back window in hours"),
+    cursor: Optional[str] = Query(
+        None, description="X-Next-Cursor of the previous page (streamed formats only)"
+    ),
+    accept: Optional[str] = Header(None),
+    ch: ClickHousePool = Depends(get_clickhouse),
 ):
     """Query recent telemetry readings from ClickHouse."""
+    media_type = _negotiate_stream_format(accept)
+    if media_type is None and limit > JSON_MAX_LIMIT:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"limit above {JSON_MAX_LIMIT} requires Accept: "
+                f"{NDJSON_MEDIA_TYPE} or {ARROW_MEDIA_TYPE}"
+            ),
+        )
+    if media_type is None and cursor:
+        raise HTTPException(status_code=422, detail="cursor requires a streamed format")
+
     try:
-        client = _get_ch_client()
+        if media_type is not None:
+            return await _stream_telemetry(ch, media_type, device_id, limit, hours_back, cursor)
 
-        query = """
-            SELECT
-                event_id, device_id, device_type, location,
-                timestamp, temperature, vibration, pressure,
-                humidity, power_usage, rpm, error_code
+        query = f"""
+            SELECT {_TELEMETRY_COLUMNS}
             FROM raw_telemetry
-            WHERE timestamp >= now() - INTERVAL {hours_back:UInt32} HOUR
+            WHERE timestamp >= now() - INTERVAL {{hours_back:UInt32}} HOUR
         """
         params: dict = {"hours_back": hours_back, "limit": limit}
 
@@ -48,7 +186,7 @@ async def get_telemetry(
 
         query += " ORDER BY timestamp DESC LIMIT {limit:UInt32}"
 
-        result = client.query(query, parameters=params)
+        result = await ch.query(query, params, name="telemetry.list")
 
         readings = []
         for row in result.result_rows:
@@ -70,6 +208,10 @@ async def get_telemetry(
             )
         return readings
 
+    except HTTPException:
+        raise
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
 
@@ -77,11 +219,10 @@ async def get_telemetry(
 @router.get("/stats")
 async def get_telemetry_stats(
     hours_back: int = Query(24, ge=1, le=720, description="Look-back window in hours"),
+    ch: ClickHousePool = Depends(get_clickhouse),
 ):
     """Aggregated telemetry stats grouped by device_id for the last N hours."""
     try:
-        client = _get_ch_client()
-
         query = """
             SELECT
                 device_id,
@@ -102,7 +243,7 @@ async def get_telemetry_stats(
             ORDER BY device_id
         """
 
-        result = client.query(query, parameters={"hours_back": hours_back})
+        result = await ch.query(query, {"hours_back": hours_back}, name="telemetry.stats")
         columns = [col[0] for col in result.column_names] if hasattr(result, "column_names") else [
             "device_id", "reading_count",
             "avg_temperature", "min_temperature", "max_temperature",
@@ -117,5 +258,7 @@ async def get_telemetry_stats(
 
         return {"hours_back": hours_back, "devices": stats}
 
+    except QueryTimeoutError as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except Exception as exc:
         raise HTTPException(status_code=500, detail=f"ClickHouse query failed: {exc}")
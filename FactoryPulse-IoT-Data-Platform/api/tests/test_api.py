@@ -16,7 +16,9 @@ def client():
     with mock.patch("clickhouse_connect.get_client", return_value=mock_ch):
         from main import app
 
-        yield TestClient(app)
+        # Entering the client runs the lifespan, which creates the ClickHouse pool.
+        with TestClient(app) as test_client:
+            yield test_client
 
 
 def test_root(client):
@@ -64,3 +66,93 @@ def test_metrics_endpoint(client):
     response = client.get("/metrics")
     assert response.status_code == 200
     assert "http_request" in response.text or "HELP" in response.text
+
+
+def test_metrics_include_clickhouse_queries(client):
+    """Query-level ClickHouse metrics share the Instrumentator's /metrics endpoint."""
+    client.get("/api/v1/alerts?limit=5")
+    response = client.get("/metrics")
+    assert 'clickhouse_query_duration_seconds_count{query="alerts.list",status="ok"}' in response.text
+
+
+def test_telemetry_json_limit_is_capped(client):
+    response = client.get("/api/v1/telemetry/?limit=50000")
+    assert response.status_code == 422
+
+
+def test_telemetry_ndjson_streams_clickhouse_output(client):
+    import io
+
+    import clickhouse_connect
+
+    ch = clickhouse_connect.get_client()
+    ch.raw_stream.return_value = io.BytesIO(b'{"device_id":"DEV-0001"}\n')
+    response = client.get(
+        "/api/v1/telemetry/?limit=50000",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert response.text == '{"device_id":"DEV-0001"}\n'
+    assert ch.raw_stream.call_args.kwargs["fmt"] == "JSONEachRow"
+    # Fewer rows than the limit remain, so there is no next page.
+    assert "x-next-cursor" not in response.headers
+
+
+def test_telemetry_cursor_round_trip(client):
+    import io
+
+    import clickhouse_connect
+    from routers.telemetry import _encode_cursor
+
+    ch = clickhouse_connect.get_client()
+    ch.query.return_value.result_rows = [("DEV-0002", "2024-01-01 00:00:00.000")]
+    ch.raw_stream.return_value = io.BytesIO(b"ARROW")
+    cursor = _encode_cursor("DEV-0001", "2023-12-31 23:59:59.000")
+    response = client.get(
+        f"/api/v1/telemetry/?limit=10&cursor={cursor}",
+        headers={"Accept": "application/vnd.apache.arrow.stream"},
+    )
+    assert response.status_code == 200
+    assert response.content == b"ARROW"
+    assert response.headers["x-next-cursor"] == _encode_cursor(
+        "DEV-0002", "2024-01-01 00:00:00.000"
+    )
+    params = ch.raw_stream.call_args.kwargs["parameters"]
+    assert params["after_device"] == "DEV-0001"
+    assert params["until_device"] == "DEV-0002"
+
+
+def test_telemetry_rejects_bad_cursor(client):
+    response = client.get(
+        "/api/v1/telemetry/?cursor=not-a-cursor",
+        headers={"Accept": "application/x-ndjson"},
+    )
+    assert response.status_code == 400
+
+
+def test_device_health_is_one_rollup_lookup(client):
+    import clickhouse_connect
+
+    ch = clickhouse_connect.get_client()
+    ch.query.reset_mock()
+    ch.query.return_value.result_rows = [(160.0, 0.5, 150.0, "2024-01-01 00:00:00", 2)]
+    response = client.get("/api/v1/devices/DEV-0001")
+    assert response.status_code == 200
+    assert response.json()["health_score"] == 60.0  # -30 temperature, -10 alerts
+    assert ch.query.call_count == 1
+    assert "device_health_hourly" in ch.query.call_args.args[0]
+
+
+def test_maintenance_reuses_health_rollups(client):
+    import clickhouse_connect
+
+    ch = clickhouse_connect.get_client()
+    ch.query.reset_mock()
+    ch.query.return_value.result_rows = [("CNC_Mill", 30, 40, 70.0, 0.9, 0)]
+    response = client.get("/api/v1/devices/DEV-0001/maintenance")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["overdue"] is True
+    assert data["health_score"] == 80.0
+    assert ch.query.call_count == 1
@@ -0,0 +1,165 @@
+"""Tests for the shared ClickHouse pool."""
+
+import asyncio
+import threading
+import time
+import unittest.mock as mock
+
+import pytest
+
+from clickhouse_pool import ClickHousePool, QueryTimeoutError
+
+
+class _SlowClient:
+    """Blocking stand-in for a clickhouse_connect client."""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def query(self, sql, parameters=None, settings=None):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        return mock.MagicMock(result_rows=[(1,)])
+
+    def close(self):
+        pass
+
+
+def test_clients_are_reused_across_queries():
+    factory = mock.MagicMock(side_effect=lambda: _SlowClient())
+
+    async def run():
+        pool = ClickHousePool(size=4, client_factory=factory)
+        for _ in range(10):
+            await pool.query("SELECT 1", name="test.reuse")
+        await pool.close()
+
+    asyncio.run(run())
+    assert factory.call_count == 1
+
+
+def test_concurrency_is_bounded_by_pool_size():
+    shared = _SlowClient(delay=0.02)
+    created = []
+
+    def factory():
+        created.append(1)
+        return shared
+
+    async def run():
+        pool = ClickHousePool(size=3, client_factory=factory)
+        await asyncio.gather(*(pool.query("SELECT 1", name="test.bound") for _ in range(12)))
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(created) == 3
+    assert shared.max_active <= 3
+
+
+def test_event_loop_stays_responsive_during_queries():
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def run():
+        pool = ClickHousePool(size=2, client_factory=lambda: _SlowClient(delay=0.1))
+        await asyncio.gather(pool.query("SELECT 1", name="test.loop"), ticker())
+        await pool.close()
+
+    asyncio.run(run())
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.1
+
+
+def test_timeout_raises_and_client_returns_after_completion():
+    client = _SlowClient(delay=0.2)
+
+    async def run():
+        pool = ClickHousePool(size=1, query_timeout=0.05, client_factory=lambda: client)
+        with pytest.raises(QueryTimeoutError):
+            await pool.query("SELECT sleep(1)", name="test.timeout")
+        # The only client is still busy; the next query waits for it instead of sharing it.
+        client.delay = 0.0
+        result = await pool.query("SELECT 1", name="test.timeout", timeout=1.0)
+        await pool.close()
+        return result
+
+    result = asyncio.run(run())
+    assert result.result_rows == [(1,)]
+    assert client.max_active == 1
+
+
+class _SlowStream:
+    def __init__(self, client, delay: float):
+        self._client = client
+        self._delay = delay
+
+    def read(self, size):
+        with self._client.using():
+            time.sleep(self._delay)
+            return b"x" * 10
+
+    def close(self):
+        with self._client.using():
+            self._client.closed += 1
+
+
+class _StreamingClient(_SlowClient):
+    def __init__(self, delay: float):
+        super().__init__(delay)
+        self.closed = 0
+
+    def using(self):
+        client = self
+
+        class _Use:
+            def __enter__(self):
+                with client._lock:
+                    client.active += 1
+                    client.max_active = max(client.max_active, client.active)
+
+            def __exit__(self, *exc):
+                with client._lock:
+                    client.active -= 1
+
+        return _Use()
+
+    def raw_stream(self, sql, parameters=None, settings=None, fmt=None):
+        return _SlowStream(self, self.delay)
+
+
+def test_cancelled_stream_returns_client_after_in_flight_read():
+    anyio = pytest.importorskip("anyio")
+    client = _StreamingClient(delay=0.2)
+
+    async def run():
+        pool = ClickHousePool(size=1, client_factory=lambda: client)
+
+        async def consume():
+            async for _ in pool.raw_stream("SELECT 1", fmt="CSV", name="test.stream"):
+                pass
+
+        with anyio.move_on_after(0.3):
+            await consume()
+        # The read in flight at cancellation still owns the client; the next
+        # query waits for it and the close instead of sharing the client.
+        client.delay = 0.0
+        with anyio.fail_after(5):  # a leaked slot would block here forever
+            result = await pool.query("SELECT 1", name="test.stream", timeout=1.0)
+        await pool.close()
+        return result
+
+    result = anyio.run(run)
+    assert result.result_rows == [(1,)]
+    assert client.closed == 1
+    assert client.max_active == 1
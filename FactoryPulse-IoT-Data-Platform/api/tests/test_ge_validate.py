@@ -0,0 +1,45 @@
+"""Tests for the single-pass data quality validation."""
+
+import unittest.mock as mock
+
+import ge_validate
+
+
+def _client(*rows):
+    client = mock.MagicMock()
+    client.query.side_effect = [
+        r if isinstance(r, Exception) else mock.MagicMock(result_rows=[r]) for r in rows
+    ]
+    return client
+
+
+def test_compile_query_is_one_scan():
+    query = ge_validate.compile_query(ge_validate.EXPECTATIONS)
+    assert query.count("FROM raw_telemetry") == 1
+    assert query.count("countIf(") == len(ge_validate.EXPECTATIONS) - 1
+    assert "WHERE" not in query
+
+    scoped = ge_validate.compile_query(ge_validate.EXPECTATIONS, ["20250101"])
+    assert scoped.endswith("WHERE _partition_id IN {partitions:Array(String)}")
+
+
+def test_validate_maps_columns_to_expectations():
+    expectations = ge_validate.EXPECTATIONS[:3]
+    client = _client((100, 0, 0, 7))
+
+    rows_checked, results = ge_validate.validate(client, expectations, ["20250101"])
+
+    assert client.query.call_count == 1
+    assert client.query.call_args.kwargs["parameters"] == {"partitions": ["20250101"]}
+    assert rows_checked == 100
+    assert [r["status"] for r in results] == ["PASS", "PASS", "FAIL"]
+    assert results[2]["violations"] == 7
+
+
+def test_validate_isolates_broken_expectation():
+    expectations = ge_validate.EXPECTATIONS[:2]
+    client = _client(RuntimeError("bad column"), (10, 0), RuntimeError("bad column"))
+
+    _, results = ge_validate.validate(client, expectations)
+
+    assert [r["status"] for r in results] == ["PASS", "ERROR"]
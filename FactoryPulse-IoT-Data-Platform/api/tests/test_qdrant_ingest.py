@@ -0,0 +1,134 @@
+"""Tests for the incremental Qdrant ingestion."""
+
+import numpy as np
+import pytest
+from qdrant_client import QdrantClient
+from qdrant_client.models import PointStruct, VectorParams, Distance
+
+import qdrant_ingest
+
+
+class _FakeModel:
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, texts):
+        self.encoded.extend(texts)
+        return np.ones((len(texts), qdrant_ingest.VECTOR_SIZE), dtype=np.float32)
+
+
+def _manual(title, text):
+    return {"id": title, "title": title, "text": text, "device_id": None,
+            "severity": None, "source": "manual"}
+
+
+def _incident(incident_id, text, ingested_at):
+    return {"id": incident_id, "title": incident_id, "text": text, "device_id": "DEV-0001",
+            "severity": "HIGH", "source": "incident", "ingested_at": ingested_at}
+
+
+@pytest.fixture
+def sources(monkeypatch):
+    state = {"manuals": [], "incidents": [], "since": []}
+
+    def load_incidents(since=None):
+        state["since"].append(since)
+        return [dict(i) for i in state["incidents"]
+                if since is None or i["ingested_at"] >= since]
+
+    monkeypatch.setattr(qdrant_ingest, "load_manuals_from_minio",
+                        lambda: [dict(m) for m in state["manuals"]])
+    monkeypatch.setattr(qdrant_ingest, "load_incident_ids_from_clickhouse",
+                        lambda: {i["id"] for i in state["incidents"]})
+    monkeypatch.setattr(qdrant_ingest, "load_incidents_from_clickhouse", load_incidents)
+    return state
+
+
+def _ingest(client):
+    model = _FakeModel()
+    stats = qdrant_ingest.run_ingest(client, model_loader=lambda: model)
+    return stats, model
+
+
+def test_rerun_without_changes_embeds_nothing(sources):
+    client = QdrantClient(":memory:")
+    sources["manuals"] = [_manual("Overheating", "Check coolant."), _manual("Noise", "Tighten.")]
+    sources["incidents"] = [_incident("INC-1", "Spindle jam", 100.0)]
+
+    stats, model = _ingest(client)
+    assert stats == {"embedded": 3, "skipped": 0, "deleted": 0}
+    assert len(model.encoded) == 3
+
+    stats, model = _ingest(client)
+    assert stats["embedded"] == 0
+    assert model.encoded == []
+    assert sources["since"][-1] == 100.0
+    assert client.count(qdrant_ingest.COLLECTION).count == 3
+
+
+def test_changed_and_removed_documents(sources):
+    client = QdrantClient(":memory:")
+    sources["manuals"] = [_manual("Overheating", "Check coolant."), _manual("Noise", "Tighten.")]
+    sources["incidents"] = [_incident("INC-1", "Spindle jam", 100.0),
+                            _incident("INC-2", "Belt slip", 101.0)]
+    _ingest(client)
+
+    sources["manuals"] = [_manual("Overheating", "Check coolant and fan.")]
+    sources["incidents"] = [_incident("INC-2", "Belt slip", 101.0),
+                            _incident("INC-3", "Sensor drift", 102.0)]
+    stats, model = _ingest(client)
+
+    assert stats["deleted"] == 2  # manual "Noise" and incident INC-1
+    assert sorted(model.encoded) == ["Check coolant and fan.", "Sensor drift"]
+    payloads = {
+        p.payload["doc_id"]: p.payload
+        for p in client.scroll(qdrant_ingest.COLLECTION, limit=10)[0]
+    }
+    assert set(payloads) == {"Overheating", "INC-2", "INC-3"}
+    assert payloads["Overheating"]["text"] == "Check coolant and fan."
+
+
+def test_point_ids_are_stable_and_legacy_points_are_removed(sources):
+    client = QdrantClient(":memory:")
+    client.create_collection(
+        qdrant_ingest.COLLECTION,
+        vectors_config=VectorParams(size=qdrant_ingest.VECTOR_SIZE, distance=Distance.COSINE),
+    )
+    client.upsert(qdrant_ingest.COLLECTION, points=[
+        PointStruct(id=0, vector=[1.0] * qdrant_ingest.VECTOR_SIZE,
+                    payload={"title": "old", "source": "manual"}),
+    ])
+    sources["manuals"] = [_manual("Overheating", "Check coolant.")]
+    _ingest(client)
+
+    points = client.scroll(qdrant_ingest.COLLECTION, limit=10)[0]
+    assert [str(p.id) for p in points] == [qdrant_ingest.point_id("manual", "Overheating")]
+    assert qdrant_ingest.point_id("manual", "Overheating") != qdrant_ingest.point_id(
+        "incident", "Overheating"
+    )
+
+
+def test_unreadable_manuals_are_kept(sources, monkeypatch):
+    client = QdrantClient(":memory:")
+    sources["manuals"] = [_manual("Overheating", "Check coolant.")]
+    _ingest(client)
+
+    monkeypatch.setattr(qdrant_ingest, "load_manuals_from_minio", lambda: None)
+    stats, _ = _ingest(client)
+    assert stats["deleted"] == 0
+    assert client.count(qdrant_ingest.COLLECTION).count == 1
+
+
+def test_manuals_sharing_a_title_get_separate_points(sources):
+    client = QdrantClient(":memory:")
+    manuals = [dict(_manual("Overheating", text), id="") for text in ("Check coolant.", "Check fans.")]
+    manuals.append(dict(_manual("Noise", "Tighten."), id=""))
+    sources["manuals"] = qdrant_ingest.assign_manual_ids(manuals)
+
+    stats, _ = _ingest(client)
+    assert stats["embedded"] == 3
+    assert client.count(qdrant_ingest.COLLECTION).count == 3
+    # A unique title stays the key, so edits still update that point in place.
+    assert manuals[2]["id"] == "Noise"
+    stats, _ = _ingest(client)
+    assert stats == {"embedded": 0, "skipped": 3, "deleted": 0}
@@ -3,7 +3,9 @@
 
 CREATE DATABASE IF NOT EXISTS factory_pulse;
 
--- Raw telemetry landing table (populated by Spark batch from Iceberg or directly)
+-- Raw telemetry landing table (populated by Spark batch from Iceberg or directly).
+-- The deduplication window lets the streaming job tag each insert block with an
+-- insert_deduplication_token so replayed micro-batches are dropped.
 CREATE TABLE IF NOT EXISTS factory_pulse.raw_telemetry
 (
     event_id       String,
@@ -22,7 +24,8 @@ CREATE TABLE IF NOT EXISTS factory_pulse.raw_telemetry
 )
 ENGINE = MergeTree()
 PARTITION BY toYYYYMMDD(timestamp)
-ORDER BY (device_id, timestamp);
+ORDER BY (device_id, timestamp)
+SETTINGS non_replicated_deduplication_window = 1000;
 
 -- Device reference / dimension table
 CREATE TABLE IF NOT EXISTS factory_pulse.raw_devices
@@ -76,3 +79,79 @@ CREATE TABLE IF NOT EXISTS factory_pulse.raw_incidents
 )
 ENGINE = MergeTree()
 ORDER BY (device_id, created_at);
+
+-- Data quality results (one row per expectation per api/ge_validate.py run)
+CREATE TABLE IF NOT EXISTS factory_pulse.dq_results
+(
+    run_id        String,
+    run_at        DateTime64(3),
+    table_name    String,
+    expectation   String,
+    description   String,
+    status        LowCardinality(String),
+    observed      Int64,
+    expected      Int64,
+    rows_checked  UInt64,
+    partitions    Array(String)
+)
+ENGINE = MergeTree()
+PARTITION BY toYYYYMM(run_at)
+ORDER BY (table_name, expectation, run_at);
+
+-- ---------------------------------------------------------------------------
+-- Device health rollups, maintained at insert time by materialized views so
+-- the API answers device health with a point lookup.  dbt's on-run-end hook
+-- (macros/reconcile_device_rollups.sql) backfills and reconciles them.
+-- ---------------------------------------------------------------------------
+
+-- Hourly telemetry aggregates per device (kept a little longer than the 24h
+-- health window so late data and reconciliation have room).
+CREATE TABLE IF NOT EXISTS factory_pulse.device_health_hourly
+(
+    device_id        String,
+    hour             DateTime,
+    avg_temperature  AggregateFunction(avg, Float64),
+    avg_vibration    AggregateFunction(avg, Float64),
+    avg_pressure     AggregateFunction(avg, Float64),
+    reading_count    SimpleAggregateFunction(sum, UInt64),
+    last_reading     SimpleAggregateFunction(max, DateTime64(3))
+)
+ENGINE = AggregatingMergeTree()
+PARTITION BY toYYYYMMDD(hour)
+ORDER BY (device_id, hour)
+TTL hour + INTERVAL 8 DAY;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS factory_pulse.device_health_hourly_mv
+TO factory_pulse.device_health_hourly
+AS
+SELECT
+    device_id,
+    toStartOfHour(timestamp)  AS hour,
+    avgState(temperature)     AS avg_temperature,
+    avgState(vibration)       AS avg_vibration,
+    avgState(pressure)        AS avg_pressure,
+    count()                   AS reading_count,
+    max(timestamp)            AS last_reading
+FROM factory_pulse.raw_telemetry
+GROUP BY device_id, hour;
+
+-- Open (unresolved) alert count per device.  Inserts add +1 per open alert;
+-- resolving or deleting alerts happens through mutations, which views do not
+-- see, so those code paths insert the matching negative rows themselves.
+CREATE TABLE IF NOT EXISTS factory_pulse.device_open_alerts
+(
+    device_id    String,
+    open_alerts  Int64
+)
+ENGINE = SummingMergeTree(open_alerts)
+ORDER BY device_id;
+
+CREATE MATERIALIZED VIEW IF NOT EXISTS factory_pulse.device_open_alerts_mv
+TO factory_pulse.device_open_alerts
+AS
+SELECT
+    device_id,
+    toInt64(count()) AS open_alerts
+FROM factory_pulse.raw_alerts
+WHERE resolved = 0
+GROUP BY device_id;
@@ -0,0 +1,53 @@
+{#
+    Batch reconciliation for the insert-time device rollups defined in
+    clickhouse/init.sql, run as an on-run-end hook after every dbt run.
+
+    * device_health_hourly is backfilled from raw_telemetry when it is empty,
+      e.g. when the views were added to a stack that already held data.
+    * device_open_alerts is corrected by inserting the difference between the
+      live open-alert count and the rolled-up sum, which absorbs any mutation
+      that was not compensated for at write time.
+#}
+{% macro reconcile_device_rollups() %}
+    {%- set health = adapter.get_relation(database=target.database, schema=target.schema, identifier='device_health_hourly') -%}
+    {%- set alerts = adapter.get_relation(database=target.database, schema=target.schema, identifier='device_open_alerts') -%}
+
+    {%- if execute and health is not none -%}
+        {%- set rows = run_query('select count() from ' ~ health) -%}
+        {%- if rows.columns[0].values()[0] == 0 -%}
+            {%- do run_query(
+                'insert into ' ~ health ~ '
+                select
+                    device_id,
+                    toStartOfHour(timestamp) as hour,
+                    avgState(temperature),
+                    avgState(vibration),
+                    avgState(pressure),
+                    count(),
+                    max(timestamp)
+                from ' ~ target.schema ~ '.raw_telemetry
+                where timestamp >= now() - interval 8 day
+                group by device_id, hour'
+            ) -%}
+        {%- endif -%}
+    {%- endif -%}
+
+    {%- if alerts is not none %}
+        insert into {{ alerts }}
+        select device_id, sum(actual) - sum(rolled_up) as open_alerts
+        from (
+            select device_id, toInt64(count()) as actual, toInt64(0) as rolled_up
+            from {{ target.schema }}.raw_alerts
+            where resolved = 0
+            group by device_id
+            union all
+            select device_id, toInt64(0) as actual, sum(open_alerts) as rolled_up
+            from {{ alerts }}
+            group by device_id
+        )
+        group by device_id
+        having open_alerts != 0
+    {%- else %}
+        select 1
+    {%- endif %}
+{% endmacro %}
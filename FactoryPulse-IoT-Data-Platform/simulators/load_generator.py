@@ -0,0 +1,533 @@
+"""
+FactoryPulse Telemetry Load Generator
+======================================
+High-throughput companion to ``sensor_stream.py`` for load-testing the Spark
+and Flink pipelines.  Two modes:
+
+* ``synthetic`` -- sustain a target events-per-second rate across a large
+                   fleet from ``build_device_fleet``.
+* ``replay``    -- re-publish the historical parquet written by
+                   ``batch_reference_gen.generate_historical_telemetry`` at
+                   N x real time, preserving the original inter-event gaps.
+
+Work is fanned out over ``--workers`` processes, each with its own producer and
+a disjoint slice of the devices (so per-device ordering is kept).  Sends are
+paced against a clock instead of a sleep per cycle, delivery is tracked with
+async callbacks rather than ``flush()``, and event ids / timestamps are built
+from a per-worker counter and a per-millisecond cache instead of ``uuid4`` and
+``isoformat`` per event.
+
+``--encoding binary`` switches to the fixed layout in ``encode_binary`` (under
+a third of the JSON size).  The Spark and Flink jobs parse JSON, so use it for
+broker/producer benchmarks or point ``--topic`` at a separate topic; every
+message carries a ``content-type`` header naming its encoding.
+
+Usage (inside the simulator container)::
+
+    python load_generator.py --rate 200000 --devices 50000 --workers 8 --duration 300
+    python load_generator.py --replay s3://factory-raw/telemetry/historical/telemetry_historical.parquet --speedup 60
+
+Environment variables
+---------------------
+KAFKA_BROKER            Bootstrap servers (default: kafka:9092)
+KAFKA_TOPIC_TELEMETRY   Target topic (default: factory.telemetry.raw)
+LOADGEN_ACKS            Producer acks (default: 1)
+LOADGEN_LINGER_MS       Producer linger.ms (default: 20)
+LOADGEN_BATCH_BYTES     Producer batch.size (default: 262144)
+LOADGEN_COMPRESSION     Producer compression type (default: none)
+"""
+
+import argparse
+import functools
+import io
+import json
+import logging
+import multiprocessing as mp
+import os
+import random
+import struct
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from typing import Optional
+
+from sensor_stream import (
+    DEVICE_TYPES,
+    ERROR_CODES,
+    KAFKA_BROKER,
+    KAFKA_TOPIC_TELEMETRY,
+    LOCATIONS,
+    build_device_fleet,
+    generate_telemetry,
+)
+
+# ---------------------------------------------------------------------------
+#  Configuration
+# ---------------------------------------------------------------------------
+PRODUCER_ACKS = os.getenv("LOADGEN_ACKS", "1")
+PRODUCER_LINGER_MS = int(os.getenv("LOADGEN_LINGER_MS", "20"))
+PRODUCER_BATCH_BYTES = int(os.getenv("LOADGEN_BATCH_BYTES", str(256 * 1024)))
+PRODUCER_COMPRESSION = os.getenv("LOADGEN_COMPRESSION") or None
+
+REPORT_INTERVAL_S = 5
+MAX_BURST = 5000  # events sent per pacing step before re-checking the clock
+
+CONTENT_TYPE_JSON = b"application/json"
+CONTENT_TYPE_BINARY = b"application/x-factorypulse-telemetry-v1"
+
+# ---------------------------------------------------------------------------
+#  Logging
+# ---------------------------------------------------------------------------
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s [%(levelname)s] %(processName)s %(message)s",
+    datefmt="%Y-%m-%d %H:%M:%S",
+)
+logger = logging.getLogger("load_generator")
+
+
+# ---------------------------------------------------------------------------
+#  Encodings
+# ---------------------------------------------------------------------------
+# version, timestamp (epoch ms), device_type, location, error_code index
+# (0 = none), then temperature, vibration, pressure, humidity, power_usage, rpm.
+# event_id and device_id follow as length-prefixed UTF-8.
+BINARY_HEADER = struct.Struct("<BqBBB6f")
+BINARY_VERSION = 1
+_DEVICE_TYPE_INDEX = {name: i for i, name in enumerate(DEVICE_TYPES)}
+_LOCATION_INDEX = {name: i for i, name in enumerate(LOCATIONS)}
+_ERROR_CODE_INDEX = {name: i + 1 for i, name in enumerate(ERROR_CODES)}
+
+
+@functools.lru_cache(maxsize=4096)
+def _iso_to_epoch_ms(timestamp: str) -> int:
+    # Events built in the same millisecond share one timestamp string.
+    return int(datetime.fromisoformat(timestamp).timestamp() * 1000)
+
+
+def encode_json(event: dict) -> bytes:
+    return json.dumps(event, separators=(",", ":")).encode("utf-8")
+
+
+def encode_binary(event: dict) -> bytes:
+    """Pack a telemetry event into the compact fixed layout."""
+    event_id = event["event_id"].encode("utf-8")
+    device_id = event["device_id"].encode("utf-8")
+    return b"".join(
+        (
+            BINARY_HEADER.pack(
+                BINARY_VERSION,
+                _iso_to_epoch_ms(event["timestamp"]),
+                _DEVICE_TYPE_INDEX[event["device_type"]],
+                _LOCATION_INDEX[event["location"]],
+                _ERROR_CODE_INDEX.get(event["error_code"], 0),
+                event["temperature"],
+                event["vibration"],
+                event["pressure"],
+                event["humidity"],
+                event["power_usage"],
+                event["rpm"],
+            ),
+            bytes((len(event_id),)),
+            event_id,
+            bytes((len(device_id),)),
+            device_id,
+        )
+    )
+
+
+def decode_binary(payload: bytes) -> dict:
+    """Inverse of :func:`encode_binary` (floats come back as float32 precision)."""
+    (
+        version, timestamp_ms, device_type, location, error_code,
+        temperature, vibration, pressure, humidity, power_usage, rpm,
+    ) = BINARY_HEADER.unpack_from(payload)
+    if version != BINARY_VERSION:
+        raise ValueError(f"Unsupported telemetry encoding version {version}")
+    offset = BINARY_HEADER.size
+    event_id_len = payload[offset]
+    event_id = payload[offset + 1 : offset + 1 + event_id_len].decode("utf-8")
+    offset += 1 + event_id_len
+    device_id = payload[offset + 1 : offset + 1 + payload[offset]].decode("utf-8")
+    return {
+        "event_id": event_id,
+        "device_id": device_id,
+        "device_type": DEVICE_TYPES[device_type],
+        "location": LOCATIONS[location],
+        "timestamp": datetime.fromtimestamp(timestamp_ms / 1000, tz=timezone.utc).isoformat(),
+        "temperature": temperature,
+        "vibration": vibration,
+        "pressure": pressure,
+        "humidity": humidity,
+        "power_usage": power_usage,
+        "rpm": rpm,
+        "error_code": ERROR_CODES[error_code - 1] if error_code else None,
+    }
+
+
+ENCODERS = {
+    "json": (encode_json, CONTENT_TYPE_JSON),
+    "binary": (encode_binary, CONTENT_TYPE_BINARY),
+}
+
+
+# ---------------------------------------------------------------------------
+#  Cheap per-event identity
+# ---------------------------------------------------------------------------
+class EventIds:
+    """Unique event ids from a random per-worker prefix and a counter."""
+
+    def __init__(self):
+        self._prefix = uuid.uuid4().hex[:16]
+        self._seq = 0
+
+    def next(self) -> str:
+        self._seq += 1
+        return f"{self._prefix}-{self._seq:012x}"
+
+
+class TimestampCache:
+    """ISO-8601 UTC timestamps, formatted at most once per millisecond."""
+
+    def __init__(self):
+        self._ms = -1
+        self._iso = ""
+
+    def at(self, epoch_ms: int) -> str:
+        if epoch_ms != self._ms:
+            self._ms = epoch_ms
+            self._iso = datetime.fromtimestamp(epoch_ms / 1000, tz=timezone.utc).isoformat()
+        return self._iso
+
+    def now(self) -> str:
+        return self.at(time.time_ns() // 1_000_000)
+
+
+# ---------------------------------------------------------------------------
+#  Kafka producer
+# ---------------------------------------------------------------------------
+class DeliveryStats:
+    """Counters updated from the producer's delivery callbacks."""
+
+    def __init__(self):
+        self.sent = 0
+        self.acked = 0
+        self.failed = 0
+        self.last_error: Optional[str] = None
+
+    def on_success(self, _metadata) -> None:
+        self.acked += 1
+
+    def on_error(self, exc: Exception) -> None:
+        self.failed += 1
+        self.last_error = str(exc)
+
+
+def create_producer(retries: int = 30, delay: int = 5):
+    """Create a throughput-tuned KafkaProducer sending pre-encoded bytes."""
+    from kafka import KafkaProducer
+
+    for attempt in range(1, retries + 1):
+        try:
+            return KafkaProducer(
+                bootstrap_servers=KAFKA_BROKER,
+                acks=PRODUCER_ACKS if PRODUCER_ACKS == "all" else int(PRODUCER_ACKS),
+                linger_ms=PRODUCER_LINGER_MS,
+                batch_size=PRODUCER_BATCH_BYTES,
+                compression_type=PRODUCER_COMPRESSION,
+                buffer_memory=128 * 1024 * 1024,
+                retries=3,
+            )
+        except Exception as exc:
+            logger.warning(
+                "Kafka connection attempt %d/%d failed: %s — retrying in %ds",
+                attempt,
+                retries,
+                exc,
+                delay,
+            )
+            time.sleep(delay)
+    raise RuntimeError(f"Could not connect to Kafka at {KAFKA_BROKER} after {retries} attempts")
+
+
+def _send(producer, topic: str, key: bytes, value: bytes, headers: list, stats: DeliveryStats):
+    future = producer.send(topic, key=key, value=value, headers=headers)
+    future.add_callback(stats.on_success)
+    future.add_errback(stats.on_error)
+    stats.sent += 1
+
+
+# ---------------------------------------------------------------------------
+#  Workers
+# ---------------------------------------------------------------------------
+def _publish(counters, index: int, stats: DeliveryStats) -> None:
+    counters[index * 3] = stats.sent
+    counters[index * 3 + 1] = stats.acked
+    counters[index * 3 + 2] = stats.failed
+
+
+def run_synthetic_worker(
+    index: int,
+    devices: list[dict],
+    rate: float,
+    duration: float,
+    start_at: float,
+    opts: dict,
+    counters,
+    stop,
+    producer_factory=create_producer,
+) -> None:
+    """Send readings for ``devices`` round-robin at ``rate`` events/s."""
+    encode, content_type = ENCODERS[opts["encoding"]]
+    headers = [("content-type", content_type)]
+    keys = [d["device_id"].encode("utf-8") for d in devices]
+    ids = EventIds()
+    clock = TimestampCache()
+    stats = DeliveryStats()
+    producer = producer_factory()
+
+    time.sleep(max(0.0, start_at - time.time()))
+    started = time.perf_counter()
+    cursor = 0
+    try:
+        while not stop.is_set():
+            elapsed = time.perf_counter() - started
+            if duration and elapsed >= duration:
+                break
+            due = min(int(elapsed * rate) - stats.sent, MAX_BURST)
+            if due <= 0:
+                time.sleep(min(0.005, (stats.sent + 1) / rate - elapsed))
+                continue
+            now_iso = clock.now()
+            for _ in range(due):
+                device = devices[cursor]
+                event = generate_telemetry(device, event_id=ids.next(), timestamp=now_iso)
+                _send(producer, opts["topic"], keys[cursor], encode(event), headers, stats)
+                cursor = (cursor + 1) % len(devices)
+            _publish(counters, index, stats)
+    finally:
+        producer.flush(timeout=30)
+        producer.close()
+        _publish(counters, index, stats)
+
+
+def run_replay_worker(
+    index: int,
+    rows: list[tuple[float, dict]],
+    speedup: float,
+    loops: int,
+    start_at: float,
+    opts: dict,
+    counters,
+    stop,
+    producer_factory=create_producer,
+) -> None:
+    """Re-send ``(offset_s, event)`` rows at their original spacing / ``speedup``.
+
+    ``speedup`` 0 sends as fast as possible.  With ``rebase_timestamps`` each
+    event is stamped with its send time instead of its historical timestamp.
+    """
+    encode, content_type = ENCODERS[opts["encoding"]]
+    headers = [("content-type", content_type)]
+    clock = TimestampCache()
+    stats = DeliveryStats()
+    producer = producer_factory()
+    span = rows[-1][0] if rows else 0.0
+
+    try:
+        for loop in range(loops):
+            loop_start = start_at + (loop * span / speedup if speedup else 0.0)
+            if not speedup:
+                loop_start = time.time()
+            for offset, event in rows:
+                if stop.is_set():
+                    return
+                send_at = loop_start + (offset / speedup if speedup else 0.0)
+                wait = send_at - time.time()
+                if wait > 0.001:
+                    _publish(counters, index, stats)
+                    time.sleep(wait)
+                if loop or opts["rebase_timestamps"]:
+                    event = dict(event)
+                    if loop:
+                        event["event_id"] = f"{event['event_id']}-r{loop}"
+                    if opts["rebase_timestamps"]:
+                        event["timestamp"] = clock.at(int(max(send_at, time.time()) * 1000))
+                _send(
+                    producer, opts["topic"], event["device_id"].encode("utf-8"),
+                    encode(event), headers, stats,
+                )
+            _publish(counters, index, stats)
+    finally:
+        producer.flush(timeout=30)
+        producer.close()
+        _publish(counters, index, stats)
+
+
+# ---------------------------------------------------------------------------
+#  Replay input
+# ---------------------------------------------------------------------------
+def load_replay_rows(source: str) -> list[tuple[float, dict]]:
+    """Read historical telemetry parquet (local path or ``s3://bucket/key``).
+
+    Returns ``(offset_seconds, event)`` pairs sorted by event time, where the
+    offset is relative to the earliest event.
+    """
+    import pyarrow.parquet as pq
+
+    if source.startswith("s3://"):
+        from batch_reference_gen import get_s3_client
+
+        bucket, _, key = source[len("s3://"):].partition("/")
+        body = get_s3_client().get_object(Bucket=bucket, Key=key)["Body"].read()
+        table = pq.read_table(io.BytesIO(body))
+    else:
+        table = pq.read_table(source)
+
+    events = table.to_pylist()
+    for event in events:
+        ts = event["timestamp"]
+        if isinstance(ts, str):
+            ts = datetime.fromisoformat(ts)
+        if ts.tzinfo is None:
+            ts = ts.replace(tzinfo=timezone.utc)
+        event["_epoch"] = ts.timestamp()
+        event["timestamp"] = ts.isoformat()
+    events.sort(key=lambda e: e["_epoch"])
+
+    first = events[0]["_epoch"] if events else 0.0
+    return [(e.pop("_epoch") - first, e) for e in events]
+
+
+def split_by_device(rows: list, workers: int) -> list[list]:
+    """Stable device -> worker assignment so per-device order survives fan-out."""
+    shards = [[] for _ in range(workers)]
+    for row in rows:
+        shards[zlib.crc32(row[1]["device_id"].encode("utf-8")) % workers].append(row)
+    return shards
+
+
+# ---------------------------------------------------------------------------
+#  Orchestration
+# ---------------------------------------------------------------------------
+def _totals(counters, workers: int) -> tuple[int, int, int]:
+    return (
+        sum(counters[i * 3] for i in range(workers)),
+        sum(counters[i * 3 + 1] for i in range(workers)),
+        sum(counters[i * 3 + 2] for i in range(workers)),
+    )
+
+
+def run(args) -> dict:
+    opts = {
+        "topic": args.topic,
+        "encoding": args.encoding,
+        "rebase_timestamps": args.rebase_timestamps,
+    }
+    workers = max(1, args.workers)
+    counters = mp.Array("q", workers * 3, lock=False)
+    stop = mp.Event()
+    start_at = time.time() + 2.0  # lets every worker connect before the clock starts
+
+    if args.replay:
+        rows = load_replay_rows(args.replay)
+        logger.info(
+            "Replaying %d events spanning %.0fs at %sx from %s",
+            len(rows), rows[-1][0] if rows else 0, args.speedup or "max", args.replay,
+        )
+        shards = split_by_device(rows, workers)
+        targets = [
+            (run_replay_worker, (i, shard, args.speedup, args.loops, start_at, opts, counters, stop))
+            for i, shard in enumerate(shards)
+        ]
+    else:
+        random.seed(args.seed)
+        fleet = build_device_fleet(args.devices)
+        workers = min(workers, len(fleet))
+        logger.info(
+            "Synthetic load: %d devices, %d events/s, %d workers, encoding=%s",
+            len(fleet), args.rate, workers, args.encoding,
+        )
+        targets = [
+            (
+                run_synthetic_worker,
+                (i, fleet[i::workers], args.rate / workers, args.duration, start_at, opts,
+                 counters, stop),
+            )
+            for i in range(workers)
+        ]
+
+    processes = [
+        mp.Process(target=fn, args=fn_args, name=f"loadgen-{i}", daemon=True)
+        for i, (fn, fn_args) in enumerate(targets)
+    ]
+    for p in processes:
+        p.start()
+
+    last_sent, last_report = 0, time.time()
+    try:
+        while any(p.is_alive() for p in processes):
+            time.sleep(REPORT_INTERVAL_S)
+            sent, acked, failed = _totals(counters, len(processes))
+            now = time.time()
+            logger.info(
+                "sent=%d acked=%d failed=%d  %.0f events/s",
+                sent, acked, failed, (sent - last_sent) / (now - last_report),
+            )
+            last_sent, last_report = sent, now
+    except KeyboardInterrupt:
+        logger.info("Shutdown requested — waiting for in-flight deliveries")
+        stop.set()
+    for p in processes:
+        p.join()
+
+    elapsed = max(time.time() - start_at, 1e-9)
+    sent, acked, failed = _totals(counters, len(processes))
+    return {
+        "mode": "replay" if args.replay else "synthetic",
+        "workers": len(processes),
+        "encoding": args.encoding,
+        "target_rate": None if args.replay else args.rate,
+        "speedup": args.speedup if args.replay else None,
+        "duration_s": round(elapsed, 1),
+        "sent": sent,
+        "acked": acked,
+        "failed": failed,
+        "events_per_sec": round(acked / elapsed),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=10000, help="Target events/s (synthetic)")
+    parser.add_argument("--devices", type=int, default=10000, help="Fleet size (synthetic)")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run, 0 = forever")
+    parser.add_argument("--seed", type=int, default=42, help="Fleet baseline seed")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--encoding", choices=sorted(ENCODERS), default="json")
+    parser.add_argument("--topic", default=KAFKA_TOPIC_TELEMETRY)
+    parser.add_argument("--replay", help="Historical parquet: local path or s3://bucket/key")
+    parser.add_argument("--speedup", type=float, default=1.0, help="Replay speed, 0 = max")
+    parser.add_argument("--loops", type=int, default=1, help="Replay the file this many times")
+    parser.add_argument(
+        "--rebase-timestamps",
+        action="store_true",
+        help="Stamp replayed events with their send time",
+    )
+    parser.add_argument("--output", help="Write the JSON summary to this file")
+    args = parser.parse_args()
+
+    result = run(args)
+    logger.info(
+        "Done: %d sent, %d acked, %d failed in %.1fs (%d events/s)",
+        result["sent"], result["acked"], result["failed"],
+        result["duration_s"], result["events_per_sec"],
+    )
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(result, fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,6 +12,7 @@ import random
 import time
 import uuid
 from datetime import datetime, timezone
+from typing import Optional
 
 from kafka import KafkaProducer
 
@@ -158,10 +159,17 @@ def build_device_fleet(count: int) -> list[dict]:
 # ---------------------------------------------------------------------------
 #  Telemetry generation
 # ---------------------------------------------------------------------------
-def generate_telemetry(device: dict) -> dict:
+def generate_telemetry(
+    device: dict,
+    event_id: Optional[str] = None,
+    timestamp: Optional[str] = None,
+) -> dict:
     """
     Generate a single telemetry reading for a device.
     With probability ANOMALY_RATE, inject an anomaly.
+
+    ``event_id`` and ``timestamp`` default to a fresh uuid4 and the current
+    time; high-rate callers pass cheaper precomputed values instead.
     """
     base = device["baseline"]
     is_anomaly = random.random() < ANOMALY_RATE
@@ -201,11 +209,11 @@ def generate_telemetry(device: dict) -> dict:
     rpm = max(500.0, rpm)
 
     return {
-        "event_id": str(uuid.uuid4()),
+        "event_id": event_id or str(uuid.uuid4()),
         "device_id": device["device_id"],
         "device_type": device["device_type"],
         "location": device["location"],
-        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "timestamp": timestamp or datetime.now(timezone.utc).isoformat(),
         "temperature": round(temperature, 2),
         "vibration": round(vibration, 4),
         "pressure": round(pressure, 2),
@@ -276,6 +284,11 @@ def create_producer(retries: int = 30, delay: int = 5) -> KafkaProducer:
     raise RuntimeError(f"Could not connect to Kafka at {KAFKA_BROKER} after {retries} attempts")
 
 
+def _on_send_error(topic: str, exc: Exception) -> None:
+    """Delivery callback for failed sends (runs on the producer I/O thread)."""
+    logger.error("Delivery to [%s] failed: %s", topic, exc)
+
+
 # ---------------------------------------------------------------------------
 #  Main loop
 # ---------------------------------------------------------------------------
@@ -313,7 +326,7 @@ def main() -> None:
                     KAFKA_TOPIC_TELEMETRY,
                     key=device["device_id"],
                     value=reading,
-                )
+                ).add_errback(_on_send_error, KAFKA_TOPIC_TELEMETRY)
                 if reading["error_code"]:
                     logger.warning(
                         "ANOMALY  %s  %s  temp=%.1f  vib=%.3f  press=%.1f  err=%s",
@@ -341,7 +354,7 @@ def main() -> None:
                     KAFKA_TOPIC_INCIDENTS,
                     key=device["device_id"],
                     value=incident,
-                )
+                ).add_errback(_on_send_error, KAFKA_TOPIC_INCIDENTS)
                 logger.info(
                     "INCIDENT  %s  %s  type=%s  severity=%s — %s",
                     incident["device_id"],
@@ -352,7 +365,8 @@ def main() -> None:
                 )
                 last_incident_time = now
 
-            producer.flush()
+            # Delivery is confirmed asynchronously; flushing here would stall
+            # every cycle on the slowest broker acknowledgement.
             time.sleep(interval_s)
 
     except KeyboardInterrupt:
@@ -3,11 +3,22 @@ FactoryPulse  --  Spark Batch: Anomaly Scoring
 ===============================================
 BATCH LAYER (Lambda architecture)
 
-Reads recent telemetry from the Iceberg table ``factory_db.raw_telemetry``,
+Reads telemetry from the Iceberg table ``factory_db.raw_telemetry``,
 applies rule-based anomaly scoring, classifies severity, then writes the
 results to ``factory_db.anomaly_scores`` (Iceberg) and pushes WARNING /
 CRITICAL alerts to ClickHouse ``factory_pulse.raw_alerts``.
 
+Scoring is incremental.  The last scored ``raw_telemetry`` snapshot id is kept
+as a high-water mark in ``factory_db.anomaly_scoring_state``; each run diffs the
+snapshots appended since then, collects the ``days(timestamp)`` partitions they
+touched and rescores only those days.  Late rows (old timestamp, new snapshot)
+therefore pull their day back in, however old it is.  Scores and alerts of a
+rescored day are replaced as a whole, and the per-severity totals are carried
+forward in the state table, so Iceberg, ClickHouse and MLflow end up exactly
+where a full rescore would have left them.  A full rescore happens on the first
+run, when the watermark snapshot has been expired, or with
+``ANOMALY_FULL_RESCORE=1``.
+
 MLflow is used to track each scoring run (parameters, counts, metrics).
 
 Environment variables
@@ -16,12 +27,16 @@ AWS_ACCESS_KEY_ID       MinIO / S3 access key
 AWS_SECRET_ACCESS_KEY   MinIO / S3 secret key
 CLICKHOUSE_USER         ClickHouse user  (default: default)
 CLICKHOUSE_PASSWORD     ClickHouse password (default: clickhouse)
+CLICKHOUSE_INSERT_BLOCK_SIZE
+                        Max rows per native alert insert block (default: 100000)
 MLFLOW_TRACKING_URI     MLflow server     (default: http://mlflow:5000)
+ANOMALY_FULL_RESCORE    Ignore the watermark and rescore everything (default: 0)
 """
 
 import os
 import uuid
 import logging
+from datetime import timedelta
 
 from pyspark.sql import SparkSession, DataFrame
 from pyspark.sql import functions as F
@@ -42,8 +57,11 @@ MINIO_ENDPOINT = "http://minio:9000"
 ICEBERG_REST_URI = "http://iceberg-rest:8181"
 
 CLICKHOUSE_JDBC_URL = "jdbc:clickhouse://clickhouse:8123/factory_pulse"
+CLICKHOUSE_HOST = "clickhouse"
+CLICKHOUSE_PORT = 9000
 CLICKHOUSE_USER = os.getenv("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = os.getenv("CLICKHOUSE_PASSWORD", "clickhouse")
+CLICKHOUSE_INSERT_BLOCK_SIZE = int(os.getenv("CLICKHOUSE_INSERT_BLOCK_SIZE", "100000"))
 
 CLICKHOUSE_JDBC_PROPERTIES = {
     "driver": "com.clickhouse.jdbc.ClickHouseDriver",
@@ -52,6 +70,15 @@ CLICKHOUSE_JDBC_PROPERTIES = {
 }
 
 MLFLOW_TRACKING_URI = os.getenv("MLFLOW_TRACKING_URI", "http://mlflow:5000")
+FULL_RESCORE = os.getenv("ANOMALY_FULL_RESCORE", "0") == "1"
+
+RAW_TABLE = "factory_db.factory_db.raw_telemetry"
+SCORES_TABLE = "factory_db.factory_db.anomaly_scores"
+STATE_TABLE = "factory_db.factory_db.anomaly_scoring_state"
+
+# Alert ids are derived from the scored event so a rescored day re-emits the same ids.
+ALERT_ID_NAMESPACE = uuid.UUID("6f1c2a4e-5b7d-4c1e-9a3f-0d8e2b6c4a10")
+SEVERITIES = ("CRITICAL", "WARNING", "NORMAL")
 
 # ---------------------------------------------------------------------------
 #  Scoring thresholds
@@ -71,6 +98,8 @@ def _build_spark_session() -> SparkSession:
     builder = (
         SparkSession.builder
         .appName("FactoryPulse-AnomalyScoring")
+        # Iceberg day partitions and ClickHouse deletes are both cut in UTC.
+        .config("spark.sql.session.timeZone", "UTC")
         # ---- Iceberg catalog ------------------------------------------------
         .config("spark.sql.catalog.factory_db", "org.apache.iceberg.spark.SparkCatalog")
         .config("spark.sql.catalog.factory_db.type", "rest")
@@ -111,8 +140,8 @@ def _ensure_anomaly_table(spark: SparkSession) -> None:
     spark.sql("CREATE NAMESPACE IF NOT EXISTS factory_db.factory_db")
 
     spark.sql(
-        """
-        CREATE TABLE IF NOT EXISTS factory_db.factory_db.anomaly_scores (
+        f"""
+        CREATE TABLE IF NOT EXISTS {SCORES_TABLE} (
             event_id        STRING,
             device_id       STRING,
             device_type     STRING,
@@ -130,10 +159,119 @@ def _ensure_anomaly_table(spark: SparkSession) -> None:
             scored_at       TIMESTAMP
         )
         USING iceberg
-        PARTITIONED BY (severity)
+        PARTITIONED BY (days(timestamp), severity)
+        """
+    )
+
+    # Tables created before incremental scoring were partitioned by severity
+    # only; day-level overwrites need the day transform as well.
+    partition_fields = spark.table(f"{SCORES_TABLE}.partitions").schema["partition"]
+    if "timestamp_day" not in partition_fields.dataType.fieldNames():
+        spark.sql(f"ALTER TABLE {SCORES_TABLE} ADD PARTITION FIELD days(timestamp)")
+        log.info("Added days(timestamp) partition field to %s.", SCORES_TABLE)
+
+    spark.sql(
+        f"""
+        CREATE TABLE IF NOT EXISTS {STATE_TABLE} (
+            snapshot_id     BIGINT,
+            critical_count  BIGINT,
+            warning_count   BIGINT,
+            normal_count    BIGINT,
+            rescored_days   INT,
+            full_rescore    BOOLEAN,
+            run_at          TIMESTAMP
+        )
+        USING iceberg
         """
     )
-    log.info("Iceberg table factory_db.factory_db.anomaly_scores is ready.")
+    log.info("Iceberg tables %s and %s are ready.", SCORES_TABLE, STATE_TABLE)
+
+
+# ---------------------------------------------------------------------------
+#  Watermark helpers
+# ---------------------------------------------------------------------------
+def _current_snapshot_id(spark: SparkSession):
+    """Return the current snapshot id of raw_telemetry, or None for an empty table."""
+    rows = (
+        spark.sql(f"SELECT snapshot_id FROM {RAW_TABLE}.history WHERE is_current_ancestor")
+        .orderBy(F.col("made_current_at").desc())
+        .limit(1)
+        .collect()
+    )
+    return rows[0]["snapshot_id"] if rows else None
+
+
+def _load_state(spark: SparkSession):
+    """Return the latest scoring state row, or None if the job never ran."""
+    rows = spark.table(STATE_TABLE).orderBy(F.col("run_at").desc()).limit(1).collect()
+    return rows[0] if rows else None
+
+
+def _snapshot_is_live(spark: SparkSession, snapshot_id: int) -> bool:
+    return (
+        spark.sql(f"SELECT 1 FROM {RAW_TABLE}.history WHERE snapshot_id = {int(snapshot_id)}")
+        .count() > 0
+    )
+
+
+def _changed_days(spark: SparkSession, start_snapshot: int, end_snapshot: int) -> list:
+    """Distinct ``days(timestamp)`` touched by rows appended after ``start_snapshot``."""
+    appended = (
+        spark.read.format("iceberg")
+        .option("start-snapshot-id", str(start_snapshot))
+        .option("end-snapshot-id", str(end_snapshot))
+        .load(RAW_TABLE)
+    )
+    rows = appended.select(F.to_date("timestamp").alias("day")).distinct().collect()
+    return sorted((row["day"] for row in rows), key=lambda d: (d is not None, d))
+
+
+def _days_condition(days: list) -> str:
+    """SQL predicate selecting whole ``days(timestamp)`` partitions.
+
+    Written as timestamp ranges so Iceberg can translate it into a partition
+    filter for both scan pruning and ``overwrite``.
+    """
+    clauses = []
+    for day in days:
+        if day is None:
+            clauses.append("timestamp IS NULL")
+            continue
+        next_day = day + timedelta(days=1)
+        clauses.append(
+            f"(timestamp >= TIMESTAMP '{day.isoformat()} 00:00:00' "
+            f"AND timestamp < TIMESTAMP '{next_day.isoformat()} 00:00:00')"
+        )
+    return " OR ".join(clauses)
+
+
+def _severity_counts(df: DataFrame) -> dict:
+    rows = df.groupBy("severity").count().collect()
+    count_map = {row["severity"]: row["count"] for row in rows}
+    return {severity: count_map.get(severity, 0) for severity in SEVERITIES}
+
+
+def _save_state(
+    spark: SparkSession,
+    snapshot_id: int,
+    counts: dict,
+    rescored_days: int,
+    full_rescore: bool,
+) -> None:
+    state = spark.createDataFrame(
+        [(
+            snapshot_id,
+            counts["CRITICAL"],
+            counts["WARNING"],
+            counts["NORMAL"],
+            rescored_days,
+            full_rescore,
+        )],
+        "snapshot_id BIGINT, critical_count BIGINT, warning_count BIGINT, "
+        "normal_count BIGINT, rescored_days INT, full_rescore BOOLEAN",
+    ).withColumn("run_at", F.current_timestamp())
+    state.writeTo(STATE_TABLE).append()
+    log.info("Advanced anomaly-scoring watermark to snapshot %s.", snapshot_id)
 
 
 # ---------------------------------------------------------------------------
@@ -195,7 +333,8 @@ def compute_anomaly_scores(telemetry_df: DataFrame) -> DataFrame:
 # ---------------------------------------------------------------------------
 #  Write helpers
 # ---------------------------------------------------------------------------
-def _write_scores_to_iceberg(scores_df: DataFrame) -> None:
+def _write_scores_to_iceberg(scores_df: DataFrame, days_condition: str = None) -> None:
+    """Replace the scored days in Iceberg (every day when ``days_condition`` is None)."""
     scores_projected = scores_df.select(
         "event_id",
         "device_id",
@@ -213,18 +352,85 @@ def _write_scores_to_iceberg(scores_df: DataFrame) -> None:
         "severity",
         "scored_at",
     )
-    scores_projected.writeTo("factory_db.factory_db.anomaly_scores").overwritePartitions()
+    condition = F.expr(days_condition) if days_condition else F.lit(True)
+    scores_projected.writeTo(SCORES_TABLE).overwrite(condition)
     log.info("Wrote anomaly scores to Iceberg.")
 
 
-def _write_alerts_to_clickhouse(scores_df: DataFrame) -> None:
-    """Push WARNING and CRITICAL rows to ClickHouse raw_alerts table."""
-    generate_uuid = F.udf(lambda: str(uuid.uuid4()), StringType())
+def _alert_key(device_id: str, timestamp_ms: int) -> str:
+    """Deterministic alert id: one ANOMALY_SCORE alert per device reading."""
+    return str(uuid.uuid5(ALERT_ID_NAMESPACE, f"{device_id}:{timestamp_ms}"))
+
+
+def _clickhouse_client():
+    from clickhouse_driver import Client as CHClient
+
+    return CHClient(
+        host=CLICKHOUSE_HOST,
+        port=CLICKHOUSE_PORT,
+        user=CLICKHOUSE_USER,
+        password=CLICKHOUSE_PASSWORD,
+        database="factory_pulse",
+    )
+
+
+def _alert_partition_writer(columns: list, resolved, written, block_size: int):
+    """Build the ``foreachPartition`` callback that streams one partition of alerts into raw_alerts.
+
+    Runs on the executors: alerts whose ``(device_id, timestamp_ms)`` is in the
+    ``resolved`` broadcast set are skipped, the rest are sent as native
+    columnar blocks of at most ``block_size`` rows and counted into the
+    ``written`` accumulator.
+    """
+    insert_sql = f"INSERT INTO raw_alerts ({', '.join(columns)}) VALUES"
+
+    def write_partition(rows) -> None:
+        client = None
+        block = [[] for _ in columns]
+
+        def flush() -> None:
+            nonlocal client, block
+            if client is None:
+                client = _clickhouse_client()
+            client.execute(insert_sql, block, columnar=True)
+            written.add(len(block[0]))
+            block = [[] for _ in columns]
+
+        try:
+            for row in rows:
+                if (row["device_id"], row["timestamp_ms"]) in resolved.value:
+                    continue
+                for values, column in zip(block, columns):
+                    values.append(row[column])
+                if len(block[0]) >= block_size:
+                    flush()
+            if block[0]:
+                flush()
+        finally:
+            if client is not None:
+                client.disconnect()
+
+    return write_partition
+
+
+def _write_alerts_to_clickhouse(scores_df: DataFrame, days: list = None) -> None:
+    """Replace the open ANOMALY_SCORE alerts for the scored days with WARNING and CRITICAL rows.
+
+    ``days`` lists the rescored UTC days; None means the whole table was rescored.
+
+    Alerts an operator already resolved are kept as they are and never
+    re-raised.  ClickHouse has no transactions, so the new alerts are inserted
+    before the superseded open ones are deleted: a failure in between leaves
+    duplicates that the next run removes, never a gap.  Open-alert rollup
+    drift from a partial run is corrected by the dbt reconcile hook.
+    """
+    alert_id = F.udf(_alert_key, StringType())
 
     alerts = (
         scores_df
         .filter(F.col("severity").isin("WARNING", "CRITICAL"))
-        .withColumn("alert_id", generate_uuid())
+        .withColumn("timestamp_ms", F.expr("unix_millis(timestamp)"))
+        .withColumn("alert_id", alert_id(F.col("device_id"), F.col("timestamp_ms")))
         .withColumn("alert_type", F.lit("ANOMALY_SCORE"))
         .withColumn(
             "message",
@@ -242,7 +448,6 @@ def _write_alerts_to_clickhouse(scores_df: DataFrame) -> None:
         .withColumn("metric_value", F.col("anomaly_score").cast("double"))
         .withColumn("threshold", F.lit(30.0))
         .withColumn("resolved", F.lit(0).cast("int"))
-        .withColumn("ingested_at", F.current_timestamp())
         .select(
             "alert_id",
             "device_id",
@@ -254,48 +459,84 @@ def _write_alerts_to_clickhouse(scores_df: DataFrame) -> None:
             "threshold",
             "timestamp",
             "resolved",
-            "ingested_at",
+            "timestamp_ms",
         )
     )
 
-    alert_count = alerts.count()
-    if alert_count == 0:
-        log.info("No alerts to write to ClickHouse.")
-        return
+    ch = _clickhouse_client()
 
-    from clickhouse_driver import Client as CHClient
+    condition = "alert_type = 'ANOMALY_SCORE'"
+    params = {}
+    if days is not None:
+        params["days"] = tuple(day for day in days if day is not None)
+        condition += " AND toDate(timestamp, 'UTC') IN %(days)s"
+    if days is not None and not params["days"]:
+        log.info("No days to rewrite alerts for.")
+        return
 
-    ch = CHClient(
-        host="clickhouse",
-        port=9000,
-        user=CLICKHOUSE_USER,
-        password=CLICKHOUSE_PASSWORD,
-        database="factory_pulse",
+    # Rows ingested before this point are the previous verdicts.  Taken from
+    # the server clock, which also stamps ingested_at on the new rows.
+    cutoff = ch.execute("SELECT now64(3)")[0][0]
+    resolved = {
+        (device_id, timestamp_ms)
+        for device_id, timestamp_ms in ch.execute(
+            "SELECT device_id, toUnixTimestamp64Milli(timestamp) FROM raw_alerts "
+            f"WHERE {condition} AND resolved = 1",
+            params or None,
+        )
+    }
+
+    # Stream the new alerts from the executors; the driver only ships the
+    # resolved keys out and reads the written count back.
+    spark_context = scores_df.sparkSession.sparkContext
+    resolved_keys = spark_context.broadcast(resolved)
+    written = spark_context.accumulator(0)
+    columns = [c for c in alerts.columns if c != "timestamp_ms"]
+    alerts.foreachPartition(
+        _alert_partition_writer(columns, resolved_keys, written, CLICKHOUSE_INSERT_BLOCK_SIZE)
+    )
+    resolved_keys.unpersist()
+
+    # Deletes bypass the device_open_alerts materialized view; subtract the
+    # open alerts being removed so the rollup stays in step.
+    params["cutoff"] = cutoff
+    superseded = f"{condition} AND resolved = 0 AND ingested_at < %(cutoff)s"
+    ch.execute(
+        "INSERT INTO device_open_alerts "
+        "SELECT device_id, -toInt64(count()) FROM raw_alerts "
+        f"WHERE {superseded} GROUP BY device_id",
+        params,
+    )
+    ch.execute(
+        f"DELETE FROM raw_alerts WHERE {superseded}",
+        params,
+        settings={"lightweight_deletes_sync": 1},
+    )
+    log.info(
+        "Wrote %d alerts to ClickHouse raw_alerts; kept %d resolved alerts.",
+        written.value,
+        len(resolved),
     )
-    rows = [row.asDict() for row in alerts.collect()]
-    columns = list(rows[0].keys())
-    values = [[row[c] for c in columns] for row in rows]
-    col_str = ", ".join(columns)
-    ch.execute(f"INSERT INTO raw_alerts ({col_str}) VALUES", values)
-    log.info("Wrote %d alerts to ClickHouse raw_alerts.", alert_count)
 
 
 # ---------------------------------------------------------------------------
 #  MLflow logging
 # ---------------------------------------------------------------------------
-def _log_to_mlflow(total_records: int, scores_df: DataFrame) -> None:
-    """Log a scoring run to MLflow."""
+def _log_to_mlflow(
+    total_records: int,
+    count_map: dict,
+    scored_records: int,
+    rescored_days: int,
+    full_rescore: bool,
+) -> None:
+    """Log a scoring run to MLflow.
+
+    ``count_map`` holds the severity totals over the whole scores table, so the
+    metrics match a full rescore even when only a few days were rescored.
+    """
     mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
     mlflow.set_experiment("factoryPulse-anomaly-scoring")
 
-    severity_counts = (
-        scores_df
-        .groupBy("severity")
-        .count()
-        .collect()
-    )
-    count_map = {row["severity"]: row["count"] for row in severity_counts}
-
     with mlflow.start_run(run_name="anomaly-scoring-batch"):
         # -- parameters -------------------------------------------------------
         mlflow.log_param("temp_threshold", TEMP_THRESHOLD)
@@ -304,12 +545,15 @@ def _log_to_mlflow(total_records: int, scores_df: DataFrame) -> None:
         mlflow.log_param("pressure_low", PRESSURE_LOW)
         mlflow.log_param("power_threshold", POWER_THRESHOLD)
         mlflow.log_param("scoring_method", "rule_based")
+        mlflow.log_param("full_rescore", full_rescore)
 
         # -- metrics ----------------------------------------------------------
         mlflow.log_metric("total_records", total_records)
         mlflow.log_metric("critical_count", count_map.get("CRITICAL", 0))
         mlflow.log_metric("warning_count", count_map.get("WARNING", 0))
         mlflow.log_metric("normal_count", count_map.get("NORMAL", 0))
+        mlflow.log_metric("scored_records", scored_records)
+        mlflow.log_metric("rescored_days", rescored_days)
 
         anomaly_rate = (
             (count_map.get("CRITICAL", 0) + count_map.get("WARNING", 0))
@@ -337,34 +581,92 @@ def main() -> None:
     _ensure_anomaly_table(spark)
 
     # -----------------------------------------------------------------
-    #  Read recent telemetry from Iceberg
+    #  Resolve the snapshot range to score
     # -----------------------------------------------------------------
-    telemetry_df = spark.table("factory_db.factory_db.raw_telemetry")
-
-    total_records = telemetry_df.count()
-    log.info("Read %d telemetry records from Iceberg.", total_records)
-
-    if total_records == 0:
+    end_snapshot = _current_snapshot_id(spark)
+    if end_snapshot is None:
         log.warning("No telemetry data available -- nothing to score.")
         spark.stop()
         return
 
+    state = _load_state(spark)
+    full_rescore = (
+        FULL_RESCORE
+        or state is None
+        or not _snapshot_is_live(spark, state["snapshot_id"])
+    )
+
+    telemetry_df = (
+        spark.read.format("iceberg")
+        .option("snapshot-id", str(end_snapshot))
+        .load(RAW_TABLE)
+    )
+
+    if full_rescore:
+        log.info("Full rescore of %s at snapshot %s.", RAW_TABLE, end_snapshot)
+        days = None
+        days_condition = None
+        previous_counts = {severity: 0 for severity in SEVERITIES}
+    else:
+        previous_counts = {
+            "CRITICAL": state["critical_count"],
+            "WARNING": state["warning_count"],
+            "NORMAL": state["normal_count"],
+        }
+        if state["snapshot_id"] == end_snapshot:
+            days = []
+        else:
+            days = _changed_days(spark, state["snapshot_id"], end_snapshot)
+        log.info(
+            "Incremental run: snapshots %s..%s touched %d day partition(s): %s",
+            state["snapshot_id"],
+            end_snapshot,
+            len(days),
+            ", ".join(str(day) for day in days),
+        )
+        if not days:
+            total = sum(previous_counts.values())
+            _log_to_mlflow(total, previous_counts, 0, 0, False)
+            spark.stop()
+            log.info("No new telemetry since the last run -- scores are current.")
+            return
+        days_condition = _days_condition(days)
+        telemetry_df = telemetry_df.filter(F.expr(days_condition))
+
     # -----------------------------------------------------------------
     #  Score
     # -----------------------------------------------------------------
     scores_df = compute_anomaly_scores(telemetry_df)
     scores_df.cache()
+    scored_records = scores_df.count()
+    log.info("Scoring %d telemetry records from Iceberg.", scored_records)
+
+    new_counts = _severity_counts(scores_df)
+    if days_condition:
+        replaced_counts = _severity_counts(
+            spark.table(SCORES_TABLE).filter(F.expr(days_condition))
+        )
+    else:
+        replaced_counts = {severity: 0 for severity in SEVERITIES}
+    count_map = {
+        severity: previous_counts[severity] - replaced_counts[severity] + new_counts[severity]
+        for severity in SEVERITIES
+    }
+    total_records = sum(count_map.values())
 
     # -----------------------------------------------------------------
     #  Write results
     # -----------------------------------------------------------------
-    _write_scores_to_iceberg(scores_df)
-    _write_alerts_to_clickhouse(scores_df)
+    _write_scores_to_iceberg(scores_df, days_condition)
+    _write_alerts_to_clickhouse(scores_df, days)
+
+    rescored_days = len(days) if days is not None else 0
+    _save_state(spark, end_snapshot, count_map, rescored_days, full_rescore)
 
     # -----------------------------------------------------------------
     #  Log to MLflow
     # -----------------------------------------------------------------
-    _log_to_mlflow(total_records, scores_df)
+    _log_to_mlflow(total_records, count_map, scored_records, rescored_days, full_rescore)
 
     scores_df.unpersist()
     spark.stop()
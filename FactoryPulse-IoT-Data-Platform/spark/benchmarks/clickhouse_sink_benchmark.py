@@ -0,0 +1,198 @@
+"""
+FactoryPulse  --  Benchmark: Spark -> ClickHouse micro-batch sink
+=================================================================
+Compares the two ways a streaming micro-batch can land in ClickHouse:
+
+* ``driver``     -- the original path: ``df.collect()`` on the driver followed by
+                    a single row-oriented ``INSERT ... VALUES``.
+* ``columnar``   -- ``telemetry_stream._write_to_clickhouse``: every executor
+                    streams its partition as native columnar blocks tagged with
+                    an ``insert_deduplication_token``.
+
+For every trigger size a synthetic telemetry DataFrame is generated with
+``spark.range``, each path writes it into a fresh scratch table
+(``raw_telemetry_bench``, cloned from ``raw_telemetry``), and the row count is
+verified.  The columnar path is then replayed with the same batch id to prove
+that the replay is deduplicated; the script exits non-zero if a replay changes
+the row count.
+
+Usage (inside the spark-master container)::
+
+    spark-submit --master local[*] /opt/spark-apps/benchmarks/clickhouse_sink_benchmark.py
+
+Environment variables
+---------------------
+BENCH_ROW_COUNTS        Comma-separated trigger sizes (default: 10000,100000,1000000)
+BENCH_PARTITIONS        Partitions of the synthetic DataFrame (default: 3, like the Kafka topic)
+BENCH_OUTPUT            Optional path of a JSON file receiving the results
+"""
+
+import json
+import os
+import sys
+import time
+import logging
+
+from pyspark.sql import SparkSession, DataFrame
+from pyspark.sql import functions as F
+
+STREAMING_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "streaming")
+sys.path.insert(0, STREAMING_DIR)
+
+import telemetry_stream  # noqa: E402
+from telemetry_stream import SINK_COLUMNS, _write_to_clickhouse  # noqa: E402
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(message)s")
+log = logging.getLogger("clickhouse_sink_benchmark")
+
+# ---------------------------------------------------------------------------
+#  Configuration
+# ---------------------------------------------------------------------------
+ROW_COUNTS = [int(n) for n in os.getenv("BENCH_ROW_COUNTS", "10000,100000,1000000").split(",")]
+PARTITIONS = int(os.getenv("BENCH_PARTITIONS", "3"))
+OUTPUT_PATH = os.getenv("BENCH_OUTPUT", "")
+
+BENCH_TABLE = "raw_telemetry_bench"
+
+
+def _ch_client():
+    from clickhouse_driver import Client
+
+    return Client(
+        host=telemetry_stream.CLICKHOUSE_HOST,
+        port=telemetry_stream.CLICKHOUSE_PORT,
+        user=telemetry_stream.CLICKHOUSE_USER,
+        password=telemetry_stream.CLICKHOUSE_PASSWORD,
+        database="factory_pulse",
+    )
+
+
+def _reset_bench_table() -> None:
+    """Recreate the scratch table so deduplication state never leaks between runs."""
+    ch = _ch_client()
+    ch.execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    ch.execute(f"CREATE TABLE {BENCH_TABLE} AS raw_telemetry")
+    ch.disconnect()
+
+
+def _bench_row_count() -> int:
+    ch = _ch_client()
+    count = ch.execute(f"SELECT count() FROM {BENCH_TABLE}")[0][0]
+    ch.disconnect()
+    return count
+
+
+def _synthetic_batch(spark: SparkSession, rows: int) -> DataFrame:
+    """Build a telemetry-shaped DataFrame with ``rows`` rows."""
+    return (
+        spark.range(rows, numPartitions=PARTITIONS)
+        .select(
+            F.expr("uuid()").alias("event_id"),
+            F.format_string("DEV-%04d", F.col("id") % 1000).alias("device_id"),
+            F.lit("CNC_Mill").alias("device_type"),
+            F.lit("Zone_A").alias("location"),
+            F.expr("current_timestamp() - make_interval(0, 0, 0, 0, 0, 0, id % 86400)")
+            .alias("timestamp"),
+            (F.rand() * 60 + 40).alias("temperature"),
+            (F.rand() * 4).alias("vibration"),
+            (F.rand() * 200 + 50).alias("pressure"),
+            (F.rand() * 50 + 20).alias("humidity"),
+            (F.rand() * 100).alias("power_usage"),
+            (F.rand() * 3000).alias("rpm"),
+            F.when(F.col("id") % 50 == 0, F.lit("E101")).alias("error_code"),
+            F.current_timestamp().alias("ingested_at"),
+        )
+        .select(*SINK_COLUMNS)
+        .cache()
+    )
+
+
+def _write_via_driver(df: DataFrame, table: str) -> None:
+    """The original sink: collect on the driver, then one row-oriented INSERT."""
+    rows = [row.asDict() for row in df.collect()]
+    if not rows:
+        return
+    columns = list(rows[0].keys())
+    values = [[row[c] for c in columns] for row in rows]
+    col_str = ", ".join(columns)
+    ch = _ch_client()
+    ch.execute(f"INSERT INTO {table} ({col_str}) VALUES", values)
+    ch.disconnect()
+
+
+def _timed(label: str, rows: int, write) -> dict:
+    _reset_bench_table()
+    started = time.perf_counter()
+    try:
+        write()
+    except Exception as exc:  # e.g. driver OOM on the legacy path at 1M rows
+        log.error("%s failed at %d rows: %s", label, rows, exc)
+        return {"path": label, "rows": rows, "seconds": None, "rows_per_sec": None,
+                "error": str(exc)}
+    elapsed = time.perf_counter() - started
+
+    written = _bench_row_count()
+    if written != rows:
+        log.warning("%s wrote %d rows, expected %d.", label, written, rows)
+    return {
+        "path": label,
+        "rows": rows,
+        "seconds": round(elapsed, 3),
+        "rows_per_sec": round(rows / elapsed) if elapsed > 0 else None,
+        "written": written,
+    }
+
+
+def main() -> None:
+    spark = SparkSession.builder.appName("FactoryPulse-ClickHouseSinkBenchmark").getOrCreate()
+    # The partition writer is pickled by reference, so executors must import it too.
+    spark.sparkContext.addPyFile(os.path.join(STREAMING_DIR, "telemetry_stream.py"))
+    results = []
+    replay_failures = 0
+
+    for rows in ROW_COUNTS:
+        df = _synthetic_batch(spark, rows)
+        df.count()  # materialise the cache so only the sink is timed
+
+        results.append(_timed("driver", rows, lambda: _write_via_driver(df, BENCH_TABLE)))
+
+        batch_id = int(time.time() * 1000)
+        columnar = _timed(
+            "columnar", rows, lambda: _write_to_clickhouse(df, BENCH_TABLE, batch_id)
+        )
+        if columnar.get("error") is None:
+            _write_to_clickhouse(df, BENCH_TABLE, batch_id)
+            after_replay = _bench_row_count()
+            columnar["rows_after_replay"] = after_replay
+            if after_replay != columnar["written"]:
+                replay_failures += 1
+                log.error(
+                    "Replaying batch %d changed the row count from %d to %d; "
+                    "the replay was not deduplicated.",
+                    batch_id, columnar["written"], after_replay,
+                )
+        results.append(columnar)
+
+        df.unpersist()
+
+    _ch_client().execute(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+
+    log.info("%-10s %10s %10s %14s", "path", "rows", "seconds", "rows/sec")
+    for r in results:
+        log.info(
+            "%-10s %10d %10s %14s",
+            r["path"], r["rows"], r["seconds"] or "failed", r["rows_per_sec"] or "-",
+        )
+
+    if OUTPUT_PATH:
+        with open(OUTPUT_PATH, "w") as fh:
+            json.dump(results, fh, indent=2)
+        log.info("Results written to %s", OUTPUT_PATH)
+
+    spark.stop()
+    if replay_failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
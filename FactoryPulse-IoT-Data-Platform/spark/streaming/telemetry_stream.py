@@ -12,6 +12,8 @@ Environment variables
 KAFKA_BROKER            Kafka bootstrap servers  (default: kafka:9092)
 AWS_ACCESS_KEY_ID       MinIO / S3 access key
 AWS_SECRET_ACCESS_KEY   MinIO / S3 secret key
+CLICKHOUSE_INSERT_BLOCK_SIZE
+                        Rows per native columnar INSERT block (default: 100000)
 """
 
 import os
@@ -41,8 +43,11 @@ AWS_SECRET_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "minioadmin")
 
 MINIO_ENDPOINT = "http://minio:9000"
 ICEBERG_REST_URI = "http://iceberg-rest:8181"
+CLICKHOUSE_HOST = "clickhouse"
+CLICKHOUSE_PORT = 9000
 CLICKHOUSE_USER = os.getenv("CLICKHOUSE_USER", "default")
 CLICKHOUSE_PASSWORD = os.getenv("CLICKHOUSE_PASSWORD", "clickhouse")
+CLICKHOUSE_INSERT_BLOCK_SIZE = int(os.getenv("CLICKHOUSE_INSERT_BLOCK_SIZE", "100000"))
 
 CHECKPOINT_LOCATION = "s3a://factory-curated/checkpoints/telemetry_stream"
 
@@ -66,6 +71,23 @@ TELEMETRY_SCHEMA = StructType(
     ]
 )
 
+# Column order shared by the Iceberg append and the ClickHouse insert.
+SINK_COLUMNS = (
+    "event_id",
+    "device_id",
+    "device_type",
+    "location",
+    "timestamp",
+    "temperature",
+    "vibration",
+    "pressure",
+    "humidity",
+    "power_usage",
+    "rpm",
+    "error_code",
+    "ingested_at",
+)
+
 
 def _build_spark_session() -> SparkSession:
     """Create a SparkSession configured for Iceberg + S3 (MinIO) + Kafka."""
@@ -133,45 +155,79 @@ def _ensure_namespace_and_table(spark: SparkSession) -> None:
     log.info("Iceberg namespace and table factory_db.factory_db.raw_telemetry are ready.")
 
 
-def _write_to_clickhouse(df: DataFrame, table: str) -> None:
-    """Append a static DataFrame into a ClickHouse table."""
-    from clickhouse_driver import Client
+def _clickhouse_partition_writer(table: str, columns: tuple, batch_id: int, block_size: int):
+    """Build the ``foreachPartition`` callback that streams one partition into ClickHouse.
 
-    rows = [row.asDict() for row in df.collect()]
-    if not rows:
-        return
+    Runs on the executors: rows are accumulated into per-column lists and sent
+    as native columnar blocks of at most ``block_size`` rows, so neither the
+    driver nor the executor ever holds more than one block in memory.
 
-    client = Client(
-        host="clickhouse",
-        port=9000,
-        user=CLICKHOUSE_USER,
-        password=CLICKHOUSE_PASSWORD,
-        database="factory_pulse",
-    )
-    columns = list(rows[0].keys())
-    values = [[row[c] for c in columns] for row in rows]
+    Every block carries an ``insert_deduplication_token`` derived from the
+    micro-batch id, the Spark partition id and the block index.  A replayed
+    ``foreachBatch`` re-reads the same Kafka offsets into the same partitions,
+    so ClickHouse recognises the repeated blocks and drops them.
+    """
     col_str = ", ".join(columns)
+    insert_sql = f"INSERT INTO {table} ({col_str}) VALUES"
+
+    def write_partition(rows) -> None:
+        from clickhouse_driver import Client
+        from pyspark import TaskContext
+
+        partition_id = TaskContext.get().partitionId()
+        client = None
+        block = [[] for _ in columns]
+        block_index = 0
+
+        def flush() -> None:
+            nonlocal client, block, block_index
+            if client is None:
+                client = Client(
+                    host=CLICKHOUSE_HOST,
+                    port=CLICKHOUSE_PORT,
+                    user=CLICKHOUSE_USER,
+                    password=CLICKHOUSE_PASSWORD,
+                    database="factory_pulse",
+                )
+            token = f"{table}:{batch_id}:{partition_id}:{block_index}"
+            client.execute(
+                insert_sql,
+                block,
+                columnar=True,
+                settings={"insert_deduplication_token": token},
+            )
+            block = [[] for _ in columns]
+            block_index += 1
+
+        try:
+            for row in rows:
+                for values, value in zip(block, row):
+                    values.append(value)
+                if len(block[0]) >= block_size:
+                    flush()
+            if block[0]:
+                flush()
+        finally:
+            if client is not None:
+                client.disconnect()
+
+    return write_partition
+
+
+def _write_to_clickhouse(df: DataFrame, table: str, batch_id: int) -> None:
+    """Append a static DataFrame into a ClickHouse table from every executor in parallel."""
     short_table = table.split(".")[-1]
-    client.execute(f"INSERT INTO {short_table} ({col_str}) VALUES", values)
+    projected = df.select(*SINK_COLUMNS)
+    projected.foreachPartition(
+        _clickhouse_partition_writer(
+            short_table, SINK_COLUMNS, batch_id, CLICKHOUSE_INSERT_BLOCK_SIZE
+        )
+    )
 
 
 def _write_microbatch(batch_df: DataFrame, batch_id: int) -> None:
     """Persist each micro-batch to both Iceberg and ClickHouse."""
-    projected = batch_df.select(
-        "event_id",
-        "device_id",
-        "device_type",
-        "location",
-        "timestamp",
-        "temperature",
-        "vibration",
-        "pressure",
-        "humidity",
-        "power_usage",
-        "rpm",
-        "error_code",
-        "ingested_at",
-    ).cache()
+    projected = batch_df.select(*SINK_COLUMNS).cache()
 
     row_count = projected.count()
     if row_count == 0:
@@ -180,7 +236,7 @@ def _write_microbatch(batch_df: DataFrame, batch_id: int) -> None:
         return
 
     projected.writeTo("factory_db.factory_db.raw_telemetry").append()
-    _write_to_clickhouse(projected, "factory_pulse.raw_telemetry")
+    _write_to_clickhouse(projected, "factory_pulse.raw_telemetry", batch_id)
     projected.unpersist()
     log.info("Streaming micro-batch %s wrote %d rows.", batch_id, row_count)
 
@@ -2,20 +2,24 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
 import sys
+import time
 from pathlib import Path
-from typing import Annotated, Any, TypedDict
+from typing import Annotated, Any, AsyncIterator, TypedDict
 
 _PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
-from langgraph.graph import END, StateGraph
-from langgraph.graph.message import add_messages
+from langgraph.config import get_stream_writer  # noqa: E402
+from langgraph.graph import END, StateGraph  # noqa: E402
+from langgraph.graph.message import add_messages  # noqa: E402
 
-from shared.config import get_settings
-from shared.llm_backend import LLMClient, LLMMessage, create_llm_client
-from shared.logging import get_logger
+from shared.config import get_settings  # noqa: E402
+from shared.llm_backend import LLMClient, LLMMessage, create_llm_client  # noqa: E402
+from shared.logging import get_logger  # noqa: E402
 
 logger = get_logger(__name__)
 settings = get_settings()
@@ -26,43 +30,78 @@ class AgentState(TypedDict):
     session_id: str
     use_tools: bool
     use_rag: bool
+    stream: bool
+    plan: list[str]
     rag_context: str
+    sources: list[str]
     tool_results: list[dict]
     final_response: str
 
 
+_ROLES = {"human": "user", "ai": "assistant", "system": "system", "tool": "tool"}
+
+
+def _message_role(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("role", "user")
+    return _ROLES.get(getattr(message, "type", ""), "user")
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        return message.get("content", "")
+    return str(getattr(message, "content", message))
+
+
+def _to_llm_messages(messages: list) -> list[LLMMessage]:
+    return [LLMMessage(role=_message_role(m), content=_message_text(m)) for m in messages]
+
+
 class AgentGraph:
-    """LangGraph-based agent with pluggable LLM backend."""
+    """LangGraph-based agent with pluggable LLM backend.
+
+    The ``plan`` node decides which branches a turn needs; retrieval and tool
+    calling run as parallel branches that join at ``generate``.  Inside the
+    tool branch every tool call the LLM asks for runs concurrently, each under
+    its own timeout (a tool's ``timeout`` attribute, else ``tool_timeout_s``).
+    A failed or timed-out step is recorded with its status and the turn
+    continues with whatever did return.
+
+    ``run_stream`` drives the same graph and yields progress events from the
+    nodes (plan, retrieval, tool start/end) followed by generation tokens.
+    """
 
     def __init__(
         self,
         llm_client: LLMClient | None = None,
         rag_client: Any = None,
         tool_registry: dict[str, Any] | None = None,
+        tool_timeout_s: float | None = None,
+        retrieval_timeout_s: float | None = None,
+        max_parallel_tools: int | None = None,
     ):
         self.llm = llm_client or create_llm_client()
         self.rag_client = rag_client
         self.tool_registry = tool_registry or {}
+        self.tool_timeout_s = tool_timeout_s or settings.agent_tool_timeout_s
+        self.retrieval_timeout_s = retrieval_timeout_s or settings.agent_retrieval_timeout_s
+        self.max_parallel_tools = max_parallel_tools or settings.agent_max_parallel_tools
         self.graph = self._build_graph()
 
     def _build_graph(self) -> StateGraph:
         graph = StateGraph(AgentState)
 
-        graph.add_node("route", self._route_node)
+        graph.add_node("plan", self._plan_node)
         graph.add_node("retrieve", self._retrieve_node)
         graph.add_node("call_tools", self._tool_node)
         graph.add_node("generate", self._generate_node)
 
-        graph.set_entry_point("route")
+        graph.set_entry_point("plan")
 
         graph.add_conditional_edges(
-            "route",
-            self._should_retrieve_or_generate,
-            {
-                "retrieve": "retrieve",
-                "call_tools": "call_tools",
-                "generate": "generate",
-            },
+            "plan",
+            self._dispatch,
+            ["retrieve", "call_tools", "generate"],
         )
         graph.add_edge("retrieve", "generate")
         graph.add_edge("call_tools", "generate")
@@ -70,43 +109,59 @@ class AgentGraph:
 
         return graph.compile()
 
-    async def _route_node(self, state: AgentState) -> AgentState:
-        logger.debug("routing", session_id=state.get("session_id"))
-        return state
-
-    def _should_retrieve_or_generate(self, state: AgentState) -> str:
+    def _plan(self, state: AgentState) -> list[str]:
+        steps = []
         if state.get("use_rag") and self.rag_client:
-            return "retrieve"
+            steps.append("retrieve")
         if state.get("use_tools") and self.tool_registry:
-            return "call_tools"
-        return "generate"
+            steps.append("call_tools")
+        return steps
+
+    async def _plan_node(self, state: AgentState) -> dict:
+        plan = self._plan(state)
+        logger.debug("planned", session_id=state.get("session_id"), steps=plan)
+        get_stream_writer()({"type": "plan", "steps": plan})
+        return {"plan": plan}
+
+    def _dispatch(self, state: AgentState) -> list[str]:
+        """Fan out to every planned branch; LangGraph runs them concurrently."""
+        return state.get("plan") or ["generate"]
 
     async def _retrieve_node(self, state: AgentState) -> dict:
         messages = state.get("messages", [])
-        last_msg = messages[-1] if messages else {}
-        query = last_msg.get("content", "") if isinstance(last_msg, dict) else str(last_msg)
+        query = _message_text(messages[-1]) if messages else ""
 
         context = ""
+        sources: list[str] = []
+        status = "ok"
+        started = time.perf_counter()
         if self.rag_client:
             try:
-                chunks = await self.rag_client.retrieve(query, top_k=3)
+                chunks = await asyncio.wait_for(
+                    self.rag_client.retrieve(query, top_k=3), self.retrieval_timeout_s
+                )
                 context = "\n\n".join(
                     f"[Source: {c.get('document_id', 'unknown')}]\n{c.get('content', '')}"
                     for c in chunks
                 )
+                sources = list(dict.fromkeys(c.get("document_id", "unknown") for c in chunks))
+            except asyncio.TimeoutError:
+                logger.warning("rag_retrieve_timeout", timeout_s=self.retrieval_timeout_s)
+                status = "timeout"
             except Exception as e:
                 logger.error("rag_retrieve_error", error=str(e))
-                context = ""
-
-        return {"rag_context": context}
-
-    async def _tool_node(self, state: AgentState) -> dict:
-        messages = state.get("messages", [])
-        last_msg = messages[-1] if messages else {}
-        user_text = last_msg.get("content", "") if isinstance(last_msg, dict) else str(last_msg)
-
-        # Ask the LLM if it wants to use any tools
-        tool_definitions = [
+                status = "error"
+
+        get_stream_writer()({
+            "type": "retrieval",
+            "status": status,
+            "sources": sources,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1),
+        })
+        return {"rag_context": context, "sources": sources}
+
+    def _tool_definitions(self) -> list[dict]:
+        return [
             {
                 "type": "function",
                 "function": {
@@ -118,33 +173,52 @@ class AgentGraph:
             for name, tool in self.tool_registry.items()
         ]
 
-        llm_messages = [LLMMessage(role=m.get("role", "user"), content=m.get("content", "")) for m in messages]
-        response = await self.llm.chat(llm_messages, tools=tool_definitions)
-
-        tool_results = []
-        if response.tool_calls:
-            for tc in response.tool_calls:
-                func_name = tc.get("function", {}).get("name", "")
-                func_args = tc.get("function", {}).get("arguments", "{}")
-                tool = self.tool_registry.get(func_name)
-                if tool:
-                    try:
-                        import json
-                        args = json.loads(func_args) if isinstance(func_args, str) else func_args
-                        result = await tool.execute(**args) if hasattr(tool, "execute") else str(tool)
-                        tool_results.append({
-                            "tool_name": func_name,
-                            "arguments": func_args,
-                            "result": str(result),
-                        })
-                    except Exception as e:
-                        tool_results.append({
-                            "tool_name": func_name,
-                            "arguments": func_args,
-                            "result": f"Error: {e}",
-                        })
-
-        return {"tool_results": tool_results}
+    async def _run_tool(self, call: dict, slots: asyncio.Semaphore, writer) -> dict | None:
+        func_name = call.get("function", {}).get("name", "")
+        func_args = call.get("function", {}).get("arguments", "{}")
+        tool = self.tool_registry.get(func_name)
+        if tool is None:
+            return None
+
+        timeout = getattr(tool, "timeout", None) or self.tool_timeout_s
+        started = time.perf_counter()
+        async with slots:
+            writer({"type": "tool_start", "tool_name": func_name, "arguments": func_args})
+            try:
+                args = json.loads(func_args) if isinstance(func_args, str) else func_args
+                if hasattr(tool, "execute"):
+                    result = await asyncio.wait_for(tool.execute(**args), timeout)
+                else:
+                    result = str(tool)
+                status = "ok"
+            except asyncio.TimeoutError:
+                result, status = f"Error: timed out after {timeout:g}s", "timeout"
+            except Exception as e:
+                result, status = f"Error: {e}", "error"
+        latency_ms = round((time.perf_counter() - started) * 1000, 1)
+        logger.info("tool_call", tool=func_name, status=status, latency_ms=latency_ms)
+        writer(
+            {"type": "tool_end", "tool_name": func_name, "status": status, "latency_ms": latency_ms}
+        )
+        return {
+            "tool_name": func_name,
+            "arguments": func_args,
+            "result": str(result),
+            "status": status,
+            "latency_ms": latency_ms,
+        }
+
+    async def _tool_node(self, state: AgentState) -> dict:
+        # Ask the LLM which tools it wants, then run them all at once.
+        llm_messages = _to_llm_messages(state.get("messages", []))
+        response = await self.llm.chat(llm_messages, tools=self._tool_definitions())
+
+        slots = asyncio.Semaphore(self.max_parallel_tools)
+        writer = get_stream_writer()
+        results = await asyncio.gather(
+            *(self._run_tool(tc, slots, writer) for tc in response.tool_calls or [])
+        )
+        return {"tool_results": [r for r in results if r is not None]}
 
     async def _generate_node(self, state: AgentState) -> dict:
         messages = state.get("messages", [])
@@ -162,69 +236,97 @@ class AgentGraph:
 
         if tool_results:
             tool_info = "\n".join(
-                f"Tool '{tr['tool_name']}' returned: {tr['result']}" for tr in tool_results
+                f"Tool '{tr['tool_name']}' returned: {tr['result']}"
+                if tr.get("status", "ok") == "ok"
+                else f"Tool '{tr['tool_name']}' is unavailable ({tr['result']}); "
+                "say so if the answer depends on it."
+                for tr in tool_results
             )
             system_prompt += f"\n\nTool results:\n{tool_info}"
 
         llm_messages = [LLMMessage(role="system", content=system_prompt)]
-        for m in messages:
-            role = m.get("role", "user") if isinstance(m, dict) else "user"
-            content = m.get("content", "") if isinstance(m, dict) else str(m)
-            llm_messages.append(LLMMessage(role=role, content=content))
+        llm_messages.extend(_to_llm_messages(messages))
 
-        response = await self.llm.chat(llm_messages)
-        return {"final_response": response.content}
+        if not state.get("stream"):
+            response = await self.llm.chat(llm_messages)
+            return {"final_response": response.content}
 
-    async def run(
+        writer = get_stream_writer()
+        parts = []
+        async for token in self.llm.stream(llm_messages):
+            parts.append(token)
+            writer({"type": "token", "token": token})
+        return {"final_response": "".join(parts)}
+
+    def _initial_state(
         self,
         session_id: str,
         message: str,
-        history: list[dict] | None = None,
-        use_tools: bool = True,
-        use_rag: bool = True,
-    ) -> dict:
+        history: list[dict] | None,
+        use_tools: bool,
+        use_rag: bool,
+        stream: bool,
+    ) -> AgentState:
         messages = list(history or [])
         messages.append({"role": "user", "content": message})
-
-        initial_state: AgentState = {
+        return {
             "messages": messages,
             "session_id": session_id,
             "use_tools": use_tools,
             "use_rag": use_rag,
+            "stream": stream,
+            "plan": [],
             "rag_context": "",
+            "sources": [],
             "tool_results": [],
             "final_response": "",
         }
 
-        result = await self.graph.ainvoke(initial_state)
+    @staticmethod
+    def _result(state: dict) -> dict:
         return {
-            "content": result.get("final_response", ""),
-            "tool_calls": result.get("tool_results", []),
-            "sources": [],
+            "content": state.get("final_response", ""),
+            "tool_calls": state.get("tool_results", []),
+            "sources": state.get("sources", []),
         }
 
-    async def run_stream(
+    async def run(
         self,
         session_id: str,
         message: str,
         history: list[dict] | None = None,
         use_tools: bool = True,
         use_rag: bool = True,
-    ):
-        """Stream the final generation step."""
-        messages = list(history or [])
-        messages.append({"role": "user", "content": message})
-
-        system_prompt = (
-            "You are Local-AIOps-Copilot, an AI assistant for infrastructure operations, "
-            "MLOps, and release management."
+    ) -> dict:
+        initial_state = self._initial_state(
+            session_id, message, history, use_tools, use_rag, stream=False
         )
+        result = await self.graph.ainvoke(initial_state)
+        return self._result(result)
 
-        llm_messages = [LLMMessage(role="system", content=system_prompt)]
-        for m in messages:
-            role = m.get("role", "user") if isinstance(m, dict) else "user"
-            content = m.get("content", "") if isinstance(m, dict) else str(m)
-            llm_messages.append(LLMMessage(role=role, content=content))
-
-        async for token in self.llm.stream(llm_messages):
-            yield token
+    async def run_stream(
+        self,
+        session_id: str,
+        message: str,
+        history: list[dict] | None = None,
+        use_tools: bool = True,
+        use_rag: bool = True,
+    ) -> AsyncIterator[dict]:
+        """Run the full graph, yielding progress events and generation tokens.
+
+        Events are dicts with a ``type`` of ``plan``, ``retrieval``,
+        ``tool_start``, ``tool_end`` or ``token``; the last event is ``done``
+        and carries the same fields as :meth:`run` returns.
+        """
+        initial_state = self._initial_state(
+            session_id, message, history, use_tools, use_rag, stream=True
+        )
+        final_state: dict = initial_state
+        async for mode, chunk in self.graph.astream(
+            initial_state, stream_mode=["custom", "values"]
+        ):
+            if mode == "custom":
+                yield chunk
+            else:
+                final_state = chunk
+        yield {"type": "done", **self._result(final_state)}
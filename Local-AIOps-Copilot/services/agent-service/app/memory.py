@@ -1,42 +1,154 @@
-"""Redis-backed conversation memory for the agent service."""
+"""Redis-backed conversation memory for the agent service.
+
+Both stores keep at most ``max_history`` messages per session and can
+optionally compact long sessions: once a session holds more than
+``compact_after`` messages, :meth:`compact` folds everything except the last
+``keep_recent`` messages into a rolling summary, which :meth:`get_history`
+returns as a leading system message.  That keeps the prompt, and therefore
+generation latency, bounded however long the session runs.
+"""
 
 from __future__ import annotations
 
 import json
-from typing import Any
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable
 
 import redis.asyncio as redis
+from redis.exceptions import WatchError
 
+from shared.llm_backend import LLMClient, LLMMessage
 from shared.logging import get_logger
 
 logger = get_logger(__name__)
 
+# (previous summary, turns to fold in) -> new summary
+Summarizer = Callable[[str, list[dict]], Awaitable[str]]
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+class LLMSummarizer:
+    """Rolling summarizer that asks the configured LLM backend to fold in turns."""
+
+    def __init__(self, llm_client: LLMClient, max_tokens: int = 256):
+        self.llm = llm_client
+        self.max_tokens = max_tokens
+
+    async def __call__(self, summary: str, turns: list[dict]) -> str:
+        transcript = "\n".join(f"{t['role']}: {t['content']}" for t in turns)
+        prompt = (
+            f"Current summary:\n{summary or '(none)'}\n\n"
+            f"New conversation turns:\n{transcript}\n\n"
+            "Rewrite the summary so it also covers the new turns. Keep hosts, "
+            "services, commands, numbers and decisions; drop pleasantries."
+        )
+        response = await self.llm.chat(
+            [
+                LLMMessage(role="system", content="You summarize operations conversations."),
+                LLMMessage(role="user", content=prompt),
+            ],
+            temperature=0.0,
+            max_tokens=self.max_tokens,
+        )
+        return response.content.strip()
+
+
+def _with_summary(summary: str, messages: list[dict]) -> list[dict]:
+    if not summary:
+        return messages
+    return [{"role": "system", "content": SUMMARY_PREFIX + summary}, *messages]
+
 
 class ConversationMemory:
-    """Stores conversation history per session in Redis."""
+    """Stores conversation history per session in Redis.
 
-    def __init__(self, redis_url: str, max_history: int = 50, ttl_seconds: int = 3600):
-        self._redis = redis.from_url(redis_url, decode_responses=True)
+    Every write is one MULTI/EXEC round trip (append, trim, refresh TTL).
+    """
+
+    def __init__(
+        self,
+        redis_url: str | None = None,
+        max_history: int = 50,
+        ttl_seconds: int = 3600,
+        summarizer: Summarizer | None = None,
+        compact_after: int = 0,
+        keep_recent: int = 6,
+        client: Any = None,
+    ):
+        self._redis = client or redis.from_url(redis_url, decode_responses=True)
         self._max_history = max_history
         self._ttl = ttl_seconds
+        self._summarizer = summarizer
+        self._compact_after = compact_after
+        self._keep_recent = keep_recent
 
     def _key(self, session_id: str) -> str:
         return f"copilot:chat:{session_id}"
 
+    def _summary_key(self, session_id: str) -> str:
+        return f"copilot:chat:{session_id}:summary"
+
     async def add_message(self, session_id: str, role: str, content: str):
+        await self.add_messages(session_id, [{"role": role, "content": content}])
+
+    async def add_messages(self, session_id: str, messages: list[dict]):
+        """Append several messages (e.g. a user/assistant turn) in one round trip."""
         key = self._key(session_id)
-        msg = json.dumps({"role": role, "content": content})
-        await self._redis.rpush(key, msg)
-        await self._redis.ltrim(key, -self._max_history, -1)
-        await self._redis.expire(key, self._ttl)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.rpush(key, *(json.dumps(m) for m in messages))
+            pipe.ltrim(key, -self._max_history, -1)
+            pipe.expire(key, self._ttl)
+            pipe.expire(self._summary_key(session_id), self._ttl)
+            await pipe.execute()
 
     async def get_history(self, session_id: str) -> list[dict]:
-        key = self._key(session_id)
-        raw = await self._redis.lrange(key, 0, -1)
-        return [json.loads(m) for m in raw]
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.get(self._summary_key(session_id))
+            pipe.lrange(self._key(session_id), 0, -1)
+            summary, raw = await pipe.execute()
+        return _with_summary(summary or "", [json.loads(m) for m in raw])
+
+    async def compact(self, session_id: str) -> bool:
+        """Fold old turns into the rolling summary; returns True if it compacted.
+
+        The summarizer runs outside any transaction.  The trim then only
+        commits if the summarized prefix is still the head of the list, so a
+        concurrent append or trim makes this a no-op rather than losing turns.
+        """
+        if self._summarizer is None or self._compact_after <= 0:
+            return False
+        key, summary_key = self._key(session_id), self._summary_key(session_id)
+        if await self._redis.llen(key) <= self._compact_after:
+            return False
+
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.get(summary_key)
+            pipe.lrange(key, 0, -self._keep_recent - 1)
+            summary, old = await pipe.execute()
+        if not old:
+            return False
+        new_summary = await self._summarizer(summary or "", [json.loads(m) for m in old])
+
+        async with self._redis.pipeline(transaction=True) as pipe:
+            try:
+                await pipe.watch(key, summary_key)
+                head = await pipe.lrange(key, 0, len(old) - 1)
+                if head != old or await pipe.get(summary_key) != summary:
+                    return False
+                pipe.multi()
+                pipe.ltrim(key, len(old), -1)
+                pipe.set(summary_key, new_summary, ex=self._ttl)
+                await pipe.execute()
+            except WatchError:
+                return False
+        logger.info("memory_compacted", session_id=session_id, folded=len(old))
+        return True
 
     async def clear(self, session_id: str):
-        await self._redis.delete(self._key(session_id))
+        await self._redis.delete(self._key(session_id), self._summary_key(session_id))
 
     async def health_check(self) -> bool:
         try:
@@ -49,21 +161,95 @@ class ConversationMemory:
         await self._redis.aclose()
 
 
+@dataclass
+class _Session:
+    messages: list[dict] = field(default_factory=list)
+    summary: str = ""
+    expires_at: float = 0.0
+
+
 class InMemoryConversationMemory:
-    """Fallback in-memory store when Redis is unavailable."""
+    """Fallback in-memory store when Redis is unavailable.
+
+    Sessions expire ``ttl_seconds`` after their last write, and at most
+    ``max_sessions`` are kept; the least recently used session is evicted
+    first.
+    """
 
-    def __init__(self, max_history: int = 50):
-        self._store: dict[str, list[dict]] = {}
+    def __init__(
+        self,
+        max_history: int = 50,
+        ttl_seconds: float = 3600,
+        max_sessions: int = 1000,
+        summarizer: Summarizer | None = None,
+        compact_after: int = 0,
+        keep_recent: int = 6,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._store: OrderedDict[str, _Session] = OrderedDict()
         self._max_history = max_history
+        self._ttl = ttl_seconds
+        self._max_sessions = max_sessions
+        self._summarizer = summarizer
+        self._compact_after = compact_after
+        self._keep_recent = keep_recent
+        self._clock = clock
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def _get(self, session_id: str) -> _Session | None:
+        session = self._store.get(session_id)
+        if session is None:
+            return None
+        if session.expires_at <= self._clock():
+            del self._store[session_id]
+            return None
+        self._store.move_to_end(session_id)
+        return session
+
+    def _evict(self):
+        now = self._clock()
+        for session_id in [s for s, v in self._store.items() if v.expires_at <= now]:
+            del self._store[session_id]
+        while len(self._store) > self._max_sessions:
+            evicted, _ = self._store.popitem(last=False)
+            logger.debug("memory_session_evicted", session_id=evicted)
 
     async def add_message(self, session_id: str, role: str, content: str):
-        if session_id not in self._store:
-            self._store[session_id] = []
-        self._store[session_id].append({"role": role, "content": content})
-        self._store[session_id] = self._store[session_id][-self._max_history:]
+        await self.add_messages(session_id, [{"role": role, "content": content}])
+
+    async def add_messages(self, session_id: str, messages: list[dict]):
+        session = self._get(session_id)
+        if session is None:
+            session = self._store[session_id] = _Session()
+        session.messages.extend(dict(m) for m in messages)
+        del session.messages[: -self._max_history]
+        session.expires_at = self._clock() + self._ttl
+        if len(self._store) > self._max_sessions:
+            self._evict()
 
     async def get_history(self, session_id: str) -> list[dict]:
-        return list(self._store.get(session_id, []))
+        session = self._get(session_id)
+        if session is None:
+            return []
+        return _with_summary(session.summary, list(session.messages))
+
+    async def compact(self, session_id: str) -> bool:
+        if self._summarizer is None or self._compact_after <= 0:
+            return False
+        session = self._get(session_id)
+        if session is None or len(session.messages) <= self._compact_after:
+            return False
+        old = session.messages[: -self._keep_recent or None]
+        summary = await self._summarizer(session.summary, old)
+        # Messages appended while summarizing stay, since only the folded prefix is dropped.
+        if session.messages[: len(old)] != old:
+            return False
+        del session.messages[: len(old)]
+        session.summary = summary
+        logger.info("memory_compacted", session_id=session_id, folded=len(old))
+        return True
 
     async def clear(self, session_id: str):
         self._store.pop(session_id, None)
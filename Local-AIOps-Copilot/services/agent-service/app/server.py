@@ -18,7 +18,7 @@ from shared.llm_backend import create_llm_client
 from shared.logging import setup_logging, get_logger
 from shared.metrics import setup_metrics
 from app.graph import AgentGraph
-from app.memory import ConversationMemory, InMemoryConversationMemory
+from app.memory import ConversationMemory, InMemoryConversationMemory, LLMSummarizer
 
 settings = get_settings()
 setup_logging(settings.log_level, settings.log_format, "agent-service")
@@ -26,17 +26,62 @@ logger = get_logger(__name__)
 metrics = setup_metrics("agent-service")
 
 
+def _progress_event(agent_pb2, event: dict):
+    """Convert an ``AgentGraph.run_stream`` event into a ProgressEvent message."""
+    return agent_pb2.ProgressEvent(
+        stage=event["type"],
+        name=event.get("tool_name", ""),
+        status=event.get("status", ""),
+        latency_ms=event.get("latency_ms", 0.0),
+        items=event.get("steps") or event.get("sources") or [],
+        detail=str(event.get("arguments", "")),
+    )
+
+
 class AgentServicer:
     """gRPC servicer that wraps the LangGraph agent."""
 
     def __init__(self):
         self.llm_client = create_llm_client()
         self.agent = AgentGraph(llm_client=self.llm_client)
+        compaction = {
+            "summarizer": LLMSummarizer(self.llm_client),
+            "compact_after": settings.memory_compact_after,
+            "keep_recent": settings.memory_keep_recent,
+        }
         try:
-            self.memory = ConversationMemory(settings.redis_url)
+            self.memory = ConversationMemory(
+                settings.redis_url,
+                max_history=settings.memory_max_history,
+                ttl_seconds=settings.memory_ttl_s,
+                **compaction,
+            )
         except Exception:
             logger.warning("redis_unavailable", msg="Using in-memory fallback")
-            self.memory = InMemoryConversationMemory()
+            self.memory = InMemoryConversationMemory(
+                max_history=settings.memory_max_history,
+                ttl_seconds=settings.memory_ttl_s,
+                max_sessions=settings.memory_max_sessions,
+                **compaction,
+            )
+        self._background: set[asyncio.Task] = set()
+
+    async def _remember(self, session_id: str, user_message: str, reply: str):
+        await self.memory.add_messages(
+            session_id,
+            [{"role": "user", "content": user_message}, {"role": "assistant", "content": reply}],
+        )
+        if settings.memory_compact_after > 0:
+            # Summarizing costs an LLM call; keep it off the response path.
+            task = asyncio.create_task(self._compact(session_id))
+            self._background.add(task)
+            task.add_done_callback(self._background.discard)
+
+    async def _compact(self, session_id: str):
+        try:
+            await self.memory.compact(session_id)
+        except Exception as e:
+            logger.warning("memory_compaction_failed", session_id=session_id, error=str(e))
 
     async def Chat(self, request, context):
         try:
@@ -50,8 +95,7 @@ class AgentServicer:
                 use_tools=request.use_tools,
                 use_rag=request.use_rag,
             )
-            await self.memory.add_message(request.session_id, "user", request.user_message)
-            await self.memory.add_message(request.session_id, "assistant", result["content"])
+            await self._remember(request.session_id, request.user_message, result["content"])
 
             metrics.llm_request_count.labels(
                 self.llm_client.backend_name, self.llm_client.model_name
@@ -86,15 +130,27 @@ class AgentServicer:
             from shared.grpc_common import agent_pb2
 
             history = await self.memory.get_history(request.session_id)
-            async for token in self.agent.run_stream(
+            async for event in self.agent.run_stream(
                 session_id=request.session_id,
                 message=request.user_message,
                 history=history,
                 use_tools=request.use_tools,
                 use_rag=request.use_rag,
             ):
-                yield agent_pb2.ChatToken(token=token, is_final=False)
-            yield agent_pb2.ChatToken(token="", is_final=True)
+                if event["type"] == "token":
+                    yield agent_pb2.ChatToken(token=event["token"], is_final=False)
+                elif event["type"] == "done":
+                    await self._remember(
+                        request.session_id, request.user_message, event["content"]
+                    )
+                    metrics.llm_request_count.labels(
+                        self.llm_client.backend_name, self.llm_client.model_name
+                    ).inc()
+                    yield agent_pb2.ChatToken(
+                        token="", is_final=True, progress=_progress_event(agent_pb2, event)
+                    )
+                else:
+                    yield agent_pb2.ChatToken(progress=_progress_event(agent_pb2, event))
         except Exception as e:
             logger.error("stream_chat_error", error=str(e))
             from shared.grpc_common import agent_pb2
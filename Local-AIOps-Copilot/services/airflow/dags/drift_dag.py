@@ -22,12 +22,14 @@ def detect_drift(**context):
 
     eval_url = "http://eval-service:50054"
     release_id = context["params"].get("release_id", "active")
+    baseline_release_id = context["params"].get("baseline_release_id", "previous")
 
     try:
         resp = httpx.post(
             f"{eval_url}/api/v1/drift",
             json={
                 "release_id": release_id,
+                "baseline_release_id": baseline_release_id,
                 "window_hours": 24,
             },
             timeout=120,
@@ -59,5 +61,5 @@ with DAG(
     drift_task = PythonOperator(
         task_id="detect_drift",
         python_callable=detect_drift,
-        params={"release_id": "active"},
+        params={"release_id": "active", "baseline_release_id": "previous"},
     )
@@ -19,6 +19,22 @@ default_args = {
 }
 
 
+CONTROLLER_URL = "http://release-controller:50055"
+
+
+def _record_on_controller(release_id: str, payload: dict):
+    """Fold eval/drift results into the release's summary on the controller."""
+    import httpx
+
+    resp = httpx.post(
+        f"{CONTROLLER_URL}/api/v1/releases/{release_id}/eval", json=payload, timeout=30
+    )
+    if resp.status_code == 404:
+        print(f"Release {release_id} is not registered with the controller; not recorded")
+        return
+    resp.raise_for_status()
+
+
 def evaluate_candidates(**context):
     """Evaluate both blue and green candidates."""
     import httpx
@@ -34,6 +50,7 @@ def evaluate_candidates(**context):
             )
             resp.raise_for_status()
             context["ti"].xcom_push(key=f"{slot}_eval", value=resp.json())
+            _record_on_controller(release_id, {"metrics": resp.json()["metrics"]})
         except Exception as e:
             print(f"Evaluation failed for {slot}: {e}")
             raise
@@ -57,31 +74,37 @@ def run_replay(**context):
 
 
 def check_drift(**context):
-    """Check drift on active release."""
+    """Check the green candidate's answers for drift from blue's."""
     import httpx
 
     eval_url = "http://eval-service:50054"
-    release_id = context["params"].get("blue_release_id", "blue-latest")
+    blue_id = context["params"].get("blue_release_id", "blue-latest")
+    green_id = context["params"].get("green_release_id", "green-latest")
 
     resp = httpx.post(
         f"{eval_url}/api/v1/drift",
-        json={"release_id": release_id, "window_hours": 24},
+        json={"release_id": green_id, "baseline_release_id": blue_id, "window_hours": 24},
         timeout=120,
     )
     resp.raise_for_status()
     context["ti"].xcom_push(key="drift_result", value=resp.json())
+    # The decision gates on the green release's drift score.
+    result = resp.json()
+    _record_on_controller(
+        green_id,
+        {"drift_score": result["drift_score"], "drift_detected": result["drift_detected"]},
+    )
 
 
 def make_release_decision(**context):
     """Call the release controller to make a decision."""
     import httpx
 
-    controller_url = "http://release-controller:50055"
     blue_id = context["params"].get("blue_release_id", "blue-latest")
     green_id = context["params"].get("green_release_id", "green-latest")
 
     resp = httpx.post(
-        f"{controller_url}/api/v1/releases/decide",
+        f"{CONTROLLER_URL}/api/v1/releases/decide",
         json={
             "blue_release_id": blue_id,
             "green_release_id": green_id,
@@ -120,7 +143,7 @@ with DAG(
     drift = PythonOperator(
         task_id="check_drift",
         python_callable=check_drift,
-        params={"blue_release_id": "blue-latest"},
+        params={"blue_release_id": "blue-latest", "green_release_id": "green-latest"},
     )
 
     decide = PythonOperator(
@@ -11,6 +11,17 @@ from shared.logging import get_logger
 logger = get_logger(__name__)
 
 
+def _progress_dict(progress) -> dict:
+    return {
+        "stage": progress.stage,
+        "name": progress.name,
+        "status": progress.status,
+        "latency_ms": round(progress.latency_ms, 1),
+        "items": list(progress.items),
+        "detail": progress.detail,
+    }
+
+
 class AgentGRPCClient:
     """Client that connects to agent-service over gRPC.
 
@@ -91,11 +102,12 @@ class AgentGRPCClient:
         message: str,
         use_tools: bool = True,
         use_rag: bool = True,
-    ) -> AsyncIterator[str]:
+    ) -> AsyncIterator[dict]:
+        """Yield ``{"event": "token", "token": ...}`` and ``{"event": "progress", ...}`` dicts."""
         try:
             await self._ensure_channel()
             if self._stub is None:
-                yield self._fallback_response(message)["content"]
+                yield {"event": "token", "token": self._fallback_response(message)["content"]}
                 return
             from shared.grpc_common import agent_pb2
 
@@ -105,11 +117,14 @@ class AgentGRPCClient:
                 use_tools=use_tools,
                 use_rag=use_rag,
             )
-            async for token in self._stub.StreamChat(request):
-                yield token.token
+            async for chunk in self._stub.StreamChat(request):
+                if chunk.HasField("progress"):
+                    yield {"event": "progress", **_progress_dict(chunk.progress)}
+                if chunk.token:
+                    yield {"event": "token", "token": chunk.token}
         except Exception as e:
             logger.error("agent_stream_error", error=str(e))
-            yield f"Error: {e}"
+            yield {"event": "token", "token": f"Error: {e}"}
 
     def _fallback_response(self, message: str) -> dict:
         return {
@@ -5,7 +5,7 @@ from __future__ import annotations
 import json
 import sys
 import uuid
-from contextlib import asynccontextmanager
+from contextlib import aclosing, asynccontextmanager
 from pathlib import Path
 
 # Ensure project root is on sys.path for shared module imports
@@ -31,7 +31,11 @@ logger = get_logger(__name__)
 metrics = setup_metrics("api-gateway")
 
 agent_client: AgentGRPCClient | None = None
-ws_manager = ConnectionManager()
+ws_manager = ConnectionManager(
+    queue_size=settings.ws_queue_size,
+    policy=settings.ws_slow_consumer_policy,
+    send_timeout_s=settings.ws_send_timeout_s,
+)
 
 
 @asynccontextmanager
@@ -45,6 +49,7 @@ async def lifespan(app: FastAPI):
     yield
     if agent_client:
         await agent_client.close()
+    await ws_manager.close()
     logger.info("api_gateway_stopped")
 
 
@@ -119,13 +124,14 @@ async def chat_stream(request: ChatRequest):
         yield {"event": "start", "data": json.dumps({"session_id": session_id})}
         try:
             if agent_client:
-                async for token in agent_client.stream_chat(
+                async for event in agent_client.stream_chat(
                     session_id=session_id,
                     message=request.message,
                     use_tools=request.use_tools,
                     use_rag=request.use_rag,
                 ):
-                    yield {"event": "token", "data": json.dumps({"token": token})}
+                    kind = event.pop("event")
+                    yield {"event": kind, "data": json.dumps(event)}
             else:
                 yield {
                     "event": "token",
@@ -150,31 +156,49 @@ async def websocket_chat(websocket: WebSocket, session_id: str):
             use_tools = data.get("use_tools", True)
             use_rag = data.get("use_rag", True)
 
-            await websocket.send_json({"event": "thinking", "session_id": session_id})
+            # Outgoing messages go through the manager's per-connection queue so
+            # this socket has a single writer, shared with broadcasts.  Sends wait
+            # for room rather than dropping tokens, and fail once the connection
+            # has been shed, which ends the turn.
+            sent = await ws_manager.send_to_session(
+                session_id, {"event": "thinking", "session_id": session_id}
+            )
 
-            if agent_client:
-                async for token in agent_client.stream_chat(
-                    session_id=session_id,
-                    message=message,
-                    use_tools=use_tools,
-                    use_rag=use_rag,
-                ):
-                    await websocket.send_json(
-                        {"event": "token", "token": token, "session_id": session_id}
+            if sent and agent_client:
+                async with aclosing(
+                    agent_client.stream_chat(
+                        session_id=session_id,
+                        message=message,
+                        use_tools=use_tools,
+                        use_rag=use_rag,
                     )
-            else:
-                await websocket.send_json(
+                ) as events:
+                    async for event in events:
+                        sent = await ws_manager.send_to_session(
+                            session_id, {**event, "session_id": session_id}
+                        )
+                        if not sent:
+                            break
+            elif sent:
+                sent = await ws_manager.send_to_session(
+                    session_id,
                     {
                         "event": "token",
                         "token": "Agent service not available",
                         "session_id": session_id,
-                    }
+                    },
                 )
 
-            await websocket.send_json({"event": "done", "session_id": session_id})
+            if sent:
+                sent = await ws_manager.send_to_session(
+                    session_id, {"event": "done", "session_id": session_id}
+                )
+            if not sent:
+                logger.info("ws_turn_abandoned", session_id=session_id)
+                return
 
     except WebSocketDisconnect:
-        ws_manager.disconnect(session_id)
+        ws_manager.disconnect(session_id, websocket)
         logger.info("ws_disconnected", session_id=session_id)
 
 
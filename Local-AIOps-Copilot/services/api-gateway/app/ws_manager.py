@@ -1,32 +1,211 @@
-"""WebSocket connection manager for live events."""
+"""WebSocket connection manager for live events.
+
+Every connection gets a bounded send queue drained by its own writer task, so
+``broadcast`` only enqueues and never waits on a socket: one slow or
+half-closed client cannot delay the others.  When a queue is full the
+slow-consumer policy decides what a broadcast gives up — the connection's
+oldest queued message (``drop_oldest``) or the connection itself
+(``disconnect``).  A session's own replies are never dropped: ``send_to_session``
+waits for room in the queue instead, so a reply stream is slowed to the pace
+of its reader.  A send that takes longer than ``send_timeout_s`` always
+disconnects, which is how half-closed peers are detected.
+"""
 
 from __future__ import annotations
 
+import asyncio
+from dataclasses import dataclass, field
+from enum import Enum
+
 from fastapi import WebSocket
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge
+
+from shared.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Close codes by reason; 1013 ("try again later") tells a client it was shed
+# for falling behind.
+_CLOSE_CODES = {"slow_consumer": 1013, "send_timeout": 1013, "replaced": 1000, "shutdown": 1001}
+
+
+class SlowConsumerPolicy(str, Enum):
+    DROP_OLDEST = "drop_oldest"
+    DISCONNECT = "disconnect"
+
+
+@dataclass
+class ConnectionMetrics:
+    prefix: str = "api_gateway"
+    registry: CollectorRegistry = REGISTRY
+    connections: Gauge = field(init=False)
+    queue_depth: Gauge = field(init=False)
+    dropped_messages: Counter = field(init=False)
+    disconnects: Counter = field(init=False)
+
+    def __post_init__(self):
+        self.connections = Gauge(
+            f"{self.prefix}_ws_connections",
+            "Open WebSocket connections",
+            registry=self.registry,
+        )
+        self.queue_depth = Gauge(
+            f"{self.prefix}_ws_queue_depth",
+            "Messages queued across all WebSocket send queues",
+            registry=self.registry,
+        )
+        self.dropped_messages = Counter(
+            f"{self.prefix}_ws_dropped_messages_total",
+            "Messages dropped for slow WebSocket consumers",
+            ["policy"],
+            registry=self.registry,
+        )
+        self.disconnects = Counter(
+            f"{self.prefix}_ws_disconnects_total",
+            "WebSocket connections closed by the server",
+            ["reason"],
+            registry=self.registry,
+        )
+
+
+class _Connection:
+    def __init__(self, session_id: str, websocket: WebSocket, queue_size: int):
+        self.session_id = session_id
+        self.websocket = websocket
+        self.queue: asyncio.Queue[dict] = asyncio.Queue(maxsize=queue_size)
+        self.writer: asyncio.Task | None = None
+        self.closed = False
+        # Set whenever the writer frees a slot, and on close.
+        self.space = asyncio.Event()
 
 
 class ConnectionManager:
     """Manages active WebSocket connections by session ID."""
 
-    def __init__(self):
-        self._connections: dict[str, WebSocket] = {}
+    def __init__(
+        self,
+        queue_size: int = 256,
+        policy: SlowConsumerPolicy | str = SlowConsumerPolicy.DROP_OLDEST,
+        send_timeout_s: float = 5.0,
+        metrics: ConnectionMetrics | None = None,
+    ):
+        self._connections: dict[str, _Connection] = {}
+        self._queue_size = queue_size
+        self._policy = SlowConsumerPolicy(policy)
+        self._send_timeout = send_timeout_s
+        self._metrics = metrics or ConnectionMetrics()
+        self._closing: set[asyncio.Task] = set()
 
     async def connect(self, session_id: str, websocket: WebSocket):
         await websocket.accept()
-        self._connections[session_id] = websocket
+        previous = self._connections.get(session_id)
+        if previous is not None:
+            self._close(previous, reason="replaced")
+        conn = _Connection(session_id, websocket, self._queue_size)
+        conn.writer = asyncio.create_task(self._write_loop(conn))
+        self._connections[session_id] = conn
+        self._metrics.connections.set(len(self._connections))
+
+    def disconnect(self, session_id: str, websocket: WebSocket | None = None):
+        conn = self._connections.get(session_id)
+        if conn is not None and (websocket is None or conn.websocket is websocket):
+            self._release(conn)
 
-    def disconnect(self, session_id: str):
-        self._connections.pop(session_id, None)
+    async def send_to_session(self, session_id: str, data: dict) -> bool:
+        """Queue ``data`` for one session, waiting while its queue is full.
 
-    async def send_to_session(self, session_id: str, data: dict):
-        ws = self._connections.get(session_id)
-        if ws:
-            await ws.send_json(data)
+        Returns False when the session has no open connection, including one
+        shed while waiting, so the caller can stop producing.
+        """
+        conn = self._connections.get(session_id)
+        if conn is None:
+            return False
+        while conn.queue.full() and not conn.closed:
+            conn.space.clear()
+            await conn.space.wait()
+        if conn.closed:
+            return False
+        conn.queue.put_nowait(data)
+        self._metrics.queue_depth.inc()
+        return True
 
-    async def broadcast(self, data: dict):
-        for ws in self._connections.values():
-            await ws.send_json(data)
+    async def broadcast(self, data: dict) -> int:
+        """Queue ``data`` for every connection; returns how many accepted it."""
+        return sum(self._enqueue(conn, data) for conn in list(self._connections.values()))
 
     @property
     def active_connections(self) -> int:
         return len(self._connections)
+
+    def queue_depth(self, session_id: str) -> int:
+        conn = self._connections.get(session_id)
+        return conn.queue.qsize() if conn else 0
+
+    async def close(self):
+        connections = list(self._connections.values())
+        for conn in connections:
+            self._close(conn, reason="shutdown")
+        pending = [c.writer for c in connections if c.writer is not None] + list(self._closing)
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    def _enqueue(self, conn: _Connection, data: dict) -> bool:
+        if conn.closed:
+            return False
+        if conn.queue.full():
+            self._metrics.dropped_messages.labels(self._policy.value).inc()
+            if self._policy is SlowConsumerPolicy.DISCONNECT:
+                logger.warning("ws_slow_consumer", session_id=conn.session_id, action="disconnect")
+                self._close(conn, reason="slow_consumer")
+                return False
+            conn.queue.get_nowait()
+            self._metrics.queue_depth.dec()
+        conn.queue.put_nowait(data)
+        self._metrics.queue_depth.inc()
+        return True
+
+    async def _write_loop(self, conn: _Connection):
+        while True:
+            data = await conn.queue.get()
+            self._metrics.queue_depth.dec()
+            conn.space.set()
+            try:
+                async with asyncio.timeout(self._send_timeout):
+                    await conn.websocket.send_json(data)
+            except TimeoutError:
+                logger.warning("ws_send_timeout", session_id=conn.session_id)
+                self._close(conn, reason="send_timeout")
+                return
+            except Exception as e:
+                logger.debug("ws_send_failed", session_id=conn.session_id, error=str(e))
+                self._release(conn)
+                return
+
+    def _release(self, conn: _Connection):
+        """Forget the connection and stop its writer; the socket is left alone."""
+        if conn.closed:
+            return
+        conn.closed = True
+        conn.space.set()
+        if self._connections.get(conn.session_id) is conn:
+            del self._connections[conn.session_id]
+        if conn.writer is not None and conn.writer is not asyncio.current_task():
+            conn.writer.cancel()
+        self._metrics.queue_depth.dec(conn.queue.qsize())
+        self._metrics.connections.set(len(self._connections))
+
+    def _close(self, conn: _Connection, reason: str):
+        if conn.closed:
+            return
+        self._release(conn)
+        self._metrics.disconnects.labels(reason).inc()
+        task = asyncio.create_task(self._close_socket(conn.websocket, _CLOSE_CODES[reason]))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def _close_socket(self, websocket: WebSocket, code: int):
+        try:
+            async with asyncio.timeout(self._send_timeout):
+                await websocket.close(code=code)
+        except Exception:
+            pass
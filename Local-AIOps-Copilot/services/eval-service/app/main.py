@@ -1,10 +1,19 @@
-"""Eval Service — evaluation, replay testing, and drift detection with MLflow."""
+"""Eval Service — evaluation, replay testing, and drift detection with MLflow.
+
+Evaluations replay a golden dataset (``datasets/<name>.jsonl``) through an
+LLM client from ``create_llm_client`` — the configured backend, or the one
+named in the request — so with ``LLM_BACKEND=mock`` everything runs offline.
+Answer embeddings from each run are kept per release; drift compares a
+release's answers with those of a baseline release.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import sys
 import time
 import uuid
+from collections import defaultdict, deque
 from contextlib import asynccontextmanager
 from pathlib import Path
 
@@ -12,13 +21,24 @@ _PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
-from fastapi import FastAPI
-from prometheus_client import make_asgi_app
-from pydantic import BaseModel, Field
-
-from shared.config import get_settings
-from shared.logging import setup_logging, get_logger
-from shared.metrics import setup_metrics
+import numpy as np  # noqa: E402
+from fastapi import FastAPI, HTTPException  # noqa: E402
+from prometheus_client import make_asgi_app  # noqa: E402
+from pydantic import BaseModel, Field  # noqa: E402
+
+from shared.chunking.evaluation import HashingEmbedder  # noqa: E402
+from shared.config import get_settings  # noqa: E402
+from shared.llm_backend import LLMClient, create_embedding_client, create_llm_client  # noqa: E402
+from shared.logging import setup_logging, get_logger  # noqa: E402
+from shared.metrics import setup_metrics  # noqa: E402
+from app.replay import (  # noqa: E402
+    GoldenConversation,
+    ReplayEngine,
+    ReplayRun,
+    embedding_drift,
+    load_dataset,
+    sample,
+)
 
 settings = get_settings()
 setup_logging(settings.log_level, settings.log_format, "eval-service")
@@ -26,10 +46,19 @@ logger = get_logger(__name__)
 metrics = setup_metrics("eval-service")
 
 
+_clients: dict[str, LLMClient] = {}
+# release_id -> (finished_at, answer embeddings) for recent runs
+_answer_embeddings: dict[str, deque[tuple[float, np.ndarray]]] = defaultdict(
+    lambda: deque(maxlen=50)
+)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     logger.info("eval_service_started", mlflow_uri=settings.mlflow_tracking_uri)
     yield
+    for client in _clients.values():
+        await client.close()
     logger.info("eval_service_stopped")
 
 
@@ -45,7 +74,10 @@ class EvalRequest(BaseModel):
     release_id: str
     model_name: str
     dataset_name: str = "default"
-    metrics_to_compute: list[str] = Field(default_factory=lambda: ["latency", "quality", "consistency"])
+    metrics_to_compute: list[str] = Field(
+        default_factory=lambda: ["latency", "quality", "consistency"]
+    )
+    backend: str | None = None  # LLM backend to replay through; None = configured backend
 
 
 class EvalResult(BaseModel):
@@ -62,6 +94,8 @@ class ReplayRequest(BaseModel):
     release_id_green: str
     replay_dataset: str = "default"
     sample_size: int = 50
+    backend_blue: str | None = None
+    backend_green: str | None = None
 
 
 class ReplayResult(BaseModel):
@@ -74,14 +108,20 @@ class ReplayResult(BaseModel):
 
 class DriftRequest(BaseModel):
     release_id: str
+    # Release whose recorded answers define the baseline distribution (usually blue)
+    baseline_release_id: str
     window_hours: int = 24
-    reference_dataset: str = "baseline"
+    # Golden dataset replayed for a release with no recorded answers
+    reference_dataset: str = "default"
+    backend: str | None = None
+    baseline_backend: str | None = None
 
 
 class DriftResult(BaseModel):
     drift_id: str
     release_id: str
     drift_detected: bool
+    # 1 - p-value of the MMD² test: above 1 - EVAL_DRIFT_ALPHA means drift
     drift_score: float
     drift_details: dict[str, float] = Field(default_factory=dict)
     mlflow_run_id: str | None = None
@@ -105,6 +145,62 @@ def _log_to_mlflow(experiment_name: str, run_name: str, params: dict, metrics: d
         return None
 
 
+# ── Replay helpers ──
+
+
+def _client(backend: str | None) -> LLMClient:
+    key = backend or settings.llm_backend.value
+    if key not in _clients:
+        _clients[key] = create_llm_client(backend)
+    return _clients[key]
+
+
+def _embedder():
+    """Embedder for similarity and drift; hashing is deterministic and offline."""
+    if settings.eval_embedder == "backend":
+        return create_embedding_client()
+    return HashingEmbedder()
+
+
+def _engine(backend: str | None) -> ReplayEngine:
+    return ReplayEngine(
+        _client(backend),
+        embedder=_embedder(),
+        concurrency=settings.eval_concurrency,
+        timeout_s=settings.eval_request_timeout_s,
+    )
+
+
+def _dataset(name: str) -> list[GoldenConversation]:
+    try:
+        return load_dataset(name, settings.eval_dataset_dir or None)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=404, detail=str(e)) from e
+
+
+def _record(release_id: str, run: ReplayRun):
+    if run.answer_embeddings is not None and len(run.answer_embeddings):
+        _answer_embeddings[release_id].append((time.time(), run.answer_embeddings))
+
+
+def _recent_embeddings(release_id: str, window_hours: int | None) -> np.ndarray | None:
+    cutoff = time.time() - window_hours * 3600 if window_hours is not None else 0.0
+    recent = [e for finished, e in _answer_embeddings.get(release_id, ()) if finished >= cutoff]
+    return np.vstack(recent) if recent else None
+
+
+async def _answers(
+    release_id: str, window_hours: int | None, dataset: str, backend: str | None
+) -> np.ndarray | None:
+    """Recorded answer embeddings of a release, replaying the dataset if there are none."""
+    answers = _recent_embeddings(release_id, window_hours)
+    if answers is None:
+        run = await _engine(backend).run(_dataset(dataset))
+        _record(release_id, run)
+        answers = run.answer_embeddings
+    return answers
+
+
 # ── Endpoints ──
 
 
@@ -114,20 +210,24 @@ async def run_evaluation(request: EvalRequest):
     eval_id = str(uuid.uuid4())[:8]
     start = time.time()
 
-    # Simulated evaluation metrics (replace with real evaluation logic)
-    eval_metrics = {
-        "latency_p50_ms": 120.5,
-        "latency_p99_ms": 450.2,
-        "quality_score": 0.82,
-        "consistency_score": 0.91,
-        "error_rate": 0.02,
-    }
+    conversations = _dataset(request.dataset_name)
+    engine = _engine(request.backend)
+    run = await engine.run(conversations)
+    eval_metrics = run.metrics()
+    if "consistency" in request.metrics_to_compute:
+        eval_metrics["consistency_score"] = await engine.consistency(conversations, run)
     eval_metrics["eval_duration_s"] = round(time.time() - start, 3)
+    _record(request.release_id, run)
 
     mlflow_run_id = _log_to_mlflow(
         experiment_name="evaluations",
         run_name=f"eval-{request.release_id}-{eval_id}",
-        params={"release_id": request.release_id, "model_name": request.model_name, "dataset": request.dataset_name},
+        params={
+            "release_id": request.release_id,
+            "model_name": request.model_name,
+            "dataset": request.dataset_name,
+            "backend": _client(request.backend).backend_name,
+        },
         metrics=eval_metrics,
     )
 
@@ -146,9 +246,14 @@ async def run_replay(request: ReplayRequest):
     """Run replay comparison between blue and green releases."""
     comparison_id = str(uuid.uuid4())[:8]
 
-    # Simulated replay metrics
-    blue_metrics = {"latency_p50_ms": 130.0, "quality_score": 0.80, "error_rate": 0.03}
-    green_metrics = {"latency_p50_ms": 115.0, "quality_score": 0.85, "error_rate": 0.01}
+    conversations = sample(_dataset(request.replay_dataset), request.sample_size)
+    blue_run, green_run = await asyncio.gather(
+        _engine(request.backend_blue).run(conversations),
+        _engine(request.backend_green).run(conversations),
+    )
+    _record(request.release_id_blue, blue_run)
+    _record(request.release_id_green, green_run)
+    blue_metrics, green_metrics = blue_run.metrics(), green_run.metrics()
 
     # Simple decision logic
     green_better = (
@@ -164,8 +269,12 @@ async def run_replay(request: ReplayRequest):
             "blue_release": request.release_id_blue,
             "green_release": request.release_id_green,
             "sample_size": str(request.sample_size),
+            "dataset": request.replay_dataset,
+        },
+        metrics={
+            **{f"blue_{k}": v for k, v in blue_metrics.items()},
+            **{f"green_{k}": v for k, v in green_metrics.items()},
         },
-        metrics={**{f"blue_{k}": v for k, v in blue_metrics.items()}, **{f"green_{k}": v for k, v in green_metrics.items()}},
     )
 
     return ReplayResult(
@@ -179,22 +288,41 @@ async def run_replay(request: ReplayRequest):
 
 @app.post("/api/v1/drift", response_model=DriftResult)
 async def detect_drift(request: DriftRequest):
-    """Detect data or model drift for a release."""
+    """Test whether a release's answers drifted from the baseline release's answers.
+
+    The baseline is every answer still recorded for ``baseline_release_id``
+    (its eval and replay runs); the current side is the release's answers
+    from the last ``window_hours``.  Either side with nothing recorded is
+    replayed over ``reference_dataset`` first.
+    """
     drift_id = str(uuid.uuid4())[:8]
+    if request.baseline_release_id == request.release_id:
+        raise HTTPException(status_code=422, detail="A release cannot be its own drift baseline")
+
+    baseline = await _answers(
+        request.baseline_release_id, None, request.reference_dataset, request.baseline_backend
+    )
+    current = await _answers(
+        request.release_id, request.window_hours, request.reference_dataset, request.backend
+    )
+    if baseline is None or current is None or len(baseline) < 2 or len(current) < 2:
+        raise HTTPException(status_code=422, detail="Not enough answers to test for drift")
 
-    # Simulated drift detection
-    drift_details = {
-        "input_distribution_shift": 0.15,
-        "output_distribution_shift": 0.08,
-        "feature_drift_pct": 0.12,
-    }
-    drift_score = max(drift_details.values())
-    drift_detected = drift_score > 0.20
+    report = await asyncio.to_thread(
+        embedding_drift, baseline, current, settings.eval_drift_alpha
+    )
+    drift_details = report.details()
+    drift_score = round(1.0 - report.p_value, 4)
+    drift_detected = report.drift_detected
 
     mlflow_run_id = _log_to_mlflow(
         experiment_name="drift_detection",
         run_name=f"drift-{request.release_id}-{drift_id}",
-        params={"release_id": request.release_id, "window_hours": str(request.window_hours)},
+        params={
+            "release_id": request.release_id,
+            "baseline_release_id": request.baseline_release_id,
+            "window_hours": str(request.window_hours),
+        },
         metrics={"drift_score": drift_score, **drift_details},
     )
 
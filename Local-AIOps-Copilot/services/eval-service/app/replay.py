@@ -0,0 +1,310 @@
+"""Offline evaluation: replay golden conversations and test for drift.
+
+A dataset is a JSONL file of golden conversations, one per line::
+
+    {"id": "pg-lag", "messages": [{"role": "user", "content": "..."}],
+     "expected": "reference answer", "keywords": ["pg_stat_replication"]}
+
+:class:`ReplayEngine` sends every conversation through an ``LLMClient`` with
+bounded concurrency and a per-request timeout, then scores each answer
+against its reference (normalised exact match, token F1, keyword recall and
+embedding similarity).  The per-conversation ``match`` is keyword recall when
+keywords are given and token F1 otherwise; ``quality_score`` is its mean.
+
+:func:`embedding_drift` is a two-sample test between a baseline and a
+current set of embeddings: the (biased) RBF-kernel MMD² with a median
+bandwidth, and a permutation p-value.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import numpy as np
+
+from shared.llm_backend.base import LLMClient, LLMMessage
+from shared.llm_backend.benchmark import percentile
+
+DATASET_DIR = Path(__file__).resolve().parents[1] / "datasets"
+
+_TOKEN = re.compile(r"[a-z0-9_.]+")
+
+
+@dataclass
+class GoldenConversation:
+    id: str
+    messages: list[dict]
+    expected: str
+    keywords: list[str] = field(default_factory=list)
+
+    def llm_messages(self) -> list[LLMMessage]:
+        return [LLMMessage(role=m["role"], content=m["content"]) for m in self.messages]
+
+
+def load_dataset(name: str, directory: str | Path | None = None) -> list[GoldenConversation]:
+    path = Path(directory or DATASET_DIR) / f"{name}.jsonl"
+    if not path.is_file():
+        raise FileNotFoundError(f"Golden dataset not found: {path}")
+    with path.open(encoding="utf-8") as fh:
+        return [GoldenConversation(**json.loads(line)) for line in fh if line.strip()]
+
+
+def sample(conversations: list[GoldenConversation], size: int) -> list[GoldenConversation]:
+    """Deterministic sample: the first ``size`` conversations, cycling if needed."""
+    if size <= 0 or not conversations:
+        return list(conversations)
+    return [conversations[i % len(conversations)] for i in range(size)]
+
+
+# ── Answer matching ──
+
+
+def _tokens(text: str) -> list[str]:
+    return [t.strip(".") for t in _TOKEN.findall(text.lower()) if t.strip(".")]
+
+
+def exact_match(answer: str, expected: str) -> float:
+    return float(_tokens(answer) == _tokens(expected))
+
+
+def token_f1(answer: str, expected: str) -> float:
+    got, want = _tokens(answer), _tokens(expected)
+    if not got or not want:
+        return float(got == want)
+    common = sum((Counter(got) & Counter(want)).values())
+    if common == 0:
+        return 0.0
+    precision, recall = common / len(got), common / len(want)
+    return 2 * precision * recall / (precision + recall)
+
+
+def keyword_recall(answer: str, keywords: list[str]) -> float:
+    if not keywords:
+        return 0.0
+    text = answer.lower()
+    return sum(k.lower() in text for k in keywords) / len(keywords)
+
+
+# ── Replay ──
+
+
+@dataclass
+class ReplayOutcome:
+    id: str
+    answer: str = ""
+    latency_ms: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    error: str | None = None
+    exact_match: float = 0.0
+    token_f1: float = 0.0
+    keyword_recall: float = 0.0
+    similarity: float = 0.0
+    match: float = 0.0
+
+
+@dataclass
+class ReplayRun:
+    outcomes: list[ReplayOutcome]
+    wall_s: float
+    answer_embeddings: np.ndarray | None = None
+
+    def metrics(self) -> dict[str, float]:
+        ok = [o for o in self.outcomes if o.error is None]
+        latencies = [o.latency_ms for o in ok]
+        completion = sum(o.completion_tokens for o in ok)
+        per_request = [
+            o.completion_tokens / (o.latency_ms / 1000) for o in ok if o.latency_ms > 0
+        ]
+        n = len(self.outcomes) or 1
+        result = {
+            "latency_p50_ms": percentile(latencies, 50),
+            "latency_p95_ms": percentile(latencies, 95),
+            "latency_p99_ms": percentile(latencies, 99),
+            "latency_mean_ms": float(np.mean(latencies)) if latencies else 0.0,
+            "tokens_per_s": completion / self.wall_s if self.wall_s > 0 else 0.0,
+            "request_tokens_per_s_p50": percentile(per_request, 50),
+            "completion_tokens": float(completion),
+            "exact_match": sum(o.exact_match for o in self.outcomes) / n,
+            "token_f1": sum(o.token_f1 for o in self.outcomes) / n,
+            "keyword_recall": sum(o.keyword_recall for o in self.outcomes) / n,
+            "semantic_similarity": sum(o.similarity for o in self.outcomes) / n,
+            "quality_score": sum(o.match for o in self.outcomes) / n,
+            "error_rate": (len(self.outcomes) - len(ok)) / n,
+            "samples": float(len(self.outcomes)),
+        }
+        return {k: round(v, 4) for k, v in result.items()}
+
+
+def _completion_tokens(response, answer: str) -> int:
+    return response.completion_tokens or len(answer.split())
+
+
+class ReplayEngine:
+    """Replays golden conversations through one LLM client and scores them."""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        embedder=None,
+        concurrency: int = 8,
+        timeout_s: float = 60.0,
+        max_tokens: int | None = None,
+    ):
+        self.llm = llm_client
+        self.embedder = embedder
+        self.concurrency = concurrency
+        self.timeout_s = timeout_s
+        self.max_tokens = max_tokens
+
+    async def _replay_one(
+        self, conversation: GoldenConversation, slots: asyncio.Semaphore
+    ) -> ReplayOutcome:
+        outcome = ReplayOutcome(id=conversation.id)
+        async with slots:
+            started = time.perf_counter()
+            try:
+                async with asyncio.timeout(self.timeout_s):
+                    response = await self.llm.chat(
+                        conversation.llm_messages(), temperature=0.0, max_tokens=self.max_tokens
+                    )
+            except TimeoutError:
+                outcome.error = f"timed out after {self.timeout_s:g}s"
+                return outcome
+            except Exception as e:
+                outcome.error = str(e) or type(e).__name__
+                return outcome
+            outcome.latency_ms = (time.perf_counter() - started) * 1000
+
+        answer = response.content
+        outcome.answer = answer
+        outcome.prompt_tokens = response.prompt_tokens
+        outcome.completion_tokens = _completion_tokens(response, answer)
+        outcome.exact_match = exact_match(answer, conversation.expected)
+        outcome.token_f1 = token_f1(answer, conversation.expected)
+        outcome.keyword_recall = keyword_recall(answer, conversation.keywords)
+        outcome.match = max(
+            outcome.exact_match,
+            outcome.keyword_recall if conversation.keywords else outcome.token_f1,
+        )
+        return outcome
+
+    async def run(self, conversations: list[GoldenConversation]) -> ReplayRun:
+        slots = asyncio.Semaphore(self.concurrency)
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(self._replay_one(c, slots) for c in conversations))
+        run = ReplayRun(outcomes=list(outcomes), wall_s=time.perf_counter() - started)
+        if self.embedder is not None:
+            await self._embed(run, conversations)
+        return run
+
+    async def _embed(self, run: ReplayRun, conversations: list[GoldenConversation]):
+        ok = [(o, c) for o, c in zip(run.outcomes, conversations) if o.error is None]
+        if not ok:
+            return
+        answers = _unit(await self._vectors([o.answer for o, _ in ok]))
+        expected = _unit(await self._vectors([c.expected for _, c in ok]))
+        for (outcome, _), similarity in zip(ok, np.sum(answers * expected, axis=1)):
+            outcome.similarity = float(similarity)
+        run.answer_embeddings = answers
+
+    async def _vectors(self, texts: list[str]) -> np.ndarray:
+        response = await self.embedder.embeddings(texts)
+        return np.asarray(response.embeddings, dtype=np.float32)
+
+    async def consistency(
+        self, conversations: list[GoldenConversation], first: ReplayRun
+    ) -> float:
+        """Replay once more and return the mean token F1 between the two answers."""
+        second = await self.run(conversations)
+        pairs = [
+            (a.answer, b.answer)
+            for a, b in zip(first.outcomes, second.outcomes)
+            if a.error is None and b.error is None
+        ]
+        if not pairs:
+            return 0.0
+        return round(sum(token_f1(a, b) for a, b in pairs) / len(pairs), 4)
+
+
+# ── Drift ──
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+
+
+@dataclass
+class DriftReport:
+    mmd2: float
+    p_value: float
+    centroid_distance: float
+    drift_detected: bool
+    baseline_size: int
+    current_size: int
+
+    def details(self) -> dict[str, float]:
+        return {
+            "mmd2": self.mmd2,
+            "p_value": self.p_value,
+            "centroid_distance": self.centroid_distance,
+            "baseline_size": float(self.baseline_size),
+            "current_size": float(self.current_size),
+        }
+
+
+def embedding_drift(
+    baseline: np.ndarray,
+    current: np.ndarray,
+    alpha: float = 0.01,
+    permutations: int = 500,
+    max_samples: int = 500,
+    seed: int = 0,
+) -> DriftReport:
+    """Kernel two-sample test between baseline and current embeddings.
+
+    Drift is detected when the permutation p-value of MMD² is below ``alpha``.
+    ``centroid_distance`` is the cosine distance between the mean embeddings.
+    Each side is subsampled to ``max_samples`` to bound the O(n²) kernel.
+    """
+    rng = np.random.default_rng(seed)
+    sides = []
+    for vectors in (baseline, current):
+        vectors = _unit(np.asarray(vectors, dtype=np.float64))
+        if len(vectors) > max_samples:
+            vectors = vectors[rng.choice(len(vectors), max_samples, replace=False)]
+        sides.append(vectors)
+    baseline, current = sides
+    n, m = len(baseline), len(current)
+    if n < 2 or m < 2:
+        raise ValueError("Drift test needs at least two embeddings on each side")
+
+    pooled = np.vstack([baseline, current])
+    sq = np.maximum(2.0 - 2.0 * pooled @ pooled.T, 0.0)  # squared distances of unit vectors
+    off_diagonal = sq[np.triu_indices(len(pooled), k=1)]
+    bandwidth = float(np.median(off_diagonal[off_diagonal > 0])) if off_diagonal.any() else 1.0
+    kernel = np.exp(-sq / bandwidth)
+
+    # Biased MMD² is w·Kw with w = 1/n on baseline rows and -1/m on current
+    # rows, so each permutation costs one matrix-vector product.
+    weights = np.concatenate([np.full(n, 1.0 / n), np.full(m, -1.0 / m)])
+    observed = float(weights @ kernel @ weights)
+    shuffled = np.stack([rng.permutation(weights) for _ in range(permutations)])
+    null = np.einsum("pi,ij,pj->p", shuffled, kernel, shuffled)
+    p_value = (int(np.sum(null >= observed)) + 1) / (permutations + 1)
+
+    centroids = _unit(np.vstack([baseline.mean(axis=0), current.mean(axis=0)]))
+    return DriftReport(
+        mmd2=round(observed, 6),
+        p_value=round(p_value, 4),
+        centroid_distance=round(float(1.0 - centroids[0] @ centroids[1]), 6),
+        drift_detected=p_value < alpha,
+        baseline_size=n,
+        current_size=len(current),
+    )
@@ -1,11 +1,23 @@
-"""MCP Tool Server — exposes operational tools via Model Context Protocol."""
+"""MCP Tool Server — exposes operational tools via Model Context Protocol.
+
+Tools share one app-scoped httpx connection pool.  Each tool has a
+concurrency limit, and read-only tools cache results for a short TTL keyed by
+tool name and arguments, with identical in-flight calls coalesced; so the
+same PromQL query issued by several agent turns in the same second reaches
+Prometheus once.  ``POST /tools/batch`` runs several calls in one round trip.
+"""
 
 from __future__ import annotations
 
+import asyncio
 import datetime
+import json
 import platform
 import sys
+import time
+from collections import OrderedDict
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
 from pathlib import Path
 
 _PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
@@ -14,7 +26,7 @@ if _PROJECT_ROOT not in sys.path:
 
 import httpx
 import psutil
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException
 from prometheus_client import make_asgi_app
 from pydantic import BaseModel, Field
 
@@ -28,10 +40,30 @@ logger = get_logger(__name__)
 metrics = setup_metrics("mcp-tool-server")
 
 
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the app-scoped client, so tool calls reuse pooled connections."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=settings.mcp_http_timeout_s,
+            limits=httpx.Limits(
+                max_connections=settings.mcp_http_max_connections,
+                max_keepalive_connections=settings.mcp_http_max_connections,
+            ),
+        )
+    return _http_client
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    get_http_client()
     logger.info("mcp_tool_server_started", port=settings.mcp_server_port)
     yield
+    if _http_client is not None:
+        await _http_client.aclose()
     logger.info("mcp_tool_server_stopped")
 
 
@@ -58,15 +90,110 @@ class ToolCallResponse(BaseModel):
     tool_name: str
     result: str
     success: bool = True
+    cached: bool = False
+
+
+class ToolBatchRequest(BaseModel):
+    calls: list[ToolCallRequest]
+
+
+class ToolBatchResponse(BaseModel):
+    results: list[ToolCallResponse]
+
+
+class ToolError(Exception):
+    """Raised by an executor when the tool ran but could not produce a result."""
+
+
+@dataclass
+class ToolPolicy:
+    cache_ttl_s: float = 0.0  # 0 = never cache (tools with side effects or clocks)
+    max_concurrency: int = 4
 
 
 TOOLS: dict[str, ToolDefinition] = {}
+TOOL_POLICIES: dict[str, ToolPolicy] = {}
 
 
-def register_tool(name: str, description: str, parameters: dict | None = None):
+def register_tool(
+    name: str,
+    description: str,
+    parameters: dict | None = None,
+    cache_ttl_s: float = 0.0,
+    max_concurrency: int | None = None,
+):
     TOOLS[name] = ToolDefinition(
         name=name, description=description, parameters=parameters or {}
     )
+    TOOL_POLICIES[name] = ToolPolicy(
+        cache_ttl_s=cache_ttl_s,
+        max_concurrency=max_concurrency or settings.mcp_tool_max_concurrency,
+    )
+
+
+class ToolResultCache:
+    """TTL cache of successful tool results that also coalesces in-flight calls."""
+
+    def __init__(self, max_entries: int = 1024, clock=time.monotonic):
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._inflight: dict[tuple[str, str], asyncio.Task] = {}
+        self._max_entries = max_entries
+        self._clock = clock
+
+    @staticmethod
+    def key(tool_name: str, arguments: dict) -> tuple[str, str]:
+        return tool_name, json.dumps(arguments, sort_keys=True, default=str)
+
+    def get(self, key: tuple[str, str]) -> str | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, result = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        return result
+
+    def put(self, key: tuple[str, str], result: str, ttl_s: float):
+        self._entries[key] = (self._clock() + ttl_s, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+
+    async def get_or_run(self, key: tuple[str, str], ttl_s: float, run) -> tuple[str, bool]:
+        """Return ``(result, cached)``; concurrent misses for one key share a run.
+
+        The shared run is its own task, so a caller that goes away does not
+        cancel it for the others.
+        """
+        result = self.get(key)
+        if result is not None:
+            return result, True
+        task = self._inflight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(run())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._settle(key, ttl_s, t))
+        return await asyncio.shield(task), shared
+
+    def _settle(self, key: tuple[str, str], ttl_s: float, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self.put(key, task.result(), ttl_s)
+
+    def clear(self):
+        self._entries.clear()
+
+
+result_cache = ToolResultCache()
+_limits: dict[str, asyncio.Semaphore] = {}
+
+
+def _limit(tool_name: str) -> asyncio.Semaphore:
+    if tool_name not in _limits:
+        _limits[tool_name] = asyncio.Semaphore(TOOL_POLICIES[tool_name].max_concurrency)
+    return _limits[tool_name]
 
 
 # ── Built-in tools ──
@@ -81,6 +208,8 @@ register_tool(
     "get_system_info",
     "Get system information (CPU, memory, disk usage)",
     {"type": "object", "properties": {}},
+    cache_ttl_s=settings.mcp_tool_cache_ttl_s,
+    max_concurrency=1,
 )
 
 register_tool(
@@ -93,6 +222,7 @@ register_tool(
         },
         "required": ["url"],
     },
+    cache_ttl_s=settings.mcp_tool_cache_ttl_s,
 )
 
 register_tool(
@@ -105,12 +235,16 @@ register_tool(
         },
         "required": ["query"],
     },
+    cache_ttl_s=settings.mcp_tool_cache_ttl_s,
+    max_concurrency=8,
 )
 
 register_tool(
     "list_docker_containers",
     "List running Docker containers",
     {"type": "object", "properties": {}},
+    cache_ttl_s=settings.mcp_tool_cache_ttl_s,
+    max_concurrency=2,
 )
 
 
@@ -123,7 +257,8 @@ async def exec_get_current_time(**kwargs) -> str:
 
 
 async def exec_get_system_info(**kwargs) -> str:
-    cpu_pct = psutil.cpu_percent(interval=0.1)
+    # cpu_percent(interval=...) sleeps; keep it off the event loop.
+    cpu_pct = await asyncio.to_thread(psutil.cpu_percent, 0.1)
     mem = psutil.virtual_memory()
     disk = psutil.disk_usage("/") if platform.system() != "Windows" else psutil.disk_usage("C:\\")
     return (
@@ -136,29 +271,25 @@ async def exec_get_system_info(**kwargs) -> str:
 
 async def exec_check_service_health(url: str = "", **kwargs) -> str:
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(url)
-            return f"Status: {resp.status_code}, Body: {resp.text[:500]}"
+        resp = await get_http_client().get(url)
     except Exception as e:
-        return f"Error reaching {url}: {e}"
+        raise ToolError(f"Error reaching {url}: {e}") from e
+    return f"Status: {resp.status_code}, Body: {resp.text[:500]}"
 
 
 async def exec_get_prometheus_metric(query: str = "", **kwargs) -> str:
     prom_url = f"http://localhost:{settings.prometheus_port}"
     try:
-        async with httpx.AsyncClient(timeout=10) as client:
-            resp = await client.get(f"{prom_url}/api/v1/query", params={"query": query})
-            if resp.status_code == 200:
-                data = resp.json()
-                return str(data.get("data", {}).get("result", []))
-            return f"Prometheus returned {resp.status_code}"
+        resp = await get_http_client().get(f"{prom_url}/api/v1/query", params={"query": query})
     except Exception as e:
-        return f"Prometheus query failed: {e}"
+        raise ToolError(f"Prometheus query failed: {e}") from e
+    if resp.status_code != 200:
+        raise ToolError(f"Prometheus returned {resp.status_code}")
+    data = resp.json()
+    return str(data.get("data", {}).get("result", []))
 
 
 async def exec_list_docker_containers(**kwargs) -> str:
-    import asyncio
-
     try:
         proc = await asyncio.create_subprocess_exec(
             "docker", "ps", "--format", "table {{.Names}}\t{{.Status}}\t{{.Ports}}",
@@ -166,11 +297,11 @@ async def exec_list_docker_containers(**kwargs) -> str:
             stderr=asyncio.subprocess.PIPE,
         )
         stdout, stderr = await proc.communicate()
-        if proc.returncode == 0:
-            return stdout.decode()
-        return f"Docker error: {stderr.decode()}"
     except Exception as e:
-        return f"Docker not available: {e}"
+        raise ToolError(f"Docker not available: {e}") from e
+    if proc.returncode != 0:
+        raise ToolError(f"Docker error: {stderr.decode()}")
+    return stdout.decode()
 
 
 TOOL_EXECUTORS = {
@@ -191,26 +322,56 @@ async def list_tools() -> list[ToolDefinition]:
     return list(TOOLS.values())
 
 
-@app.post("/tools/call", response_model=ToolCallResponse)
-async def call_tool(request: ToolCallRequest):
-    """Execute a tool by name (MCP tool invocation)."""
-    executor = TOOL_EXECUTORS.get(request.tool_name)
+async def execute_tool(tool_name: str, arguments: dict) -> ToolCallResponse:
+    """Run one tool call under its concurrency limit, through the result cache."""
+    executor = TOOL_EXECUTORS.get(tool_name)
     if not executor:
         return ToolCallResponse(
-            tool_name=request.tool_name,
-            result=f"Unknown tool: {request.tool_name}",
-            success=False,
+            tool_name=tool_name, result=f"Unknown tool: {tool_name}", success=False
         )
+
+    async def run() -> str:
+        async with _limit(tool_name):
+            return await executor(**arguments)
+
+    policy = TOOL_POLICIES[tool_name]
     try:
-        result = await executor(**request.arguments)
-        metrics.request_count.labels("POST", "/tools/call", "200").inc()
-        return ToolCallResponse(tool_name=request.tool_name, result=result)
+        if policy.cache_ttl_s > 0:
+            key = result_cache.key(tool_name, arguments)
+            result, cached = await result_cache.get_or_run(key, policy.cache_ttl_s, run)
+        else:
+            result, cached = await run(), False
+        return ToolCallResponse(tool_name=tool_name, result=result, cached=cached)
+    except ToolError as e:
+        metrics.error_count.labels("tool_call").inc()
+        return ToolCallResponse(tool_name=tool_name, result=str(e), success=False)
     except Exception as e:
-        logger.error("tool_call_error", tool=request.tool_name, error=str(e))
+        logger.error("tool_call_error", tool=tool_name, error=str(e))
         metrics.error_count.labels("tool_call").inc()
-        return ToolCallResponse(
-            tool_name=request.tool_name, result=f"Error: {e}", success=False
+        return ToolCallResponse(tool_name=tool_name, result=f"Error: {e}", success=False)
+
+
+@app.post("/tools/call", response_model=ToolCallResponse)
+async def call_tool(request: ToolCallRequest):
+    """Execute a tool by name (MCP tool invocation)."""
+    response = await execute_tool(request.tool_name, request.arguments)
+    metrics.request_count.labels("POST", "/tools/call", "200").inc()
+    return response
+
+
+@app.post("/tools/batch", response_model=ToolBatchResponse)
+async def call_tools_batch(request: ToolBatchRequest):
+    """Execute several tool calls concurrently; results keep the request order."""
+    if len(request.calls) > settings.mcp_batch_max_calls:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.mcp_batch_max_calls} calls per batch",
         )
+    results = await asyncio.gather(
+        *(execute_tool(call.tool_name, call.arguments) for call in request.calls)
+    )
+    metrics.request_count.labels("POST", "/tools/batch", "200").inc()
+    return ToolBatchResponse(results=list(results))
 
 
 @app.get("/health")
@@ -0,0 +1,159 @@
+"""Query-latency benchmark for the in-memory vector store.
+
+Fills ``InMemoryVectorStore`` with random 384-d embeddings at each size and
+times top-k search, unfiltered and with a metadata filter matching 10% of
+the chunks, plus snapshot write/load.  Up to 10k vectors it also times the
+previous pure-Python cosine loop for reference.
+
+Usage (from ``services/rag-service``)::
+
+    python -m app.benchmark --sizes 10000 100000 1000000 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+import numpy as np  # noqa: E402
+
+from app.vectorstore import InMemoryVectorStore  # noqa: E402
+from shared.llm_backend.benchmark import percentile  # noqa: E402
+from shared.llm_backend.mock_client import MockLLMClient  # noqa: E402
+
+PYTHON_BASELINE_MAX = 10_000  # the pure-Python loop needs ~10 GB of floats at 1M
+
+
+@dataclass
+class BenchmarkRow:
+    vectors: int
+    dim: int
+    query_p50_ms: float
+    query_p99_ms: float
+    filtered_p50_ms: float
+    filtered_p99_ms: float
+    python_p50_ms: float | None
+    snapshot_write_s: float
+    snapshot_load_s: float
+
+
+def _fill(store: InMemoryVectorStore, size: int, dim: int, rng: np.random.Generator) -> None:
+    """Documents of 100 chunks, spread over ten ``source`` values."""
+    batch, chunks_per_doc = 50_000, 100
+    for start in range(0, size, batch):
+        vectors = rng.standard_normal((min(batch, size - start), dim), dtype=np.float32)
+        for offset in range(0, len(vectors), chunks_per_doc):
+            doc = (start + offset) // chunks_per_doc
+            block = vectors[offset : offset + chunks_per_doc]
+            store.add_embeddings(
+                "bench",
+                f"doc-{doc}",
+                [f"chunk {start + offset + i}" for i in range(len(block))],
+                block,
+                {"source": f"s{doc % 10}"},
+            )
+
+
+def _time_ms(fn, queries: np.ndarray) -> list[float]:
+    latencies = []
+    for query in queries:
+        started = time.perf_counter()
+        fn(query)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+
+def _python_cosine(docs: list[list[float]], query: list[float], top_k: int) -> list[float]:
+    """The store's former per-document loop, kept only as a baseline."""
+    scored = []
+    for vec in docs:
+        dot = sum(x * y for x, y in zip(query, vec))
+        norm = sum(x * x for x in vec) ** 0.5 * sum(x * x for x in query) ** 0.5
+        scored.append(dot / norm if norm else 0.0)
+    scored.sort(reverse=True)
+    return scored[:top_k]
+
+
+def run_benchmark(
+    sizes: list[int], dim: int = 384, queries: int = 50, top_k: int = 10, seed: int = 0
+) -> list[BenchmarkRow]:
+    rng = np.random.default_rng(seed)
+    rows = []
+    for size in sizes:
+        store = InMemoryVectorStore(MockLLMClient())
+        _fill(store, size, dim, rng)
+        probes = rng.standard_normal((queries, dim), dtype=np.float32)
+
+        plain = _time_ms(lambda q: store.search(q, top_k, "bench"), probes)
+        filtered = _time_ms(
+            lambda q: store.search(q, top_k, "bench", filters={"source": "s3"}), probes
+        )
+
+        python_p50 = None
+        if size <= PYTHON_BASELINE_MAX:
+            docs = store._collections["bench"].vectors.tolist()
+            baseline = _time_ms(lambda q: _python_cosine(docs, q.tolist(), top_k), probes[:5])
+            python_p50 = round(percentile(baseline, 50), 2)
+            del docs
+
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            store.snapshot(f"{tmp}/snapshot")
+            written = time.perf_counter() - started
+            started = time.perf_counter()
+            InMemoryVectorStore(MockLLMClient(), snapshot_path=f"{tmp}/snapshot")
+            loaded = time.perf_counter() - started
+
+        rows.append(
+            BenchmarkRow(
+                vectors=size,
+                dim=dim,
+                query_p50_ms=round(percentile(plain, 50), 2),
+                query_p99_ms=round(percentile(plain, 99), 2),
+                filtered_p50_ms=round(percentile(filtered, 50), 2),
+                filtered_p99_ms=round(percentile(filtered, 99), 2),
+                python_p50_ms=python_p50,
+                snapshot_write_s=round(written, 2),
+                snapshot_load_s=round(loaded, 2),
+            )
+        )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the in-memory vector store")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = run_benchmark(args.sizes, args.dim, args.queries, args.top_k)
+    print(
+        f"{'vectors':>9}{'p50 ms':>9}{'p99 ms':>9}{'filt p50':>10}{'filt p99':>10}"
+        f"{'python p50':>12}{'snap write s':>14}{'snap load s':>13}"
+    )
+    for row in rows:
+        python = f"{row.python_p50_ms:.2f}" if row.python_p50_ms is not None else "-"
+        print(
+            f"{row.vectors:>9}{row.query_p50_ms:>9.2f}{row.query_p99_ms:>9.2f}"
+            f"{row.filtered_p50_ms:>10.2f}{row.filtered_p99_ms:>10.2f}{python:>12}"
+            f"{row.snapshot_write_s:>14.2f}{row.snapshot_load_s:>13.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump([asdict(r) for r in rows], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,19 +5,21 @@ from __future__ import annotations
 import asyncio
 import sys
 import uuid
+from functools import partial
 from pathlib import Path
 
 _PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
-import grpc
+import grpc  # noqa: E402
 
-from shared.config import get_settings
-from shared.llm_backend import create_llm_client
-from shared.logging import setup_logging, get_logger
-from shared.metrics import setup_metrics
-from app.vectorstore import VectorStore, InMemoryVectorStore
+from shared.chunking import chunk_document, load_token_counter  # noqa: E402
+from shared.config import get_settings  # noqa: E402
+from shared.llm_backend import create_llm_client  # noqa: E402
+from shared.logging import setup_logging, get_logger  # noqa: E402
+from shared.metrics import setup_metrics  # noqa: E402
+from app.vectorstore import VectorStore, InMemoryVectorStore  # noqa: E402
 
 settings = get_settings()
 setup_logging(settings.log_level, settings.log_format, "rag-service")
@@ -30,19 +32,51 @@ class RAGServicer:
 
     def __init__(self):
         self.llm_client = create_llm_client()
+        self.store: VectorStore | InMemoryVectorStore | None = None
+        self.chunker = partial(
+            chunk_document,
+            max_tokens=settings.rag_chunk_tokens,
+            overlap_tokens=settings.rag_chunk_overlap_tokens,
+            count_tokens=load_token_counter(settings.embedding_model),
+        )
+
+    async def start(self):
+        """Connect to Qdrant and create the default collection, once.
+
+        Falls back to the in-memory store when Qdrant is unreachable.
+        """
         try:
-            from qdrant_client import QdrantClient
+            from qdrant_client import AsyncQdrantClient
 
-            qdrant = QdrantClient(url=settings.qdrant_url)
-            self.store = VectorStore(
-                qdrant_client=qdrant,
+            store = VectorStore(
+                qdrant_client=AsyncQdrantClient(url=settings.qdrant_url),
                 embedding_client=self.llm_client,
                 collection_name="copilot_docs",
+                chunker=self.chunker,
             )
+            await store.bootstrap()
+            self.store = store
             logger.info("qdrant_connected", url=settings.qdrant_url)
         except Exception as e:
             logger.warning("qdrant_unavailable", error=str(e), msg="Using in-memory fallback")
-            self.store = InMemoryVectorStore(embedding_client=self.llm_client)
+            self.store = InMemoryVectorStore(
+                embedding_client=self.llm_client,
+                snapshot_path=settings.rag_snapshot_path or None,
+                chunker=self.chunker,
+            )
+
+    async def snapshot_loop(self):
+        """Periodically persist the in-memory fallback store, if it has changes."""
+        if not isinstance(self.store, InMemoryVectorStore) or not settings.rag_snapshot_path:
+            return
+        try:
+            while True:
+                await asyncio.sleep(settings.rag_snapshot_interval_s)
+                if self.store.dirty:
+                    await asyncio.to_thread(self.store.snapshot)
+        finally:
+            if self.store.dirty:
+                self.store.snapshot()
 
     async def Ingest(self, request, context):
         from shared.grpc_common import rag_pb2
@@ -75,6 +109,7 @@ class RAGServicer:
                 top_k=request.top_k or 5,
                 collection=request.collection or "copilot_docs",
                 score_threshold=request.score_threshold or 0.0,
+                filters=dict(request.filters) or None,
             )
             chunks = [
                 rag_pb2.RetrievedChunk(
@@ -109,12 +144,18 @@ async def serve():
         logger.error("grpc_stubs_missing")
         return
 
+    await servicer.start()
     port = settings.rag_service_port
     server.add_insecure_port(f"[::]:{port}")
     logger.info("rag_service_starting", port=port)
     await server.start()
     logger.info("rag_service_started", port=port)
-    await server.wait_for_termination()
+    snapshots = asyncio.create_task(servicer.snapshot_loop())
+    try:
+        await server.wait_for_termination()
+    finally:
+        snapshots.cancel()
+        await asyncio.gather(snapshots, return_exceptions=True)
 
 
 if __name__ == "__main__":
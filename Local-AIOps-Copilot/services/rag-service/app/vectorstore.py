@@ -2,26 +2,29 @@
 
 from __future__ import annotations
 
+import asyncio
+import json
+import os
+import shutil
+import tempfile
 import uuid
 from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Callable
 
+import numpy as np
+
+from shared.chunking import Chunk, chunk_by_chars, chunk_document
 from shared.llm_backend.base import LLMClient
 from shared.logging import get_logger
 
 logger = get_logger(__name__)
 
 
-def _chunk_text(text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
-    """Split text into overlapping chunks."""
-    if len(text) <= chunk_size:
-        return [text]
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start = end - overlap
-    return chunks
+# Fixed-size character windows; ingestion now uses the structure-aware chunk_document.
+_chunk_text = chunk_by_chars
+
+Chunker = Callable[[str], list[Chunk]]
 
 
 class BaseVectorStore(ABC):
@@ -30,73 +33,140 @@ class BaseVectorStore(ABC):
         ...
 
     @abstractmethod
-    async def retrieve(self, query: str, top_k: int, collection: str, score_threshold: float) -> list[dict]:
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        collection: str,
+        score_threshold: float,
+        filters: dict | None = None,
+    ) -> list[dict]:
         ...
 
     @abstractmethod
     async def health_check(self) -> bool:
         ...
 
+    async def bootstrap(self) -> None:
+        """One-time setup at service startup (create collections, etc.)."""
 
-class VectorStore(BaseVectorStore):
-    """Qdrant-backed vector store."""
 
-    def __init__(self, qdrant_client, embedding_client: LLMClient, collection_name: str = "copilot_docs"):
+class VectorStore(BaseVectorStore):
+    """Qdrant-backed vector store on ``qdrant_client.AsyncQdrantClient``.
+
+    Collections are created by ``bootstrap()`` at service startup rather than
+    checked on every request; a collection first seen at ingest time is
+    created once and remembered.  Ingest upserts points in batches of
+    ``upsert_batch_size`` with at most ``upsert_concurrency`` in flight, so a
+    large document does not monopolise the client while retrievals wait.
+    """
+
+    def __init__(
+        self,
+        qdrant_client,
+        embedding_client: LLMClient,
+        collection_name: str = "copilot_docs",
+        vector_size: int = 384,
+        upsert_batch_size: int = 256,
+        upsert_concurrency: int = 4,
+        chunker: Chunker = chunk_document,
+    ):
         self._qdrant = qdrant_client
         self._embedder = embedding_client
+        self._chunker = chunker
         self._default_collection = collection_name
-        self._ensure_collection(collection_name)
-
-    def _ensure_collection(self, name: str):
-        try:
+        self._vector_size = vector_size
+        self._upsert_batch_size = upsert_batch_size
+        self._upsert_slots = asyncio.Semaphore(upsert_concurrency)
+        self._ready: set[str] = set()
+        self._ready_lock = asyncio.Lock()
+
+    async def bootstrap(self) -> None:
+        await self._ensure_collection(self._default_collection)
+
+    async def _ensure_collection(self, name: str) -> None:
+        if name in self._ready:
+            return
+        async with self._ready_lock:
+            if name in self._ready:
+                return
             from qdrant_client.models import Distance, VectorParams
 
-            collections = [c.name for c in self._qdrant.get_collections().collections]
-            if name not in collections:
-                self._qdrant.create_collection(
+            if not await self._qdrant.collection_exists(name):
+                await self._qdrant.create_collection(
                     collection_name=name,
-                    vectors_config=VectorParams(size=384, distance=Distance.COSINE),
+                    vectors_config=VectorParams(size=self._vector_size, distance=Distance.COSINE),
                 )
                 logger.info("collection_created", name=name)
-        except Exception as e:
-            logger.error("collection_create_error", error=str(e))
+            self._ready.add(name)
 
     async def ingest(self, document_id: str, content: str, metadata: dict, collection: str) -> int:
-        chunks = _chunk_text(content)
-        embeddings_resp = await self._embedder.embeddings(chunks)
+        collection = collection or self._default_collection
+        await self._ensure_collection(collection)
+        chunks = self._chunker(content)
+        embeddings_resp = await self._embedder.embeddings([c.text for c in chunks])
         vectors = embeddings_resp.embeddings
 
         from qdrant_client.models import PointStruct
 
-        points = []
-        for i, (chunk, vec) in enumerate(zip(chunks, vectors)):
-            points.append(
-                PointStruct(
-                    id=str(uuid.uuid4()),
-                    vector=vec,
-                    payload={
-                        "document_id": document_id,
-                        "content": chunk,
-                        "chunk_index": i,
-                        **metadata,
-                    },
-                )
+        points = [
+            PointStruct(
+                id=str(uuid.uuid4()),
+                vector=vec,
+                payload={
+                    "document_id": document_id,
+                    "content": chunk.text,
+                    "chunk_index": i,
+                    **chunk.metadata(),
+                    **metadata,
+                },
             )
+            for i, (chunk, vec) in enumerate(zip(chunks, vectors))
+        ]
+
+        async def upsert(batch: list) -> None:
+            async with self._upsert_slots:
+                await self._qdrant.upsert(collection_name=collection, points=batch)
 
-        self._ensure_collection(collection)
-        self._qdrant.upsert(collection_name=collection, points=points)
+        size = self._upsert_batch_size
+        await asyncio.gather(*(upsert(points[i : i + size]) for i in range(0, len(points), size)))
         logger.info("ingested", document_id=document_id, chunks=len(points))
         return len(points)
 
-    async def retrieve(self, query: str, top_k: int, collection: str, score_threshold: float) -> list[dict]:
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        collection: str,
+        score_threshold: float,
+        filters: dict | None = None,
+    ) -> list[dict]:
         embeddings_resp = await self._embedder.embeddings([query])
         query_vec = embeddings_resp.embeddings[0]
 
-        results = self._qdrant.search(
+        query_filter = None
+        if filters:
+            from qdrant_client.models import FieldCondition, Filter, MatchAny, MatchValue
+
+            query_filter = Filter(
+                must=[
+                    FieldCondition(
+                        key=key,
+                        match=MatchAny(any=list(value))
+                        if isinstance(value, (list, tuple, set))
+                        else MatchValue(value=value),
+                    )
+                    for key, value in filters.items()
+                ]
+            )
+
+        response = await self._qdrant.query_points(
             collection_name=collection or self._default_collection,
-            query_vector=query_vec,
+            query=query_vec,
             limit=top_k,
             score_threshold=score_threshold if score_threshold > 0 else None,
+            query_filter=query_filter,
+            with_payload=True,
         )
 
         return [
@@ -104,77 +174,326 @@ class VectorStore(BaseVectorStore):
                 "document_id": r.payload.get("document_id", ""),
                 "content": r.payload.get("content", ""),
                 "score": r.score,
-                "metadata": {k: v for k, v in r.payload.items() if k not in ("document_id", "content")},
+                "metadata": {
+                    k: v for k, v in r.payload.items() if k not in ("document_id", "content")
+                },
             }
-            for r in results
+            for r in response.points
         ]
 
     async def health_check(self) -> bool:
         try:
-            self._qdrant.get_collections()
+            await self._qdrant.get_collections()
             return True
         except Exception:
             return False
 
 
-class InMemoryVectorStore(BaseVectorStore):
-    """Fallback in-memory vector store for dev mode without Qdrant."""
+class _Collection:
+    """Row-major float32 matrix of unit-normalised embeddings plus payloads.
+
+    Rows are appended into a buffer that doubles in capacity, so ingestion is
+    amortised O(1) per chunk and a query is a single matrix-vector product.
+    ``_index`` maps ``(metadata key, value)`` to row ids for filtered search.
+    """
+
+    def __init__(
+        self, dim: int, vectors: np.ndarray | None = None, records: list[dict] | None = None
+    ):
+        self.dim = dim
+        self.records: list[dict] = []
+        self._vectors = np.zeros((0, dim), dtype=np.float32)
+        self._index: dict[tuple[str, str], list[int]] = {}
+        if vectors is not None:
+            self._vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+            for record in records or []:
+                self._append_record(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def vectors(self) -> np.ndarray:
+        return self._vectors[: len(self.records)]
+
+    def add(self, vectors: np.ndarray, records: list[dict]) -> None:
+        if vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Embedding dimension {vectors.shape[1]} != collection dimension {self.dim}"
+            )
+        start, end = len(self.records), len(self.records) + len(records)
+        if end > len(self._vectors):
+            grown = np.zeros((max(end, 2 * len(self._vectors), 1024), self.dim), dtype=np.float32)
+            grown[:start] = self._vectors[:start]
+            self._vectors = grown
+        self._vectors[start:end] = _normalize(vectors)
+        for record in records:
+            self._append_record(record)
+
+    def _append_record(self, record: dict) -> None:
+        row = len(self.records)
+        self.records.append(record)
+        for key, value in record["metadata"].items():
+            self._index.setdefault((key, str(value)), []).append(row)
+
+    def candidates(self, filters: dict | None) -> np.ndarray | None:
+        """Row ids matching every filter (a list value matches any of its items)."""
+        if not filters:
+            return None
+        rows: np.ndarray | None = None
+        for key, wanted in filters.items():
+            values = wanted if isinstance(wanted, (list, tuple, set)) else [wanted]
+            # Row lists are appended in order, so each is already sorted and unique.
+            lists = [np.asarray(self._index.get((key, str(v)), ()), dtype=np.int64) for v in values]
+            matched = lists[0] if len(lists) == 1 else np.unique(np.concatenate(lists))
+            rows = matched if rows is None else np.intersect1d(rows, matched, assume_unique=True)
+            if rows.size == 0:
+                break
+        return rows
+
+    def _scores(self, rows: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Scores for the sorted row ids ``rows``.
+
+        Chunks of one document are stored contiguously, so filter matches tend
+        to come in runs; scoring each run through a slice view avoids copying
+        the matching rows out of the matrix.  Scattered matches are gathered.
+        """
+        breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+        if (len(breaks) + 1) * 16 > len(rows):
+            return self._vectors[rows] @ query
+        scores = np.empty(len(rows), dtype=np.float32)
+        starts = [0, *breaks.tolist()]
+        ends = [*breaks.tolist(), len(rows)]
+        for start, end in zip(starts, ends):
+            first = int(rows[start])
+            np.matmul(self._vectors[first : first + end - start], query, out=scores[start:end])
+        return scores
+
+    def search(
+        self, query: np.ndarray, top_k: int, score_threshold: float, filters: dict | None = None
+    ) -> list[tuple[float, dict]]:
+        rows = self.candidates(filters)
+        if rows is None:
+            scores = self.vectors @ query
+        elif rows.size == 0:
+            return []
+        else:
+            scores = self._scores(rows, query)
 
-    def __init__(self, embedding_client: LLMClient):
-        self._embedder = embedding_client
-        self._docs: dict[str, list[dict]] = {}  # collection -> [doc_records]
+        k = min(top_k, len(scores))
+        if k <= 0:
+            return []
+        if k < len(scores):
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+
+        results = []
+        for i in top:
+            score = float(scores[i])
+            if score < score_threshold:
+                break
+            row = int(rows[i]) if rows is not None else int(i)
+            results.append((score, self.records[row]))
+        return results
 
-    async def ingest(self, document_id: str, content: str, metadata: dict, collection: str) -> int:
-        chunks = _chunk_text(content)
-        embeddings_resp = await self._embedder.embeddings(chunks)
-        vectors = embeddings_resp.embeddings
 
-        if collection not in self._docs:
-            self._docs[collection] = []
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return np.divide(vectors, norms, out=np.zeros_like(vectors), where=norms > 0)
 
-        for i, (chunk, vec) in enumerate(zip(chunks, vectors)):
-            self._docs[collection].append({
+
+class InMemoryVectorStore(BaseVectorStore):
+    """Fallback in-memory vector store for dev mode without Qdrant.
+
+    Embeddings are normalised on ingest and kept in a numpy matrix per
+    collection, so cosine similarity is one matrix-vector product and top-k is
+    an ``argpartition``.  ``snapshot()`` writes the store to ``snapshot_path``
+    and a new store loads it from there, so restarts skip re-ingestion.
+    """
+
+    SNAPSHOT_VERSION = 1
+
+    def __init__(
+        self,
+        embedding_client: LLMClient,
+        snapshot_path: str | None = None,
+        chunker: Chunker = chunk_document,
+    ):
+        self._embedder = embedding_client
+        self._chunker = chunker
+        self._collections: dict[str, _Collection] = {}
+        self._snapshot_path = Path(snapshot_path) if snapshot_path else None
+        self._dirty = False
+        if self._snapshot_path and (self._snapshot_path / "manifest.json").exists():
+            self.load(self._snapshot_path)
+
+    @property
+    def dirty(self) -> bool:
+        """True when there are chunks not yet written by ``snapshot()``."""
+        return self._dirty
+
+    def add_embeddings(
+        self,
+        collection: str,
+        document_id: str,
+        chunks: list[str],
+        vectors,
+        metadata: dict | None = None,
+        chunk_metadata: list[dict] | None = None,
+    ) -> int:
+        """Store pre-computed embeddings for ``chunks`` (used by ingest and benchmarks).
+
+        ``chunk_metadata`` optionally holds one dict per chunk (section, kind, ...)
+        merged under the document-level ``metadata``.
+        """
+        if not chunks:
+            return 0
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if collection not in self._collections:
+            self._collections[collection] = _Collection(dim=vectors.shape[1])
+        records = [
+            {
                 "document_id": document_id,
                 "content": chunk,
-                "vector": vec,
-                "metadata": {**metadata, "chunk_index": i},
-            })
-
+                "metadata": {
+                    **(chunk_metadata[i] if chunk_metadata else {}),
+                    **(metadata or {}),
+                    "chunk_index": i,
+                },
+            }
+            for i, chunk in enumerate(chunks)
+        ]
+        self._collections[collection].add(vectors, records)
+        self._dirty = True
         return len(chunks)
 
-    async def retrieve(self, query: str, top_k: int, collection: str, score_threshold: float) -> list[dict]:
-        docs = self._docs.get(collection, [])
-        if not docs:
-            return []
-
-        embeddings_resp = await self._embedder.embeddings([query])
-        query_vec = embeddings_resp.embeddings[0]
-
-        scored = []
-        for doc in docs:
-            score = self._cosine_similarity(query_vec, doc["vector"])
-            if score >= score_threshold:
-                scored.append((score, doc))
-        scored.sort(key=lambda x: x[0], reverse=True)
+    async def ingest(self, document_id: str, content: str, metadata: dict, collection: str) -> int:
+        chunks = self._chunker(content)
+        texts = [c.text for c in chunks]
+        embeddings_resp = await self._embedder.embeddings(texts)
+        return self.add_embeddings(
+            collection,
+            document_id,
+            texts,
+            embeddings_resp.embeddings,
+            metadata,
+            chunk_metadata=[c.metadata() for c in chunks],
+        )
 
+    def search(
+        self,
+        query_vector,
+        top_k: int,
+        collection: str,
+        score_threshold: float = 0.0,
+        filters: dict | None = None,
+    ) -> list[dict]:
+        store = self._collections.get(collection)
+        if store is None or len(store) == 0:
+            return []
+        query = _normalize(np.asarray(query_vector, dtype=np.float32))
         return [
             {
-                "document_id": doc["document_id"],
-                "content": doc["content"],
+                "document_id": record["document_id"],
+                "content": record["content"],
                 "score": score,
-                "metadata": doc["metadata"],
+                "metadata": record["metadata"],
             }
-            for score, doc in scored[:top_k]
+            for score, record in store.search(query, top_k, score_threshold, filters)
         ]
 
-    @staticmethod
-    def _cosine_similarity(a: list[float], b: list[float]) -> float:
-        dot = sum(x * y for x, y in zip(a, b))
-        norm_a = sum(x * x for x in a) ** 0.5
-        norm_b = sum(x * x for x in b) ** 0.5
-        if norm_a == 0 or norm_b == 0:
-            return 0.0
-        return dot / (norm_a * norm_b)
+    async def retrieve(
+        self,
+        query: str,
+        top_k: int,
+        collection: str,
+        score_threshold: float,
+        filters: dict | None = None,
+    ) -> list[dict]:
+        if not self._collections.get(collection):
+            return []
+
+        embeddings_resp = await self._embedder.embeddings([query])
+        return self.search(
+            embeddings_resp.embeddings[0], top_k, collection, score_threshold, filters
+        )
+
+    def snapshot(self, path: str | None = None) -> Path:
+        """Write every collection to ``path`` (default: ``snapshot_path``) atomically.
+
+        Layout: ``manifest.json`` plus ``<n>.npy`` (vectors) and ``<n>.json``
+        (payloads) per collection.  The directory is written beside the target
+        and swapped in, so a crash mid-write leaves the previous snapshot intact.
+        """
+        target = Path(path) if path else self._snapshot_path
+        if target is None:
+            raise ValueError("No snapshot path configured")
+        target.parent.mkdir(parents=True, exist_ok=True)
+        staging = Path(tempfile.mkdtemp(prefix=f".{target.name}-", dir=target.parent))
+        previous = target.with_name(f".{target.name}-old")
+        # Rows are written before their records are appended, so slicing both
+        # at the record count gives a consistent view even if ingestion runs
+        # concurrently (the service snapshots from a worker thread).
+        counts = {}
+        try:
+            manifest = {"version": self.SNAPSHOT_VERSION, "collections": {}}
+            for i, (name, store) in enumerate(list(self._collections.items())):
+                count = counts[name] = len(store)
+                np.save(staging / f"{i}.npy", store.vectors[:count])
+                with open(staging / f"{i}.json", "w") as fh:
+                    json.dump(store.records[:count], fh)
+                manifest["collections"][name] = {"file": str(i), "dim": store.dim, "count": count}
+            with open(staging / "manifest.json", "w") as fh:
+                json.dump(manifest, fh)
+
+            if target.exists():
+                shutil.rmtree(previous, ignore_errors=True)
+                os.replace(target, previous)
+            os.replace(staging, target)
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            if previous.exists() and not target.exists():
+                os.replace(previous, target)
+            raise
+        shutil.rmtree(previous, ignore_errors=True)
+        # Still dirty if chunks were ingested while the snapshot was written.
+        self._dirty = {name: len(c) for name, c in self._collections.items()} != counts
+
+        logger.info(
+            "vectorstore_snapshot_written",
+            path=str(target),
+            collections=len(self._collections),
+            chunks=sum(len(c) for c in self._collections.values()),
+        )
+        return target
+
+    def load(self, path: str | Path) -> None:
+        """Replace the store's contents with the snapshot at ``path``."""
+        path = Path(path)
+        with open(path / "manifest.json") as fh:
+            manifest = json.load(fh)
+        if manifest.get("version") != self.SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version: {manifest.get('version')}")
+
+        collections = {}
+        for name, entry in manifest["collections"].items():
+            vectors = np.load(path / f"{entry['file']}.npy")
+            with open(path / f"{entry['file']}.json") as fh:
+                records = json.load(fh)
+            if len(records) != len(vectors):
+                raise ValueError(f"Snapshot collection {name!r} is inconsistent")
+            collections[name] = _Collection(entry["dim"], vectors, records)
+        self._collections = collections
+        self._dirty = False
+        logger.info(
+            "vectorstore_snapshot_loaded",
+            path=str(path),
+            collections=len(collections),
+            chunks=sum(len(c) for c in collections.values()),
+        )
 
     async def health_check(self) -> bool:
         return True
@@ -0,0 +1,201 @@
+"""Listing and decision benchmark for the release repository on SQLite.
+
+Seeds a SQLite database with synthetic releases (20 models, every status,
+two years of ``created_at``, most of them evaluated), then times through
+:class:`ReleaseRepository`:
+
+- ``full_list``: every release in one query, the listing's former behaviour
+- ``first_page`` / ``deep_page``: a keyset page at the head and half-way down
+- ``status_page`` / ``model_page`` / ``date_page``: filtered pages
+- ``decision``: reading both eval summaries and running ``make_decision``
+
+Each query is then timed again with the listing indexes dropped.
+
+Usage (from ``services/release-controller``)::
+
+    python -m app.benchmark --releases 100000 --queries 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import datetime
+import json
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+_PROJECT_ROOT = str(Path(__file__).resolve().parents[3])
+if _PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, _PROJECT_ROOT)
+
+from sqlalchemy import insert, select, text  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+from app.decision_engine import make_decision  # noqa: E402
+from app.models import ReleaseRecord, ReleaseStatus  # noqa: E402
+from app.repository import ReleaseRepository, encode_cursor  # noqa: E402
+from shared.llm_backend.benchmark import percentile  # noqa: E402
+
+PAGE_SIZE = 50
+FULL_LIST_RUNS = 3  # loading every row is slow; a few runs are enough
+
+
+@dataclass
+class BenchmarkRow:
+    query: str
+    rows: int
+    p50_ms: float
+    p99_ms: float
+    unindexed_p50_ms: float | None = None
+    unindexed_p99_ms: float | None = None
+
+
+def _synthetic_rows(count: int, rng: random.Random) -> list[dict]:
+    start = datetime.datetime(2024, 1, 1)
+    statuses = [s.value for s in ReleaseStatus]
+    rows = []
+    for i in range(count):
+        evaluated = rng.random() < 0.8
+        samples = rng.randint(10, 200) if evaluated else None
+        rows.append(
+            {
+                "release_id": f"rel-{i:08x}",
+                "model_name": f"model-{i % 20}",
+                "version": f"1.{i // 20}",
+                "status": rng.choice(statuses),
+                "slot": rng.choice(["blue", "green"]),
+                "created_at": start + datetime.timedelta(seconds=rng.randint(0, 2 * 365 * 86400)),
+                "eval_runs": rng.randint(1, 5) if evaluated else None,
+                "eval_samples": samples,
+                "error_total": samples * rng.uniform(0, 0.06) if evaluated else None,
+                "quality_total": samples * rng.uniform(0.6, 0.95) if evaluated else None,
+                "latency_p99_total": samples * rng.uniform(200, 1200) if evaluated else None,
+            }
+        )
+    return rows
+
+
+async def _seed(repo: ReleaseRepository, count: int, seed: int) -> list[str]:
+    rows = _synthetic_rows(count, random.Random(seed))
+    async with repo.engine.begin() as conn:
+        for start in range(0, count, 10_000):
+            await conn.execute(insert(ReleaseRecord), rows[start : start + 10_000])
+    return [r["release_id"] for r in rows]
+
+
+async def _time_ms(fn, runs: int) -> tuple[list[float], int]:
+    latencies, returned = [], 0
+    for _ in range(runs):
+        started = time.perf_counter()
+        returned = await fn()
+        latencies.append((time.perf_counter() - started) * 1000)
+    return latencies, returned
+
+
+def _queries(repo: ReleaseRepository, release_ids: list[str], middle_cursor: str):
+    async def full_list():
+        async with repo._sessions() as session:
+            stmt = select(ReleaseRecord).order_by(ReleaseRecord.created_at.desc())
+            return len(list(await session.scalars(stmt)))
+
+    async def page(**filters):
+        records, _ = await repo.list_page(PAGE_SIZE, **filters)
+        return len(records)
+
+    pairs = iter(range(0, len(release_ids) - 1, 2))
+
+    async def decision():
+        i = next(pairs)
+        inputs = await repo.decision_inputs([release_ids[i], release_ids[i + 1]])
+        (blue, _, _), (green, drift, drifted) = inputs[release_ids[i]], inputs[release_ids[i + 1]]
+        if blue and green:
+            make_decision(blue, green, drift_score=drift or 0.0, drift_detected=drifted)
+        return len(inputs)
+
+    return {
+        "full_list": (full_list, True),
+        "first_page": (lambda: page(), False),
+        "deep_page": (lambda: page(cursor=middle_cursor), False),
+        "status_page": (lambda: page(status=ReleaseStatus.EVALUATED.value), False),
+        "model_page": (lambda: page(model_name="model-7"), False),
+        "date_page": (
+            lambda: page(
+                created_after=datetime.datetime(2024, 6, 1),
+                created_before=datetime.datetime(2024, 7, 1),
+            ),
+            False,
+        ),
+        "decision": (decision, False),
+    }
+
+
+async def run_benchmark(
+    releases: int = 100_000, queries: int = 50, seed: int = 0
+) -> list[BenchmarkRow]:
+    with tempfile.TemporaryDirectory() as tmp:
+        repo = ReleaseRepository(create_async_engine(f"sqlite+aiosqlite:///{tmp}/releases.db"))
+        await repo.create_schema()
+        release_ids = await _seed(repo, releases, seed)
+
+        async with repo._sessions() as session:
+            stmt = (
+                select(ReleaseRecord)
+                .order_by(ReleaseRecord.created_at.desc(), ReleaseRecord.id.desc())
+                .offset(releases // 2)
+                .limit(1)
+            )
+            middle_cursor = encode_cursor(await session.scalar(stmt))
+
+        rows: dict[str, BenchmarkRow] = {}
+        for name, (fn, full) in _queries(repo, release_ids, middle_cursor).items():
+            latencies, returned = await _time_ms(fn, FULL_LIST_RUNS if full else queries)
+            rows[name] = BenchmarkRow(
+                name,
+                returned,
+                round(percentile(latencies, 50), 2),
+                round(percentile(latencies, 99), 2),
+            )
+
+        async with repo.engine.begin() as conn:
+            for index in ReleaseRecord.__table__.indexes:
+                if not index.unique:
+                    await conn.execute(text(f"DROP INDEX {index.name}"))
+        for name, (fn, full) in _queries(repo, release_ids, middle_cursor).items():
+            latencies, _ = await _time_ms(fn, FULL_LIST_RUNS if full else queries)
+            rows[name].unindexed_p50_ms = round(percentile(latencies, 50), 2)
+            rows[name].unindexed_p99_ms = round(percentile(latencies, 99), 2)
+
+        await repo.close()
+    return list(rows.values())
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark release listing and decisions on SQLite"
+    )
+    parser.add_argument("--releases", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run_benchmark(args.releases, args.queries))
+    print(
+        f"{'query':<13}{'rows':>8}{'p50 ms':>10}{'p99 ms':>10}{'no-idx p50':>12}{'no-idx p99':>12}"
+    )
+    for row in rows:
+        print(
+            f"{row.query:<13}{row.rows:>8}{row.p50_ms:>10.2f}{row.p99_ms:>10.2f}"
+            f"{row.unindexed_p50_ms:>12.2f}{row.unindexed_p99_ms:>12.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump([asdict(r) for r in rows], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
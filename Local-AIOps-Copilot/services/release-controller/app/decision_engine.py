@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections.abc import Mapping
 from dataclasses import dataclass
 
 from shared.logging import get_logger
@@ -16,18 +17,76 @@ class DecisionCriteria:
     max_error_rate: float = 0.05
     min_quality_score: float = 0.70
     max_latency_p99_ms: float = 1000.0
-    max_drift_score: float = 0.25
+    # Optional extra gate on the drift score (1 - p-value); the eval service's
+    # drift_detected flag, at its EVAL_DRIFT_ALPHA, always holds a release.
+    max_drift_score: float | None = None
     min_quality_improvement: float = 0.02  # green must be at least this much better
 
 
+@dataclass(frozen=True)
+class EvalSummary:
+    """Aggregated evaluation results for one release.
+
+    The release controller keeps running, sample-weighted totals per release
+    as eval runs arrive, so a decision reads one summary row per side instead
+    of re-deriving it from raw run metrics.
+    """
+
+    error_rate: float = 0.0
+    quality_score: float = 0.0
+    latency_p99_ms: float = 0.0
+    runs: int = 1
+    samples: int = 0
+
+    @classmethod
+    def from_metrics(cls, metrics: Mapping[str, float]) -> EvalSummary:
+        return cls(
+            error_rate=metrics.get("error_rate", 0),
+            quality_score=metrics.get("quality_score", 0),
+            latency_p99_ms=metrics.get("latency_p99_ms", 0),
+            samples=int(metrics.get("samples", 0)),
+        )
+
+    @classmethod
+    def from_totals(
+        cls,
+        runs: int,
+        samples: int,
+        error_total: float,
+        quality_total: float,
+        latency_p99_total: float,
+    ) -> EvalSummary:
+        """Build the summary from the sample-weighted totals stored per release."""
+        weight = samples or 1
+        return cls(
+            error_rate=error_total / weight,
+            quality_score=quality_total / weight,
+            latency_p99_ms=latency_p99_total / weight,
+            runs=runs,
+            samples=samples,
+        )
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            "error_rate": round(self.error_rate, 4),
+            "quality_score": round(self.quality_score, 4),
+            "latency_p99_ms": round(self.latency_p99_ms, 2),
+            "runs": self.runs,
+            "samples": self.samples,
+        }
+
+
 def make_decision(
-    blue_metrics: dict[str, float],
-    green_metrics: dict[str, float],
+    blue_metrics: EvalSummary | Mapping[str, float],
+    green_metrics: EvalSummary | Mapping[str, float],
     drift_score: float = 0.0,
     criteria: DecisionCriteria | None = None,
+    drift_detected: bool = False,
 ) -> tuple[str, str]:
     """Evaluate blue vs green metrics and return (decision, rationale).
 
+    Each side is an :class:`EvalSummary` or a plain metrics mapping.
+
     Returns one of:
         - stay_on_blue
         - switch_to_green
@@ -37,12 +96,21 @@ def make_decision(
     criteria = criteria or DecisionCriteria()
     reasons = []
 
-    green_error = green_metrics.get("error_rate", 0)
-    green_quality = green_metrics.get("quality_score", 0)
-    green_latency = green_metrics.get("latency_p99_ms", 0)
-    blue_error = blue_metrics.get("error_rate", 0)
-    blue_quality = blue_metrics.get("quality_score", 0)
-    blue_latency = blue_metrics.get("latency_p99_ms", 0)
+    blue, green = (
+        side if isinstance(side, EvalSummary) else EvalSummary.from_metrics(side)
+        for side in (blue_metrics, green_metrics)
+    )
+
+    green_error, green_quality, green_latency = (
+        green.error_rate,
+        green.quality_score,
+        green.latency_p99_ms,
+    )
+    blue_error, blue_quality, blue_latency = (
+        blue.error_rate,
+        blue.quality_score,
+        blue.latency_p99_ms,
+    )
 
     # Gate 1: Green must meet minimum thresholds
     if green_error > criteria.max_error_rate:
@@ -54,12 +122,19 @@ def make_decision(
         return "rollback_to_blue", "; ".join(reasons)
 
     if green_latency > criteria.max_latency_p99_ms:
-        reasons.append(f"Green p99 latency {green_latency:.1f}ms exceeds max {criteria.max_latency_p99_ms}ms")
+        reasons.append(
+            f"Green p99 latency {green_latency:.1f}ms exceeds max {criteria.max_latency_p99_ms}ms"
+        )
         return "hold_for_review", "; ".join(reasons)
 
     # Gate 2: Check for drift
-    if drift_score > criteria.max_drift_score:
-        reasons.append(f"Drift score {drift_score:.3f} exceeds threshold {criteria.max_drift_score}")
+    if drift_detected:
+        reasons.append(f"Green answers drifted from blue (drift score {drift_score:.3f})")
+        return "hold_for_review", "; ".join(reasons)
+    if criteria.max_drift_score is not None and drift_score > criteria.max_drift_score:
+        reasons.append(
+            f"Drift score {drift_score:.3f} exceeds threshold {criteria.max_drift_score}"
+        )
         return "hold_for_review", "; ".join(reasons)
 
     # Gate 3: Compare green vs blue
@@ -67,7 +142,8 @@ def make_decision(
     if quality_improvement < criteria.min_quality_improvement:
         reasons.append(
             f"Green quality improvement {quality_improvement:.3f} below min "
-            f"{criteria.min_quality_improvement} (blue={blue_quality:.3f}, green={green_quality:.3f})"
+            f"{criteria.min_quality_improvement} "
+            f"(blue={blue_quality:.3f}, green={green_quality:.3f})"
         )
         if green_error <= blue_error and green_latency <= blue_latency:
             reasons.append("Green is not worse on error/latency, but quality gain is marginal")
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import datetime
 import sys
 import uuid
 from contextlib import asynccontextmanager
@@ -12,46 +13,43 @@ if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
 import httpx
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from prometheus_client import make_asgi_app
-from sqlalchemy import create_engine, select
-from sqlalchemy.orm import Session, sessionmaker
 
 from shared.config import get_settings
 from shared.logging import setup_logging, get_logger
 from shared.metrics import setup_metrics
 from app.models import (
-    Base,
     DecisionRequest,
     DecisionResponse,
+    RecordEvalRequest,
     RegisterReleaseRequest,
     RegisterReleaseResponse,
     ReleaseInfo,
+    ReleasePage,
     ReleaseRecord,
     ReleaseStatus,
 )
 from app.decision_engine import make_decision
+from app.repository import ReleaseRepository, summary_of
 
 settings = get_settings()
 setup_logging(settings.log_level, settings.log_format, "release-controller")
 logger = get_logger(__name__)
 metrics = setup_metrics("release-controller")
 
-# Database setup
-try:
-    engine = create_engine(settings.postgres_url)
-    SessionLocal = sessionmaker(bind=engine)
-except Exception as e:
-    logger.warning("postgres_unavailable", error=str(e), msg="Using SQLite fallback")
-    engine = create_engine("sqlite:///release_controller.db")
-    SessionLocal = sessionmaker(bind=engine)
+repository: ReleaseRepository | None = None
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
-    logger.info("release_controller_started")
+    global repository
+    repository = await ReleaseRepository.connect(
+        settings.postgres_url, settings.release_db_fallback_url
+    )
+    logger.info("release_controller_started", database=repository.engine.url.get_backend_name())
     yield
+    await repository.close()
     logger.info("release_controller_stopped")
 
 
@@ -60,112 +58,124 @@ metrics_app = make_asgi_app()
 app.mount("/metrics", metrics_app)
 
 
-def _get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _release_info(r: ReleaseRecord) -> ReleaseInfo:
+    summary = summary_of(r)
+    return ReleaseInfo(
+        release_id=r.release_id,
+        model_name=r.model_name,
+        version=r.version,
+        status=r.status,
+        slot=r.slot,
+        created_at=r.created_at.isoformat() if r.created_at else "",
+        eval_metrics=r.eval_metrics,
+        eval_summary=summary.as_dict() if summary else None,
+        drift_score=r.drift_score,
+        drift_detected=r.drift_detected,
+        decision=r.decision,
+        decision_rationale=r.decision_rationale,
+    )
 
 
 @app.post("/api/v1/releases", response_model=RegisterReleaseResponse)
 async def register_release(request: RegisterReleaseRequest):
     """Register a new release candidate."""
     release_id = f"rel-{uuid.uuid4().hex[:8]}"
-    with SessionLocal() as db:
-        record = ReleaseRecord(
-            release_id=release_id,
-            model_name=request.model_name,
-            version=request.version,
-            status=ReleaseStatus.REGISTERED.value,
-            slot=request.slot,
-        )
-        db.add(record)
-        db.commit()
+    await repository.register(release_id, request.model_name, request.version, request.slot)
 
     logger.info("release_registered", release_id=release_id, model=request.model_name)
     return RegisterReleaseResponse(release_id=release_id, status=ReleaseStatus.REGISTERED.value)
 
 
-@app.get("/api/v1/releases", response_model=list[ReleaseInfo])
-async def list_releases():
-    """List all releases."""
-    with SessionLocal() as db:
-        records = db.query(ReleaseRecord).order_by(ReleaseRecord.created_at.desc()).all()
-        return [
-            ReleaseInfo(
-                release_id=r.release_id,
-                model_name=r.model_name,
-                version=r.version,
-                status=r.status,
-                slot=r.slot,
-                created_at=r.created_at.isoformat() if r.created_at else "",
-                eval_metrics=r.eval_metrics,
-                decision=r.decision,
-                decision_rationale=r.decision_rationale,
-            )
-            for r in records
-        ]
+@app.get("/api/v1/releases", response_model=ReleasePage)
+async def list_releases(
+    limit: int | None = Query(None, ge=1),
+    cursor: str | None = None,
+    status: str | None = None,
+    model_name: str | None = None,
+    created_after: datetime.datetime | None = None,
+    created_before: datetime.datetime | None = None,
+):
+    """List releases newest first, one page at a time.
+
+    Pass the returned ``next_cursor`` back as ``cursor`` for the next page.
+    """
+    limit = min(limit or settings.release_page_size, settings.release_page_size_max)
+    try:
+        records, next_cursor = await repository.list_page(
+            limit,
+            cursor=cursor,
+            status=status,
+            model_name=model_name,
+            created_after=created_after,
+            created_before=created_before,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ReleasePage(items=[_release_info(r) for r in records], next_cursor=next_cursor)
 
 
 @app.get("/api/v1/releases/{release_id}", response_model=ReleaseInfo)
 async def get_release(release_id: str):
     """Get a specific release."""
-    with SessionLocal() as db:
-        r = db.query(ReleaseRecord).filter(ReleaseRecord.release_id == release_id).first()
-        if not r:
-            raise HTTPException(status_code=404, detail="Release not found")
-        return ReleaseInfo(
-            release_id=r.release_id,
-            model_name=r.model_name,
-            version=r.version,
-            status=r.status,
-            slot=r.slot,
-            created_at=r.created_at.isoformat() if r.created_at else "",
-            eval_metrics=r.eval_metrics,
-            decision=r.decision,
-            decision_rationale=r.decision_rationale,
-        )
+    r = await repository.get(release_id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Release not found")
+    return _release_info(r)
+
+
+@app.post("/api/v1/releases/{release_id}/eval", response_model=ReleaseInfo)
+async def record_eval(release_id: str, request: RecordEvalRequest):
+    """Fold an eval run and/or a drift check into the release's summary."""
+    recorded = await repository.record_eval(
+        release_id, request.metrics, request.drift_score, request.drift_detected
+    )
+    if not recorded:
+        raise HTTPException(status_code=404, detail="Release not found")
+    return _release_info(await repository.get(release_id))
 
 
 @app.post("/api/v1/releases/decide", response_model=DecisionResponse)
 async def decide_release(request: DecisionRequest):
-    """Run the blue-green decision engine."""
-    with SessionLocal() as db:
-        blue = db.query(ReleaseRecord).filter(ReleaseRecord.release_id == request.blue_release_id).first()
-        green = db.query(ReleaseRecord).filter(ReleaseRecord.release_id == request.green_release_id).first()
-
-        if not blue or not green:
-            raise HTTPException(status_code=404, detail="Release(s) not found")
-
-        blue_metrics = blue.eval_metrics or {
-            "error_rate": 0.03, "quality_score": 0.80, "latency_p99_ms": 400.0
-        }
-        green_metrics = green.eval_metrics or {
-            "error_rate": 0.02, "quality_score": 0.85, "latency_p99_ms": 350.0
-        }
-
-        decision, rationale = make_decision(blue_metrics, green_metrics)
-
-        # Update records
-        blue.decision = decision
-        blue.decision_rationale = rationale
-        green.decision = decision
-        green.decision_rationale = rationale
-
-        applied = False
-        if request.auto_apply and decision == "switch_to_green":
-            blue.status = ReleaseStatus.ARCHIVED.value
-            green.status = ReleaseStatus.ACTIVE_GREEN.value
-            applied = True
-            logger.info("release_switched", decision=decision, green=request.green_release_id)
-        elif request.auto_apply and decision == "rollback_to_blue":
-            green.status = ReleaseStatus.ROLLED_BACK.value
-            blue.status = ReleaseStatus.ACTIVE_BLUE.value
-            applied = True
-            logger.info("release_rolled_back", decision=decision, blue=request.blue_release_id)
-
-        db.commit()
+    """Run the blue-green decision engine on the releases' eval summaries."""
+    inputs = await repository.decision_inputs([request.blue_release_id, request.green_release_id])
+    if request.blue_release_id not in inputs or request.green_release_id not in inputs:
+        raise HTTPException(status_code=404, detail="Release(s) not found")
+
+    blue_summary, _, _ = inputs[request.blue_release_id]
+    green_summary, green_drift, green_drifted = inputs[request.green_release_id]
+    if blue_summary is None or green_summary is None:
+        missing = [
+            rid for rid, summary in (
+                (request.blue_release_id, blue_summary), (request.green_release_id, green_summary)
+            ) if summary is None
+        ]
+        decision = "hold_for_review"
+        rationale = f"No evaluation results for {', '.join(missing)}"
+    else:
+        decision, rationale = make_decision(
+            blue_summary,
+            green_summary,
+            drift_score=green_drift or 0.0,
+            drift_detected=green_drifted,
+        )
+
+    statuses: dict[str, str | None] = {
+        request.blue_release_id: None,
+        request.green_release_id: None,
+    }
+    applied = False
+    if request.auto_apply and decision == "switch_to_green":
+        statuses[request.blue_release_id] = ReleaseStatus.ARCHIVED.value
+        statuses[request.green_release_id] = ReleaseStatus.ACTIVE_GREEN.value
+        applied = True
+        logger.info("release_switched", decision=decision, green=request.green_release_id)
+    elif request.auto_apply and decision == "rollback_to_blue":
+        statuses[request.green_release_id] = ReleaseStatus.ROLLED_BACK.value
+        statuses[request.blue_release_id] = ReleaseStatus.ACTIVE_BLUE.value
+        applied = True
+        logger.info("release_rolled_back", decision=decision, blue=request.blue_release_id)
+
+    await repository.apply_decision(decision, rationale, statuses)
 
     metrics.request_count.labels("POST", "/api/v1/releases/decide", "200").inc()
     return DecisionResponse(
@@ -173,18 +183,17 @@ async def decide_release(request: DecisionRequest):
         rationale=rationale,
         blue_release_id=request.blue_release_id,
         green_release_id=request.green_release_id,
-        metrics_summary={"blue": blue_metrics, "green": green_metrics},
+        metrics_summary={
+            "blue": blue_summary.as_dict() if blue_summary else {},
+            "green": green_summary.as_dict() if green_summary else {},
+            "green_drift_score": green_drift,
+            "green_drift_detected": green_drifted,
+        },
         applied=applied,
     )
 
 
 @app.get("/health")
 async def health():
-    db_ok = False
-    try:
-        with SessionLocal() as db:
-            db.execute(select(ReleaseRecord).limit(1))
-            db_ok = True
-    except Exception:
-        pass
+    db_ok = repository is not None and await repository.ping()
     return {"status": "healthy" if db_ok else "degraded", "database": db_ok}
@@ -6,7 +6,7 @@ import datetime
 from enum import Enum
 
 from pydantic import BaseModel, Field
-from sqlalchemy import Column, DateTime, Float, Integer, String, Text, JSON
+from sqlalchemy import Boolean, Column, DateTime, Float, Index, Integer, String, Text, JSON
 from sqlalchemy.orm import declarative_base
 
 Base = declarative_base()
@@ -42,12 +42,31 @@ class ReleaseRecord(Base):
     status = Column(String(32), nullable=False, default=ReleaseStatus.REGISTERED.value)
     slot = Column(String(8), nullable=True)  # "blue" or "green"
     created_at = Column(DateTime, default=datetime.datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+    updated_at = Column(
+        DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow
+    )
     eval_metrics = Column(JSON, nullable=True)
     decision = Column(String(32), nullable=True)
     decision_rationale = Column(Text, nullable=True)
     mlflow_run_id = Column(String(64), nullable=True)
 
+    # Sample-weighted running totals of eval runs; the summary is total / samples.
+    eval_runs = Column(Integer, nullable=True)
+    eval_samples = Column(Integer, nullable=True)
+    error_total = Column(Float, nullable=True)
+    quality_total = Column(Float, nullable=True)
+    latency_p99_total = Column(Float, nullable=True)
+    drift_score = Column(Float, nullable=True)  # latest drift check
+    drift_detected = Column(Boolean, nullable=True)
+
+    # Listing is keyset-paginated newest first on (created_at, id), optionally
+    # filtered by status or model.
+    __table_args__ = (
+        Index("ix_releases_created_at_id", "created_at", "id"),
+        Index("ix_releases_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_releases_model_created_at_id", "model_name", "created_at", "id"),
+    )
+
 
 # ── Pydantic schemas ──
 
@@ -71,10 +90,24 @@ class ReleaseInfo(BaseModel):
     slot: str | None
     created_at: str
     eval_metrics: dict | None = None
+    eval_summary: dict | None = None
+    drift_score: float | None = None
+    drift_detected: bool | None = None
     decision: str | None = None
     decision_rationale: str | None = None
 
 
+class ReleasePage(BaseModel):
+    items: list[ReleaseInfo]
+    next_cursor: str | None = None
+
+
+class RecordEvalRequest(BaseModel):
+    metrics: dict[str, float] = Field(default_factory=dict)
+    drift_score: float | None = None
+    drift_detected: bool | None = None
+
+
 class DecisionRequest(BaseModel):
     blue_release_id: str
     green_release_id: str
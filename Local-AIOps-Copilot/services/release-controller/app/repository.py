@@ -0,0 +1,305 @@
+"""Async persistence for releases.
+
+All database access goes through an ``AsyncEngine`` (asyncpg for Postgres,
+aiosqlite for the SQLite fallback), so handlers never block the event loop.
+Listing is keyset-paginated newest first on ``(created_at, id)``: the cursor
+is the last row's key, and each page is an index range scan whatever its
+depth.  Eval runs are folded into per-release running totals with a single
+``UPDATE``, which is what the decision endpoint reads.
+"""
+
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import json
+from typing import Any, Mapping
+
+from sqlalchemy import case, func, inspect, select, text, tuple_, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.decision_engine import EvalSummary
+from app.models import Base, ReleaseRecord, ReleaseStatus
+from shared.logging import get_logger
+
+logger = get_logger(__name__)
+
+_ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+_PRE_EVAL_STATUSES = (ReleaseStatus.REGISTERED.value, ReleaseStatus.EVALUATING.value)
+
+
+def async_database_url(url: str) -> str:
+    """Map a configured (possibly sync) database URL onto its async driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS:
+        return url
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def encode_cursor(record: ReleaseRecord) -> str:
+    raw = json.dumps([record.created_at.isoformat(), record.id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime.datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, row_id = json.loads(raw)
+        return datetime.datetime.fromisoformat(created_at), int(row_id)
+    except (binascii.Error, TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def _naive_utc(value: datetime.datetime) -> datetime.datetime:
+    # created_at is stored as naive UTC.
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+
+
+def _run_totals(metrics: Mapping[str, float]) -> dict[str, float]:
+    """One eval run's sample-weighted contribution to the release's totals."""
+    weight = max(int(metrics.get("samples", 1)), 1)
+    return {
+        "eval_samples": weight,
+        "error_total": weight * metrics.get("error_rate", 0.0),
+        "quality_total": weight * metrics.get("quality_score", 0.0),
+        "latency_p99_total": weight * metrics.get("latency_p99_ms", 0.0),
+    }
+
+
+def _backfill_eval_totals(conn):
+    """Seed the totals of releases evaluated before they existed from their last run."""
+    table = ReleaseRecord.__table__
+    rows = conn.execute(
+        select(table.c.id, table.c.eval_metrics).where(
+            table.c.eval_metrics.is_not(None), table.c.eval_runs.is_(None)
+        )
+    ).all()
+    backfilled = 0
+    for row in rows:
+        if not row.eval_metrics:
+            continue
+        conn.execute(
+            update(table)
+            .where(table.c.id == row.id)
+            .values(eval_runs=1, **_run_totals(row.eval_metrics))
+        )
+        backfilled += 1
+    if backfilled:
+        logger.info("release_eval_totals_backfilled", releases=backfilled)
+
+
+def _create_schema(conn):
+    """Create missing tables, then add columns and indexes newer than the table."""
+    Base.metadata.create_all(conn)
+    table = ReleaseRecord.__table__
+    existing = {c["name"] for c in inspect(conn).get_columns(table.name)}
+    for column in table.columns:
+        if column.name not in existing:
+            column_type = column.type.compile(dialect=conn.dialect)
+            conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"))
+            logger.info("release_schema_column_added", column=column.name)
+    if "eval_runs" not in existing:
+        _backfill_eval_totals(conn)
+    for index in table.indexes:
+        index.create(conn, checkfirst=True)
+
+
+class ReleaseRepository:
+    """Release persistence on an async engine."""
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self._sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+    @classmethod
+    async def connect(cls, url: str, fallback_url: str | None = None) -> ReleaseRepository:
+        """Open ``url`` and create the schema, falling back to ``fallback_url``."""
+        repo = None
+        try:
+            repo = cls(create_async_engine(async_database_url(url), pool_pre_ping=True))
+            await repo.create_schema()
+            return repo
+        except Exception as e:
+            if repo is not None:
+                await repo.close()
+            if not fallback_url:
+                raise
+            logger.warning("postgres_unavailable", error=str(e), msg="Using SQLite fallback")
+        repo = cls(create_async_engine(async_database_url(fallback_url)))
+        await repo.create_schema()
+        return repo
+
+    async def create_schema(self):
+        async with self.engine.begin() as conn:
+            await conn.run_sync(_create_schema)
+
+    async def close(self):
+        await self.engine.dispose()
+
+    async def ping(self) -> bool:
+        try:
+            async with self.engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+            return True
+        except Exception:
+            return False
+
+    async def register(
+        self, release_id: str, model_name: str, version: str, slot: str
+    ) -> ReleaseRecord:
+        record = ReleaseRecord(
+            release_id=release_id,
+            model_name=model_name,
+            version=version,
+            status=ReleaseStatus.REGISTERED.value,
+            slot=slot,
+        )
+        async with self._sessions.begin() as session:
+            session.add(record)
+        return record
+
+    async def get(self, release_id: str) -> ReleaseRecord | None:
+        async with self._sessions() as session:
+            return await session.scalar(
+                select(ReleaseRecord).where(ReleaseRecord.release_id == release_id)
+            )
+
+    async def list_page(
+        self,
+        limit: int,
+        cursor: str | None = None,
+        status: str | None = None,
+        model_name: str | None = None,
+        created_after: datetime.datetime | None = None,
+        created_before: datetime.datetime | None = None,
+    ) -> tuple[list[ReleaseRecord], str | None]:
+        """One page of releases, newest first, and the cursor for the next page.
+
+        Raises ``ValueError`` for a malformed cursor.
+        """
+        stmt = select(ReleaseRecord)
+        if status is not None:
+            stmt = stmt.where(ReleaseRecord.status == status)
+        if model_name is not None:
+            stmt = stmt.where(ReleaseRecord.model_name == model_name)
+        if created_after is not None:
+            stmt = stmt.where(ReleaseRecord.created_at >= _naive_utc(created_after))
+        if created_before is not None:
+            stmt = stmt.where(ReleaseRecord.created_at < _naive_utc(created_before))
+        if cursor is not None:
+            stmt = stmt.where(
+                tuple_(ReleaseRecord.created_at, ReleaseRecord.id) < tuple_(*decode_cursor(cursor))
+            )
+        stmt = stmt.order_by(ReleaseRecord.created_at.desc(), ReleaseRecord.id.desc()).limit(
+            limit + 1
+        )
+
+        async with self._sessions() as session:
+            records = list(await session.scalars(stmt))
+        if len(records) <= limit:
+            return records, None
+        records = records[:limit]
+        return records, encode_cursor(records[-1])
+
+    async def record_eval(
+        self,
+        release_id: str,
+        metrics: Mapping[str, float],
+        drift_score: float | None = None,
+        drift_detected: bool | None = None,
+    ) -> bool:
+        """Fold one eval run into the release's running totals; False if unknown.
+
+        The totals are incremented in the ``UPDATE`` itself, so concurrent
+        runs for the same release cannot lose each other's contribution.
+        """
+        values: dict[str, Any] = {}
+        if metrics:
+            r = ReleaseRecord
+            values = {
+                "eval_metrics": dict(metrics),
+                "eval_runs": func.coalesce(r.eval_runs, 0) + 1,
+                **{
+                    name: func.coalesce(getattr(r, name), 0) + value
+                    for name, value in _run_totals(metrics).items()
+                },
+                "status": case(
+                    (r.status.in_(_PRE_EVAL_STATUSES), ReleaseStatus.EVALUATED.value),
+                    else_=r.status,
+                ),
+            }
+        if drift_score is not None:
+            values["drift_score"] = drift_score
+        if drift_detected is not None:
+            values["drift_detected"] = drift_detected
+        if not values:
+            return await self.get(release_id) is not None
+
+        async with self._sessions.begin() as session:
+            result = await session.execute(
+                update(ReleaseRecord).where(ReleaseRecord.release_id == release_id).values(**values)
+            )
+        return result.rowcount > 0
+
+    async def decision_inputs(
+        self, release_ids: list[str]
+    ) -> dict[str, tuple[EvalSummary | None, float | None, bool]]:
+        """Eval summary and latest drift check per release, in one narrow query."""
+        r = ReleaseRecord
+        stmt = select(
+            r.release_id,
+            r.eval_runs,
+            r.eval_samples,
+            r.error_total,
+            r.quality_total,
+            r.latency_p99_total,
+            r.drift_score,
+            r.drift_detected,
+        ).where(r.release_id.in_(release_ids))
+        async with self._sessions() as session:
+            rows = (await session.execute(stmt)).all()
+        return {
+            row.release_id: (summary_of(row), row.drift_score, bool(row.drift_detected))
+            for row in rows
+        }
+
+    async def apply_decision(
+        self,
+        decision: str,
+        rationale: str,
+        statuses: Mapping[str, str | None],
+    ):
+        """Store the decision on every release in ``statuses`` and set any new status."""
+        async with self._sessions.begin() as session:
+            for release_id, status in statuses.items():
+                values = {"decision": decision, "decision_rationale": rationale}
+                if status:
+                    values["status"] = status
+                await session.execute(
+                    update(ReleaseRecord)
+                    .where(ReleaseRecord.release_id == release_id)
+                    .values(**values)
+                )
+
+
+def summary_of(record) -> EvalSummary | None:
+    """The release's aggregated eval summary, or None if it was never evaluated."""
+    if not record.eval_runs:
+        return None
+    return EvalSummary.from_totals(
+        runs=record.eval_runs,
+        samples=record.eval_samples or 0,
+        error_total=record.error_total or 0.0,
+        quality_total=record.quality_total or 0.0,
+        latency_p99_total=record.latency_p99_total or 0.0,
+    )
@@ -0,0 +1,15 @@
+from shared.chunking.chunker import (
+    Chunk,
+    chunk_by_chars,
+    chunk_document,
+    load_token_counter,
+    regex_token_count,
+)
+
+__all__ = [
+    "Chunk",
+    "chunk_by_chars",
+    "chunk_document",
+    "load_token_counter",
+    "regex_token_count",
+]
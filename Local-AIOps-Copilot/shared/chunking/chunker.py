@@ -0,0 +1,265 @@
+"""Structure-preserving, token-sized document chunking for RAG ingestion.
+
+Documents are parsed into blocks that must not be cut in half:
+
+* markdown headings, which open a section (tracked as a heading path);
+* fenced code blocks (```` ``` ```` / ``~~~``), kept whole when they fit;
+* log lines (timestamp / level prefixed), with indented continuation lines
+  such as stack traces attached to the line they belong to;
+* prose, split into sentences.
+
+Blocks are packed greedily into chunks of at most ``max_tokens`` tokens.  A
+chunk never spans two sections, and prose and log chunks repeat their last
+``overlap_tokens`` worth of sentences / lines at the start of the next chunk.
+Only a single unit larger than ``max_tokens`` (a huge code block, a very long
+line) is split further, on line and then word boundaries.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable
+
+TokenCounter = Callable[[str], int]
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_LOG_LINE = re.compile(
+    r"^\s*(?:\[?\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}"  # ISO timestamp
+    r"|[A-Z][a-z]{2} +\d{1,2} \d{2}:\d{2}:\d{2}"  # syslog
+    r"|\[?(?:TRACE|DEBUG|INFO|WARN|WARNING|ERROR|FATAL|CRITICAL)\b)"  # bare level
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[A-Z0-9`])")
+_WORDPIECE = re.compile(r"\w+|[^\w\s]")
+
+
+def regex_token_count(text: str) -> int:
+    """Approximate subword count: words plus punctuation marks.
+
+    A slight undercount of BERT-style WordPiece (which also splits rare words);
+    used when no tokenizer library is installed.
+    """
+    return len(_WORDPIECE.findall(text))
+
+
+def load_token_counter(model_name: str | None = None) -> TokenCounter:
+    """Best available token counter.
+
+    Tries the embedding model's own tokenizer (``transformers``, local files
+    only), then ``tiktoken``'s cl100k_base, then :func:`regex_token_count`.
+    """
+    if model_name:
+        try:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(model_name, local_files_only=True)
+            return lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+        except Exception:
+            pass
+    try:
+        import tiktoken
+
+        encoding = tiktoken.get_encoding("cl100k_base")
+        return lambda text: len(encoding.encode(text, disallowed_special=()))
+    except Exception:
+        return regex_token_count
+
+
+@dataclass
+class Chunk:
+    text: str
+    section: str = ""  # heading path, e.g. "Runbook > Failover > Promote replica"
+    kinds: list[str] = field(default_factory=list)  # block kinds present: prose/code/log
+    tokens: int = 0
+
+    @property
+    def kind(self) -> str:
+        return self.kinds[0] if len(self.kinds) == 1 else "mixed" if self.kinds else "prose"
+
+    def metadata(self) -> dict:
+        return {"section": self.section, "chunk_kind": self.kind, "chunk_tokens": self.tokens}
+
+
+@dataclass
+class _Block:
+    kind: str  # heading | prose | code | log
+    units: list[str]  # sentences / lines, the boundaries a chunk may be cut at
+    section: str
+    joiner: str = "\n"  # how units of this block are rejoined (" " for sentences)
+
+
+@dataclass
+class _Unit:
+    kind: str
+    text: str
+    tokens: int
+    block: int
+    joiner: str
+
+
+def _parse_blocks(text: str) -> list[_Block]:
+    blocks: list[_Block] = []
+    headings: list[tuple[int, str]] = []
+    lines = text.splitlines()
+    i = 0
+
+    def section() -> str:
+        return " > ".join(title for _, title in headings)
+
+    while i < len(lines):
+        line = lines[i]
+        if not line.strip():
+            i += 1
+            continue
+
+        fence = _FENCE.match(line)
+        if fence:
+            body = [line]
+            i += 1
+            while i < len(lines):
+                body.append(lines[i])
+                i += 1
+                if lines[i - 1].strip().startswith(fence.group(1)):
+                    break
+            blocks.append(_Block("code", body, section()))
+            continue
+
+        heading = _HEADING.match(line)
+        if heading:
+            level = len(heading.group(1))
+            headings = [h for h in headings if h[0] < level] + [(level, heading.group(2))]
+            blocks.append(_Block("heading", [line], section()))
+            i += 1
+            continue
+
+        if _LOG_LINE.match(line):
+            entries: list[str] = []
+            while i < len(lines) and lines[i].strip():
+                if _LOG_LINE.match(lines[i]) or not entries:
+                    entries.append(lines[i])
+                elif lines[i][:1].isspace():
+                    entries[-1] += "\n" + lines[i]  # stack trace / continuation
+                else:
+                    break
+                i += 1
+            blocks.append(_Block("log", entries, section()))
+            continue
+
+        paragraph = []
+        while (
+            i < len(lines)
+            and lines[i].strip()
+            and not _FENCE.match(lines[i])
+            and not _HEADING.match(lines[i])
+            and not _LOG_LINE.match(lines[i])
+        ):
+            paragraph.append(lines[i])
+            i += 1
+        if any(p.lstrip().startswith(("- ", "* ", "|")) or p.lstrip()[:2].rstrip(".").isdigit()
+               for p in paragraph):
+            blocks.append(_Block("prose", paragraph, section()))  # list / table: per line
+        else:
+            sentences = _SENTENCE_END.split(" ".join(p.strip() for p in paragraph))
+            blocks.append(_Block("prose", sentences, section(), joiner=" "))
+    return blocks
+
+
+def _split_oversized(unit: str, max_tokens: int, count: TokenCounter) -> list[str]:
+    """Split one unit that alone exceeds ``max_tokens``, on lines then words."""
+    pieces: list[str] = []
+    separator = "\n" if "\n" in unit else " "
+    current: list[str] = []
+    for part in unit.split(separator):
+        candidate = separator.join(current + [part])
+        if current and count(candidate) > max_tokens:
+            pieces.append(separator.join(current))
+            current = [part]
+        else:
+            current.append(part)
+    if current:
+        pieces.append(separator.join(current))
+    if separator == "\n":
+        return [p for piece in pieces for p in (
+            _split_oversized(piece, max_tokens, count) if count(piece) > max_tokens else [piece]
+        )]
+    return pieces
+
+
+def chunk_document(
+    text: str,
+    max_tokens: int = 200,
+    overlap_tokens: int = 30,
+    count_tokens: TokenCounter = regex_token_count,
+) -> list[Chunk]:
+    """Split ``text`` into chunks of at most ``max_tokens`` tokens.
+
+    The 200-token default leaves headroom under the 256-token input limit of
+    all-MiniLM-L6-v2, the default embedding model.
+    """
+    chunks: list[Chunk] = []
+    units: list[_Unit] = []  # the open chunk
+    section = ""
+
+    def flush(carry_overlap: bool) -> None:
+        nonlocal units
+        content = [u for u in units if u.kind != "heading"]
+        if not content:
+            return
+        body = units[0].text
+        for prev, unit in zip(units, units[1:]):
+            body += (unit.joiner if unit.block == prev.block else "\n") + unit.text
+        kinds = list(dict.fromkeys(u.kind for u in content))
+        chunks.append(Chunk(body, section, kinds, count_tokens(body)))
+        carried: list[_Unit] = []
+        if carry_overlap and overlap_tokens > 0 and content[-1].kind != "code":
+            budget = overlap_tokens
+            for unit in reversed(content):
+                if unit.kind == "code" or unit.tokens > budget:
+                    break
+                carried.insert(0, unit)
+                budget -= unit.tokens
+        units = carried
+
+    for index, block in enumerate(_parse_blocks(text)):
+        if block.section != section or block.kind == "heading":
+            flush(carry_overlap=False)
+            # Consecutive headings (section, then subsection) stay together.
+            units = [u for u in units if u.kind == "heading"] if block.kind == "heading" else []
+            section = block.section
+
+        if block.kind == "code":
+            whole = "\n".join(block.units)
+            block_units = [whole] if count_tokens(whole) <= max_tokens else block.units
+        else:
+            block_units = block.units
+
+        for text_unit in block_units:
+            tokens = count_tokens(text_unit)
+            if tokens > max_tokens:
+                pieces = _split_oversized(text_unit, max_tokens, count_tokens)
+            else:
+                pieces = [text_unit]
+            for piece in pieces:
+                piece_tokens = count_tokens(piece)
+                if units and sum(u.tokens for u in units) + piece_tokens > max_tokens:
+                    flush(carry_overlap=True)
+                    # Overlap must still leave room for the unit that did not fit.
+                    while units and sum(u.tokens for u in units) + piece_tokens > max_tokens:
+                        units.pop(0)
+                units.append(_Unit(block.kind, piece, piece_tokens, index, block.joiner))
+    flush(carry_overlap=False)
+    return chunks
+
+
+def chunk_by_chars(text: str, chunk_size: int = 500, overlap: int = 50) -> list[str]:
+    """Fixed-size character windows (the original splitter; kept as a baseline)."""
+    if len(text) <= chunk_size:
+        return [text]
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        chunks.append(text[start:end])
+        start = end - overlap
+    return chunks
@@ -0,0 +1,173 @@
+"""Offline comparison of chunking strategies on a fixture corpus.
+
+For each strategy the corpus is chunked, every chunk is embedded, and each
+query in ``queries.json`` is answered by cosine top-k over the chunks.  A
+query counts as recalled at k when one of its top-k chunks contains the
+query's ``evidence`` span in full (whitespace-normalised) — a chunk that cut
+the command, log line or sentence in half does not count.
+
+The default embedder is :class:`HashingEmbedder`, a deterministic bag of
+hashed word and character-trigram features, so the evaluation needs no model
+download; ``--backend`` embeds with a configured backend instead.
+
+Usage::
+
+    python -m shared.chunking.evaluation --corpus tests/fixtures/rag_corpus --k 1 3 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from shared.chunking.chunker import chunk_by_chars, chunk_document, regex_token_count
+from shared.llm_backend.base import EmbeddingResponse
+
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+class HashingEmbedder:
+    """Deterministic feature-hashing embedder (words and character trigrams)."""
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _index(self, feature: str) -> int:
+        return int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=4).digest(), "little")
+
+    def embed(self, text: str) -> list[float]:
+        vec = np.zeros(self.dim, dtype=np.float32)
+        words = _WORD.findall(text.lower())
+        for word in words:
+            vec[self._index(word) % self.dim] += 1.0
+            padded = f" {word} "
+            for i in range(len(padded) - 2):
+                vec[self._index(padded[i : i + 3]) % self.dim] += 0.25
+        norm = np.linalg.norm(vec)
+        return (vec / norm if norm else vec).tolist()
+
+    async def embeddings(self, texts: list[str]) -> EmbeddingResponse:
+        return EmbeddingResponse(embeddings=[self.embed(t) for t in texts], model="hashing")
+
+
+@dataclass
+class StrategyResult:
+    strategy: str
+    chunks: int
+    embedded_tokens: int
+    embed_seconds: float
+    recall: dict[str, float]
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split())
+
+
+def load_corpus(corpus_dir: str | Path) -> tuple[dict[str, str], list[dict]]:
+    corpus_dir = Path(corpus_dir)
+    documents = {
+        path.name: path.read_text(encoding="utf-8")
+        for path in sorted(corpus_dir.iterdir())
+        if path.suffix in (".md", ".log", ".txt")
+    }
+    queries = json.loads((corpus_dir / "queries.json").read_text(encoding="utf-8"))
+    return documents, queries
+
+
+def default_strategies() -> dict[str, Callable[[str], list[str]]]:
+    return {
+        "chars-500/50": lambda text: chunk_by_chars(text, 500, 50),
+        "structured-200/30": lambda text: [c.text for c in chunk_document(text, 200, 30)],
+        "structured-120/20": lambda text: [c.text for c in chunk_document(text, 120, 20)],
+    }
+
+
+async def evaluate(
+    documents: dict[str, str],
+    queries: list[dict],
+    strategies: dict[str, Callable[[str], list[str]]] | None = None,
+    embedder=None,
+    ks: tuple[int, ...] = (1, 3, 5),
+) -> list[StrategyResult]:
+    embedder = embedder or HashingEmbedder()
+    strategies = strategies or default_strategies()
+
+    missing = [q["evidence"] for q in queries
+               if _normalize(q["evidence"]) not in _normalize(documents[q["document"]])]
+    if missing:
+        raise ValueError(f"Evidence not found in corpus: {missing[:3]}")
+
+    query_vectors = np.asarray(
+        (await embedder.embeddings([q["query"] for q in queries])).embeddings, dtype=np.float32
+    )
+    results = []
+    for name, split in strategies.items():
+        chunks = [(doc, text) for doc, content in documents.items() for text in split(content)]
+        started = time.perf_counter()
+        response = await embedder.embeddings([text for _, text in chunks])
+        embed_seconds = time.perf_counter() - started
+
+        matrix = np.asarray(response.embeddings, dtype=np.float32)
+        matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+        queries_unit = query_vectors / np.maximum(
+            np.linalg.norm(query_vectors, axis=1, keepdims=True), 1e-12
+        )
+        ranking = np.argsort(-(queries_unit @ matrix.T), axis=1)
+        normalized = [_normalize(text) for _, text in chunks]
+
+        recall = {}
+        for k in ks:
+            hits = sum(
+                any(_normalize(q["evidence"]) in normalized[i] for i in ranking[qi, :k])
+                for qi, q in enumerate(queries)
+            )
+            recall[f"@{k}"] = round(hits / len(queries), 3)
+        results.append(
+            StrategyResult(
+                strategy=name,
+                chunks=len(chunks),
+                embedded_tokens=sum(regex_token_count(text) for _, text in chunks),
+                embed_seconds=round(embed_seconds, 4),
+                recall=recall,
+            )
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare chunking strategies offline")
+    parser.add_argument("--corpus", default="tests/fixtures/rag_corpus")
+    parser.add_argument("--k", type=int, nargs="+", default=[1, 3, 5])
+    parser.add_argument("--backend", help="Embed with this backend instead of the hashing embedder")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    embedder = None
+    if args.backend:
+        from shared.llm_backend.factory import create_embedding_client
+
+        embedder = create_embedding_client()
+    documents, queries = load_corpus(args.corpus)
+    results = asyncio.run(evaluate(documents, queries, embedder=embedder, ks=tuple(args.k)))
+
+    header = "".join(f"{'recall' + k:>11}" for k in results[0].recall)
+    print(f"{'strategy':<20}{'chunks':>8}{'tokens':>8}{'embed s':>9}{header}")
+    for r in results:
+        recall = "".join(f"{v:>11.3f}" for v in r.recall.values())
+        print(f"{r.strategy:<20}{r.chunks:>8}{r.embedded_tokens:>8}{r.embed_seconds:>9.4f}{recall}")
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump([asdict(r) for r in results], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
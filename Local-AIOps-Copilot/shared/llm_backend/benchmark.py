@@ -0,0 +1,321 @@
+"""Latency-distribution load generator for LLM backends.
+
+Where ``compare_backends`` sends prompts one after another and reports mean
+latency, this harness drives a backend at a given load and reports the tail:
+
+* **closed loop** — ``concurrency`` workers, each sending its next request as
+  soon as the previous one finishes.
+* **poisson**     — open loop; requests arrive at ``rate`` req/s with
+  exponential gaps whatever the backend's speed (``concurrency`` caps the
+  requests in flight).  Latency is measured from the scheduled arrival, so
+  queueing delay is included rather than hidden.
+
+Requests are streamed, so each one yields time to first token (TTFT), mean
+inter-token latency (ITL) and end-to-end latency; the report has
+p50/p95/p99 for each plus request and token throughput.  Results can be
+written to JSON and logged to MLflow.
+
+Runs offline against ``MockLLMClient`` with a ``LatencyProfile``::
+
+    python -m shared.llm_backend.benchmark --backend mock --arrival poisson \\
+        --rate 20 --requests 500 --mock-ttft-ms 120 --mock-itl-ms 15 --mock-sigma 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from dataclasses import asdict, dataclass, field
+
+from shared.llm_backend.base import LLMClient, LLMMessage
+from shared.logging import get_logger
+
+logger = get_logger(__name__)
+
+DEFAULT_PROMPTS = [
+    "Why is the checkout service returning 502 errors?",
+    "Summarize the last hour of alerts for the payments cluster.",
+    "Which pods restarted most often today?",
+    "How do I roll back the latest release of the agent service?",
+]
+
+
+@dataclass
+class BenchmarkConfig:
+    arrival: str = "closed"  # "closed" | "poisson"
+    concurrency: int = 8
+    requests: int = 100
+    rate: float = 10.0  # poisson arrivals per second
+    max_tokens: int = 256
+    temperature: float = 0.7
+    prompts: list[str] = field(default_factory=lambda: list(DEFAULT_PROMPTS))
+    seed: int = 0
+
+
+@dataclass
+class RequestSample:
+    e2e_ms: float
+    ttft_ms: float | None
+    itl_ms: float | None
+    tokens: int
+    error: str | None = None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Linear-interpolated percentile (0 for an empty list)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def _distribution(values: list[float]) -> dict:
+    return {
+        "p50": round(percentile(values, 50), 2),
+        "p95": round(percentile(values, 95), 2),
+        "p99": round(percentile(values, 99), 2),
+        "mean": round(sum(values) / len(values), 2) if values else 0.0,
+        "max": round(max(values), 2) if values else 0.0,
+    }
+
+
+@dataclass
+class BenchmarkReport:
+    backend: str
+    model: str
+    config: BenchmarkConfig
+    wall_time_s: float
+    samples: list[RequestSample]
+
+    @property
+    def succeeded(self) -> list[RequestSample]:
+        return [s for s in self.samples if s.error is None]
+
+    def summary(self) -> dict:
+        ok = self.succeeded
+        tokens = sum(s.tokens for s in ok)
+        return {
+            "backend": self.backend,
+            "model": self.model,
+            "arrival": self.config.arrival,
+            "concurrency": self.config.concurrency,
+            "rate": self.config.rate if self.config.arrival == "poisson" else None,
+            "requests": len(self.samples),
+            "errors": len(self.samples) - len(ok),
+            "wall_time_s": round(self.wall_time_s, 3),
+            "requests_per_s": round(len(ok) / self.wall_time_s, 2) if self.wall_time_s else 0.0,
+            "tokens_per_s": round(tokens / self.wall_time_s, 2) if self.wall_time_s else 0.0,
+            "e2e_ms": _distribution([s.e2e_ms for s in ok]),
+            "ttft_ms": _distribution([s.ttft_ms for s in ok if s.ttft_ms is not None]),
+            "itl_ms": _distribution([s.itl_ms for s in ok if s.itl_ms is not None]),
+        }
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w") as fh:
+            json.dump(
+                {"summary": self.summary(), "samples": [asdict(s) for s in self.samples]},
+                fh,
+                indent=2,
+            )
+
+    def mlflow_metrics(self) -> dict[str, float]:
+        summary = self.summary()
+        metrics = {
+            key: float(summary[key])
+            for key in ("errors", "requests_per_s", "tokens_per_s", "wall_time_s")
+        }
+        for group in ("e2e_ms", "ttft_ms", "itl_ms"):
+            for stat, value in summary[group].items():
+                metrics[f"{group}_{stat}"] = float(value)
+        return metrics
+
+    def log_to_mlflow(
+        self, experiment_name: str, run_name: str | None = None, tracking_uri: str | None = None
+    ) -> str | None:
+        """Log config as params and the distribution as metrics; returns the run id."""
+        try:
+            import mlflow
+
+            if tracking_uri:
+                mlflow.set_tracking_uri(tracking_uri)
+            mlflow.set_experiment(experiment_name)
+            params = {
+                "backend": self.backend,
+                "model": self.model,
+                "arrival": self.config.arrival,
+                "concurrency": self.config.concurrency,
+                "requests": self.config.requests,
+                "rate": self.config.rate,
+                "max_tokens": self.config.max_tokens,
+            }
+            run_name = run_name or f"{self.backend}-{self.config.arrival}"
+            with mlflow.start_run(run_name=run_name) as run:
+                mlflow.log_params(params)
+                mlflow.log_metrics(self.mlflow_metrics())
+                return run.info.run_id
+        except Exception as e:
+            logger.warning("mlflow_log_failed", error=str(e))
+            return None
+
+
+async def _measure(
+    client: LLMClient, prompt: str, config: BenchmarkConfig, started: float
+) -> RequestSample:
+    """Stream one request; ``started`` is its (scheduled) arrival time."""
+    first: float | None = None
+    last: float | None = None
+    tokens = 0
+    try:
+        async for _ in client.stream(
+            [LLMMessage(role="user", content=prompt)],
+            temperature=config.temperature,
+            max_tokens=config.max_tokens,
+        ):
+            last = time.perf_counter()
+            if first is None:
+                first = last
+            tokens += 1
+    except Exception as exc:
+        return RequestSample(
+            e2e_ms=(time.perf_counter() - started) * 1000,
+            ttft_ms=None,
+            itl_ms=None,
+            tokens=tokens,
+            error=str(exc),
+        )
+    end = time.perf_counter()
+    return RequestSample(
+        e2e_ms=(end - started) * 1000,
+        ttft_ms=(first - started) * 1000 if first is not None else None,
+        itl_ms=(last - first) * 1000 / (tokens - 1) if tokens > 1 else None,
+        tokens=tokens,
+    )
+
+
+async def _closed_loop(client: LLMClient, config: BenchmarkConfig) -> list[RequestSample]:
+    samples: list[RequestSample] = []
+    next_index = 0
+
+    async def worker() -> None:
+        nonlocal next_index
+        while next_index < config.requests:
+            prompt = config.prompts[next_index % len(config.prompts)]
+            next_index += 1
+            samples.append(await _measure(client, prompt, config, time.perf_counter()))
+
+    await asyncio.gather(*(worker() for _ in range(max(1, config.concurrency))))
+    return samples
+
+
+async def _poisson(client: LLMClient, config: BenchmarkConfig) -> list[RequestSample]:
+    rng = random.Random(config.seed)
+    slots = asyncio.Semaphore(max(1, config.concurrency))
+    origin = time.perf_counter()
+
+    async def fire(index: int, arrival: float) -> RequestSample:
+        async with slots:
+            prompt = config.prompts[index % len(config.prompts)]
+            return await _measure(client, prompt, config, arrival)
+
+    tasks = []
+    arrival = origin
+    for index in range(config.requests):
+        arrival += rng.expovariate(config.rate)
+        delay = arrival - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(fire(index, arrival)))
+    return list(await asyncio.gather(*tasks))
+
+
+async def run_benchmark(client: LLMClient, config: BenchmarkConfig) -> BenchmarkReport:
+    if config.arrival not in ("closed", "poisson"):
+        raise ValueError(f"Unknown arrival pattern: {config.arrival}")
+    started = time.perf_counter()
+    if config.arrival == "closed":
+        samples = await _closed_loop(client, config)
+    else:
+        samples = await _poisson(client, config)
+    report = BenchmarkReport(
+        backend=client.backend_name,
+        model=client.model_name,
+        config=config,
+        wall_time_s=time.perf_counter() - started,
+        samples=samples,
+    )
+    summary = {k: v for k, v in report.summary().items() if k != "config"}
+    logger.info("benchmark_complete", **summary)
+    return report
+
+
+def _build_client(args) -> LLMClient:
+    if args.backend == "mock":
+        from shared.llm_backend.mock_client import LatencyProfile, MockLLMClient
+
+        return MockLLMClient(
+            latency_profile=LatencyProfile(
+                ttft_ms=args.mock_ttft_ms,
+                itl_ms=args.mock_itl_ms,
+                sigma=args.mock_sigma,
+                seed=args.seed,
+            )
+        )
+    from shared.llm_backend.factory import create_llm_client
+
+    return create_llm_client(backend=args.backend)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark LLM backend latency distributions")
+    parser.add_argument("--backend", default="mock", help="mock | ollama | vllm | triton")
+    parser.add_argument("--arrival", choices=["closed", "poisson"], default="closed")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--rate", type=float, default=10.0, help="Poisson arrivals per second")
+    parser.add_argument("--max-tokens", type=int, default=256)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--mock-ttft-ms", type=float, default=100.0)
+    parser.add_argument("--mock-itl-ms", type=float, default=10.0)
+    parser.add_argument("--mock-sigma", type=float, default=0.3)
+    parser.add_argument("--output", help="Write summary and samples as JSON")
+    parser.add_argument("--mlflow-experiment", help="Log the run to this MLflow experiment")
+    parser.add_argument("--mlflow-uri", help="MLflow tracking URI (default: settings)")
+    args = parser.parse_args()
+
+    config = BenchmarkConfig(
+        arrival=args.arrival,
+        concurrency=args.concurrency,
+        requests=args.requests,
+        rate=args.rate,
+        max_tokens=args.max_tokens,
+        seed=args.seed,
+    )
+
+    async def _run() -> BenchmarkReport:
+        client = _build_client(args)
+        try:
+            return await run_benchmark(client, config)
+        finally:
+            await client.close()
+
+    report = asyncio.run(_run())
+    print(json.dumps(report.summary(), indent=2))
+    if args.output:
+        report.to_json(args.output)
+    if args.mlflow_experiment:
+        from shared.config.settings import get_settings
+
+        report.log_to_mlflow(
+            args.mlflow_experiment,
+            tracking_uri=args.mlflow_uri or get_settings().mlflow_tracking_uri,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+"""Embedding throughput benchmark for the Ollama client.
+
+Runs the same corpus through three client configurations against a local
+HTTP stub that mimics Ollama's embedding endpoints with a fixed per-request
+latency, and through ``MockLLMClient`` as an in-process reference:
+
+* ``serial``    — one ``/api/embeddings`` request per text, one at a time
+                  (the client's behaviour before batching).
+* ``batched``   — a single ``embeddings()`` call over the whole corpus.
+* ``coalesced`` — many concurrent callers with a few texts each, as the RAG
+                  service issues them while ingesting documents.
+
+Usage::
+
+    python -m shared.llm_backend.embedding_benchmark --texts 2000 --latency-ms 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+from dataclasses import asdict, dataclass
+
+from shared.llm_backend.mock_client import MockLLMClient
+from shared.llm_backend.ollama_client import OllamaLLMClient
+
+
+class EmbeddingStubServer:
+    """Minimal HTTP/1.1 server imitating Ollama's embedding endpoints.
+
+    Every request sleeps ``latency_s`` before answering, independent of the
+    number of inputs, which is how round-trip-dominated local inference behaves
+    for short chunks.  ``batch_endpoint=False`` simulates an Ollama build
+    without ``/api/embed``.
+    """
+
+    def __init__(self, latency_s: float = 0.02, dim: int = 384, batch_endpoint: bool = True):
+        self.latency_s = latency_s
+        self.dim = dim
+        self.batch_endpoint = batch_endpoint
+        self.requests = 0
+        self.inputs = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._server: asyncio.base_events.Server | None = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def __aenter__(self) -> EmbeddingStubServer:
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+        await self._server.wait_closed()
+
+    def _vector(self, text: str) -> list[float]:
+        seed = sum(map(ord, text)) or 1
+        return [((seed * (i + 1)) % 997) / 997 for i in range(self.dim)]
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                payload = json.loads(await reader.readexactly(length)) if length else {}
+                status, body = await self._respond(path, payload)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, path: str, payload: dict) -> tuple[str, bytes]:
+        if path == "/api/embed" and not self.batch_endpoint:
+            return "404 Not Found", b"404 page not found"
+        if path not in ("/api/embed", "/api/embeddings"):
+            return "404 Not Found", b"404 page not found"
+
+        self.requests += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency_s)
+        finally:
+            self.in_flight -= 1
+
+        if path == "/api/embed":
+            inputs = payload["input"]
+            self.inputs += len(inputs)
+            body = {
+                "model": payload["model"],
+                "embeddings": [self._vector(t) for t in inputs],
+                "prompt_eval_count": sum(len(t.split()) for t in inputs),
+            }
+        else:
+            self.inputs += 1
+            body = {"embedding": self._vector(payload["prompt"])}
+        return "200 OK", json.dumps(body).encode()
+
+
+@dataclass
+class BenchmarkRow:
+    name: str
+    texts: int
+    seconds: float
+    texts_per_sec: float
+    http_requests: int
+    max_in_flight: int
+
+
+def _corpus(count: int) -> list[str]:
+    return [f"chunk {i}: disk usage on node-{i % 50} exceeded {70 + i % 30}%" for i in range(count)]
+
+
+async def _run_stub(
+    name: str,
+    texts: list[str],
+    latency_s: float,
+    *,
+    callers: int = 1,
+    batch_endpoint: bool = True,
+    **client_kwargs,
+) -> BenchmarkRow:
+    async with EmbeddingStubServer(latency_s=latency_s, batch_endpoint=batch_endpoint) as stub:
+        client = OllamaLLMClient(base_url=stub.url, model="stub-embed", **client_kwargs)
+        started = time.perf_counter()
+        if callers == 1:
+            result = await client.embeddings(texts)
+            assert len(result.embeddings) == len(texts)
+        else:
+            per_caller = max(1, len(texts) // callers)
+            await asyncio.gather(
+                *(
+                    client.embeddings(texts[i : i + per_caller])
+                    for i in range(0, len(texts), per_caller)
+                )
+            )
+        elapsed = time.perf_counter() - started
+        await client.close()
+        return BenchmarkRow(
+            name=name,
+            texts=len(texts),
+            seconds=round(elapsed, 3),
+            texts_per_sec=round(len(texts) / elapsed, 1),
+            http_requests=stub.requests,
+            max_in_flight=stub.max_in_flight,
+        )
+
+
+async def run_benchmark(
+    text_count: int = 2000,
+    latency_ms: float = 20.0,
+    batch_size: int = 64,
+    concurrency: int = 4,
+    callers: int = 200,
+) -> list[BenchmarkRow]:
+    texts = _corpus(text_count)
+    latency_s = latency_ms / 1000
+    rows = [
+        await _run_stub(
+            "serial", texts, latency_s,
+            batch_endpoint=False, embed_batch_size=1, embed_concurrency=1,
+        ),
+        await _run_stub(
+            "batched", texts, latency_s,
+            embed_batch_size=batch_size, embed_concurrency=concurrency,
+        ),
+        await _run_stub(
+            "coalesced", texts, latency_s, callers=callers,
+            embed_batch_size=batch_size, embed_concurrency=concurrency,
+        ),
+    ]
+
+    mock = MockLLMClient(latency=latency_s)
+    started = time.perf_counter()
+    await mock.embeddings(texts)
+    elapsed = time.perf_counter() - started
+    rows.append(
+        BenchmarkRow("mock", len(texts), round(elapsed, 3), round(len(texts) / elapsed, 1), 0, 0)
+    )
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark batched Ollama embeddings")
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="Stub latency per request")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--callers", type=int, default=200, help="Concurrent callers (coalesced)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(
+        run_benchmark(args.texts, args.latency_ms, args.batch_size, args.concurrency, args.callers)
+    )
+    print(f"{'mode':<11}{'texts':>8}{'seconds':>10}{'texts/s':>12}{'requests':>10}{'in-flight':>11}")
+    for row in rows:
+        print(
+            f"{row.name:<11}{row.texts:>8}{row.seconds:>10.3f}{row.texts_per_sec:>12.1f}"
+            f"{row.http_requests:>10}{row.max_in_flight:>11}"
+        )
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump([asdict(r) for r in rows], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
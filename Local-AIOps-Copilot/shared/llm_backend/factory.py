@@ -34,6 +34,8 @@ def create_llm_client(
             base_url=settings.ollama_base_url,
             model=settings.ollama_model,
             timeout=settings.llm_timeout,
+            embed_batch_size=settings.ollama_embed_batch_size,
+            embed_concurrency=settings.ollama_embed_concurrency,
         )
 
     if backend_type == LLMBackendType.VLLM:
@@ -53,6 +55,9 @@ def create_llm_client(
             model=settings.triton_model,
             timeout=settings.llm_timeout,
             grpc_url=settings.triton_grpc_url,
+            transport=settings.triton_transport,
+            max_batch_size=settings.triton_max_batch_size,
+            batch_window_ms=settings.triton_batch_window_ms,
         )
 
     raise ValueError(f"Unknown LLM backend: {backend_type}")
@@ -3,6 +3,9 @@
 from __future__ import annotations
 
 import asyncio
+import math
+import random
+from dataclasses import dataclass
 from typing import AsyncIterator
 
 from shared.llm_backend.base import (
@@ -23,12 +26,46 @@ _MOCK_RESPONSES: dict[str, str] = {
 }
 
 
+@dataclass
+class LatencyProfile:
+    """Latency model for benchmarking against the mock backend.
+
+    Time to first token and each inter-token gap are drawn from lognormal
+    distributions with the given medians; ``sigma`` 0 makes them constant.
+    """
+
+    ttft_ms: float = 100.0
+    itl_ms: float = 10.0
+    sigma: float = 0.0
+    seed: int | None = None
+
+    def __post_init__(self):
+        self._rng = random.Random(self.seed)
+
+    def _sample(self, median_ms: float) -> float:
+        if self.sigma <= 0:
+            return median_ms / 1000
+        return self._rng.lognormvariate(math.log(median_ms), self.sigma) / 1000
+
+    def ttft(self) -> float:
+        return self._sample(self.ttft_ms)
+
+    def itl(self) -> float:
+        return self._sample(self.itl_ms)
+
+
 class MockLLMClient(LLMClient):
     """Deterministic mock backend for CPU-only development."""
 
-    def __init__(self, model: str = "mock-model", latency: float = 0.1):
+    def __init__(
+        self,
+        model: str = "mock-model",
+        latency: float = 0.1,
+        latency_profile: LatencyProfile | None = None,
+    ):
         self._model = model
         self._latency = latency
+        self._profile = latency_profile
 
     @property
     def backend_name(self) -> str:
@@ -46,9 +83,14 @@ class MockLLMClient(LLMClient):
         max_tokens: int | None = None,
         tools: list[dict] | None = None,
     ) -> LLMResponse:
-        await asyncio.sleep(self._latency)
         last_content = messages[-1].content.strip().lower() if messages else ""
         response_text = _MOCK_RESPONSES.get(last_content, _MOCK_RESPONSES["default"])
+        if self._profile is None:
+            await asyncio.sleep(self._latency)
+        else:
+            gaps = len(response_text.split()) - 1
+            delay = self._profile.ttft() + sum(self._profile.itl() for _ in range(gaps))
+            await asyncio.sleep(delay)
 
         # Simulate tool calling if tools are provided
         tool_calls = None
@@ -88,8 +130,11 @@ class MockLLMClient(LLMClient):
         last_content = messages[-1].content.strip().lower() if messages else ""
         response_text = _MOCK_RESPONSES.get(last_content, _MOCK_RESPONSES["default"])
         words = response_text.split()
-        for word in words:
-            await asyncio.sleep(self._latency / len(words))
+        for i, word in enumerate(words):
+            if self._profile is None:
+                await asyncio.sleep(self._latency / len(words))
+            else:
+                await asyncio.sleep(self._profile.ttft() if i == 0 else self._profile.itl())
             yield word + " "
 
     async def embeddings(self, texts: list[str]) -> EmbeddingResponse:
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import AsyncIterator
 
 import httpx
@@ -15,13 +16,40 @@ from shared.llm_backend.base import (
 
 
 class OllamaLLMClient(LLMClient):
-    """Connects to a local Ollama instance for CPU-friendly inference."""
+    """Connects to a local Ollama instance for CPU-friendly inference.
 
-    def __init__(self, base_url: str, model: str, timeout: int = 60):
+    Embedding requests are batched through ``/api/embed`` with at most
+    ``embed_concurrency`` requests in flight.  Texts requested by concurrent
+    ``embeddings()`` calls within ``embed_coalesce_ms`` are merged into shared
+    batches, and a text that is already queued or in flight is not sent twice.
+    Servers without ``/api/embed`` fall back to one ``/api/embeddings`` request
+    per text under the same concurrency limit.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        timeout: int = 60,
+        embed_batch_size: int = 64,
+        embed_concurrency: int = 4,
+        embed_coalesce_ms: float = 2.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
         self._base_url = base_url.rstrip("/")
         self._model = model
         self._timeout = timeout
-        self._http = httpx.AsyncClient(base_url=self._base_url, timeout=timeout)
+        self._http = httpx.AsyncClient(
+            base_url=self._base_url, timeout=timeout, transport=transport
+        )
+        self._embed_batch_size = max(1, embed_batch_size)
+        self._embed_coalesce_s = embed_coalesce_ms / 1000
+        self._embed_slots = asyncio.Semaphore(max(1, embed_concurrency))
+        self._embed_queue: list[str] = []
+        self._embed_pending: dict[str, asyncio.Future] = {}
+        self._embed_flush: asyncio.TimerHandle | None = None
+        self._embed_tasks: set[asyncio.Task] = set()
+        self._embed_legacy = False
 
     @property
     def backend_name(self) -> str:
@@ -102,19 +130,89 @@ class OllamaLLMClient(LLMClient):
                     yield token
 
     async def embeddings(self, texts: list[str]) -> EmbeddingResponse:
-        all_embeddings = []
+        loop = asyncio.get_running_loop()
+        futures = []
         for text in texts:
+            future = self._embed_pending.get(text)
+            if future is None:
+                future = loop.create_future()
+                self._embed_pending[text] = future
+                self._embed_queue.append(text)
+            futures.append(future)
+
+        if len(self._embed_queue) >= self._embed_batch_size:
+            self._dispatch_embeddings()
+        elif self._embed_queue and self._embed_flush is None:
+            self._embed_flush = loop.call_later(self._embed_coalesce_s, self._dispatch_embeddings)
+
+        # Futures may be shared with other callers; a cancelled caller must not
+        # cancel them.
+        results = await asyncio.gather(*(asyncio.shield(f) for f in futures))
+        return EmbeddingResponse(
+            embeddings=[embedding for embedding, _ in results],
+            model=self._model,
+            usage={
+                "prompt_tokens": sum(tokens for _, tokens in results),
+                "total_tokens": sum(tokens for _, tokens in results),
+            },
+        )
+
+    def _dispatch_embeddings(self) -> None:
+        """Split the coalesced queue into batches and start a request per batch."""
+        if self._embed_flush is not None:
+            self._embed_flush.cancel()
+            self._embed_flush = None
+        queue, self._embed_queue = self._embed_queue, []
+        for i in range(0, len(queue), self._embed_batch_size):
+            task = asyncio.create_task(self._run_embed_batch(queue[i : i + self._embed_batch_size]))
+            self._embed_tasks.add(task)
+            task.add_done_callback(self._embed_tasks.discard)
+
+    async def _run_embed_batch(self, batch: list[str]) -> None:
+        try:
+            embeddings, prompt_tokens = await self._embed_batch(batch)
+            if len(embeddings) != len(batch):
+                raise ValueError(
+                    f"Ollama returned {len(embeddings)} embeddings for {len(batch)} inputs"
+                )
+            per_text = prompt_tokens // len(batch)
+            outcomes = [(embedding, per_text) for embedding in embeddings]
+        except Exception as exc:
+            outcomes = [exc] * len(batch)
+        for text, outcome in zip(batch, outcomes):
+            future = self._embed_pending.pop(text)
+            if future.done():
+                continue
+            if isinstance(outcome, Exception):
+                future.set_exception(outcome)
+            else:
+                future.set_result(outcome)
+
+    async def _embed_batch(self, batch: list[str]) -> tuple[list[list[float]], int]:
+        if not self._embed_legacy:
+            async with self._embed_slots:
+                resp = await self._http.post(
+                    "/api/embed", json={"model": self._model, "input": batch}
+                )
+            # An unknown route is a plain-text 404; a missing model is a JSON error.
+            if resp.status_code == 404 and "error" not in resp.text:
+                self._embed_legacy = True  # older Ollama: single-prompt endpoint only
+            else:
+                resp.raise_for_status()
+                data = resp.json()
+                return data["embeddings"], data.get("prompt_eval_count", 0)
+
+        embeddings = await asyncio.gather(*(self._embed_one(text) for text in batch))
+        return list(embeddings), 0
+
+    async def _embed_one(self, text: str) -> list[float]:
+        async with self._embed_slots:
             resp = await self._http.post(
                 "/api/embeddings",
                 json={"model": self._model, "prompt": text},
             )
-            resp.raise_for_status()
-            data = resp.json()
-            all_embeddings.append(data["embedding"])
-        return EmbeddingResponse(
-            embeddings=all_embeddings,
-            model=self._model,
-        )
+        resp.raise_for_status()
+        return resp.json()["embedding"]
 
     async def health_check(self) -> bool:
         try:
@@ -124,4 +222,6 @@ class OllamaLLMClient(LLMClient):
             return False
 
     async def close(self):
+        if self._embed_tasks:
+            await asyncio.gather(*self._embed_tasks, return_exceptions=True)
         await self._http.aclose()
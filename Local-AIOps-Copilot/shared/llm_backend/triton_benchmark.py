@@ -0,0 +1,342 @@
+"""Batching benchmark for the Triton client against a local fake server.
+
+``FakeTritonServer`` speaks enough of the KServe v2 protocol, over HTTP and
+gRPC, for ``TritonClient`` to run unmodified.  Its cost model is the one that
+makes dynamic batching worthwhile on a GPU: every infer call pays a fixed
+overhead (kernel launch, weight reads) plus a small per-row cost, and the
+model has a limited number of execution instances, so unbatched requests
+queue behind each other.
+
+The benchmark drives ``callers`` concurrent ``chat`` loops through several
+``max_batch_size`` / ``batch_window_ms`` settings and reports throughput,
+chat latency percentiles and how many infer calls the server actually saw::
+
+    python -m shared.llm_backend.triton_benchmark --transport grpc --requests 512 --callers 32
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+
+from shared.llm_backend.base import LLMMessage
+from shared.llm_backend.benchmark import percentile
+from shared.llm_backend.triton_client import TritonClient
+
+
+@dataclass
+class CostModel:
+    infer_overhead_ms: float = 20.0  # paid once per infer call
+    per_row_ms: float = 1.0  # paid per row in the batch
+    itl_ms: float = 2.0  # gap between streamed tokens
+    instances: int = 1  # infer calls executing at the same time
+
+
+def _fake_reply(prompt: str, max_tokens: int) -> str:
+    """Deterministic reply: echoes the last user turn so tests can match rows."""
+    turns = re.findall(r"<\|user\|>\n(.*?)(?=\n<\|)", prompt, flags=re.S)
+    words = f"echo: {turns[-1] if turns else ''}".split()
+    return " ".join(words[: max(1, max_tokens)])
+
+
+class FakeTritonServer:
+    """In-process KServe v2 server for ``TritonClient`` (HTTP and gRPC).
+
+    Counts infer calls and the rows in each, so batching efficiency can be
+    asserted directly.  The gRPC side needs ``tritonclient[grpc]``; set
+    ``grpc=False`` to run HTTP only.
+    """
+
+    def __init__(self, cost: CostModel | None = None, grpc: bool = True):
+        self.cost = cost or CostModel()
+        self.infer_calls = 0
+        self.batch_sizes: list[int] = []
+        self.stream_calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._enable_grpc = grpc
+        self._instances = asyncio.Semaphore(max(1, self.cost.instances))
+        self._http: asyncio.base_events.Server | None = None
+        self._grpc = None
+        self._grpc_port = 0
+
+    @property
+    def http_url(self) -> str:
+        host, port = self._http.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def grpc_url(self) -> str:
+        return f"127.0.0.1:{self._grpc_port}"
+
+    async def __aenter__(self) -> FakeTritonServer:
+        self._http = await asyncio.start_server(self._handle_http, "127.0.0.1", 0)
+        if self._enable_grpc:
+            import grpc
+            from tritonclient.grpc import service_pb2_grpc
+
+            self._grpc = grpc.aio.server()
+            service_pb2_grpc.add_GRPCInferenceServiceServicer_to_server(
+                _make_servicer(self), self._grpc
+            )
+            self._grpc_port = self._grpc.add_insecure_port("127.0.0.1:0")
+            await self._grpc.start()
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._http.close()
+        await self._http.wait_closed()
+        if self._grpc is not None:
+            await self._grpc.stop(grace=None)
+
+    @property
+    def mean_batch_size(self) -> float:
+        return sum(self.batch_sizes) / len(self.batch_sizes) if self.batch_sizes else 0.0
+
+    async def execute(self, prompts: list[str], max_tokens: list[int]) -> list[str]:
+        """Run one batched infer call under the cost model."""
+        self.infer_calls += 1
+        self.batch_sizes.append(len(prompts))
+        async with self._instances:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            try:
+                cost_ms = self.cost.infer_overhead_ms + self.cost.per_row_ms * len(prompts)
+                await asyncio.sleep(cost_ms / 1000)
+            finally:
+                self.in_flight -= 1
+        return [_fake_reply(p, m) for p, m in zip(prompts, max_tokens)]
+
+    async def generate(self, prompt: str, max_tokens: int):
+        """Yield reply tokens one at a time, as a decoupled streaming model would."""
+        self.stream_calls += 1
+        async with self._instances:
+            await asyncio.sleep(self.cost.infer_overhead_ms / 1000)
+        words = _fake_reply(prompt, max_tokens).split()
+        for i, word in enumerate(words):
+            if i:
+                await asyncio.sleep(self.cost.itl_ms / 1000)
+            yield word if i == 0 else f" {word}"
+
+    # ── HTTP (KServe v2 JSON) ──
+
+    async def _handle_http(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                _, path, _ = request_line.decode().split(" ", 2)
+                length = 0
+                while (line := await reader.readline()) not in (b"\r\n", b""):
+                    name, _, value = line.decode().partition(":")
+                    if name.lower() == "content-length":
+                        length = int(value)
+                payload = json.loads(await reader.readexactly(length)) if length else {}
+                status, body = await self._respond_http(path, payload)
+                writer.write(
+                    f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n\r\n".encode()
+                    + body
+                )
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond_http(self, path: str, payload: dict) -> tuple[str, bytes]:
+        if path == "/v2/health/ready":
+            return "200 OK", b"{}"
+        inputs = {i["name"]: i["data"] for i in payload.get("inputs", [])}
+        if re.fullmatch(r"/v2/models/[^/]+/generate_stream", path):
+            prompt, max_tokens = inputs["text_input"][0], inputs["max_tokens"][0]
+            tokens = [t async for t in self.generate(prompt, max_tokens)]
+            events = "".join(f"data: {json.dumps({'text_output': t})}\n\n" for t in tokens)
+            return "200 OK", events.encode()
+        match = re.fullmatch(r"/v2/models/([^/]+)/infer", path)
+        if not match:
+            return "404 Not Found", b'{"error": "not found"}'
+        texts = await self.execute(inputs["text_input"], inputs["max_tokens"])
+        body = {
+            "model_name": match.group(1),
+            "outputs": [
+                {
+                    "name": "text_output",
+                    "datatype": "BYTES",
+                    "shape": [len(texts), 1],
+                    "data": texts,
+                }
+            ],
+        }
+        return "200 OK", json.dumps(body).encode()
+
+
+def _make_servicer(server: FakeTritonServer):
+    """KServe v2 gRPC servicer backed by ``server`` (imports tritonclient lazily)."""
+    import numpy as np
+    from tritonclient.grpc import service_pb2, service_pb2_grpc
+    from tritonclient.utils import deserialize_bytes_tensor, serialize_byte_tensor
+
+    dtypes = {"INT32": np.int32, "FP32": np.float32, "BOOL": np.bool_}
+
+    def decode_inputs(request) -> dict[str, list]:
+        values = {}
+        for tensor, raw in zip(request.inputs, request.raw_input_contents):
+            if tensor.datatype == "BYTES":
+                values[tensor.name] = [b.decode("utf-8") for b in deserialize_bytes_tensor(raw)]
+            else:
+                values[tensor.name] = np.frombuffer(raw, dtype=dtypes[tensor.datatype]).tolist()
+        return values
+
+    def encode_texts(model_name: str, texts: list[str]):
+        raw = serialize_byte_tensor(np.array([t.encode("utf-8") for t in texts], dtype=np.object_))
+        return service_pb2.ModelInferResponse(
+            model_name=model_name,
+            outputs=[
+                service_pb2.ModelInferResponse.InferOutputTensor(
+                    name="text_output", datatype="BYTES", shape=[len(texts), 1]
+                )
+            ],
+            raw_output_contents=[raw.item()],
+        )
+
+    class Servicer(service_pb2_grpc.GRPCInferenceServiceServicer):
+        async def ServerLive(self, request, context):
+            return service_pb2.ServerLiveResponse(live=True)
+
+        async def ServerReady(self, request, context):
+            return service_pb2.ServerReadyResponse(ready=True)
+
+        async def ModelInfer(self, request, context):
+            inputs = decode_inputs(request)
+            texts = await server.execute(inputs["text_input"], inputs["max_tokens"])
+            return encode_texts(request.model_name, texts)
+
+        async def ModelStreamInfer(self, request_iterator, context):
+            async for request in request_iterator:
+                inputs = decode_inputs(request)
+                async for token in server.generate(
+                    inputs["text_input"][0], inputs["max_tokens"][0]
+                ):
+                    yield service_pb2.ModelStreamInferResponse(
+                        infer_response=encode_texts(request.model_name, [token])
+                    )
+
+    return Servicer()
+
+
+@dataclass
+class BenchmarkRow:
+    max_batch_size: int
+    batch_window_ms: float
+    requests: int
+    seconds: float
+    requests_per_sec: float
+    p50_ms: float
+    p99_ms: float
+    infer_calls: int
+    mean_batch_size: float
+
+
+async def _run_setting(
+    transport: str,
+    requests: int,
+    callers: int,
+    cost: CostModel,
+    max_batch_size: int,
+    batch_window_ms: float,
+) -> BenchmarkRow:
+    async with FakeTritonServer(cost, grpc=transport == "grpc") as server:
+        client = TritonClient(
+            http_url=server.http_url,
+            grpc_url=server.grpc_url,
+            model="fake-llm",
+            transport=transport,
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+        )
+        latencies: list[float] = []
+        next_index = 0
+
+        async def caller() -> None:
+            nonlocal next_index
+            while next_index < requests:
+                index = next_index
+                next_index += 1
+                started = time.perf_counter()
+                await client.chat(
+                    [LLMMessage(role="user", content=f"status of node-{index}")], max_tokens=16
+                )
+                latencies.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(caller() for _ in range(callers)))
+        elapsed = time.perf_counter() - started
+        await client.close()
+        return BenchmarkRow(
+            max_batch_size=max_batch_size,
+            batch_window_ms=batch_window_ms,
+            requests=requests,
+            seconds=round(elapsed, 3),
+            requests_per_sec=round(requests / elapsed, 1),
+            p50_ms=round(percentile(latencies, 50), 2),
+            p99_ms=round(percentile(latencies, 99), 2),
+            infer_calls=server.infer_calls,
+            mean_batch_size=round(server.mean_batch_size, 2),
+        )
+
+
+async def run_benchmark(
+    transport: str = "http",
+    requests: int = 512,
+    callers: int = 32,
+    cost: CostModel | None = None,
+    settings: list[tuple[int, float]] | None = None,
+) -> list[BenchmarkRow]:
+    cost = cost or CostModel()
+    settings = settings or [(1, 0.0), (8, 2.0), (8, 5.0), (32, 5.0), (32, 20.0)]
+    return [
+        await _run_setting(transport, requests, callers, cost, size, window)
+        for size, window in settings
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark Triton client-side batching")
+    parser.add_argument("--transport", choices=["http", "grpc"], default="http")
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--callers", type=int, default=32)
+    parser.add_argument("--overhead-ms", type=float, default=20.0, help="Fixed cost per infer call")
+    parser.add_argument("--per-row-ms", type=float, default=1.0, help="Cost per batched row")
+    parser.add_argument("--instances", type=int, default=1, help="Concurrent model instances")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    cost = CostModel(
+        infer_overhead_ms=args.overhead_ms, per_row_ms=args.per_row_ms, instances=args.instances
+    )
+    rows = asyncio.run(run_benchmark(args.transport, args.requests, args.callers, cost))
+    print(
+        f"{'batch':>6}{'window':>8}{'seconds':>10}{'req/s':>9}"
+        f"{'p50 ms':>9}{'p99 ms':>9}{'infers':>8}{'rows/infer':>12}"
+    )
+    for row in rows:
+        print(
+            f"{row.max_batch_size:>6}{row.batch_window_ms:>8.1f}{row.seconds:>10.3f}"
+            f"{row.requests_per_sec:>9.1f}{row.p50_ms:>9.2f}{row.p99_ms:>9.2f}"
+            f"{row.infer_calls:>8}{row.mean_batch_size:>12.2f}"
+        )
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump([asdict(r) for r in rows], fh, indent=2)
+
+
+if __name__ == "__main__":
+    main()
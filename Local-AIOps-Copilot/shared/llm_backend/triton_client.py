@@ -11,11 +11,12 @@ and returns generated text.
 
 from __future__ import annotations
 
+import asyncio
 import json
-from typing import AsyncIterator
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable
 
 import httpx
-import numpy as np
 
 from shared.llm_backend.base import (
     EmbeddingResponse,
@@ -39,6 +40,218 @@ def _messages_to_prompt(messages: list[LLMMessage]) -> str:
     return "\n".join(parts)
 
 
+@dataclass
+class _InferRow:
+    """One chat request as a row of a KServe v2 batch."""
+
+    prompt: str
+    max_tokens: int
+    temperature: float
+
+
+def _row_inputs(rows: list[_InferRow], stream: bool = False) -> list[tuple[str, str, list]]:
+    """(name, datatype, values) for each input tensor; every tensor is [N, 1]."""
+    inputs = [
+        ("text_input", "BYTES", [r.prompt for r in rows]),
+        ("max_tokens", "INT32", [r.max_tokens for r in rows]),
+        ("temperature", "FP32", [r.temperature for r in rows]),
+    ]
+    if stream:
+        inputs.append(("stream", "BOOL", [True for _ in rows]))
+    return inputs
+
+
+class _HTTPTransport:
+    """KServe v2 JSON over HTTP, on the client's own connection pool."""
+
+    def __init__(self, http: httpx.AsyncClient):
+        self._http = http
+
+    @staticmethod
+    def _payload(rows: list[_InferRow], stream: bool = False) -> dict:
+        return {
+            "inputs": [
+                {"name": name, "shape": [len(rows), 1], "datatype": datatype, "data": values}
+                for name, datatype, values in _row_inputs(rows, stream=stream)
+            ],
+            "outputs": [{"name": "text_output"}],
+        }
+
+    async def infer(self, model: str, rows: list[_InferRow]) -> list[str]:
+        resp = await self._http.post(f"/v2/models/{model}/infer", json=self._payload(rows))
+        resp.raise_for_status()
+        for output in resp.json().get("outputs", []):
+            if output["name"] == "text_output":
+                data = output.get("data", [])
+                return [str(d) for d in data] + [""] * (len(rows) - len(data))
+        return [""] * len(rows)
+
+    async def stream(self, model: str, row: _InferRow) -> AsyncIterator[str]:
+        async with self._http.stream(
+            "POST",
+            f"/v2/models/{model}/generate_stream",
+            json=self._payload([row], stream=True),
+        ) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line:
+                    continue
+                if line.startswith("data: "):
+                    data_str = line[6:]
+                    if data_str.strip() == "[DONE]":
+                        break
+                    try:
+                        chunk = json.loads(data_str)
+                        token = chunk.get("text_output", "")
+                        if token:
+                            yield token
+                    except json.JSONDecodeError:
+                        continue
+                else:
+                    try:
+                        chunk = json.loads(line)
+                        for output in chunk.get("outputs", []):
+                            if output["name"] == "text_output":
+                                for token in output.get("data", []):
+                                    if token:
+                                        yield token
+                    except json.JSONDecodeError:
+                        continue
+
+    async def is_ready(self) -> bool:
+        resp = await self._http.get("/v2/health/ready")
+        return resp.status_code == 200
+
+    async def close(self) -> None:
+        """The pool belongs to :class:`TritonClient`, which closes it."""
+
+
+class _GRPCTransport:
+    """KServe v2 over gRPC via ``tritonclient.grpc.aio`` (imported lazily)."""
+
+    _NUMPY_TYPES = {"BYTES": "object", "INT32": "int32", "FP32": "float32", "BOOL": "bool"}
+
+    def __init__(self, url: str, timeout: int):
+        import numpy as np
+        import tritonclient.grpc.aio as grpcclient
+
+        self._np = np
+        self._grpc = grpcclient
+        self._client = grpcclient.InferenceServerClient(url=url)
+        self._timeout = timeout
+
+    def _inputs(self, rows: list[_InferRow], stream: bool = False) -> list:
+        tensors = []
+        for name, datatype, values in _row_inputs(rows, stream=stream):
+            if datatype == "BYTES":
+                values = [v.encode("utf-8") for v in values]
+            tensor = self._grpc.InferInput(name, [len(rows), 1], datatype)
+            tensor.set_data_from_numpy(
+                self._np.array(values, dtype=self._NUMPY_TYPES[datatype]).reshape(len(rows), 1)
+            )
+            tensors.append(tensor)
+        return tensors
+
+    @staticmethod
+    def _texts(result) -> list[str]:
+        output = result.as_numpy("text_output")
+        if output is None:
+            return []
+        return [v.decode("utf-8") if isinstance(v, bytes) else str(v) for v in output.reshape(-1)]
+
+    async def infer(self, model: str, rows: list[_InferRow]) -> list[str]:
+        result = await self._client.infer(
+            model_name=model,
+            inputs=self._inputs(rows),
+            outputs=[self._grpc.InferRequestedOutput("text_output")],
+            client_timeout=self._timeout,
+        )
+        texts = self._texts(result)
+        return texts + [""] * (len(rows) - len(texts))
+
+    async def stream(self, model: str, row: _InferRow) -> AsyncIterator[str]:
+        async def requests():
+            yield {
+                "model_name": model,
+                "inputs": self._inputs([row], stream=True),
+                "outputs": [self._grpc.InferRequestedOutput("text_output")],
+            }
+
+        # The server ends the stream once the (single) request is complete.
+        responses = self._client.stream_infer(requests(), stream_timeout=self._timeout)
+        async for result, error in responses:
+            if error is not None:
+                raise error
+            for token in self._texts(result):
+                if token:
+                    yield token
+
+    async def is_ready(self) -> bool:
+        return await self._client.is_server_ready()
+
+    async def close(self) -> None:
+        await self._client.close()
+
+
+class _MicroBatcher:
+    """Coalesces concurrent requests into one batched call.
+
+    A request waits at most ``window_s`` for others to join it; a batch is sent
+    as soon as it reaches ``max_batch_size``.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list[_InferRow]], Awaitable[list[str]]],
+        max_batch_size: int,
+        window_s: float,
+    ):
+        self._run_batch = run_batch
+        self._max_batch_size = max_batch_size
+        self._window_s = window_s
+        self._pending: list[tuple[_InferRow, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, row: _InferRow) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((row, future))
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._window_s, self._flush)
+        return await future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while self._pending:
+            batch = self._pending[: self._max_batch_size]
+            self._pending = self._pending[self._max_batch_size :]
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[_InferRow, asyncio.Future]]) -> None:
+        try:
+            outputs = await self._run_batch([row for row, _ in batch])
+        except Exception as exc:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        for (_, future), output in zip(batch, outputs):
+            if not future.done():
+                future.set_result(output)
+
+    async def drain(self) -> None:
+        self._flush()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
 class TritonClient(LLMClient):
     """Connects to NVIDIA Triton Inference Server for GPU inference.
 
@@ -46,9 +259,16 @@ class TritonClient(LLMClient):
       - HTTP: http://<host>:8001/v2/models/<model>/infer
       - gRPC: <host>:8002
 
-    This client uses the HTTP API. The model must accept:
+    ``transport`` selects HTTP (KServe v2 JSON) or gRPC (``tritonclient``,
+    including bi-directional streaming inference).  The model must accept:
       - input: text_input (STRING), max_tokens (INT32), temperature (FP32)
       - output: text_output (STRING)
+    with a leading batch dimension.  Concurrent ``chat`` calls arriving within
+    ``batch_window_ms`` are sent as one infer request of up to
+    ``max_batch_size`` rows; ``max_batch_size=1`` (the default) disables
+    batching.  Client-side batching suits models configured with
+    ``max_batch_size > 0`` (python / TensorRT-LLM backends); the decoupled vLLM
+    backend batches continuously on the server, so stream over gRPC instead.
 
     For a vLLM-backed Triton setup, use the vLLM Triton backend which
     exposes this interface natively.
@@ -60,12 +280,32 @@ class TritonClient(LLMClient):
         model: str,
         timeout: int = 60,
         grpc_url: str | None = None,
+        transport: str = "http",
+        max_batch_size: int = 1,
+        batch_window_ms: float = 5.0,
     ):
         self._http_url = http_url.rstrip("/")
         self._model = model
         self._timeout = timeout
         self._grpc_url = grpc_url
         self._http = httpx.AsyncClient(base_url=self._http_url, timeout=timeout)
+        if transport == "grpc":
+            if not grpc_url:
+                raise ValueError("grpc_url is required for the gRPC transport")
+            self._transport: _HTTPTransport | _GRPCTransport = _GRPCTransport(grpc_url, timeout)
+        elif transport == "http":
+            self._transport = _HTTPTransport(self._http)
+        else:
+            raise ValueError(f"Unknown Triton transport: {transport}")
+        self._batcher = (
+            _MicroBatcher(
+                lambda rows: self._transport.infer(self._model, rows),
+                max_batch_size=max_batch_size,
+                window_s=batch_window_ms / 1000,
+            )
+            if max_batch_size > 1
+            else None
+        )
 
     @property
     def backend_name(self) -> str:
@@ -75,48 +315,6 @@ class TritonClient(LLMClient):
     def model_name(self) -> str:
         return self._model
 
-    def _build_infer_payload(
-        self,
-        prompt: str,
-        max_tokens: int = 512,
-        temperature: float = 0.7,
-        stream: bool = False,
-    ) -> dict:
-        """Build Triton KServe v2 inference request."""
-        payload: dict = {
-            "inputs": [
-                {
-                    "name": "text_input",
-                    "shape": [1, 1],
-                    "datatype": "BYTES",
-                    "data": [prompt],
-                },
-                {
-                    "name": "max_tokens",
-                    "shape": [1, 1],
-                    "datatype": "INT32",
-                    "data": [max_tokens],
-                },
-                {
-                    "name": "temperature",
-                    "shape": [1, 1],
-                    "datatype": "FP32",
-                    "data": [temperature],
-                },
-            ],
-            "outputs": [{"name": "text_output"}],
-        }
-        if stream:
-            payload["inputs"].append(
-                {
-                    "name": "stream",
-                    "shape": [1, 1],
-                    "datatype": "BOOL",
-                    "data": [True],
-                }
-            )
-        return payload
-
     async def chat(
         self,
         messages: list[LLMMessage],
@@ -126,26 +324,11 @@ class TritonClient(LLMClient):
         tools: list[dict] | None = None,
     ) -> LLMResponse:
         prompt = _messages_to_prompt(messages)
-        payload = self._build_infer_payload(
-            prompt=prompt,
-            max_tokens=max_tokens or 512,
-            temperature=temperature or 0.7,
-        )
-
-        resp = await self._http.post(
-            f"/v2/models/{self._model}/infer",
-            json=payload,
-        )
-        resp.raise_for_status()
-        data = resp.json()
-
-        output_text = ""
-        for output in data.get("outputs", []):
-            if output["name"] == "text_output":
-                output_data = output.get("data", [])
-                if output_data:
-                    output_text = output_data[0]
-                break
+        row = _InferRow(prompt, max_tokens or 512, temperature or 0.7)
+        if self._batcher is not None:
+            output_text = await self._batcher.submit(row)
+        else:
+            output_text = (await self._transport.infer(self._model, [row]))[0]
 
         prompt_tokens = len(prompt.split())
         completion_tokens = len(output_text.split())
@@ -166,44 +349,9 @@ class TritonClient(LLMClient):
         temperature: float | None = None,
         max_tokens: int | None = None,
     ) -> AsyncIterator[str]:
-        prompt = _messages_to_prompt(messages)
-        payload = self._build_infer_payload(
-            prompt=prompt,
-            max_tokens=max_tokens or 512,
-            temperature=temperature or 0.7,
-            stream=True,
-        )
-
-        async with self._http.stream(
-            "POST",
-            f"/v2/models/{self._model}/generate_stream",
-            json=payload,
-        ) as resp:
-            resp.raise_for_status()
-            async for line in resp.aiter_lines():
-                if not line:
-                    continue
-                if line.startswith("data: "):
-                    data_str = line[6:]
-                    if data_str.strip() == "[DONE]":
-                        break
-                    try:
-                        chunk = json.loads(data_str)
-                        token = chunk.get("text_output", "")
-                        if token:
-                            yield token
-                    except json.JSONDecodeError:
-                        continue
-                else:
-                    try:
-                        chunk = json.loads(line)
-                        for output in chunk.get("outputs", []):
-                            if output["name"] == "text_output":
-                                for token in output.get("data", []):
-                                    if token:
-                                        yield token
-                    except json.JSONDecodeError:
-                        continue
+        row = _InferRow(_messages_to_prompt(messages), max_tokens or 512, temperature or 0.7)
+        async for token in self._transport.stream(self._model, row):
+            yield token
 
     async def embeddings(self, texts: list[str]) -> EmbeddingResponse:
         """Generate embeddings using a Triton-hosted embedding model.
@@ -242,10 +390,12 @@ class TritonClient(LLMClient):
 
     async def health_check(self) -> bool:
         try:
-            resp = await self._http.get("/v2/health/ready")
-            return resp.status_code == 200
+            return await self._transport.is_ready()
         except Exception:
             return False
 
     async def close(self):
+        if self._batcher is not None:
+            await self._batcher.drain()
+        await self._transport.close()
         await self._http.aclose()
@@ -0,0 +1,226 @@
+"""Tests for the agent graph planner: concurrent retrieval and tool calls."""
+
+import asyncio
+import importlib.util
+import json
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+
+pytest.importorskip("langgraph")
+
+from shared.llm_backend.mock_client import MockLLMClient  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location(
+    "agent_graph", ROOT / "services" / "agent-service" / "app" / "graph.py"
+)
+graph_module = importlib.util.module_from_spec(_spec)
+sys.modules["agent_graph"] = graph_module  # LangGraph resolves AgentState hints by module
+_spec.loader.exec_module(graph_module)
+AgentGraph = graph_module.AgentGraph
+
+
+class PlanningLLM(MockLLMClient):
+    """MockLLMClient that asks for every offered tool and records its prompts."""
+
+    def __init__(self, arguments: dict[str, dict] | None = None, latency: float = 0.02):
+        super().__init__(latency=latency)
+        self.arguments = arguments or {}
+        self.prompts = []
+
+    async def chat(self, messages, *, tools=None, **kwargs):
+        self.prompts.append(messages)
+        response = await super().chat(messages, **kwargs)
+        if tools:
+            response.tool_calls = [
+                {
+                    "id": f"call_{i}",
+                    "type": "function",
+                    "function": {
+                        "name": t["function"]["name"],
+                        "arguments": json.dumps(self.arguments.get(t["function"]["name"], {})),
+                    },
+                }
+                for i, t in enumerate(tools)
+            ]
+        return response
+
+
+class StubTool:
+    def __init__(
+        self, result: str, latency: float, timeout: float | None = None, fail: bool = False
+    ):
+        self.description = f"returns {result}"
+        self.result = result
+        self.latency = latency
+        self.timeout = timeout
+        self.fail = fail
+        self.calls = []
+
+    async def execute(self, **kwargs):
+        self.calls.append(kwargs)
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("backend unavailable")
+        return self.result
+
+
+class StubRAG:
+    def __init__(self, latency: float, fail: bool = False):
+        self.latency = latency
+        self.fail = fail
+
+    async def retrieve(self, query, top_k=3):
+        await asyncio.sleep(self.latency)
+        if self.fail:
+            raise RuntimeError("qdrant down")
+        return [
+            {"document_id": "runbook-db", "content": "Restart the replica."},
+            {"document_id": "runbook-db", "content": "Check replication lag."},
+        ]
+
+
+def _final_prompt(llm: PlanningLLM) -> str:
+    return llm.prompts[-1][0].content
+
+
+@pytest.mark.asyncio
+async def test_retrieval_and_tools_run_concurrently():
+    cpu = StubTool("cpu=93%", latency=0.3)
+    mem = StubTool("mem=71%", latency=0.3)
+    llm = PlanningLLM(arguments={"cpu": {"host": "db-1"}})
+    agent = AgentGraph(
+        llm_client=llm, rag_client=StubRAG(latency=0.3), tool_registry={"cpu": cpu, "mem": mem}
+    )
+
+    started = time.perf_counter()
+    result = await agent.run("s1", "why is db-1 slow?", use_tools=True, use_rag=True)
+    elapsed = time.perf_counter() - started
+
+    # Serially this is 0.9s of tool and retrieval latency plus two LLM calls.
+    assert elapsed < 0.6
+    assert cpu.calls == [{"host": "db-1"}] and mem.calls == [{}]
+    assert [(t["tool_name"], t["status"]) for t in result["tool_calls"]] == [
+        ("cpu", "ok"),
+        ("mem", "ok"),
+    ]
+    assert result["sources"] == ["runbook-db"]
+    prompt = _final_prompt(llm)
+    assert "Restart the replica." in prompt and "returned: cpu=93%" in prompt
+
+
+@pytest.mark.asyncio
+async def test_tool_timeout_yields_partial_results():
+    slow = StubTool("never", latency=5.0, timeout=0.1)
+    fast = StubTool("disk=40%", latency=0.05)
+    llm = PlanningLLM()
+    agent = AgentGraph(llm_client=llm, tool_registry={"slow": slow, "fast": fast})
+
+    started = time.perf_counter()
+    result = await agent.run("s1", "check the host", use_tools=True, use_rag=False)
+
+    assert time.perf_counter() - started < 0.5
+    statuses = {t["tool_name"]: t["status"] for t in result["tool_calls"]}
+    assert statuses == {"slow": "timeout", "fast": "ok"}
+    prompt = _final_prompt(llm)
+    assert "returned: disk=40%" in prompt
+    assert "Tool 'slow' is unavailable (Error: timed out after 0.1s)" in prompt
+    assert result["content"]
+
+
+@pytest.mark.asyncio
+async def test_failures_do_not_abort_the_turn():
+    broken = StubTool("x", latency=0.01, fail=True)
+    llm = PlanningLLM()
+    agent = AgentGraph(
+        llm_client=llm,
+        rag_client=StubRAG(latency=0.01, fail=True),
+        tool_registry={"broken": broken},
+    )
+
+    result = await agent.run("s1", "anything", use_tools=True, use_rag=True)
+
+    assert result["tool_calls"][0]["status"] == "error"
+    assert "backend unavailable" in result["tool_calls"][0]["result"]
+    assert result["sources"] == []
+    assert result["content"]
+
+
+@pytest.mark.asyncio
+async def test_retrieval_timeout_and_default_tool_timeout():
+    hung = StubTool("late", latency=5.0)
+    agent = AgentGraph(
+        llm_client=PlanningLLM(),
+        rag_client=StubRAG(latency=5.0),
+        tool_registry={"hung": hung},
+        tool_timeout_s=0.1,
+        retrieval_timeout_s=0.1,
+    )
+
+    started = time.perf_counter()
+    result = await agent.run("s1", "status?", use_tools=True, use_rag=True)
+
+    assert time.perf_counter() - started < 0.5
+    assert result["tool_calls"][0]["status"] == "timeout"
+    assert result["sources"] == []
+
+
+@pytest.mark.asyncio
+async def test_plain_turn_skips_planned_branches():
+    llm = PlanningLLM()
+    agent = AgentGraph(llm_client=llm, rag_client=StubRAG(latency=0), tool_registry={})
+
+    result = await agent.run("s1", "hello", use_tools=True, use_rag=False)
+
+    assert len(llm.prompts) == 1
+    assert result == {"content": result["content"], "tool_calls": [], "sources": []}
+
+
+@pytest.mark.asyncio
+async def test_stream_runs_the_same_graph_with_progress_events():
+    tools = {"cpu": StubTool("cpu=93%", latency=0.2), "mem": StubTool("mem=71%", latency=0.05)}
+    agent = AgentGraph(
+        llm_client=PlanningLLM(), rag_client=StubRAG(latency=0.1), tool_registry=tools
+    )
+
+    started = time.perf_counter()
+    events, first_event_at = [], None
+    async for event in agent.run_stream("s1", "why is db-1 slow?", use_tools=True, use_rag=True):
+        first_event_at = first_event_at or time.perf_counter() - started
+        events.append(event)
+    total = time.perf_counter() - started
+
+    types = [e["type"] for e in events]
+    assert types[0] == "plan" and events[0]["steps"] == ["retrieve", "call_tools"]
+    assert first_event_at < total / 4
+    first_token = types.index("token")
+    assert {"retrieval", "tool_start", "tool_end"} <= set(types[:first_token])
+    assert types.count("tool_start") == types.count("tool_end") == 2
+    assert [e["tool_name"] for e in events if e["type"] == "tool_end"] == ["mem", "cpu"]
+    assert next(e for e in events if e["type"] == "retrieval")["sources"] == ["runbook-db"]
+
+    done = events[-1]
+    assert types[-1] == "done"
+    assert done["content"] == "".join(e["token"] for e in events if e["type"] == "token")
+    assert done["sources"] == ["runbook-db"] and len(done["tool_calls"]) == 2
+    unary = await agent.run("s1", "why is db-1 slow?", use_tools=True, use_rag=True)
+    # The mock streams word by word, so compare modulo trailing whitespace.
+    assert unary["content"].strip() == done["content"].strip()
+
+
+@pytest.mark.asyncio
+async def test_stream_reports_tool_timeouts():
+    agent = AgentGraph(
+        llm_client=PlanningLLM(), tool_registry={"slow": StubTool("x", latency=5.0, timeout=0.05)}
+    )
+
+    events = [e async for e in agent.run_stream("s1", "hi", use_tools=True, use_rag=False)]
+
+    tool_end = next(e for e in events if e["type"] == "tool_end")
+    assert tool_end["status"] == "timeout"
+    assert events[-1]["type"] == "done" and events[-1]["content"]
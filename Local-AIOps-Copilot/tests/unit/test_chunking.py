@@ -0,0 +1,88 @@
+"""Tests for the structure-aware chunker and its offline evaluation."""
+
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from shared.chunking import chunk_by_chars, chunk_document, regex_token_count
+from shared.chunking.evaluation import evaluate, load_corpus
+
+CORPUS = Path(__file__).resolve().parents[1] / "fixtures" / "rag_corpus"
+
+RUNBOOK = """# Redis runbook
+
+Redis backs the session cache. Eviction starts at the maxmemory limit.
+
+## Failover
+
+### Promote replica
+
+Promote the replica with the lowest offset. Then repoint the clients.
+
+```bash
+redis-cli -h redis-1 replicaof no one
+redis-cli -h redis-1 info replication
+```
+
+2024-06-02T14:01:20Z ERROR redis-0 master link down
+2024-06-02T14:01:21Z ERROR client timeout reading from redis-0
+    at RedisClient.read(redis.py:88)
+    at SessionStore.get(session.py:12)
+2024-06-02T14:01:25Z INFO  redis-1 promoted to master
+"""
+
+
+def test_sections_and_code_blocks_are_preserved():
+    chunks = chunk_document(RUNBOOK, max_tokens=60, overlap_tokens=0)
+    code = next(c for c in chunks if "```bash" in c.text)
+    assert "replicaof no one" in code.text and "info replication\n```" in code.text
+    assert code.section == "Redis runbook > Failover > Promote replica"
+    assert chunks[0].section == "Redis runbook"
+    assert chunks[0].text.startswith("# Redis runbook\nRedis backs the session cache.")
+    # Headings of an otherwise empty section are carried into the next chunk.
+    assert any(c.text.startswith("## Failover\n### Promote replica") for c in chunks)
+
+
+def test_log_lines_keep_their_continuations():
+    chunks = chunk_document(RUNBOOK, max_tokens=60, overlap_tokens=0)
+    trace = next(c for c in chunks if "client timeout" in c.text)
+    trace_head = "client timeout reading from redis-0\n    at RedisClient.read(redis.py:88)\n"
+    assert trace_head in trace.text
+    assert "at SessionStore.get(session.py:12)" in trace.text
+    assert trace.kind in ("log", "mixed")
+
+
+def test_token_budget_and_sentence_overlap():
+    text = " ".join(f"Sentence number {i} describes node {i} in detail." for i in range(60))
+    chunks = chunk_document(text, max_tokens=50, overlap_tokens=12)
+    assert len(chunks) > 1
+    assert all(regex_token_count(c.text) <= 50 for c in chunks)
+    for prev, nxt in zip(chunks, chunks[1:]):
+        last_sentence = prev.text.rsplit(". ", 1)[-1]
+        assert nxt.text.startswith(last_sentence)  # one sentence of overlap
+        assert prev.text.endswith(".")  # never cut mid-sentence
+
+
+def test_oversized_unit_is_split_on_word_boundaries():
+    text = " ".join(f"word{i}" for i in range(500))
+    chunks = chunk_document(text, max_tokens=100, overlap_tokens=0)
+    assert all(c.tokens <= 100 for c in chunks)
+    assert " ".join(c.text for c in chunks) == text
+
+
+def test_char_baseline_unchanged():
+    assert chunk_by_chars("short") == ["short"]
+    assert len(chunk_by_chars("x" * 1000, 500, 50)) == 3
+
+
+@pytest.mark.asyncio
+async def test_evaluation_structured_beats_char_windows():
+    documents, queries = load_corpus(CORPUS)
+    results = {r.strategy: r for r in await evaluate(documents, queries, ks=(1, 3))}
+    chars, structured = results["chars-500/50"], results["structured-200/30"]
+    assert structured.chunks <= chars.chunks
+    assert structured.recall["@1"] > chars.recall["@1"]
+    assert structured.recall["@3"] >= chars.recall["@3"]
@@ -4,6 +4,8 @@ import importlib.util
 import sys
 from pathlib import Path
 
+import pytest
+
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
 
@@ -62,7 +64,13 @@ def test_hold_for_review_high_latency():
 def test_hold_for_review_drift():
     blue = {"error_rate": 0.02, "quality_score": 0.80, "latency_p99_ms": 400.0}
     green = {"error_rate": 0.01, "quality_score": 0.85, "latency_p99_ms": 350.0}
-    decision, _ = make_decision(blue, green, drift_score=0.30)
+    decision, _ = make_decision(blue, green, drift_score=0.998, drift_detected=True)
+    assert decision == "hold_for_review"
+    # The eval service's flag gates by default, not a second copy of its threshold.
+    decision, _ = make_decision(blue, green, drift_score=0.5)
+    assert decision == "switch_to_green"
+    strict = DecisionCriteria(max_drift_score=0.4)
+    decision, _ = make_decision(blue, green, drift_score=0.5, criteria=strict)
     assert decision == "hold_for_review"
 
 
@@ -79,3 +87,21 @@ def test_custom_criteria():
     criteria = DecisionCriteria(min_quality_improvement=0.005)
     decision, _ = make_decision(blue, green, criteria=criteria)
     assert decision == "switch_to_green"
+
+
+def test_eval_summary_matches_plain_metrics():
+    from decision_engine import EvalSummary
+
+    blue = EvalSummary.from_totals(
+        runs=2, samples=40, error_total=1.2, quality_total=32.0, latency_p99_total=16000.0
+    )
+    green = EvalSummary.from_metrics(
+        {"error_rate": 0.01, "quality_score": 0.85, "latency_p99_ms": 350.0}
+    )
+    assert (blue.error_rate, blue.quality_score, blue.latency_p99_ms) == pytest.approx(
+        (0.03, 0.8, 400.0)
+    )
+    assert make_decision(blue, green) == make_decision(
+        {"error_rate": 0.03, "quality_score": 0.80, "latency_p99_ms": 400.0},
+        {"error_rate": 0.01, "quality_score": 0.85, "latency_p99_ms": 350.0},
+    )
@@ -0,0 +1,151 @@
+"""Tests for the eval service golden-conversation replay engine and drift test."""
+
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from shared.chunking.evaluation import HashingEmbedder  # noqa: E402
+from shared.llm_backend.base import LLMResponse  # noqa: E402
+from shared.llm_backend.mock_client import MockLLMClient  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location(
+    "eval_replay", ROOT / "services" / "eval-service" / "app" / "replay.py"
+)
+replay = importlib.util.module_from_spec(_spec)
+sys.modules["eval_replay"] = replay
+_spec.loader.exec_module(replay)
+
+
+class SlowLLM(MockLLMClient):
+    """Echoes the expected answer for some prompts and hangs on others."""
+
+    def __init__(self, answers: dict[str, str], hang_on: set[str]):
+        super().__init__(latency=0.0)
+        self.answers = answers
+        self.hang_on = hang_on
+        self.active = 0
+        self.peak = 0
+
+    async def chat(self, messages, **kwargs) -> LLMResponse:
+        prompt = messages[-1].content
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(10 if prompt in self.hang_on else 0.01)
+        finally:
+            self.active -= 1
+        return LLMResponse(content=self.answers.get(prompt, ""), model="slow")
+
+
+def test_default_dataset_loads_and_samples():
+    conversations = replay.load_dataset("default")
+    assert len(conversations) == 20
+    assert len({c.id for c in conversations}) == 20
+    assert all(c.messages[-1]["role"] == "user" and c.expected for c in conversations)
+
+    sampled = replay.sample(conversations, 45)
+    assert len(sampled) == 45 and sampled[20] is conversations[0]
+
+    with pytest.raises(FileNotFoundError):
+        replay.load_dataset("missing")
+
+
+def test_answer_scoring():
+    assert replay.exact_match("Pong!", "pong") == 1.0
+    assert replay.exact_match("pong pong", "pong") == 0.0
+    assert replay.token_f1("restart the pod", "restart the failing pod") == pytest.approx(6 / 7)
+    assert replay.token_f1("", "") == 1.0
+    recall = replay.keyword_recall("Check pg_stat_replication lag", ["PG_STAT_REPLICATION", "wal"])
+    assert recall == 0.5
+    assert replay.keyword_recall("anything", []) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_replay_mock_backend_end_to_end():
+    conversations = replay.load_dataset("default")
+    engine = replay.ReplayEngine(MockLLMClient(latency=0.01), embedder=HashingEmbedder())
+
+    run = await engine.run(conversations)
+    metrics = run.metrics()
+
+    # The mock only knows "ping" and "hello"; everything else gets its default reply.
+    assert metrics["samples"] == 20 and metrics["error_rate"] == 0
+    assert metrics["quality_score"] == pytest.approx(0.1)
+    assert 0 < metrics["latency_p50_ms"] <= metrics["latency_p95_ms"] <= metrics["latency_p99_ms"]
+    assert metrics["tokens_per_s"] > 0 and metrics["completion_tokens"] > 0
+    assert 0 < metrics["semantic_similarity"] < 1
+    assert run.answer_embeddings.shape == (20, HashingEmbedder().dim)
+    assert await engine.consistency(conversations, run) == 1.0
+
+
+@pytest.mark.asyncio
+async def test_replay_bounds_concurrency_and_times_out_requests():
+    conversations = [
+        replay.GoldenConversation(
+            id=f"c{i}", messages=[{"role": "user", "content": f"q{i}"}], expected=f"answer {i}"
+        )
+        for i in range(12)
+    ]
+    llm = SlowLLM({f"q{i}": f"answer {i}" for i in range(12)}, hang_on={"q3", "q7"})
+    engine = replay.ReplayEngine(llm, concurrency=4, timeout_s=0.2)
+
+    run = await engine.run(conversations)
+    metrics = run.metrics()
+
+    assert llm.peak == 4
+    assert run.wall_s < 2
+    assert [o.id for o in run.outcomes if o.error] == ["c3", "c7"]
+    assert "timed out" in run.outcomes[3].error
+    assert metrics["error_rate"] == pytest.approx(2 / 12, abs=1e-4)
+    assert metrics["exact_match"] == pytest.approx(10 / 12, abs=1e-4)
+
+
+def test_embedding_drift_separates_shifted_distributions():
+    rng = np.random.default_rng(1)
+    centre = rng.normal(size=64)
+    baseline = centre + rng.normal(scale=0.5, size=(80, 64))
+    same = centre + rng.normal(scale=0.5, size=(80, 64))
+    shifted = centre + rng.normal(size=64) * 0.6 + rng.normal(scale=0.5, size=(80, 64))
+
+    stable = replay.embedding_drift(baseline, same)
+    drifted = replay.embedding_drift(baseline, shifted)
+
+    assert not stable.drift_detected and stable.p_value > 0.05
+    assert drifted.drift_detected and drifted.p_value < 0.01
+    assert drifted.mmd2 > stable.mmd2 and drifted.centroid_distance > stable.centroid_distance
+
+    with pytest.raises(ValueError):
+        replay.embedding_drift(baseline, same[:1])
+
+
+@pytest.mark.asyncio
+async def test_mock_answers_drift_from_reference_answers():
+    conversations = replay.load_dataset("default")
+    embedder = HashingEmbedder()
+    engine = replay.ReplayEngine(MockLLMClient(latency=0.0), embedder=embedder)
+    run = await engine.run(conversations)
+    reference = np.asarray(
+        (await embedder.embeddings([c.expected for c in conversations])).embeddings
+    )
+
+    report = replay.embedding_drift(reference, run.answer_embeddings)
+    assert report.drift_detected
+    assert report.details()["current_size"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_answers_of_the_same_model_do_not_drift():
+    # Drift compares answers with a baseline release's answers, not references.
+    conversations = replay.load_dataset("default")
+    engine = replay.ReplayEngine(MockLLMClient(latency=0.0), embedder=HashingEmbedder())
+    baseline, current = [(await engine.run(conversations)).answer_embeddings for _ in range(2)]
+
+    report = replay.embedding_drift(baseline, current)
+    assert not report.drift_detected and report.p_value > 0.5
@@ -99,3 +99,53 @@ async def test_mock_deterministic():
     r1 = await client.chat(msg)
     r2 = await client.chat(msg)
     assert r1.content == r2.content == "pong"
+
+
+@pytest.mark.asyncio
+async def test_ollama_embeddings_are_batched_and_ordered():
+    from shared.llm_backend.embedding_benchmark import EmbeddingStubServer
+    from shared.llm_backend.ollama_client import OllamaLLMClient
+
+    texts = [f"text {i}" for i in range(130)]
+    async with EmbeddingStubServer(latency_s=0.01, dim=8) as stub:
+        client = OllamaLLMClient(stub.url, "embed", embed_batch_size=64, embed_concurrency=2)
+        response = await client.embeddings(texts)
+        await client.close()
+
+    assert isinstance(response, EmbeddingResponse)
+    assert response.embeddings == [stub._vector(t) for t in texts]
+    assert stub.requests == 3
+    assert stub.max_in_flight <= 2
+
+
+@pytest.mark.asyncio
+async def test_ollama_embeddings_coalesce_concurrent_callers():
+    import asyncio
+
+    from shared.llm_backend.embedding_benchmark import EmbeddingStubServer
+    from shared.llm_backend.ollama_client import OllamaLLMClient
+
+    async with EmbeddingStubServer(latency_s=0.01, dim=8) as stub:
+        client = OllamaLLMClient(stub.url, "embed", embed_batch_size=64)
+        results = await asyncio.gather(
+            *(client.embeddings([f"doc {i}", "shared header"]) for i in range(20))
+        )
+        await client.close()
+
+    assert stub.requests == 1
+    assert stub.inputs == 21  # the shared text is embedded once
+    assert all(r.embeddings[1] == stub._vector("shared header") for r in results)
+
+
+@pytest.mark.asyncio
+async def test_ollama_embeddings_fall_back_to_single_prompt_endpoint():
+    from shared.llm_backend.embedding_benchmark import EmbeddingStubServer
+    from shared.llm_backend.ollama_client import OllamaLLMClient
+
+    async with EmbeddingStubServer(latency_s=0.0, dim=8, batch_endpoint=False) as stub:
+        client = OllamaLLMClient(stub.url, "embed", embed_concurrency=3)
+        response = await client.embeddings(["a", "b", "c", "d"])
+        await client.close()
+
+    assert response.embeddings == [stub._vector(t) for t in "abcd"]
+    assert stub.requests == 4
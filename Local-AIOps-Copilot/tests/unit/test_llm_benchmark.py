@@ -0,0 +1,76 @@
+"""Tests for the LLM latency-distribution benchmark harness."""
+
+import json
+import sys
+import types
+
+import pytest
+
+from shared.llm_backend.benchmark import BenchmarkConfig, percentile, run_benchmark
+from shared.llm_backend.mock_client import LatencyProfile, MockLLMClient
+
+
+def test_percentile_interpolates():
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == pytest.approx(50.5)
+    assert percentile(values, 99) == pytest.approx(99.01)
+    assert percentile([], 95) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_closed_loop_reports_ttft_and_itl():
+    client = MockLLMClient(latency_profile=LatencyProfile(ttft_ms=20, itl_ms=1))
+    report = await run_benchmark(client, BenchmarkConfig(concurrency=4, requests=12))
+    summary = report.summary()
+
+    assert summary["requests"] == 12
+    assert summary["errors"] == 0
+    assert summary["ttft_ms"]["p50"] >= 20
+    assert 1 <= summary["itl_ms"]["p50"] < 10
+    assert summary["e2e_ms"]["p99"] >= summary["ttft_ms"]["p99"]
+    assert summary["tokens_per_s"] > 0
+
+
+@pytest.mark.asyncio
+async def test_poisson_latency_includes_queueing():
+    # One slot and arrivals far faster than service: later requests must wait.
+    client = MockLLMClient(latency_profile=LatencyProfile(ttft_ms=10, itl_ms=0.1))
+    config = BenchmarkConfig(arrival="poisson", concurrency=1, requests=8, rate=1000)
+    report = await run_benchmark(client, config)
+    e2e = [s.e2e_ms for s in report.samples]
+
+    assert max(e2e) > 4 * min(e2e)
+
+
+@pytest.mark.asyncio
+async def test_report_exports_json_and_mlflow(tmp_path, monkeypatch):
+    logged = {}
+    fake_mlflow = types.SimpleNamespace(
+        set_tracking_uri=lambda uri: None,
+        set_experiment=lambda name: logged.setdefault("experiment", name),
+        log_params=lambda params: logged.setdefault("params", params),
+        log_metrics=lambda metrics: logged.setdefault("metrics", metrics),
+    )
+
+    class _Run:
+        info = types.SimpleNamespace(run_id="run-1")
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+    fake_mlflow.start_run = lambda run_name=None: _Run()
+    monkeypatch.setitem(sys.modules, "mlflow", fake_mlflow)
+
+    client = MockLLMClient(latency_profile=LatencyProfile(ttft_ms=1, itl_ms=0.1))
+    report = await run_benchmark(client, BenchmarkConfig(requests=3))
+
+    path = tmp_path / "bench.json"
+    report.to_json(str(path))
+    assert len(json.loads(path.read_text())["samples"]) == 3
+
+    assert report.log_to_mlflow("llm-benchmark") == "run-1"
+    assert logged["params"]["backend"] == "mock"
+    assert {"e2e_ms_p99", "ttft_ms_p95", "itl_ms_p50", "tokens_per_s"} <= set(logged["metrics"])
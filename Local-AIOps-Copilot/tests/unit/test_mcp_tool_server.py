@@ -0,0 +1,147 @@
+"""Tests for MCP tool server pooling, result caching, limits and batching."""
+
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import httpx  # noqa: E402
+import pytest  # noqa: E402
+
+pytest.importorskip("psutil")
+
+_spec = importlib.util.spec_from_file_location(
+    "mcp_tool_server", ROOT / "services" / "mcp-tool-server" / "app" / "main.py"
+)
+mcp = importlib.util.module_from_spec(_spec)
+sys.modules["mcp_tool_server"] = mcp
+_spec.loader.exec_module(mcp)
+
+
+class FakePrometheus:
+    def __init__(self, latency: float = 0.05):
+        self.latency = latency
+        self.queries = []
+        self.status = 200
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.queries.append(request.url.params["query"])
+        await asyncio.sleep(self.latency)
+        if self.status != 200:
+            return httpx.Response(self.status)
+        return httpx.Response(200, json={"data": {"result": [{"value": [0, "0.93"]}]}})
+
+
+@pytest.fixture
+def prometheus(monkeypatch):
+    fake = FakePrometheus()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+    monkeypatch.setattr(mcp, "_http_client", client)
+    monkeypatch.setattr(mcp, "result_cache", mcp.ToolResultCache())
+    monkeypatch.setattr(mcp, "_limits", {})
+    return fake
+
+
+@pytest.fixture
+async def api():
+    transport = httpx.ASGITransport(app=mcp.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://mcp") as client:
+        yield client
+
+
+def _metric_call(query: str) -> dict:
+    return {"tool_name": "get_prometheus_metric", "arguments": {"query": query}}
+
+
+@pytest.mark.asyncio
+async def test_identical_queries_are_coalesced_and_cached(prometheus, api):
+    responses = await asyncio.gather(
+        *(api.post("/tools/call", json=_metric_call("up")) for _ in range(10))
+    )
+    bodies = [r.json() for r in responses]
+
+    assert prometheus.queries == ["up"]
+    assert all(b["success"] and "0.93" in b["result"] for b in bodies)
+    assert sorted(b["cached"] for b in bodies) == [False] + [True] * 9
+
+    # Within the TTL a repeat is served from cache; a different query is not.
+    await api.post("/tools/call", json=_metric_call("up"))
+    await api.post("/tools/call", json=_metric_call("rate(errors[5m])"))
+    assert prometheus.queries == ["up", "rate(errors[5m])"]
+    assert mcp.get_http_client() is mcp._http_client
+
+
+@pytest.mark.asyncio
+async def test_cache_expires_and_failures_are_not_cached(prometheus, api):
+    now = [100.0]
+    mcp.result_cache = mcp.ToolResultCache(clock=lambda: now[0])
+
+    await api.post("/tools/call", json=_metric_call("up"))
+    now[0] += mcp.TOOL_POLICIES["get_prometheus_metric"].cache_ttl_s + 0.01
+    second = (await api.post("/tools/call", json=_metric_call("up"))).json()
+    assert second["cached"] is False and len(prometheus.queries) == 2
+
+    prometheus.status = 503
+    failed = (await api.post("/tools/call", json=_metric_call("down"))).json()
+    assert failed == {
+        "tool_name": "get_prometheus_metric",
+        "result": "Prometheus returned 503",
+        "success": False,
+        "cached": False,
+    }
+    await api.post("/tools/call", json=_metric_call("down"))
+    assert prometheus.queries.count("down") == 2
+
+
+@pytest.fixture
+def probe_tool(monkeypatch):
+    state = {"active": 0, "peak": 0}
+
+    async def exec_probe(n: int = 0, **kwargs) -> str:
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.02)
+        state["active"] -= 1
+        return f"probe {n}"
+
+    monkeypatch.setitem(mcp.TOOL_EXECUTORS, "probe", exec_probe)
+    mcp.register_tool("probe", "test probe", max_concurrency=2)
+    yield state
+    mcp.TOOLS.pop("probe", None)
+    mcp.TOOL_POLICIES.pop("probe", None)
+
+
+@pytest.mark.asyncio
+async def test_batch_runs_concurrently_within_per_tool_limits(prometheus, api, probe_tool):
+    calls = [{"tool_name": "probe", "arguments": {"n": i}} for i in range(6)]
+    calls += [_metric_call("up"), {"tool_name": "nope", "arguments": {}}]
+
+    resp = await api.post("/tools/batch", json={"calls": calls})
+
+    results = resp.json()["results"]
+    assert [r["result"] for r in results[:6]] == [f"probe {i}" for i in range(6)]
+    assert probe_tool["peak"] == 2
+    assert results[6]["success"] and "0.93" in results[6]["result"]
+    assert results[7] == {
+        "tool_name": "nope", "result": "Unknown tool: nope", "success": False, "cached": False
+    }
+
+
+@pytest.mark.asyncio
+async def test_batch_size_is_bounded(prometheus, api):
+    calls = [_metric_call(f"q{i}") for i in range(mcp.settings.mcp_batch_max_calls + 1)]
+    resp = await api.post("/tools/batch", json={"calls": calls})
+    assert resp.status_code == 422
+    assert prometheus.queries == []
+
+
+@pytest.mark.asyncio
+async def test_uncached_tools_always_run(prometheus, api):
+    first = (await api.post("/tools/call", json={"tool_name": "get_current_time"})).json()
+    await asyncio.sleep(0.001)
+    second = (await api.post("/tools/call", json={"tool_name": "get_current_time"})).json()
+    assert first["success"] and not first["cached"] and not second["cached"]
+    assert first["result"] != second["result"]
@@ -15,11 +15,14 @@ def _import_memory():
         str(Path(__file__).resolve().parents[2] / "services" / "agent-service" / "app" / "memory.py"),
     )
     mod = importlib.util.module_from_spec(spec)
+    sys.modules["memory"] = mod
     spec.loader.exec_module(mod)
-    return mod.InMemoryConversationMemory
+    return mod
 
 
-InMemoryConversationMemory = _import_memory()
+memory = _import_memory()
+InMemoryConversationMemory = memory.InMemoryConversationMemory
+ConversationMemory = memory.ConversationMemory
 
 
 @pytest.mark.asyncio
@@ -64,3 +67,140 @@ async def test_clear():
 async def test_health_check():
     mem = InMemoryConversationMemory()
     assert await mem.health_check() is True
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RecordingSummarizer:
+    def __init__(self, during=None):
+        self.calls = []
+        self.during = during
+
+    async def __call__(self, summary, turns):
+        self.calls.append((summary, [t["content"] for t in turns]))
+        if self.during:
+            await self.during()
+        return f"{summary}+{len(turns)}".lstrip("+")
+
+
+@pytest.mark.asyncio
+async def test_lru_evicts_least_recently_used_session():
+    mem = InMemoryConversationMemory(max_sessions=2)
+    await mem.add_message("s1", "user", "a")
+    await mem.add_message("s2", "user", "b")
+    await mem.get_history("s1")  # s1 is now more recent than s2
+    await mem.add_message("s3", "user", "c")
+    assert len(mem) == 2
+    assert await mem.get_history("s2") == []
+    assert len(await mem.get_history("s1")) == 1
+
+
+@pytest.mark.asyncio
+async def test_sessions_expire_after_ttl():
+    clock = FakeClock()
+    mem = InMemoryConversationMemory(ttl_seconds=60, clock=clock)
+    await mem.add_message("s1", "user", "a")
+    clock.now += 30
+    await mem.add_message("s1", "user", "b")  # writes refresh the TTL
+    clock.now += 45
+    assert len(await mem.get_history("s1")) == 2
+    clock.now += 61
+    assert await mem.get_history("s1") == []
+    assert len(mem) == 0
+
+
+@pytest.mark.asyncio
+async def test_in_memory_compaction_keeps_recent_turns():
+    summarizer = RecordingSummarizer()
+    mem = InMemoryConversationMemory(summarizer=summarizer, compact_after=4, keep_recent=2)
+    for i in range(4):
+        await mem.add_message("s1", "user", f"m{i}")
+    assert await mem.compact("s1") is False  # not over the threshold yet
+
+    await mem.add_message("s1", "user", "m4")
+    assert await mem.compact("s1") is True
+    history = await mem.get_history("s1")
+    assert history[0] == {"role": "system", "content": memory.SUMMARY_PREFIX + "3"}
+    assert [m["content"] for m in history[1:]] == ["m3", "m4"]
+    assert summarizer.calls == [("", ["m0", "m1", "m2"])]
+
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+def _redis_memory(**kwargs):
+    return ConversationMemory(client=fakeredis.FakeAsyncRedis(decode_responses=True), **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_redis_turn_is_written_in_one_round_trip():
+    mem = _redis_memory(max_history=3, ttl_seconds=120)
+    client = mem._redis
+    pipelines, commands = [], []
+    original_pipeline, original_execute = client.pipeline, client.execute_command
+    client.pipeline = lambda *a, **kw: pipelines.append(kw) or original_pipeline(*a, **kw)
+    client.execute_command = lambda *a, **kw: commands.append(a[0]) or original_execute(*a, **kw)
+
+    await mem.add_messages(
+        "s1", [{"role": "user", "content": "q"}, {"role": "assistant", "content": "a"}]
+    )
+    assert pipelines == [{"transaction": True}] and commands == []
+
+    for i in range(3):
+        await mem.add_message("s1", "user", f"m{i}")
+    assert [m["content"] for m in await mem.get_history("s1")] == ["m0", "m1", "m2"]
+    assert 0 < await original_execute("TTL", "copilot:chat:s1") <= 120
+
+
+@pytest.mark.asyncio
+async def test_redis_compaction_rolls_the_summary_forward():
+    summarizer = RecordingSummarizer()
+    mem = _redis_memory(summarizer=summarizer, compact_after=4, keep_recent=2)
+    for i in range(6):
+        await mem.add_message("s1", "user", f"m{i}")
+
+    assert await mem.compact("s1") is True
+    history = await mem.get_history("s1")
+    assert history[0]["content"] == memory.SUMMARY_PREFIX + "4"
+    assert [m["content"] for m in history[1:]] == ["m4", "m5"]
+
+    for i in range(6, 9):
+        await mem.add_message("s1", "user", f"m{i}")
+    assert await mem.compact("s1") is True
+    assert summarizer.calls[-1] == ("4", ["m4", "m5", "m6"])
+    history = await mem.get_history("s1")
+    assert history[0]["content"].endswith("4+3")
+    assert [m["content"] for m in history[1:]] == ["m7", "m8"]
+
+    await mem.clear("s1")
+    assert await mem.get_history("s1") == []
+
+
+@pytest.mark.asyncio
+async def test_redis_compaction_never_drops_concurrent_writes():
+    mem = _redis_memory(max_history=6, summarizer=None, compact_after=4, keep_recent=2)
+
+    async def append():
+        await mem.add_message("s1", "user", "late")
+
+    mem._summarizer = RecordingSummarizer(during=append)
+    for i in range(5):
+        await mem.add_message("s1", "user", f"m{i}")
+
+    # An append at the tail leaves the summarized prefix intact.
+    assert await mem.compact("s1") is True
+    assert [m["content"] for m in (await mem.get_history("s1"))[1:]] == ["m3", "m4", "late"]
+
+    # Here the append trims the head (max_history), so compaction must back off.
+    for i in range(5, 8):
+        await mem.add_message("s1", "user", f"m{i}")
+    before = await mem.get_history("s1")
+    assert await mem.compact("s1") is False
+    after = await mem.get_history("s1")
+    assert after[0] == before[0] and [m["content"] for m in after[-2:]] == ["m7", "late"]
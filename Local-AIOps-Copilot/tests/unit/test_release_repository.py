@@ -0,0 +1,211 @@
+"""Tests for release controller persistence: pagination, indexes and eval summaries."""
+
+import datetime
+import importlib
+import sqlite3
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+from sqlalchemy import insert  # noqa: E402
+from sqlalchemy.ext.asyncio import create_async_engine  # noqa: E402
+
+
+def _import_repository():
+    """Import the service's ``app.repository`` without leaving ``app`` in sys.modules."""
+    service_dir = str(ROOT / "services" / "release-controller")
+    saved = {k: sys.modules.pop(k) for k in list(sys.modules) if k == "app" or k.startswith("app.")}
+    sys.path.insert(0, service_dir)
+    try:
+        return importlib.import_module("app.repository")
+    finally:
+        sys.path.remove(service_dir)
+        for k in [k for k in sys.modules if k == "app" or k.startswith("app.")]:
+            del sys.modules[k]
+        sys.modules.update(saved)
+
+
+repository = _import_repository()
+ReleaseRecord = repository.ReleaseRecord
+ReleaseRepository = repository.ReleaseRepository
+
+
+@pytest.fixture
+async def repo(tmp_path):
+    repo = ReleaseRepository(create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/releases.db"))
+    await repo.create_schema()
+    yield repo
+    await repo.close()
+
+
+async def _seed(repo, count: int):
+    start = datetime.datetime(2025, 1, 1)
+    rows = [
+        {
+            "release_id": f"rel-{i:04d}",
+            "model_name": f"model-{i % 3}",
+            "version": str(i),
+            "status": "registered" if i % 2 else "evaluated",
+            # Pairs share a timestamp, so the id tie-breaker matters.
+            "created_at": start + datetime.timedelta(hours=i // 2),
+        }
+        for i in range(count)
+    ]
+    async with repo.engine.begin() as conn:
+        await conn.execute(insert(ReleaseRecord), rows)
+
+
+async def _all_pages(repo, limit: int, **filters) -> list[str]:
+    seen, cursor = [], None
+    while True:
+        records, cursor = await repo.list_page(limit, cursor=cursor, **filters)
+        seen += [r.release_id for r in records]
+        if cursor is None:
+            return seen
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_every_release_once_newest_first(repo):
+    await _seed(repo, 95)
+
+    listed = await _all_pages(repo, limit=10)
+    assert listed == [f"rel-{i:04d}" for i in reversed(range(95))]
+
+    records, cursor = await repo.list_page(95)
+    assert len(records) == 95 and cursor is None
+
+
+@pytest.mark.asyncio
+async def test_filters_combine_with_pagination(repo):
+    await _seed(repo, 60)
+
+    by_model = await _all_pages(repo, limit=7, model_name="model-1", status="registered")
+    assert by_model == [f"rel-{i:04d}" for i in reversed(range(60)) if i % 3 == 1 and i % 2]
+
+    window = await _all_pages(
+        repo,
+        limit=4,
+        created_after=datetime.datetime(2025, 1, 1, 5, tzinfo=datetime.timezone.utc),
+        created_before=datetime.datetime(2025, 1, 1, 10),
+    )
+    assert window == [f"rel-{i:04d}" for i in reversed(range(10, 20))]
+
+    with pytest.raises(ValueError):
+        await repo.list_page(10, cursor="not-a-cursor")
+
+
+@pytest.mark.asyncio
+async def test_list_queries_use_the_listing_indexes(repo, tmp_path):
+    await _seed(repo, 10)
+    _, cursor = await repo.list_page(3)
+    created_at, row_id = repository.decode_cursor(cursor)
+
+    db = sqlite3.connect(tmp_path / "releases.db")
+    order = "ORDER BY created_at DESC, id DESC LIMIT 51"
+    plans = {
+        "ix_releases_created_at_id": (
+            f"SELECT * FROM releases WHERE (created_at, id) < (?, ?) {order}"
+        ),
+        "ix_releases_status_created_at_id": f"SELECT * FROM releases WHERE status = 'x' {order}",
+        "ix_releases_model_created_at_id": (
+            f"SELECT * FROM releases WHERE model_name = 'm' AND created_at >= '2025' {order}"
+        ),
+    }
+    for index, query in plans.items():
+        params = (created_at.isoformat(" "), row_id) if "?" in query else ()
+        plan = " ".join(row[3] for row in db.execute(f"EXPLAIN QUERY PLAN {query}", params))
+        assert f"USING INDEX {index}" in plan and "TEMP B-TREE" not in plan
+    db.close()
+
+
+@pytest.mark.asyncio
+async def test_eval_runs_fold_into_sample_weighted_summary(repo):
+    await repo.register("rel-a", "m", "1", "green")
+    assert await repo.decision_inputs(["rel-a"]) == {"rel-a": (None, None, False)}
+
+    await repo.record_eval(
+        "rel-a", {"error_rate": 0.02, "quality_score": 0.9, "latency_p99_ms": 300, "samples": 10}
+    )
+    await repo.record_eval(
+        "rel-a", {"error_rate": 0.0, "quality_score": 0.8, "latency_p99_ms": 500, "samples": 30}
+    )
+    assert await repo.record_eval("rel-a", {}, drift_score=0.1, drift_detected=False)
+    assert not await repo.record_eval("missing", {"quality_score": 1.0})
+
+    summary, drift, drifted = (await repo.decision_inputs(["rel-a", "missing"]))["rel-a"]
+    assert (summary.runs, summary.samples, drift, drifted) == (2, 40, 0.1, False)
+    assert summary.quality_score == pytest.approx(0.825)
+    assert summary.error_rate == pytest.approx(0.005)
+    assert summary.latency_p99_ms == pytest.approx(450)
+
+    record = await repo.get("rel-a")
+    assert record.status == "evaluated" and record.eval_metrics["samples"] == 30
+
+
+@pytest.mark.asyncio
+async def test_apply_decision_updates_only_requested_statuses(repo):
+    await repo.register("blue", "m", "1", "blue")
+    await repo.register("green", "m", "2", "green")
+
+    await repo.apply_decision("switch_to_green", "better", {"blue": "archived", "green": None})
+
+    blue, green = await repo.get("blue"), await repo.get("green")
+    assert (blue.status, blue.decision) == ("archived", "switch_to_green")
+    assert (green.status, green.decision_rationale) == ("registered", "better")
+
+
+@pytest.mark.asyncio
+async def test_schema_upgrade_adds_new_columns_and_indexes(tmp_path):
+    db = sqlite3.connect(tmp_path / "legacy.db")
+    db.execute(
+        "CREATE TABLE releases (id INTEGER PRIMARY KEY, release_id VARCHAR(64) UNIQUE NOT NULL, "
+        "model_name VARCHAR(256) NOT NULL, version VARCHAR(64) NOT NULL, "
+        "status VARCHAR(32) NOT NULL, slot VARCHAR(8), created_at DATETIME, "
+        "updated_at DATETIME, eval_metrics JSON, decision VARCHAR(32), "
+        "decision_rationale TEXT, mlflow_run_id VARCHAR(64))"
+    )
+    db.execute(
+        "INSERT INTO releases (release_id, model_name, version, status, created_at) "
+        "VALUES ('old', 'm', '1', 'registered', '2024-01-01 00:00:00')"
+    )
+    db.execute(
+        "INSERT INTO releases (release_id, model_name, version, status, created_at, eval_metrics) "
+        "VALUES ('evaluated', 'm', '2', 'evaluated', '2024-01-02 00:00:00', "
+        '\'{"quality_score": 0.9, "error_rate": 0.02, "latency_p99_ms": 300.0, "samples": 10}\')'
+    )
+    db.commit()
+    db.close()
+
+    repo = await ReleaseRepository.connect(f"sqlite:///{tmp_path}/legacy.db")
+    try:
+        # Releases evaluated before the totals existed keep their last run.
+        summary, _, _ = (await repo.decision_inputs(["evaluated"]))["evaluated"]
+        assert (summary.runs, summary.samples) == (1, 10)
+        assert summary.quality_score == pytest.approx(0.9)
+        assert summary.latency_p99_ms == pytest.approx(300.0)
+        assert (await repo.decision_inputs(["old"]))["old"][0] is None
+
+        assert await repo.record_eval("old", {"quality_score": 0.7, "samples": 5})
+        summary, _, _ = (await repo.decision_inputs(["old"]))["old"]
+        assert summary.quality_score == pytest.approx(0.7)
+    finally:
+        await repo.close()
+
+    db = sqlite3.connect(tmp_path / "legacy.db")
+    indexes = {row[1] for row in db.execute("PRAGMA index_list(releases)")}
+    db.close()
+    assert {"ix_releases_created_at_id", "ix_releases_status_created_at_id"} <= indexes
+
+
+def test_async_database_url_maps_sync_drivers():
+    assert (
+        repository.async_database_url("postgresql://u:p@db:5432/x")
+        == "postgresql+asyncpg://u:p@db:5432/x"
+    )
+    assert repository.async_database_url("sqlite:///release_controller.db") == (
+        "sqlite+aiosqlite:///release_controller.db"
+    )
+    assert repository.async_database_url("sqlite+aiosqlite:///a.db") == "sqlite+aiosqlite:///a.db"
@@ -0,0 +1,97 @@
+"""Tests for TritonClient transports and client-side batching (fake server)."""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from shared.llm_backend.base import LLMMessage
+from shared.llm_backend.triton_benchmark import CostModel, FakeTritonServer
+from shared.llm_backend.triton_client import TritonClient
+
+
+def _ask(text: str) -> list[LLMMessage]:
+    return [LLMMessage(role="system", content="be brief"), LLMMessage(role="user", content=text)]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_chats_share_infer_calls():
+    async with FakeTritonServer(CostModel(infer_overhead_ms=5), grpc=False) as server:
+        client = TritonClient(
+            http_url=server.http_url, model="fake", max_batch_size=8, batch_window_ms=20
+        )
+        responses = await asyncio.gather(*(client.chat(_ask(f"node-{i}")) for i in range(20)))
+        await client.close()
+
+    assert [r.content for r in responses] == [f"echo: node-{i}" for i in range(20)]
+    assert server.infer_calls == 3
+    assert sorted(server.batch_sizes) == [4, 8, 8]
+
+
+@pytest.mark.asyncio
+async def test_batch_size_one_disables_batching():
+    async with FakeTritonServer(CostModel(infer_overhead_ms=1), grpc=False) as server:
+        client = TritonClient(http_url=server.http_url, model="fake", max_batch_size=1)
+        await asyncio.gather(*(client.chat(_ask(f"q{i}")) for i in range(5)))
+        await client.close()
+
+    assert server.infer_calls == 5
+    assert server.batch_sizes == [1] * 5
+
+
+@pytest.mark.asyncio
+async def test_batch_window_bounds_added_latency():
+    async with FakeTritonServer(CostModel(infer_overhead_ms=0, per_row_ms=0), grpc=False) as server:
+        client = TritonClient(
+            http_url=server.http_url, model="fake", max_batch_size=8, batch_window_ms=50
+        )
+        started = time.perf_counter()
+        response = await client.chat(_ask("alone"))
+        elapsed = time.perf_counter() - started
+        await client.close()
+
+    # A lone request waits out the window, but no longer than that.
+    assert response.content == "echo: alone"
+    assert 0.05 <= elapsed < 0.5
+    assert server.batch_sizes == [1]
+
+
+@pytest.mark.asyncio
+async def test_http_transport_streams_on_the_client_pool():
+    async with FakeTritonServer(CostModel(infer_overhead_ms=0, itl_ms=1), grpc=False) as server:
+        client = TritonClient(http_url=server.http_url, model="fake")
+        assert client._transport._http is client._http
+        assert await client.health_check()
+        tokens = [t async for t in client.stream(_ask("disk full on node-3"))]
+        await client.close()
+
+    assert tokens == ["echo:", " disk", " full", " on", " node-3"]
+    assert server.stream_calls == 1
+    assert client._http.is_closed
+
+
+@pytest.mark.asyncio
+async def test_grpc_transport_batches_and_streams():
+    pytest.importorskip("tritonclient.grpc")
+    async with FakeTritonServer(CostModel(infer_overhead_ms=5, itl_ms=1)) as server:
+        client = TritonClient(
+            http_url=server.http_url,
+            grpc_url=server.grpc_url,
+            model="fake",
+            transport="grpc",
+            max_batch_size=4,
+            batch_window_ms=20,
+        )
+        assert await client.health_check()
+        responses = await asyncio.gather(*(client.chat(_ask(f"pod {i}")) for i in range(4)))
+        tokens = [t async for t in client.stream(_ask("disk full on node-3"))]
+        await client.close()
+
+    assert [r.content for r in responses] == [f"echo: pod {i}" for i in range(4)]
+    assert server.batch_sizes == [4]
+    assert tokens == ["echo:", " disk", " full", " on", " node-3"]
+    assert server.stream_calls == 1
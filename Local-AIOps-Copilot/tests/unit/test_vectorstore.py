@@ -5,6 +5,7 @@ from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
 
+import asyncio
 import importlib.util
 import pytest
 
@@ -76,3 +77,207 @@ async def test_health_check():
     mock_llm = MockLLMClient()
     store = InMemoryVectorStore(embedding_client=mock_llm)
     assert await store.health_check() is True
+
+
+def _store_with_vectors(count: int = 500, dim: int = 16):
+    import numpy as np
+
+    rng = np.random.default_rng(7)
+    store = InMemoryVectorStore(embedding_client=MockLLMClient())
+    vectors = rng.standard_normal((count, dim)).astype("float32")
+    for doc in range(0, count, 50):
+        store.add_embeddings(
+            "ops",
+            f"doc-{doc // 50}",
+            [f"chunk {i}" for i in range(doc, doc + 50)],
+            vectors[doc : doc + 50],
+            {"team": "sre" if (doc // 50) % 2 else "db"},
+        )
+    return store, vectors
+
+
+def test_search_matches_brute_force_ranking():
+    import numpy as np
+
+    store, vectors = _store_with_vectors()
+    query = vectors[123] * 3  # unnormalised on purpose
+    results = store.search(query, top_k=5, collection="ops")
+
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(unit @ (query / np.linalg.norm(query))))[:5]
+    assert [r["content"] for r in results] == [f"chunk {i}" for i in expected]
+    assert results[0]["content"] == "chunk 123"
+    assert results[0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert results[0]["metadata"] == {"team": "db", "chunk_index": 23}
+
+
+def test_search_filters_and_threshold():
+    store, vectors = _store_with_vectors()
+    sre = store.search(
+        vectors[123], top_k=500, collection="ops", score_threshold=-1.0, filters={"team": "sre"}
+    )
+    assert len(sre) == 250
+    assert all(r["metadata"]["team"] == "sre" for r in sre)
+    assert [r["score"] for r in sre] == sorted((r["score"] for r in sre), reverse=True)
+
+    both = store.search(vectors[0], top_k=3, collection="ops", filters={"team": ["sre", "db"]})
+    assert both[0]["content"] == "chunk 0"
+    assert store.search(vectors[0], top_k=3, collection="ops", filters={"team": "web"}) == []
+
+    strict = store.search(vectors[0], top_k=50, collection="ops", score_threshold=0.99)
+    assert [r["content"] for r in strict] == ["chunk 0"]
+
+
+@pytest.mark.asyncio
+async def test_ingest_records_section_metadata():
+    store = InMemoryVectorStore(embedding_client=MockLLMClient())
+    content = (
+        "# Runbook\n\n## Disk\n\nClean old logs.\n\n```bash\njournalctl --vacuum-size=1G\n```\n"
+    )
+    assert await store.ingest("rb", content, {"source": "wiki"}, "kb") == 1
+    hit = (await store.retrieve("disk", 1, "kb", -1.0, filters={"section": "Runbook > Disk"}))[0]
+    assert "journalctl --vacuum-size=1G" in hit["content"]
+    assert hit["metadata"]["chunk_kind"] == "mixed"
+    assert hit["metadata"]["source"] == "wiki"
+
+
+def test_dimension_mismatch_rejected():
+    store, _ = _store_with_vectors()
+    with pytest.raises(ValueError):
+        store.add_embeddings("ops", "bad", ["x"], [[1.0, 2.0]])
+
+
+@pytest.mark.asyncio
+async def test_snapshot_round_trip(tmp_path):
+    store, vectors = _store_with_vectors()
+    await store.ingest("doc-k8s", "Kubernetes restarts crashlooping pods.", {"team": "sre"}, "kb")
+    assert store.dirty
+    store.snapshot(str(tmp_path / "snap"))
+    assert not store.dirty
+
+    restored = InMemoryVectorStore(MockLLMClient(), snapshot_path=str(tmp_path / "snap"))
+    assert restored.search(vectors[42], top_k=3, collection="ops") == store.search(
+        vectors[42], top_k=3, collection="ops"
+    )
+    hits = await restored.retrieve("crashlooping pods", 1, "kb", 0.0, filters={"team": "sre"})
+    assert hits[0]["document_id"] == "doc-k8s"
+
+    # Restored collections keep accepting writes and can be re-snapshotted in place.
+    restored.add_embeddings("ops", "doc-new", ["fresh"], vectors[:1] * -1)
+    restored.snapshot(str(tmp_path / "snap"))
+    again = InMemoryVectorStore(MockLLMClient(), snapshot_path=str(tmp_path / "snap"))
+    assert again.search(vectors[0] * -1, top_k=1, collection="ops")[0]["content"] == "fresh"
+
+
+def test_failed_snapshot_stays_dirty_and_keeps_the_previous_one(tmp_path, monkeypatch):
+    import numpy as np
+
+    store, vectors = _store_with_vectors()
+    store.snapshot(str(tmp_path / "snap"))
+    store.add_embeddings("ops", "doc-new", ["fresh"], vectors[:1])
+
+    def disk_full(*args, **kwargs):
+        raise OSError("No space left on device")
+
+    monkeypatch.setattr(np, "save", disk_full)
+    with pytest.raises(OSError):
+        store.snapshot(str(tmp_path / "snap"))
+
+    assert store.dirty  # the snapshot loop retries
+    assert [p.name for p in tmp_path.iterdir()] == ["snap"]
+    restored = InMemoryVectorStore(MockLLMClient(), snapshot_path=str(tmp_path / "snap"))
+    assert len(restored._collections["ops"]) == 500
+
+
+def _import_qdrant_store():
+    spec = importlib.util.spec_from_file_location(
+        "vectorstore",
+        str(
+            Path(__file__).resolve().parents[2]
+            / "services"
+            / "rag-service"
+            / "app"
+            / "vectorstore.py"
+        ),
+    )
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    return mod.VectorStore
+
+
+class _NetworkQdrant:
+    """Local-mode AsyncQdrantClient with a simulated round trip and call counts."""
+
+    def __init__(self, latency_s: float = 0.002):
+        from qdrant_client import AsyncQdrantClient
+
+        self._client = AsyncQdrantClient(":memory:")
+        self._latency_s = latency_s
+        self.calls: dict[str, int] = {}
+        self.upserts_in_flight = 0
+        self.max_upserts_in_flight = 0
+
+    def __getattr__(self, name):
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            self.calls[name] = self.calls.get(name, 0) + 1
+            if name == "upsert":
+                self.upserts_in_flight += 1
+                self.max_upserts_in_flight = max(self.max_upserts_in_flight, self.upserts_in_flight)
+            try:
+                await asyncio.sleep(self._latency_s)
+                return await method(*args, **kwargs)
+            finally:
+                if name == "upsert":
+                    self.upserts_in_flight -= 1
+
+        return call
+
+
+@pytest.mark.asyncio
+async def test_qdrant_store_bootstraps_collections_once():
+    pytest.importorskip("qdrant_client")
+    VectorStore = _import_qdrant_store()
+    qdrant = _NetworkQdrant(latency_s=0)
+    store = VectorStore(qdrant, MockLLMClient(), collection_name="docs")
+    await store.bootstrap()
+
+    for i in range(3):
+        await store.ingest(f"doc{i}", f"runbook {i}: restart the pod", {"team": "sre"}, "docs")
+    await store.ingest("other", "postgres failover steps", {"team": "db"}, "archive")
+
+    assert qdrant.calls["collection_exists"] == 2  # bootstrap + first write to "archive"
+    assert qdrant.calls["create_collection"] == 2
+    hits = await store.retrieve("restart the pod", 2, "docs", 0.0, filters={"team": "sre"})
+    assert len(hits) == 2
+    assert all(h["metadata"]["team"] == "sre" for h in hits)
+    assert await store.retrieve("failover", 5, "archive", 0.0, filters={"team": "sre"}) == []
+
+
+@pytest.mark.asyncio
+async def test_qdrant_retrieve_progresses_during_large_ingest():
+    pytest.importorskip("qdrant_client")
+    VectorStore = _import_qdrant_store()
+    qdrant = _NetworkQdrant(latency_s=0.002)
+    store = VectorStore(
+        qdrant, MockLLMClient(), collection_name="docs", upsert_batch_size=16, upsert_concurrency=2
+    )
+    await store.bootstrap()
+    await store.ingest("seed", "disk pressure on node-1", {}, "docs")
+
+    sentence = " ".join(f"w{j}" for j in range(45))
+    large = " ".join(f"Step {i} {sentence}." for i in range(1600))  # ~400 chunks of 200 tokens
+    ingest = asyncio.create_task(store.ingest("large", large, {}, "docs"))
+    upserts_seen = []  # upsert calls issued when each concurrent retrieve returned
+    while not ingest.done():
+        hits = await store.retrieve("disk pressure", 1, "docs", 0.0)
+        assert hits
+        upserts_seen.append(qdrant.calls["upsert"])
+    chunks = await ingest
+
+    batches = -(-chunks // 16)
+    assert qdrant.calls["upsert"] == batches + 1  # + the seed document
+    assert qdrant.max_upserts_in_flight == 2
+    # Retrievals complete between upsert batches instead of queueing behind the ingest.
+    assert len({n for n in upserts_seen if 1 < n < batches + 1}) >= 2
@@ -0,0 +1,200 @@
+"""Tests for the gateway WebSocket ConnectionManager fan-out."""
+
+import asyncio
+import importlib.util
+import statistics
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+sys.path.insert(0, str(ROOT))
+
+import pytest  # noqa: E402
+from prometheus_client import CollectorRegistry  # noqa: E402
+
+_spec = importlib.util.spec_from_file_location(
+    "ws_manager", ROOT / "services" / "api-gateway" / "app" / "ws_manager.py"
+)
+ws_manager = importlib.util.module_from_spec(_spec)
+sys.modules["ws_manager"] = ws_manager
+_spec.loader.exec_module(ws_manager)
+ConnectionManager = ws_manager.ConnectionManager
+ConnectionMetrics = ws_manager.ConnectionMetrics
+
+
+class FakeWebSocket:
+    def __init__(self, stalled: bool = False, fail: bool = False):
+        self.stalled = stalled
+        self.fail = fail
+        self.received = []
+        self.close_code = None
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, data):
+        if self.stalled:
+            await asyncio.Event().wait()  # a client that stopped reading
+        if self.fail:
+            raise RuntimeError("connection reset")
+        self.received.append((time.perf_counter(), data))
+
+    async def close(self, code: int = 1000):
+        self.close_code = code
+
+
+def _manager(**kwargs):
+    registry = CollectorRegistry()
+    return ConnectionManager(metrics=ConnectionMetrics(registry=registry), **kwargs), registry
+
+
+async def _connect(manager, sockets):
+    for i, ws in enumerate(sockets):
+        await manager.connect(f"s{i}", ws)
+
+
+async def _broadcast_latencies(n: int, stalled: int, rounds: int = 20, queue_size: int = 8):
+    manager, registry = _manager(queue_size=queue_size, send_timeout_s=60)
+    sockets = [
+        FakeWebSocket(stalled=i % (n // stalled) == 0 if stalled else False) for i in range(n)
+    ]
+    await _connect(manager, sockets)
+    healthy = [ws for ws in sockets if not ws.stalled]
+
+    latencies = []
+    for seq in range(rounds):
+        sent = time.perf_counter()
+        await manager.broadcast({"seq": seq})
+        while any(len(ws.received) <= seq for ws in healthy):
+            await asyncio.sleep(0.001)
+        latencies.append(max(ws.received[seq][0] for ws in healthy) - sent)
+    return manager, registry, sockets, latencies
+
+
+@pytest.mark.asyncio
+async def test_broadcast_latency_flat_with_stalled_consumers():
+    n, rounds, queue_size = 1000, 20, 8
+    baseline_mgr, _, _, baseline = await _broadcast_latencies(n, stalled=0, rounds=rounds)
+    await baseline_mgr.close()
+    manager, registry, sockets, stalled = await _broadcast_latencies(
+        n, stalled=n // 20, rounds=rounds, queue_size=queue_size
+    )
+
+    # Every healthy client got every message, in order, no slower than without stalls.
+    assert statistics.median(stalled) < 2 * statistics.median(baseline) + 0.02
+    assert max(stalled) < 2 * max(baseline) + 0.05
+    for ws in sockets:
+        if not ws.stalled:
+            assert [d["seq"] for _, d in ws.received] == list(range(rounds))
+
+    # Stalled clients hold one message in send plus a full queue; the rest was dropped.
+    stuck = [f"s{i}" for i, ws in enumerate(sockets) if ws.stalled]
+    assert len(stuck) == 50 and manager.active_connections == n
+    assert all(manager.queue_depth(s) == queue_size for s in stuck)
+    assert registry.get_sample_value("api_gateway_ws_queue_depth") == 50 * queue_size
+    assert registry.get_sample_value(
+        "api_gateway_ws_dropped_messages_total", {"policy": "drop_oldest"}
+    ) == 50 * (rounds - queue_size - 1)
+
+    await manager.close()
+    assert registry.get_sample_value("api_gateway_ws_connections") == 0
+    assert registry.get_sample_value("api_gateway_ws_queue_depth") == 0
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_sheds_slow_consumers():
+    manager, registry = _manager(queue_size=2, policy="disconnect")
+    sockets = [FakeWebSocket(stalled=(i == 3)) for i in range(10)]
+    await _connect(manager, sockets)
+
+    for seq in range(5):
+        await manager.broadcast({"seq": seq})
+        await asyncio.sleep(0.001)
+    await asyncio.sleep(0.01)
+
+    assert manager.active_connections == 9
+    assert sockets[3].close_code == 1013
+    assert await manager.send_to_session("s3", {"x": 1}) is False
+    assert registry.get_sample_value(
+        "api_gateway_ws_disconnects_total", {"reason": "slow_consumer"}
+    ) == 1
+    assert all(len(ws.received) == 5 for i, ws in enumerate(sockets) if i != 3)
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_send_timeout_and_send_errors_release_connections():
+    manager, registry = _manager(send_timeout_s=0.05)
+    half_closed, reset, ok = FakeWebSocket(stalled=True), FakeWebSocket(fail=True), FakeWebSocket()
+    await _connect(manager, [half_closed, reset, ok])
+
+    assert await manager.broadcast({"event": "ping"}) == 3
+    await asyncio.sleep(0.1)
+
+    assert manager.active_connections == 1
+    assert half_closed.close_code == 1013
+    assert registry.get_sample_value(
+        "api_gateway_ws_disconnects_total", {"reason": "send_timeout"}
+    ) == 1
+    assert [d for _, d in ok.received] == [{"event": "ping"}]
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_reconnect_replaces_previous_socket():
+    manager, _ = _manager()
+    old, new = FakeWebSocket(), FakeWebSocket()
+    await manager.connect("s1", old)
+    await manager.connect("s1", new)
+    manager.disconnect("s1", old)  # late disconnect from the old handler is ignored
+
+    assert await manager.send_to_session("s1", {"n": 1})
+    await asyncio.sleep(0.01)
+    assert old.close_code == 1000 and [d for _, d in new.received] == [{"n": 1}]
+    await manager.close()
+    assert new.close_code == 1001
+
+
+class SlowWebSocket(FakeWebSocket):
+    async def send_json(self, data):
+        await asyncio.sleep(0.002)
+        await super().send_json(data)
+
+
+@pytest.mark.asyncio
+async def test_session_replies_wait_for_room_instead_of_dropping():
+    manager, registry = _manager(queue_size=4)
+    ws = SlowWebSocket()
+    await manager.connect("s1", ws)
+
+    for token in range(50):
+        assert await manager.send_to_session("s1", {"token": token})
+        assert manager.queue_depth("s1") <= 4
+    while len(ws.received) < 50:
+        await asyncio.sleep(0.005)
+
+    assert [d["token"] for _, d in ws.received] == list(range(50))
+    assert registry.get_sample_value(
+        "api_gateway_ws_dropped_messages_total", {"policy": "drop_oldest"}
+    ) is None
+    await manager.close()
+
+
+@pytest.mark.asyncio
+async def test_session_reply_fails_once_the_connection_is_shed():
+    manager, _ = _manager(queue_size=2, policy="disconnect")
+    ws = FakeWebSocket(stalled=True)
+    await manager.connect("s1", ws)
+    for token in range(3):  # one in the stalled send, two queued
+        assert await manager.send_to_session("s1", {"token": token})
+        await asyncio.sleep(0)
+
+    blocked = asyncio.create_task(manager.send_to_session("s1", {"token": 3}))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+    await manager.broadcast({"event": "status"})  # full queue: the policy sheds s1
+
+    assert await blocked is False
+    assert ws.close_code == 1013
+    await manager.close()
@@ -31,9 +31,11 @@ class ServiceClients:
                 end_of_turn=is_final,
             )
 
+        # Interim replies precede the closing one, which covers all the audio sent.
+        text, confidence = "", 0.0
         async for reply in self.stt.StreamTranscribe(iterator()):
-            return reply.text, reply.confidence
-        return "", 0.0
+            text, confidence = reply.text, reply.confidence
+        return text, confidence
 
     async def retrieve(self, meta, query: str, top_k: int = 3):
         return await self.rag.Retrieve(rag_pb2.RagRequest(meta=meta, query=query, top_k=top_k))
@@ -44,12 +46,12 @@ class ServiceClients:
         )
         return json.loads(reply.output_json)
 
-    async def synthesize(self, meta, text: str, voice: str) -> bytes:
+    async def stream_synthesize(self, meta, text: str, voice: str) -> AsyncIterator[bytes]:
         async for reply in self.tts.Synthesize(
             tts_pb2.SynthesisRequest(meta=meta, text=text, voice=voice, flush=True)
         ):
-            return reply.audio
-        return b""
+            if reply.audio:
+                yield reply.audio
 
     async def stream_generate(
         self,
@@ -6,6 +6,7 @@ import sys
 
 ROOT = pathlib.Path(__file__).resolve().parents[3]
 for rel in (
+    ROOT / "libs" / "shared-audio",
     ROOT / "libs" / "shared-config",
     ROOT / "libs" / "shared-events",
     ROOT / "libs" / "shared-observability",
@@ -15,29 +16,43 @@ for rel in (
     if rel_str not in sys.path:
         sys.path.insert(0, rel_str)
 
-import grpc
-import redis.asyncio as redis
-import uvicorn
-from temporalio.client import Client
+import grpc  # noqa: E402
+import redis.asyncio as redis  # noqa: E402
+import uvicorn  # noqa: E402
+from temporalio.client import Client  # noqa: E402
 
-from session_orchestrator_app.clients import ServiceClients
-from session_orchestrator_app.http_app import app
-from session_orchestrator_app.service import RealtimeSessionService
-from session_orchestrator_app.temporal_client import DurableWorkflowLauncher
-from shared_config.settings import get_settings
-from shared_events.bus import EventPublisher
-from shared_observability.logging import configure_logging
-from shared_observability.tracing import configure_tracing
-from voice_platform import session_pb2_grpc
+from session_orchestrator_app.clients import ServiceClients  # noqa: E402
+from session_orchestrator_app.http_app import app  # noqa: E402
+from session_orchestrator_app.service import RealtimeSessionService  # noqa: E402
+from session_orchestrator_app.temporal_client import DurableWorkflowLauncher  # noqa: E402
+from shared_audio.vad import VadConfig  # noqa: E402
+from shared_config.settings import get_settings  # noqa: E402
+from shared_events.bus import EventPublisher  # noqa: E402
+from shared_observability.logging import configure_logging  # noqa: E402
+from shared_observability.tracing import configure_tracing  # noqa: E402
+from voice_platform import session_pb2_grpc  # noqa: E402
 
 
 async def serve_grpc(publisher: EventPublisher | None, workflow_launcher: DurableWorkflowLauncher) -> None:
     settings = get_settings()
     clients = ServiceClients()
+    vad = None
+    if settings.vad_enabled:
+        vad = VadConfig(
+            threshold_db=settings.vad_threshold_db,
+            hangover_ms=settings.vad_hangover_ms,
+            padding_ms=settings.vad_padding_ms,
+        )
     server = grpc.aio.server()
     session_pb2_grpc.add_RealtimeSessionOrchestratorServicer_to_server(
         RealtimeSessionService(
-            clients, publisher, settings.default_domain_pack, workflow_launcher
+            clients,
+            publisher,
+            settings.default_domain_pack,
+            workflow_launcher,
+            stt_chunk_ms=settings.stt_chunk_ms,
+            partial_window_ms=settings.stt_partial_window_ms,
+            vad=vad,
         ),
         server,
     )
@@ -10,10 +10,15 @@ import grpc
 
 from session_orchestrator_app.clients import ServiceClients
 from session_orchestrator_app.temporal_client import DurableWorkflowLauncher
+from shared_audio.partials import IncrementalPartialTranscriber
+from shared_audio.vad import VadConfig, VoiceActivityDetector
 from shared_events.bus import EventPublisher
 from shared_events.events import EventEnvelope, EventType
+from shared_observability.metrics import VAD_SPEECH_RATIO, record_vad_frames
 from voice_platform import common_pb2, llm_pb2, session_pb2, session_pb2_grpc
 
+SERVICE_NAME = "session-orchestrator"
+
 
 class LiveSession:
     def __init__(
@@ -22,11 +27,19 @@ class LiveSession:
         publisher: EventPublisher | None,
         default_domain: str,
         workflow_launcher: DurableWorkflowLauncher,
+        *,
+        stt_chunk_ms: int = 250,
+        partial_window_ms: int = 4000,
+        vad: VadConfig | None = None,
     ) -> None:
         self._clients = clients
         self._publisher = publisher
         self._default_domain = default_domain
         self._workflow_launcher = workflow_launcher
+        self._vad = VoiceActivityDetector(vad) if vad is not None else None
+        self._partials = IncrementalPartialTranscriber(
+            chunk_ms=stt_chunk_ms, max_window_ms=partial_window_ms
+        )
         self._outgoing: asyncio.Queue[session_pb2.SessionMessage | None] = asyncio.Queue()
         self._audio_buffer = bytearray()
         self._sample_rate = 16000
@@ -91,9 +104,7 @@ class LiveSession:
             },
         )
 
-    async def _run_partial_stt(self) -> None:
-        if not self._audio_buffer:
-            return
+    async def _run_partial_stt(self, start: int, end: int) -> None:
         meta = common_pb2.RequestMeta(
             session_id=self._session_id,
             turn_id=self._turn_id,
@@ -102,21 +113,72 @@ class LiveSession:
         )
         try:
             text, _ = await self._clients.transcribe(
-                meta, bytes(self._audio_buffer), self._sample_rate, False
+                meta, bytes(self._audio_buffer[start:end]), self._sample_rate, False
             )
         except Exception:
             return
-        if text:
-            await self._emit(EventType.TRANSCRIPT_PARTIAL.value, text=text, payload={"confidence": 0.5})
+        partial = self._partials.update(start, end, text)
+        if partial:
+            await self._emit(
+                EventType.TRANSCRIPT_PARTIAL.value,
+                text=partial,
+                payload={"confidence": 0.5, "stable_text": self._partials.committed_text},
+            )
+
+    def _schedule_partial_stt(self) -> None:
+        # One partial decode in flight at a time; frames arriving meanwhile are
+        # picked up by the next decode instead of restarting this one.
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        if not self._partials.due(len(self._audio_buffer)):
+            return
+        start, end = self._partials.window(len(self._audio_buffer))
+        self._partial_task = asyncio.create_task(self._run_partial_stt(start, end))
+
+    async def _cancel_partial_stt(self) -> None:
+        task, self._partial_task = self._partial_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def _buffer_audio(self, pcm: bytes) -> bool:
+        """Buffer the turn's audio, minus non-speech; True at a VAD end of utterance."""
+        if self._vad is None:
+            self._audio_buffer.extend(pcm)
+            return False
+        if self._vad.sample_rate != self._sample_rate:
+            self._vad.sample_rate = self._sample_rate
+        result = self._vad.process(pcm)
+        record_vad_frames(SERVICE_NAME, result.frames, result.speech_frames)
+        self._audio_buffer.extend(result.audio)
+        return result.end_of_utterance
+
+    def _reset_turn_audio(self) -> None:
+        self._audio_buffer.clear()
+        self._partials.reset()
 
     async def _tts_worker(self, meta, queue: asyncio.Queue[str | None]) -> None:
         while True:
             chunk = await queue.get()
             if chunk is None:
                 return
-            audio = await self._clients.synthesize(meta, chunk, "en-us")
-            if audio:
-                await self._emit(EventType.TTS_CHUNK.value, text=chunk, audio=audio, payload={"text": chunk})
+            started = time.time()
+            first = True
+            async for audio in self._clients.stream_synthesize(meta, chunk, "en-us"):
+                if first:
+                    await self._emit_timing("tts_first_audio", started)
+                # The sentence rides on its first chunk; the rest carry audio only.
+                text = chunk if first else ""
+                await self._emit(
+                    EventType.TTS_CHUNK.value,
+                    text=text,
+                    audio=audio,
+                    payload={"text": text} if text else None,
+                )
+                first = False
 
     async def _run_turn(self, transcript: str) -> None:
         try:
@@ -239,14 +301,23 @@ class LiveSession:
         audio = message.audio
         self._session_id = audio.meta.session_id or self._session_id
         self._sample_rate = audio.sample_rate or self._sample_rate
-        self._audio_buffer.extend(audio.pcm)
-
-        if self._partial_task is not None and not self._partial_task.done():
-            self._partial_task.cancel()
-        self._partial_task = asyncio.create_task(self._run_partial_stt())
+        self._partials.sample_rate = self._sample_rate
+        end_of_utterance = self._buffer_audio(audio.pcm)
 
-        if audio.end_of_turn:
+        if not (audio.end_of_turn or end_of_utterance):
+            self._schedule_partial_stt()
+        else:
+            await self._cancel_partial_stt()
             self._turn_id = audio.meta.turn_id or f"turn-{uuid.uuid4().hex[:8]}"
+            if self._vad is not None:
+                if self._vad.frames:
+                    # Not the empty utterance after VAD already ended the turn.
+                    VAD_SPEECH_RATIO.labels(SERVICE_NAME).observe(self._vad.speech_ratio)
+                self._vad.reset()
+                if not self._audio_buffer:
+                    # Only silence since the last turn (or VAD already ended it).
+                    self._reset_turn_audio()
+                    return
             stt_started = time.time()
             meta = common_pb2.RequestMeta(
                 session_id=self._session_id,
@@ -259,13 +330,13 @@ class LiveSession:
                     meta, bytes(self._audio_buffer), self._sample_rate, True
                 )
             except Exception as exc:
-                self._audio_buffer.clear()
+                self._reset_turn_audio()
                 await self._emit(
                     EventType.ERROR.value,
                     payload={"stage": "stt", "error": str(exc)},
                 )
                 return
-            self._audio_buffer.clear()
+            self._reset_turn_audio()
             await self._emit_timing("stt_final", stt_started)
             await self._emit(
                 EventType.TRANSCRIPT_FINAL.value,
@@ -299,11 +370,18 @@ class RealtimeSessionService(session_pb2_grpc.RealtimeSessionOrchestratorService
         publisher: EventPublisher | None,
         default_domain: str,
         workflow_launcher: DurableWorkflowLauncher,
+        *,
+        stt_chunk_ms: int = 250,
+        partial_window_ms: int = 4000,
+        vad: VadConfig | None = None,
     ) -> None:
         self._clients = clients
         self._publisher = publisher
         self._default_domain = default_domain
         self._workflow_launcher = workflow_launcher
+        self._stt_chunk_ms = stt_chunk_ms
+        self._partial_window_ms = partial_window_ms
+        self._vad = vad
 
     async def Connect(self, request_iterator, context: grpc.aio.ServicerContext):
         session = LiveSession(
@@ -311,6 +389,9 @@ class RealtimeSessionService(session_pb2_grpc.RealtimeSessionOrchestratorService
             self._publisher,
             self._default_domain,
             self._workflow_launcher,
+            stt_chunk_ms=self._stt_chunk_ms,
+            partial_window_ms=self._partial_window_ms,
+            vad=self._vad,
         )
         consumer = asyncio.create_task(session.consume(request_iterator))
         try:
@@ -1,26 +1,65 @@
 from __future__ import annotations
 
 import grpc
-
-from stt_service_app.transcriber import FasterWhisperTranscriber
+from shared_audio.vad import VadConfig, VoiceActivityDetector
+from shared_observability.metrics import VAD_SPEECH_RATIO, record_vad_frames
 from voice_platform import common_pb2, stt_pb2, stt_pb2_grpc
 
+from stt_service_app.streaming import StreamingDecoder
+from stt_service_app.transcriber import DecodePool
+
+SERVICE_NAME = "stt-service"
+
 
 class SpeechToTextService(stt_pb2_grpc.SpeechToTextServicer):
-    def __init__(self, transcriber: FasterWhisperTranscriber) -> None:
-        self._transcriber = transcriber
+    def __init__(
+        self,
+        pool: DecodePool,
+        chunk_ms: int = 250,
+        max_window_ms: int = 4000,
+        vad: VadConfig | None = None,
+    ) -> None:
+        self._pool = pool
+        self._chunk_ms = chunk_ms
+        self._max_window_ms = max_window_ms
+        self._vad = vad
 
     async def StreamTranscribe(self, request_iterator, context: grpc.aio.ServicerContext):
-        chunks: list[bytes] = []
+        """Yields interim transcripts while audio streams in, then one closing transcript.
+
+        Interim chunks always have ``is_final=False``; the closing chunk covers
+        the whole stream and has ``is_final`` set from ``end_of_turn``.  With
+        VAD enabled, non-speech frames are dropped before they are decoded.
+        """
+        decoder = StreamingDecoder(self._pool, self._chunk_ms, self._max_window_ms)
+        vad = VoiceActivityDetector(self._vad) if self._vad is not None else None
         sample_rate = 16000
         meta = None
         is_final = False
-        async for request in request_iterator:
-            meta = request.meta
-            sample_rate = request.sample_rate or sample_rate
-            chunks.append(request.pcm)
-            is_final = request.end_of_turn
-        result = self._transcriber.transcribe(b"".join(chunks), sample_rate=sample_rate)
+        try:
+            async for request in request_iterator:
+                meta = request.meta
+                sample_rate = request.sample_rate or sample_rate
+                pcm = request.pcm
+                if vad is not None:
+                    if vad.sample_rate != sample_rate:
+                        vad.sample_rate = sample_rate
+                    kept = vad.process(pcm)
+                    record_vad_frames(SERVICE_NAME, kept.frames, kept.speech_frames)
+                    pcm = kept.audio
+                decoder.append(pcm, sample_rate)
+                is_final = request.end_of_turn
+                interim = decoder.poll_interim()
+                if interim is not None:
+                    text, confidence = interim
+                    yield stt_pb2.TranscriptChunk(
+                        meta=meta, text=text, is_final=False, confidence=confidence
+                    )
+            result = await decoder.finish()
+            if vad is not None:
+                VAD_SPEECH_RATIO.labels(SERVICE_NAME).observe(vad.speech_ratio)
+        finally:
+            await decoder.close()
         yield stt_pb2.TranscriptChunk(
             meta=meta,
             text=result.text,
@@ -30,4 +69,3 @@ class SpeechToTextService(stt_pb2_grpc.SpeechToTextServicer):
 
     async def Health(self, request: common_pb2.Empty, context: grpc.aio.ServicerContext):
         return common_pb2.HealthReply(status="ok")
-
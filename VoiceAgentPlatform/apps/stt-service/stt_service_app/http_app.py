@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 app = FastAPI(title="stt-service")
 
@@ -14,3 +15,7 @@ async def health_live() -> dict[str, str]:
 async def health_ready() -> dict[str, str]:
     return {"status": "ok"}
 
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -6,6 +6,7 @@ import sys
 
 ROOT = pathlib.Path(__file__).resolve().parents[3]
 for rel in (
+    ROOT / "libs" / "shared-audio",
     ROOT / "libs" / "shared-config",
     ROOT / "libs" / "shared-observability",
     ROOT / "libs" / "proto" / "generated",
@@ -14,16 +15,17 @@ for rel in (
     if rel_str not in sys.path:
         sys.path.insert(0, rel_str)
 
-import grpc
-import uvicorn
+import grpc  # noqa: E402
+import uvicorn  # noqa: E402
 
-from shared_config.settings import get_settings
-from shared_observability.logging import configure_logging
-from shared_observability.tracing import configure_tracing
-from stt_service_app.grpc_server import SpeechToTextService
-from stt_service_app.http_app import app
-from stt_service_app.transcriber import FasterWhisperTranscriber
-from voice_platform import stt_pb2_grpc
+from shared_audio.vad import VadConfig  # noqa: E402
+from shared_config.settings import get_settings  # noqa: E402
+from shared_observability.logging import configure_logging  # noqa: E402
+from shared_observability.tracing import configure_tracing  # noqa: E402
+from stt_service_app.grpc_server import SpeechToTextService  # noqa: E402
+from stt_service_app.http_app import app  # noqa: E402
+from stt_service_app.transcriber import DecodePool, FasterWhisperTranscriber  # noqa: E402
+from voice_platform import stt_pb2_grpc  # noqa: E402
 
 
 async def serve_grpc() -> None:
@@ -33,11 +35,31 @@ async def serve_grpc() -> None:
         model_name=settings.stt_model,
         device=settings.stt_device,
         compute_type=settings.stt_compute_type,
+        num_workers=settings.model_concurrency,
+    )
+    pool = DecodePool(transcriber, workers=settings.model_concurrency)
+    vad = None
+    if settings.vad_enabled:
+        vad = VadConfig(
+            threshold_db=settings.vad_threshold_db,
+            hangover_ms=settings.vad_hangover_ms,
+            padding_ms=settings.vad_padding_ms,
+        )
+    stt_pb2_grpc.add_SpeechToTextServicer_to_server(
+        SpeechToTextService(
+            pool,
+            chunk_ms=settings.stt_chunk_ms,
+            max_window_ms=settings.stt_partial_window_ms,
+            vad=vad,
+        ),
+        server,
     )
-    stt_pb2_grpc.add_SpeechToTextServicer_to_server(SpeechToTextService(transcriber), server)
     server.add_insecure_port("[::]:50052")
     await server.start()
-    await server.wait_for_termination()
+    try:
+        await server.wait_for_termination()
+    finally:
+        pool.shutdown()
 
 
 async def serve_http() -> None:
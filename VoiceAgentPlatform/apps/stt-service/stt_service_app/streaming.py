@@ -0,0 +1,108 @@
+"""Incremental decoding of one transcription stream."""
+
+from __future__ import annotations
+
+import asyncio
+
+import numpy as np
+from shared_audio.partials import BYTES_PER_SAMPLE, IncrementalPartialTranscriber
+
+from stt_service_app.transcriber import DecodePool, TranscriptResult
+
+
+class _SampleBuffer:
+    """Growable float32 buffer; appending is amortised O(chunk)."""
+
+    def __init__(self, capacity: int = 16000) -> None:
+        self._data = np.empty(capacity, dtype=np.float32)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, pcm: bytes) -> None:
+        samples = np.frombuffer(pcm[: len(pcm) - len(pcm) % BYTES_PER_SAMPLE], dtype=np.int16)
+        needed = self._size + len(samples)
+        if needed > len(self._data):
+            grown = np.empty(max(needed, 2 * len(self._data)), dtype=np.float32)
+            grown[: self._size] = self._data[: self._size]
+            self._data = grown
+        self._data[self._size : needed] = samples
+        self._data[self._size : needed] /= 32768.0
+        self._size = needed
+
+    def window(self, start: int, end: int) -> np.ndarray:
+        return self._data[start:end].copy()
+
+
+class StreamingDecoder:
+    """Decodes a stream's audio as it arrives, one window at a time.
+
+    Interim decodes cover the window since the last committed words (see
+    ``IncrementalPartialTranscriber``) and run at most once per ``chunk_ms``
+    of new audio, one at a time per stream.  The final transcript is the
+    committed words plus a decode of the remaining window, so the total work
+    per stream grows linearly with its length.
+    """
+
+    def __init__(self, pool: DecodePool, chunk_ms: int, max_window_ms: int) -> None:
+        self._pool = pool
+        self._samples = _SampleBuffer()
+        self._partials = IncrementalPartialTranscriber(
+            chunk_ms=chunk_ms, max_window_ms=max_window_ms
+        )
+        self._pending: asyncio.Task | None = None
+        self.sample_rate = self._partials.sample_rate
+
+    @property
+    def _buffered(self) -> int:
+        return len(self._samples) * BYTES_PER_SAMPLE
+
+    def append(self, pcm: bytes, sample_rate: int) -> None:
+        self.sample_rate = self._partials.sample_rate = sample_rate
+        self._samples.extend(pcm)
+
+    async def _decode(self, start: int, end: int) -> tuple[int, int, TranscriptResult]:
+        audio = self._samples.window(start // BYTES_PER_SAMPLE, end // BYTES_PER_SAMPLE)
+        return start, end, await self._pool.transcribe(audio, self.sample_rate)
+
+    def poll_interim(self) -> tuple[str, float] | None:
+        """Collect a finished interim decode and start the next one when due."""
+        interim = None
+        if self._pending is not None and self._pending.done():
+            start, end, result = self._pending.result()
+            self._pending = None
+            text = self._partials.update(start, end, result.text)
+            if text:
+                interim = (text, result.confidence)
+        if self._pending is None and self._partials.due(self._buffered):
+            self._pending = asyncio.create_task(
+                self._decode(*self._partials.window(self._buffered))
+            )
+        return interim
+
+    async def finish(self) -> TranscriptResult:
+        """Transcript of the whole stream."""
+        buffered = self._buffered
+        if self._pending is not None:
+            start, end, result = await self._pending
+            self._pending = None
+            if end == buffered:
+                # The in-flight decode already covers everything that arrived.
+                return TranscriptResult(
+                    self._partials.finalize(start, end, result.text), result.confidence
+                )
+            self._partials.update(start, end, result.text)
+        start, end = self._partials.window(buffered)
+        if end <= start:
+            return TranscriptResult(self._partials.committed_text, 0.0)
+        _, _, result = await self._decode(start, end)
+        return TranscriptResult(self._partials.finalize(start, end, result.text), result.confidence)
+
+    async def close(self) -> None:
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+            try:
+                await self._pending
+            except asyncio.CancelledError:
+                pass
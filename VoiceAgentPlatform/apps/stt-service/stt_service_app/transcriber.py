@@ -1,14 +1,17 @@
 from __future__ import annotations
 
-import io
+import asyncio
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 import numpy as np
-import soundfile as sf
 
 logger = logging.getLogger(__name__)
 
+MODEL_SAMPLE_RATE = 16000
+
 try:
     from faster_whisper import WhisperModel
 except Exception:  # pragma: no cover
@@ -22,26 +25,39 @@ class TranscriptResult:
 
 
 class FasterWhisperTranscriber:
-    def __init__(self, model_name: str, device: str, compute_type: str) -> None:
+    def __init__(
+        self, model_name: str, device: str, compute_type: str, num_workers: int = 1
+    ) -> None:
         self._model_name = model_name
         self._device = device
         self._compute_type = compute_type
+        self._num_workers = num_workers
         self._model = None
         self._fallback_attempted = False
+        self._model_lock = threading.Lock()
 
     def _ensure_model(self):
+        with self._model_lock:
+            return self._load_model()
+
+    def _load_model(self):
         if self._model is None and WhisperModel is not None:
             try:
                 self._model = WhisperModel(
                     self._model_name,
                     device=self._device,
                     compute_type=self._compute_type,
+                    num_workers=self._num_workers,
                 )
             except RuntimeError as exc:
                 if self._device != "cpu" and not self._fallback_attempted:
                     logger.warning(
                         "GPU STT initialization failed; falling back to CPU",
-                        extra={"device": self._device, "compute_type": self._compute_type, "error": str(exc)},
+                        extra={
+                            "device": self._device,
+                            "compute_type": self._compute_type,
+                            "error": str(exc),
+                        },
                     )
                     self._fallback_attempted = True
                     self._device = "cpu"
@@ -50,6 +66,7 @@ class FasterWhisperTranscriber:
                         self._model_name,
                         device=self._device,
                         compute_type=self._compute_type,
+                        num_workers=self._num_workers,
                     )
                 else:
                     raise
@@ -60,22 +77,34 @@ class FasterWhisperTranscriber:
         audio = np.frombuffer(raw_audio, dtype=np.int16).astype(np.float32) / 32768.0
         return audio
 
+    @staticmethod
+    def _resample(audio: np.ndarray, sample_rate: int) -> np.ndarray:
+        if sample_rate == MODEL_SAMPLE_RATE or not len(audio):
+            return audio
+        duration = len(audio) / sample_rate
+        target = np.arange(int(duration * MODEL_SAMPLE_RATE)) / MODEL_SAMPLE_RATE
+        source = np.arange(len(audio)) / sample_rate
+        return np.interp(target, source, audio).astype(np.float32)
+
     def transcribe(self, raw_audio: bytes, sample_rate: int = 16000) -> TranscriptResult:
-        if not raw_audio:
+        return self.transcribe_array(self._pcm_to_float32(raw_audio), sample_rate)
+
+    def transcribe_array(
+        self, audio: np.ndarray, sample_rate: int = MODEL_SAMPLE_RATE
+    ) -> TranscriptResult:
+        """Decode float32 mono samples in [-1, 1]; blocking, so call it from a worker thread."""
+        if not len(audio):
             return TranscriptResult(text="", confidence=0.0)
 
         model = self._ensure_model()
         if model is None:
             return TranscriptResult(text="mock transcript", confidence=0.5)
 
-        audio = self._pcm_to_float32(raw_audio)
-        buffer = io.BytesIO()
-        sf.write(buffer, audio, sample_rate, format="WAV")
-        buffer.seek(0)
-
         segments, info = model.transcribe(
-            buffer,
+            self._resample(audio, sample_rate),
             language="en",
+            # Non-speech is already dropped by the energy VAD in front of the
+            # decoder; faster-whisper's Silero filter would add a second model.
             vad_filter=False,
             beam_size=1,
             condition_on_previous_text=False,
@@ -83,3 +112,31 @@ class FasterWhisperTranscriber:
         text = " ".join(segment.text.strip() for segment in segments).strip()
         confidence = 1.0 - float(getattr(info, "language_probability", 0.5))
         return TranscriptResult(text=text, confidence=max(0.1, confidence))
+
+
+class DecodePool:
+    """Runs blocking decodes on at most ``workers`` threads, off the event loop.
+
+    Decodes beyond ``workers`` wait their turn in the pool's queue, so one long
+    utterance occupies one worker instead of stalling every stream.
+    """
+
+    def __init__(self, transcriber: FasterWhisperTranscriber, workers: int) -> None:
+        self._transcriber = transcriber
+        self._workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self._workers, thread_name_prefix="stt-decode"
+        )
+
+    @property
+    def workers(self) -> int:
+        return self._workers
+
+    async def transcribe(self, audio: np.ndarray, sample_rate: int) -> TranscriptResult:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, self._transcriber.transcribe_array, audio, sample_rate
+        )
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
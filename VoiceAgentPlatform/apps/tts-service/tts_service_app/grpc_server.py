@@ -1,10 +1,18 @@
 from __future__ import annotations
 
-import grpc
+import logging
+import time
 
-from tts_service_app.providers import TtsProvider
+import grpc
+from shared_observability.metrics import STAGE_LATENCY
 from voice_platform import common_pb2, tts_pb2, tts_pb2_grpc
 
+from tts_service_app.providers import PcmFrame, TtsProvider, wav_bytes
+
+SERVICE_NAME = "tts-service"
+
+logger = logging.getLogger(__name__)
+
 
 class TextToSpeechService(tts_pb2_grpc.TextToSpeechServicer):
     def __init__(self, provider: TtsProvider) -> None:
@@ -13,12 +21,45 @@ class TextToSpeechService(tts_pb2_grpc.TextToSpeechServicer):
     async def Synthesize(
         self, request: tts_pb2.SynthesisRequest, context: grpc.aio.ServicerContext
     ):
-        packet = await self._provider.synthesize(request.text, request.voice)
-        yield tts_pb2.SynthesisChunk(
+        """Forwards each frame as the provider produces it, as a self-contained WAV.
+
+        One frame is held back so the last chunk carrying audio is the one
+        marked ``is_final``.
+        """
+        started = time.perf_counter()
+        previous: PcmFrame | None = None
+        async for frame in self._provider.stream(request.text, request.voice):
+            if previous is None:
+                first_audio = time.perf_counter() - started
+                STAGE_LATENCY.labels(SERVICE_NAME, "time_to_first_audio").observe(first_audio)
+                logger.info(
+                    "tts first audio",
+                    extra={
+                        "session_id": request.meta.session_id,
+                        "turn_id": request.meta.turn_id,
+                        "request_id": request.meta.request_id,
+                        "time_to_first_audio_ms": round(first_audio * 1000, 1),
+                        "characters": len(request.text),
+                    },
+                )
+            else:
+                yield self._chunk(request, previous, is_final=False)
+            previous = frame
+        STAGE_LATENCY.labels(SERVICE_NAME, "synthesis").observe(time.perf_counter() - started)
+        if previous is None:
+            yield tts_pb2.SynthesisChunk(meta=request.meta, mime_type="audio/wav", is_final=True)
+        else:
+            yield self._chunk(request, previous, is_final=True)
+
+    @staticmethod
+    def _chunk(
+        request: tts_pb2.SynthesisRequest, frame: PcmFrame, is_final: bool
+    ) -> tts_pb2.SynthesisChunk:
+        return tts_pb2.SynthesisChunk(
             meta=request.meta,
-            audio=packet.audio,
-            mime_type=packet.mime_type,
-            is_final=True,
+            audio=wav_bytes(frame),
+            mime_type="audio/wav",
+            is_final=is_final,
         )
 
     async def Health(self, request: common_pb2.Empty, context: grpc.aio.ServicerContext):
@@ -3,12 +3,15 @@ from __future__ import annotations
 import asyncio
 import io
 import shutil
+import struct
+import threading
+import wave
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
 from typing import Protocol
 
 import httpx
 import numpy as np
-import soundfile as sf
 
 try:
     from kokoro import KPipeline
@@ -17,13 +20,31 @@ except ImportError:  # pragma: no cover - exercised in container/runtime
 
 
 @dataclass(slots=True)
-class AudioPacket:
-    audio: bytes
-    mime_type: str
+class PcmFrame:
+    """A piece of synthesized speech as 16-bit mono PCM."""
+
+    pcm: bytes
+    sample_rate: int
 
 
 class TtsProvider(Protocol):
-    async def synthesize(self, text: str, voice: str | None = None) -> AudioPacket: ...
+    def stream(self, text: str, voice: str | None = None) -> AsyncIterator[PcmFrame]:
+        """Yield audio frames as soon as they are synthesized."""
+        ...
+
+
+def wav_bytes(frame: PcmFrame) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as writer:
+        writer.setnchannels(1)
+        writer.setsampwidth(2)
+        writer.setframerate(frame.sample_rate)
+        writer.writeframes(frame.pcm)
+    return buffer.getvalue()
+
+
+def _float_to_pcm16(audio: np.ndarray) -> bytes:
+    return (np.clip(audio, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
 
 
 class OllamaTtsProbe:
@@ -50,6 +71,8 @@ class KokoroProvider:
     DEFAULT_REPO = "hexgrad/Kokoro-82M"
     DEFAULT_LANG_CODE = "a"
     DEFAULT_VOICE = "af_heart"
+    # Render phrase by phrase so the first phrase plays while the rest renders.
+    PHRASE_SPLIT = r"(?<=[.!?;:,])\s+"
 
     def __init__(
         self,
@@ -74,9 +97,36 @@ class KokoroProvider:
         await self._ensure_pipeline()
         await asyncio.to_thread(self._pipeline.load_voice, self._normalize_voice(None))
 
-    async def synthesize(self, text: str, voice: str | None = None) -> AudioPacket:
+    async def stream(self, text: str, voice: str | None = None) -> AsyncIterator[PcmFrame]:
         await self._ensure_pipeline()
-        return await asyncio.to_thread(self._synthesize_sync, text, self._normalize_voice(voice))
+        voice = self._normalize_voice(voice)
+        loop = asyncio.get_running_loop()
+        frames: asyncio.Queue[bytes | Exception | None] = asyncio.Queue()
+        stop = threading.Event()
+
+        def render() -> None:
+            try:
+                for pcm in self._render_sync(text, voice, stop):
+                    loop.call_soon_threadsafe(frames.put_nowait, pcm)
+            except Exception as exc:
+                loop.call_soon_threadsafe(frames.put_nowait, exc)
+            finally:
+                loop.call_soon_threadsafe(frames.put_nowait, None)
+
+        renderer = asyncio.ensure_future(asyncio.to_thread(render))
+        try:
+            produced = False
+            while (item := await frames.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                produced = True
+                yield PcmFrame(pcm=item, sample_rate=self.SAMPLE_RATE)
+            if not produced:
+                raise RuntimeError("Kokoro produced no audio")
+        finally:
+            # An abandoned stream stops rendering after the current phrase.
+            stop.set()
+            await renderer
 
     async def _ensure_pipeline(self) -> None:
         if self._pipeline is not None:
@@ -97,27 +147,26 @@ class KokoroProvider:
             return self._default_voice
         return voice or self._default_voice
 
-    def _synthesize_sync(self, text: str, voice: str) -> AudioPacket:
-        segments = []
-        for result in self._pipeline(text, voice=voice, speed=self._speed, split_pattern=None):
+    def _render_sync(self, text: str, voice: str, stop: threading.Event):
+        phrases = self._pipeline(
+            text, voice=voice, speed=self._speed, split_pattern=self.PHRASE_SPLIT
+        )
+        for result in phrases:
+            if stop.is_set():
+                return
             if result.audio is None:
                 continue
-            audio = result.audio.detach().cpu().numpy().astype(np.float32)
-            segments.append(audio)
-        if not segments:
-            raise RuntimeError("Kokoro produced no audio")
-        waveform = np.concatenate(segments)
-        buffer = io.BytesIO()
-        sf.write(buffer, waveform, self.SAMPLE_RATE, format="WAV")
-        return AudioPacket(audio=buffer.getvalue(), mime_type="audio/wav")
+            yield _float_to_pcm16(result.audio.detach().cpu().numpy().astype(np.float32))
 
 
 class EspeakProvider:
-    def __init__(self, voice: str) -> None:
+    def __init__(self, voice: str, *, frame_ms: int = 200, executable: str | None = None) -> None:
         self._voice = voice
+        self._frame_ms = frame_ms
+        self._executable = executable
 
-    async def synthesize(self, text: str, voice: str | None = None) -> AudioPacket:
-        executable = shutil.which("espeak-ng") or shutil.which("espeak")
+    async def stream(self, text: str, voice: str | None = None) -> AsyncIterator[PcmFrame]:
+        executable = self._executable or shutil.which("espeak-ng") or shutil.which("espeak")
         if executable is None:
             raise RuntimeError("espeak-ng or espeak must be installed for fallback TTS")
         process = await asyncio.create_subprocess_exec(
@@ -129,7 +178,65 @@ class EspeakProvider:
             stdout=asyncio.subprocess.PIPE,
             stderr=asyncio.subprocess.PIPE,
         )
-        stdout, stderr = await process.communicate()
-        if process.returncode != 0:
-            raise RuntimeError(stderr.decode("utf-8", errors="ignore"))
-        return AudioPacket(audio=stdout, mime_type="audio/wav")
+        assert process.stdout is not None and process.stderr is not None
+        # Drained alongside stdout so chatty stderr cannot fill its pipe and stall espeak.
+        stderr = asyncio.create_task(_read_tail(process.stderr))
+        try:
+            # espeak writes the WAV header first and the samples as it renders them.
+            try:
+                sample_rate = await _read_wav_header(process.stdout)
+            except asyncio.IncompleteReadError:
+                sample_rate = None
+            if sample_rate is not None:
+                frame_bytes = max(2, sample_rate * self._frame_ms // 1000 * 2)
+                pending = b""
+                while chunk := await process.stdout.read(65536):
+                    pending += chunk
+                    while len(pending) >= frame_bytes:
+                        yield PcmFrame(pcm=pending[:frame_bytes], sample_rate=sample_rate)
+                        pending = pending[frame_bytes:]
+                pending = pending[: len(pending) - len(pending) % 2]
+                if pending:
+                    yield PcmFrame(pcm=pending, sample_rate=sample_rate)
+            if await process.wait() != 0 or sample_rate is None:
+                message = (await stderr).decode("utf-8", errors="ignore")
+                raise RuntimeError(message or "espeak produced no audio")
+        finally:
+            if process.returncode is None:
+                process.kill()
+                # wait() returns only once both pipes hit EOF, and a reader
+                # paused on a full buffer never sees it; drain what is left.
+                await process.stdout.read()
+                await process.wait()
+            stderr.cancel()
+
+
+async def _read_tail(stream: asyncio.StreamReader, limit: int = 4096) -> bytes:
+    """Read ``stream`` to its end, keeping only the last ``limit`` bytes."""
+    tail = b""
+    while chunk := await stream.read(65536):
+        tail = (tail + chunk)[-limit:]
+    return tail
+
+
+async def _read_wav_header(stream: asyncio.StreamReader) -> int:
+    """Consume a WAV header up to the sample data; returns the sample rate.
+
+    Chunk sizes of a WAV written to a pipe are placeholders, so the data chunk
+    is read until end of stream rather than for its declared length.
+    """
+    riff = await stream.readexactly(12)
+    if riff[:4] != b"RIFF" or riff[8:] != b"WAVE":
+        raise RuntimeError("espeak output is not a WAV stream")
+    sample_rate = None
+    while True:
+        chunk_id, size = struct.unpack("<4sI", await stream.readexactly(8))
+        if chunk_id == b"data":
+            if sample_rate is None:
+                raise RuntimeError("espeak WAV stream has no fmt chunk")
+            return sample_rate
+        body = await stream.readexactly(size + size % 2)
+        if chunk_id == b"fmt ":
+            channels, sample_rate, bits = struct.unpack("<2xHI6xH", body[:16])
+            if channels != 1 or bits != 16:
+                raise RuntimeError(f"unsupported espeak output: {channels} channels, {bits} bits")
@@ -15,9 +15,9 @@ let stream;
 let sessionId = `session-${crypto.randomUUID()}`;
 let turnId = "turn-0";
 let sequenceId = 0;
-let audioQueue = [];
-let activeAudio = null;
-let isPlayingAudio = false;
+let playbackContext;
+let playbackSources = [];
+let playbackEnd = 0;
 
 function appendLine(element, text) {
   element.textContent = `${element.textContent}${text}\n`;
@@ -41,52 +41,62 @@ function pcmToBase64(float32Array) {
   return btoa(binary);
 }
 
-function playAudio(base64Audio, mimeType) {
-  const binary = atob(base64Audio);
-  const bytes = Uint8Array.from(binary, (char) => char.charCodeAt(0));
-  const blob = new Blob([bytes], { type: mimeType || "audio/wav" });
-  audioQueue.push(URL.createObjectURL(blob));
-  void drainAudioQueue();
+function wavToAudioBuffer(context, bytes) {
+  const view = new DataView(bytes.buffer, bytes.byteOffset, bytes.byteLength);
+  let sampleRate = 0;
+  let offset = 12;
+  while (offset + 8 <= view.byteLength) {
+    const id = String.fromCharCode(...bytes.subarray(offset, offset + 4));
+    const size = view.getUint32(offset + 4, true);
+    if (id === "fmt ") {
+      sampleRate = view.getUint32(offset + 12, true);
+    }
+    if (id === "data") {
+      const samples = Math.min(size, view.byteLength - offset - 8) >> 1;
+      if (!sampleRate || samples === 0) {
+        return null;
+      }
+      const buffer = context.createBuffer(1, samples, sampleRate);
+      const channel = buffer.getChannelData(0);
+      for (let i = 0; i < samples; i += 1) {
+        channel[i] = view.getInt16(offset + 8 + i * 2, true) / 0x8000;
+      }
+      return buffer;
+    }
+    offset += 8 + size + (size % 2);
+  }
+  return null;
 }
 
-async function drainAudioQueue() {
-  if (isPlayingAudio || audioQueue.length === 0) {
-    return;
+function playAudio(base64Audio) {
+  const binary = atob(base64Audio);
+  const bytes = Uint8Array.from(binary, (char) => char.charCodeAt(0));
+  playbackContext ??= new AudioContext();
+  if (playbackContext.state === "suspended") {
+    void playbackContext.resume();
   }
-  isPlayingAudio = true;
-  const url = audioQueue.shift();
-  const audio = new Audio(url);
-  activeAudio = audio;
-  try {
-    await audio.play();
-    await new Promise((resolve) => {
-      audio.onended = resolve;
-      audio.onerror = resolve;
-      audio.onpause = resolve;
-    });
-  } catch (_) {
-    // Ignore autoplay or decode failures in local dev.
-  } finally {
-    audio.pause();
-    URL.revokeObjectURL(url);
-    if (activeAudio === audio) {
-      activeAudio = null;
-    }
-    isPlayingAudio = false;
-    if (audioQueue.length > 0) {
-      void drainAudioQueue();
-    }
+  const buffer = wavToAudioBuffer(playbackContext, bytes);
+  if (!buffer) {
+    return;
   }
+  const source = playbackContext.createBufferSource();
+  source.buffer = buffer;
+  source.connect(playbackContext.destination);
+  // TTS streams a sentence as many short WAV frames; start each exactly where
+  // the previous one ends so they play back without gaps.
+  playbackEnd = Math.max(playbackEnd, playbackContext.currentTime + 0.05);
+  source.start(playbackEnd);
+  playbackEnd += buffer.duration;
+  playbackSources.push(source);
+  source.onended = () => {
+    playbackSources = playbackSources.filter((item) => item !== source);
+  };
 }
 
 function stopPlayback() {
-  audioQueue = [];
-  if (activeAudio) {
-    activeAudio.pause();
-    activeAudio.currentTime = 0;
-    activeAudio = null;
-  }
-  isPlayingAudio = false;
+  playbackSources.forEach((source) => source.stop());
+  playbackSources = [];
+  playbackEnd = 0;
 }
 
 function sendControl(command, value = "") {
@@ -122,7 +132,7 @@ connectBtn.addEventListener("click", async () => {
       appendLine(debugEl, "assistant turn complete");
     }
     if (payload.type === "tts.chunk" && payload.audio_b64) {
-      playAudio(payload.audio_b64, payload.mime_type);
+      playAudio(payload.audio_b64);
     }
     if (payload.type === "tts.stopped") {
       stopPlayback();
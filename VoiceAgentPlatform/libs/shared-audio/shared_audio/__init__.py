@@ -0,0 +1 @@
+"""Shared audio processing for the STT path."""
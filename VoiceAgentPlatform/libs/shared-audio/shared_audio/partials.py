@@ -0,0 +1,123 @@
+"""Incremental partial transcription for a live turn.
+
+Re-decoding the whole turn on every frame makes partial STT quadratic in the
+utterance length.  Instead, each partial decode covers only a window that
+starts at the last commit point:
+
+- words that two consecutive decodes agree on are committed, and the window
+  start moves past them, less a short overlap whose re-decoded words are
+  de-duplicated against the committed tail;
+- if the window reaches ``max_window_ms`` without agreement, all but the last
+  ``holdback_words`` are committed anyway, so a decode never covers more
+  than ``max_window_ms`` plus one cadence step of audio;
+- decodes run at most once per ``chunk_ms`` of new audio.
+
+Commit points are estimated by assuming the window's words are evenly spread
+over its audio, because the STT contract returns text without timestamps.
+"""
+
+from __future__ import annotations
+
+import re
+
+BYTES_PER_SAMPLE = 2  # 16-bit mono PCM
+
+_MAX_DEDUPE_WORDS = 4
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word: str) -> str:
+    return _NON_WORD.sub("", word.lower())
+
+
+def _agreed_prefix(previous: list[str], current: list[str]) -> int:
+    count = 0
+    for old, new in zip(previous, current, strict=False):
+        if _normalize(old) != _normalize(new):
+            break
+        count += 1
+    return count
+
+
+def _overlap(committed: list[str], words: list[str]) -> int:
+    """Longest tail of ``committed`` that ``words`` starts with."""
+    for size in range(min(len(committed), len(words), _MAX_DEDUPE_WORDS), 0, -1):
+        tail = [_normalize(w) for w in committed[-size:]]
+        if tail == [_normalize(w) for w in words[:size]]:
+            return size
+    return 0
+
+
+class IncrementalPartialTranscriber:
+    def __init__(
+        self,
+        sample_rate: int = 16000,
+        chunk_ms: int = 250,
+        max_window_ms: int = 4000,
+        overlap_ms: int = 300,
+        holdback_words: int = 2,
+    ) -> None:
+        self.sample_rate = sample_rate
+        self.chunk_ms = chunk_ms
+        self.max_window_ms = max_window_ms
+        self.overlap_ms = overlap_ms
+        self.holdback_words = holdback_words
+        self.reset()
+
+    def reset(self) -> None:
+        self._committed: list[str] = []
+        self._previous: list[str] = []
+        self._window_start = 0
+        self._commit_end = 0
+        self._decoded_until = 0
+
+    def _bytes(self, ms: int) -> int:
+        samples = self.sample_rate * ms // 1000
+        return samples * BYTES_PER_SAMPLE
+
+    @property
+    def committed_text(self) -> str:
+        return " ".join(self._committed)
+
+    def due(self, buffered: int) -> bool:
+        """Whether enough new audio arrived since the last decode."""
+        return buffered - self._decoded_until >= max(self._bytes(self.chunk_ms), BYTES_PER_SAMPLE)
+
+    def window(self, buffered: int) -> tuple[int, int]:
+        """Byte range of the turn's audio the next partial decode should cover."""
+        end = buffered - buffered % BYTES_PER_SAMPLE
+        return self._window_start, end
+
+    def update(self, start: int, end: int, text: str) -> str:
+        """Fold the decode of ``audio[start:end]`` in; returns the partial transcript."""
+        words = text.split()
+        if start < self._commit_end:
+            words = words[_overlap(self._committed, words) :]
+        self._decoded_until = end
+
+        commit = _agreed_prefix(self._previous, words)
+        if end - start >= self._bytes(self.max_window_ms):
+            commit = max(commit, len(words) - self.holdback_words) or len(words)
+
+        if commit:
+            self._committed.extend(words[:commit])
+            cut = start + (end - start) * commit // len(words)
+            cut -= cut % BYTES_PER_SAMPLE
+            self._commit_end = cut
+            self._window_start = max(start, cut - self._bytes(self.overlap_ms))
+        elif not words and end - start >= self._bytes(self.max_window_ms):
+            # Nothing but silence in a full window: stop re-decoding it.
+            self._commit_end = end
+            self._window_start = max(start, end - self._bytes(self.overlap_ms))
+        self._previous = words[commit:]
+        return " ".join(self._committed + self._previous)
+
+    def finalize(self, start: int, end: int, text: str) -> str:
+        """Commit the decode of the last window; returns the full transcript."""
+        words = text.split()
+        if start < self._commit_end:
+            words = words[_overlap(self._committed, words) :]
+        self._committed.extend(words)
+        self._previous = []
+        self._commit_end = self._window_start = self._decoded_until = end
+        return self.committed_text
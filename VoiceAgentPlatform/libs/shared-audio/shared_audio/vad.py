@@ -0,0 +1,154 @@
+"""Energy-based voice activity detection and endpointing for 16-bit mono PCM.
+
+Each ``frame_ms`` frame is speech when its level is above both an absolute
+``threshold_db`` and an adaptive noise floor plus ``margin_db``.  Non-speech
+frames are dropped, except ``padding_ms`` of audio kept on either side of
+speech so word onsets and tails are not clipped.  An utterance ends once
+``hangover_ms`` of non-speech follows at least ``min_speech_ms`` of speech.
+
+Frame levels are computed with vectorised numpy; only a small per-frame state
+machine runs in Python, so the detector costs far less CPU than decoding the
+audio it drops.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+
+import numpy as np
+
+from shared_audio.partials import BYTES_PER_SAMPLE
+
+_SILENCE_DB = -100.0
+# Per-frame rise of the noise floor towards the current level.  The slow rate
+# also applies to speech frames, so a steady background that starts above the
+# floor is absorbed within a few seconds instead of passing as speech forever.
+_NOISE_FLOOR_RISE = 0.05
+_NOISE_FLOOR_RISE_IN_SPEECH = 0.002
+
+
+@dataclass(frozen=True, slots=True)
+class VadConfig:
+    frame_ms: int = 20
+    threshold_db: float = -45.0
+    margin_db: float = 9.0
+    hangover_ms: int = 600
+    padding_ms: int = 200
+    min_speech_ms: int = 100
+
+
+@dataclass(slots=True)
+class VadResult:
+    audio: bytes
+    frames: int
+    speech_frames: int
+    end_of_utterance: bool
+
+
+def frame_levels_db(samples: np.ndarray, frame_samples: int) -> np.ndarray:
+    """RMS level in dBFS of each whole ``frame_samples`` frame."""
+    frames = samples[: len(samples) - len(samples) % frame_samples].reshape(-1, frame_samples)
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1)) / 32768.0
+    return np.maximum(20.0 * np.log10(np.maximum(rms, 1e-10)), _SILENCE_DB)
+
+
+class VoiceActivityDetector:
+    """Streaming VAD: feed arbitrary PCM chunks, get back only the speech."""
+
+    def __init__(self, config: VadConfig | None = None, sample_rate: int = 16000) -> None:
+        self.config = config or VadConfig()
+        self._remainder = b""
+        self.sample_rate = sample_rate
+        self._noise_floor_db = self.config.threshold_db - self.config.margin_db
+        self.reset()
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    @sample_rate.setter
+    def sample_rate(self, value: int) -> None:
+        self._sample_rate = value
+        self._frame_samples = max(1, value * self.config.frame_ms // 1000)
+        self._remainder = b""
+
+    def _frames(self, ms: int) -> int:
+        return -(-ms // self.config.frame_ms)
+
+    def reset(self) -> None:
+        """Start a new utterance; the noise floor estimate is kept."""
+        self._remainder = b""
+        self._pre_roll: deque[bytes] = deque(maxlen=self._frames(self.config.padding_ms))
+        self._silence_run = 0
+        self._utterance_speech = 0
+        self._utterance_frames = 0
+        self._ended = False
+
+    @property
+    def in_speech(self) -> bool:
+        return self._utterance_speech > 0 and not self._ended
+
+    @property
+    def frames(self) -> int:
+        """Frames classified since the last ``reset``."""
+        return self._utterance_frames
+
+    @property
+    def speech_ratio(self) -> float:
+        """Share of speech frames since the last ``reset``."""
+        return self._utterance_speech / self._utterance_frames if self._utterance_frames else 0.0
+
+    def _classify(self, levels: np.ndarray) -> np.ndarray:
+        speech = np.empty(len(levels), dtype=bool)
+        floor = self._noise_floor_db
+        for i, level in enumerate(levels):
+            speech[i] = level > max(self.config.threshold_db, floor + self.config.margin_db)
+            if level < floor:
+                floor = level
+            else:
+                rise = _NOISE_FLOOR_RISE_IN_SPEECH if speech[i] else _NOISE_FLOOR_RISE
+                floor += rise * (level - floor)
+        self._noise_floor_db = floor
+        return speech
+
+    def process(self, pcm: bytes) -> VadResult:
+        data = self._remainder + pcm
+        frame_bytes = self._frame_samples * BYTES_PER_SAMPLE
+        whole = len(data) - len(data) % frame_bytes
+        self._remainder = data[whole:]
+        if not whole:
+            return VadResult(b"", 0, 0, False)
+
+        speech = self._classify(
+            frame_levels_db(np.frombuffer(data[:whole], dtype=np.int16), self._frame_samples)
+        )
+        hangover = self._frames(self.config.hangover_ms)
+        padding = self._frames(self.config.padding_ms)
+        min_speech = self._frames(self.config.min_speech_ms)
+        kept = bytearray()
+        end_of_utterance = False
+        for index, is_speech in enumerate(speech):
+            frame = data[index * frame_bytes : (index + 1) * frame_bytes]
+            self._utterance_frames += 1
+            if is_speech:
+                self._utterance_speech += 1
+                self._silence_run = 0
+                self._ended = False
+                for buffered in self._pre_roll:
+                    kept += buffered
+                self._pre_roll.clear()
+                kept += frame
+                continue
+            self._silence_run += 1
+            if self.in_speech and self._silence_run <= padding:
+                kept += frame
+            else:
+                self._pre_roll.append(frame)
+            if (
+                self.in_speech
+                and self._silence_run == hangover
+                and self._utterance_speech >= min_speech
+            ):
+                self._ended = end_of_utterance = True
+        return VadResult(bytes(kept), len(speech), int(speech.sum()), end_of_utterance)
@@ -11,6 +11,7 @@ def repo_root(current_file: str) -> pathlib.Path:
 def configure_imports(current_file: str) -> pathlib.Path:
     root = repo_root(current_file)
     extra_paths = [
+        root / "libs" / "shared-audio",
         root / "libs" / "shared-config",
         root / "libs" / "shared-events",
         root / "libs" / "shared-observability",
@@ -39,10 +39,16 @@ class AppSettings(BaseSettings):
     enable_vllm: bool = Field(default=False, alias="ENABLE_VLLM")
     vllm_base_url: str = Field(default="http://localhost:8000/v1", alias="VLLM_BASE_URL")
     vllm_model: str = Field(default="TinyLlama/TinyLlama-1.1B-Chat-v1.0", alias="VLLM_MODEL")
+    model_concurrency: int = Field(default=2, alias="MODEL_CONCURRENCY")
     stt_model: str = Field(default="tiny.en", alias="STT_MODEL")
     stt_device: str = Field(default="cpu", alias="STT_DEVICE")
     stt_compute_type: str = Field(default="int8", alias="STT_COMPUTE_TYPE")
     stt_chunk_ms: int = Field(default=250, alias="STT_CHUNK_MS")
+    stt_partial_window_ms: int = Field(default=4000, alias="STT_PARTIAL_WINDOW_MS")
+    vad_enabled: bool = Field(default=True, alias="VAD_ENABLED")
+    vad_threshold_db: float = Field(default=-45.0, alias="VAD_THRESHOLD_DB")
+    vad_hangover_ms: int = Field(default=600, alias="VAD_HANGOVER_MS")
+    vad_padding_ms: int = Field(default=200, alias="VAD_PADDING_MS")
     tts_provider: str = Field(default="kokoro", alias="TTS_PROVIDER")
     tts_voice: str = Field(default="af_heart", alias="TTS_VOICE")
     tts_device: str = Field(default="cpu", alias="TTS_DEVICE")
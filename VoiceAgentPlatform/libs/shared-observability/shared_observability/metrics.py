@@ -15,3 +15,23 @@ STAGE_LATENCY = Histogram(
     ["service", "stage"],
 )
 
+
+VAD_FRAMES = Counter(
+    "voice_platform_vad_frames_total",
+    "Audio frames classified by voice activity detection",
+    ["service", "kind"],
+)
+
+VAD_SPEECH_RATIO = Histogram(
+    "voice_platform_vad_speech_ratio",
+    "Share of speech frames per utterance or stream",
+    ["service"],
+    buckets=(0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0),
+)
+
+
+def record_vad_frames(service: str, frames: int, speech_frames: int) -> None:
+    if speech_frames:
+        VAD_FRAMES.labels(service, "speech").inc(speech_frames)
+    if frames > speech_frames:
+        VAD_FRAMES.labels(service, "non_speech").inc(frames - speech_frames)
@@ -5,12 +5,15 @@ import sys
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 for rel in (
+    ROOT / "libs" / "shared-audio",
     ROOT / "libs" / "shared-config",
     ROOT / "libs" / "shared-events",
     ROOT / "libs" / "shared-observability",
     ROOT / "libs" / "proto" / "generated",
     ROOT / "apps" / "session-orchestrator",
     ROOT / "apps" / "rag-service",
+    ROOT / "apps" / "stt-service",
+    ROOT / "apps" / "tts-service",
 ):
     rel_str = str(rel)
     if rel_str not in sys.path:
@@ -20,8 +20,8 @@ class DemoClients:
     async def execute_tool(self, meta, name: str, arguments_json: str):
         return {"capabilities": ["status", "manual search"]}
 
-    async def synthesize(self, meta, text: str, voice: str):
-        return b"RIFFvoice"
+    async def stream_synthesize(self, meta, text: str, voice: str):
+        yield b"RIFFvoice"
 
     async def stream_generate(self, meta, messages, system_prompt, context, enable_tools):
         if enable_tools:
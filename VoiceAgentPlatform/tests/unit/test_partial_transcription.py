@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+from session_orchestrator_app.service import LiveSession
+from session_orchestrator_app.temporal_client import DurableWorkflowLauncher
+from voice_platform import session_pb2
+
+SAMPLE_RATE = 16000
+WORD_MS = 300
+FRAME_MS = 20
+CPU_SECONDS_PER_AUDIO_SECOND = 0.1
+
+
+def _utterance(seconds: float) -> bytes:
+    """Synthetic speech: word ``k`` is 270 ms of sample ``k + 1``, then 30 ms of silence."""
+    word_samples = SAMPLE_RATE * WORD_MS // 1000
+    words = int(seconds * 1000) // WORD_MS
+    pcm = np.zeros(words * word_samples, dtype=np.int16)
+    for k in range(words):
+        pcm[k * word_samples : k * word_samples + word_samples * 9 // 10] = k + 1
+    return pcm.tobytes()
+
+
+class FakeTranscriber:
+    """Recognises the synthetic words; CPU cost is proportional to the audio it is given."""
+
+    def __init__(self) -> None:
+        self.partial_cpu_seconds = 0.0
+        self.final_cpu_seconds = 0.0
+        self.partial_calls = 0
+
+    async def transcribe(self, meta, pcm: bytes, sample_rate: int, is_final: bool):
+        samples = np.frombuffer(pcm, dtype=np.int16)
+        cost = len(samples) / sample_rate * CPU_SECONDS_PER_AUDIO_SECOND
+        if is_final:
+            self.final_cpu_seconds += cost
+        else:
+            self.partial_cpu_seconds += cost
+            self.partial_calls += 1
+        values, counts = np.unique(samples[samples > 0], return_counts=True)
+        min_samples = SAMPLE_RATE * WORD_MS // 1000 // 2
+        words = [
+            f"w{value}" for value, count in zip(values, counts, strict=True) if count >= min_samples
+        ]
+        return " ".join(words), 0.9
+
+
+async def _stream_turn(seconds: float) -> tuple[FakeTranscriber, list[dict]]:
+    clients = FakeTranscriber()
+    session = LiveSession(
+        clients, None, "starship", DurableWorkflowLauncher(None, "voice-platform"), stt_chunk_ms=250
+    )
+    pcm = _utterance(seconds)
+    frame_bytes = SAMPLE_RATE * FRAME_MS // 1000 * 2
+    meta = {"session_id": "s1", "turn_id": "turn-1", "request_id": "r1", "domain": "starship"}
+    for offset in range(0, len(pcm), frame_bytes):
+        frame = session_pb2.AudioFrame(
+            meta=meta, pcm=pcm[offset : offset + frame_bytes], sample_rate=SAMPLE_RATE, channels=1
+        )
+        await session.handle_message(session_pb2.SessionMessage(audio=frame))
+        await asyncio.sleep(0)  # let an in-flight partial decode finish, as frames are real-time
+
+    partials = []
+    while not session._outgoing.empty():
+        item = session._outgoing.get_nowait()
+        if item is not None and item.event.event_type == "transcript.partial":
+            partials.append({"text": item.event.text, **json.loads(item.event.json_payload)})
+    await session.close()
+    return clients, partials
+
+
+@pytest.mark.asyncio
+async def test_partial_stt_cost_is_linear_in_utterance_length():
+    costs = {}
+    for seconds in (3, 6, 12, 24):
+        clients, partials = await _stream_turn(seconds)
+        costs[seconds] = clients.partial_cpu_seconds
+
+        # Throttled to one decode per 250 ms chunk, not one per 20 ms frame.
+        assert clients.partial_calls <= seconds * 1000 // 250
+        # Committed words are exactly the spoken words, in order and without duplicates.
+        words = [f"w{k + 1}" for k in range(seconds * 1000 // WORD_MS)]
+        final = partials[-1]
+        assert final["text"].split() == words
+        assert words[: len(final["stable_text"].split())] == final["stable_text"].split()
+        assert len(final["stable_text"].split()) >= len(words) - 4
+
+    # Doubling the utterance roughly doubles partial-STT CPU; re-decoding the
+    # whole buffer every 250 ms would roughly quadruple it.
+    for short, long in ((6, 12), (12, 24)):
+        assert costs[long] / costs[short] < 2.5
+    full_redecode = sum(n * 0.25 for n in range(1, 24 * 4 + 1)) * CPU_SECONDS_PER_AUDIO_SECOND
+    assert costs[24] < full_redecode / 4
+
+
+@pytest.mark.asyncio
+async def test_end_of_turn_cancels_partials_and_resets_the_window():
+    clients = FakeTranscriber()
+    session = LiveSession(
+        clients, None, "starship", DurableWorkflowLauncher(None, "voice-platform")
+    )
+    meta = {"session_id": "s1", "turn_id": "turn-1", "request_id": "r1", "domain": "starship"}
+    for end_of_turn in (False, True):
+        frame = session_pb2.AudioFrame(
+            meta=meta, pcm=_utterance(1.2), sample_rate=SAMPLE_RATE, end_of_turn=end_of_turn
+        )
+        await session.handle_message(session_pb2.SessionMessage(audio=frame))
+
+    assert clients.partial_calls == 0  # the first decode was cancelled by end of turn
+    assert clients.final_cpu_seconds == pytest.approx(2.4 * CPU_SECONDS_PER_AUDIO_SECOND)
+    assert session._audio_buffer == bytearray()
+    assert session._partials.window(0) == (0, 0)
+    await session.close()
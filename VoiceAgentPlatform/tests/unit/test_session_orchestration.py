@@ -20,8 +20,8 @@ class FakeClients:
     async def execute_tool(self, meta, name: str, arguments_json: str):
         return {"status": "ok"}
 
-    async def synthesize(self, meta, text: str, voice: str):
-        return b"RIFFfake"
+    async def stream_synthesize(self, meta, text: str, voice: str):
+        yield b"RIFFfake"
 
     async def stream_generate(self, meta, messages, system_prompt, context, enable_tools):
         yield type("Chunk", (), {"token": "Acknowledged.", "is_final": False, "tool_intent": type("Intent", (), {"name": "", "arguments_json": ""})})
@@ -53,3 +53,33 @@ async def test_live_session_emits_final_transcript_and_response():
     assert "transcript.final" in events
     assert "llm.final" in events
     assert "tts.chunk" in events
+
+
+class FramedTtsClients(FakeClients):
+    async def stream_synthesize(self, meta, text: str, voice: str):
+        for _ in range(3):
+            yield b"RIFFfake"
+
+
+@pytest.mark.asyncio
+async def test_sentence_text_rides_only_on_its_first_audio_chunk():
+    session = LiveSession(
+        FramedTtsClients(), None, "starship", DurableWorkflowLauncher(None, "voice-platform")
+    )
+    message = session_pb2.SessionMessage(
+        audio=session_pb2.AudioFrame(
+            meta={"session_id": "s1", "turn_id": "turn-1", "request_id": "r1"},
+            sample_rate=16000,
+            end_of_turn=True,
+        )
+    )
+    await session.handle_message(message)
+    await asyncio.wait_for(session._active_response_task, timeout=2)
+
+    chunks = []
+    while not session._outgoing.empty():
+        item = session._outgoing.get_nowait()
+        if item is not None and item.event.event_type == "tts.chunk":
+            chunks.append((item.event.text, item.event.json_payload))
+
+    assert chunks == [("Acknowledged.", '{"text": "Acknowledged."}'), ("", "{}"), ("", "{}")]
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from stt_service_app.grpc_server import SpeechToTextService
+from stt_service_app.transcriber import DecodePool, FasterWhisperTranscriber
+from voice_platform import stt_pb2
+
+SAMPLE_RATE = 16000
+WORD_SAMPLES = SAMPLE_RATE * 300 // 1000
+
+
+def _utterance(seconds: float, first_word: int = 1) -> bytes:
+    """Word ``k`` is 270 ms of the constant sample ``k``, then 30 ms of silence."""
+    words = int(seconds * 1000) // 300
+    pcm = np.zeros(words * WORD_SAMPLES, dtype=np.int16)
+    for i in range(words):
+        pcm[i * WORD_SAMPLES : i * WORD_SAMPLES + WORD_SAMPLES * 9 // 10] = first_word + i
+    return pcm.tobytes()
+
+
+def _words(seconds: float, first_word: int = 1) -> list[str]:
+    return [f"w{first_word + i}" for i in range(int(seconds * 1000) // 300)]
+
+
+class FakeWhisperModel:
+    """Deterministic stand-in for WhisperModel: blocks for time proportional to its input."""
+
+    def __init__(self, seconds_per_audio_second: float = 0.02) -> None:
+        self.cost = seconds_per_audio_second
+        self.lock = threading.Lock()
+        self.active = 0
+        self.peak = 0
+        self.inputs: list[np.ndarray] = []
+
+    def transcribe(self, audio, **kwargs):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            self.inputs.append(audio)
+        time.sleep(len(audio) / SAMPLE_RATE * self.cost)
+        with self.lock:
+            self.active -= 1
+        values, counts = np.unique(
+            np.rint(audio[audio > 0] * 32768).astype(int), return_counts=True
+        )
+        text = " ".join(
+            f"w{v}" for v, c in zip(values, counts, strict=True) if c >= WORD_SAMPLES // 2
+        )
+        return [SimpleNamespace(text=text)], SimpleNamespace(language_probability=0.1)
+
+
+def _service(model: FakeWhisperModel, workers: int) -> tuple[SpeechToTextService, DecodePool]:
+    transcriber = FasterWhisperTranscriber("tiny.en", "cpu", "int8")
+    transcriber._model = model
+    pool = DecodePool(transcriber, workers=workers)
+    return SpeechToTextService(pool, chunk_ms=250, max_window_ms=4000), pool
+
+
+async def _requests(pcm: bytes, frame_ms: int | None, sample_rate: int = SAMPLE_RATE):
+    frame = len(pcm) if frame_ms is None else sample_rate * frame_ms // 1000 * 2
+    for offset in range(0, len(pcm), frame):
+        last = offset + frame >= len(pcm)
+        yield stt_pb2.SttAudioChunk(
+            pcm=pcm[offset : offset + frame], sample_rate=sample_rate, end_of_turn=last
+        )
+        if frame_ms is not None:
+            await asyncio.sleep(0.001)
+
+
+async def _collect(service: SpeechToTextService, requests) -> list[stt_pb2.TranscriptChunk]:
+    return [reply async for reply in service.StreamTranscribe(requests, None)]
+
+
+@pytest.mark.asyncio
+async def test_stream_emits_interim_results_and_decodes_bounded_windows():
+    model = FakeWhisperModel()
+    service, pool = _service(model, workers=2)
+
+    replies = await _collect(service, _requests(_utterance(9), frame_ms=20))
+    pool.shutdown()
+
+    interim, final = replies[:-1], replies[-1]
+    assert interim and not any(r.is_final for r in interim)
+    assert final.is_final and final.text.split() == _words(9)
+    # Float samples go straight to the model, and no decode re-reads the whole stream.
+    assert all(isinstance(a, np.ndarray) and a.dtype == np.float32 for a in model.inputs)
+    assert max(len(a) for a in model.inputs) < SAMPLE_RATE * 4.5
+    full_redecode = sum(n * SAMPLE_RATE // 4 for n in range(1, 9 * 4 + 1))
+    assert sum(len(a) for a in model.inputs) < full_redecode / 4
+
+
+@pytest.mark.asyncio
+async def test_single_chunk_request_is_decoded_once():
+    model = FakeWhisperModel()
+    service, pool = _service(model, workers=1)
+
+    replies = await _collect(service, _requests(_utterance(2), frame_ms=None))
+    pool.shutdown()
+
+    assert [r.text.split() for r in replies] == [_words(2)]
+    assert len(model.inputs) == 1
+
+
+@pytest.mark.asyncio
+async def test_long_utterance_does_not_stall_other_streams_or_the_loop():
+    model = FakeWhisperModel(seconds_per_audio_second=0.05)
+    service, pool = _service(model, workers=2)
+    lags: list[float] = []
+
+    async def ticker():
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lags.append(time.perf_counter() - started - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    finished: list[str] = []
+
+    async def run(name: str, seconds: float, first_word: int):
+        replies = await _collect(service, _requests(_utterance(seconds, first_word), frame_ms=None))
+        finished.append(name)
+        return replies[-1].text.split()
+
+    # A 20 s utterance (~1 s of decoding) next to five short ones.
+    long_text, *short_texts = await asyncio.gather(
+        run("long", 20, 1000), *(run(f"short{i}", 0.9, 100 * i) for i in range(1, 6))
+    )
+    tick.cancel()
+    pool.shutdown()
+
+    assert long_text == _words(20, 1000)
+    assert short_texts == [_words(0.9, 100 * i) for i in range(1, 6)]
+    assert model.peak == 2  # bounded by the pool, never more
+    assert finished[-1] == "long"
+    assert max(lags) < 0.1  # decoding never ran on the event loop
+
+
+def test_non_16k_audio_is_resampled_without_a_wav_round_trip():
+    model = FakeWhisperModel(seconds_per_audio_second=0)
+    transcriber = FasterWhisperTranscriber("tiny.en", "cpu", "int8")
+    transcriber._model = model
+    pcm_8k = np.frombuffer(_utterance(1.2), dtype=np.int16)[::2].tobytes()
+
+    result = transcriber.transcribe(pcm_8k, sample_rate=8000)
+
+    assert len(model.inputs[0]) == len(pcm_8k)  # 8 kHz int16 bytes == 16 kHz samples
+    assert result.text.split() == _words(1.2)
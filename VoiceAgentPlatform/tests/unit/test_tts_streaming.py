@@ -0,0 +1,227 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import io
+import re
+import shutil
+import sys
+import textwrap
+import time
+import wave
+from types import SimpleNamespace
+from typing import ClassVar
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from tts_service_app import providers
+from tts_service_app.grpc_server import TextToSpeechService
+from tts_service_app.providers import EspeakProvider, KokoroProvider
+from voice_platform import tts_pb2
+
+ESPEAK_RATE = 22050
+RENDER_SECONDS_PER_CHUNK = 0.05
+
+# Behaves like ``espeak-ng --stdout``: a WAV header with placeholder sizes,
+# then 100 ms of samples per 50 ms of "rendering", for 60 ms per character.
+FAKE_ESPEAK = f"""\
+#!{sys.executable}
+import struct, sys, time
+text = sys.argv[-1]
+if text == "fail":
+    sys.stderr.write("voice not found")
+    sys.exit(1)
+if text.startswith("noisy"):
+    sys.stderr.write("warning: unknown word\\n" * 20000)  # far more than a pipe buffer
+    sys.stderr.flush()
+out = sys.stdout.buffer
+out.write(b"RIFF" + struct.pack("<I", 0x7FFFFFFF) + b"WAVE")
+out.write(b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, {ESPEAK_RATE}, {ESPEAK_RATE * 2}, 2, 16))
+out.write(b"data" + struct.pack("<I", 0x7FFFFFFF))
+out.flush()
+chunks = len(text) * 60 // 100
+for index in range(chunks):
+    if not text.startswith("fast"):
+        time.sleep({RENDER_SECONDS_PER_CHUNK})
+    out.write(struct.pack("<h", index + 1) * ({ESPEAK_RATE} // 10))
+    out.flush()
+"""
+
+
+@pytest.fixture()
+def fake_espeak(tmp_path):
+    path = tmp_path / "espeak-ng"
+    path.write_text(textwrap.dedent(FAKE_ESPEAK))
+    path.chmod(0o755)
+    return str(path)
+
+
+def _ttfa_count() -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "voice_platform_stage_latency_seconds_count",
+            {"service": "tts-service", "stage": "time_to_first_audio"},
+        )
+        or 0.0
+    )
+
+
+@pytest.mark.asyncio
+async def test_espeak_frames_arrive_while_rendering(fake_espeak):
+    provider = EspeakProvider("en-us", frame_ms=200, executable=fake_espeak)
+    text = "Shields at ninety percent."  # 26 characters: 1.5 s of audio over ~0.75 s
+
+    started = time.perf_counter()
+    arrivals, frames = [], []
+    async for frame in provider.stream(text):
+        arrivals.append(time.perf_counter() - started)
+        frames.append(frame)
+    total = time.perf_counter() - started
+
+    assert {frame.sample_rate for frame in frames} == {ESPEAK_RATE}
+    assert sum(len(frame.pcm) for frame in frames) == 15 * ESPEAK_RATE // 10 * 2
+    assert all(len(frame.pcm) == ESPEAK_RATE // 5 * 2 for frame in frames[:-1])
+    assert len(frames) >= 7
+    assert arrivals[0] < total / 2
+
+
+@pytest.mark.asyncio
+async def test_espeak_failure_surfaces_stderr(fake_espeak):
+    provider = EspeakProvider("en-us", executable=fake_espeak)
+
+    with pytest.raises(RuntimeError, match="voice not found"):
+        _ = [frame async for frame in provider.stream("fail")]
+
+
+@pytest.mark.asyncio
+async def test_espeak_chatty_stderr_does_not_stall_audio(fake_espeak):
+    provider = EspeakProvider("en-us", frame_ms=200, executable=fake_espeak)
+
+    async def collect():
+        async with contextlib.aclosing(provider.stream("noisy text")) as stream:
+            return [frame async for frame in stream]
+
+    frames = await asyncio.wait_for(collect(), timeout=10)
+
+    assert sum(len(frame.pcm) for frame in frames) == 6 * ESPEAK_RATE // 10 * 2
+
+
+@pytest.mark.asyncio
+async def test_abandoned_espeak_stream_exits_with_unread_audio(fake_espeak):
+    provider = EspeakProvider("en-us", executable=fake_espeak)
+    stream = provider.stream("fast " + "x" * 400)  # 24 s of audio, far more than the pipe buffers
+
+    await anext(stream)
+    await asyncio.sleep(0.2)
+    await asyncio.wait_for(stream.aclose(), timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_synthesize_forwards_wav_chunks_as_they_are_produced(fake_espeak):
+    service = TextToSpeechService(EspeakProvider("en-us", frame_ms=200, executable=fake_espeak))
+    request = tts_pb2.SynthesisRequest(
+        meta={"session_id": "s1", "turn_id": "t1", "request_id": "r1"},
+        text="Course laid in, captain.",
+        voice="en-us",
+    )
+    observed = _ttfa_count()
+
+    started = time.perf_counter()
+    arrivals, chunks = [], []
+    async for chunk in service.Synthesize(request, None):
+        arrivals.append(time.perf_counter() - started)
+        chunks.append(chunk)
+
+    assert len(chunks) > 1
+    assert [chunk.is_final for chunk in chunks] == [False] * (len(chunks) - 1) + [True]
+    for chunk in chunks:
+        assert chunk.mime_type == "audio/wav" and chunk.meta.request_id == "r1"
+        with wave.open(io.BytesIO(chunk.audio)) as reader:
+            assert reader.getframerate() == ESPEAK_RATE and reader.getnframes() > 0
+    assert arrivals[0] < arrivals[-1] / 2
+    assert _ttfa_count() == observed + 1
+
+
+class FakeTensor:
+    def __init__(self, audio: np.ndarray) -> None:
+        self._audio = audio
+
+    def detach(self):
+        return self
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self._audio
+
+
+class FakePipeline:
+    """Stands in for KPipeline: 50 ms to render each phrase of ``split_pattern``."""
+
+    rendered: ClassVar[list[str]] = []
+
+    def __init__(self, lang_code: str, repo_id: str, device: str) -> None:
+        FakePipeline.rendered = []
+
+    def load_voice(self, voice: str) -> None:
+        return None
+
+    def __call__(self, text: str, voice: str, speed: float, split_pattern: str | None):
+        for phrase in re.split(split_pattern, text) if split_pattern else [text]:
+            time.sleep(0.05)
+            FakePipeline.rendered.append(phrase)
+            yield SimpleNamespace(
+                audio=FakeTensor(np.full(len(phrase) * 240, 0.5, dtype=np.float32))
+            )
+
+
+@pytest.mark.asyncio
+async def test_kokoro_streams_phrase_by_phrase(monkeypatch):
+    monkeypatch.setattr(providers, "KPipeline", FakePipeline)
+    provider = KokoroProvider("af_heart")
+    text = "Warp core stable, shields up; hailing frequencies open. Standing by."
+
+    frames = [frame async for frame in provider.stream(text)]
+
+    assert FakePipeline.rendered == [
+        "Warp core stable,",
+        "shields up;",
+        "hailing frequencies open.",
+        "Standing by.",
+    ]
+    assert [len(frame.pcm) // 2 // 240 for frame in frames] == [
+        len(p) for p in FakePipeline.rendered
+    ]
+    assert frames[0].sample_rate == KokoroProvider.SAMPLE_RATE
+    assert np.frombuffer(frames[0].pcm, dtype=np.int16)[0] == 16383
+
+
+@pytest.mark.asyncio
+async def test_abandoned_kokoro_stream_stops_rendering(monkeypatch):
+    monkeypatch.setattr(providers, "KPipeline", FakePipeline)
+    provider = KokoroProvider("af_heart")
+    stream = provider.stream("One, two, three, four, five, six, seven, eight.")
+
+    await anext(stream)
+    await stream.aclose()
+
+    assert len(FakePipeline.rendered) < 4
+
+
+@pytest.mark.skipif(
+    shutil.which("espeak-ng") is None and shutil.which("espeak") is None,
+    reason="espeak is not installed",
+)
+@pytest.mark.asyncio
+async def test_real_espeak_streams_pcm():
+    frames = [
+        frame
+        async for frame in EspeakProvider("en-us", frame_ms=100).stream(
+            "Hello there. All systems nominal."
+        )
+    ]
+
+    assert len(frames) > 1
+    assert frames[0].sample_rate > 0 and all(len(frame.pcm) % 2 == 0 for frame in frames)
@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from prometheus_client import REGISTRY
+from session_orchestrator_app.service import LiveSession
+from session_orchestrator_app.temporal_client import DurableWorkflowLauncher
+from shared_audio.vad import VadConfig, VoiceActivityDetector
+from stt_service_app.grpc_server import SpeechToTextService
+from stt_service_app.transcriber import DecodePool, FasterWhisperTranscriber
+from voice_platform import session_pb2, stt_pb2
+
+SAMPLE_RATE = 16000
+FRAME_MS = 20
+FRAME_BYTES = SAMPLE_RATE * FRAME_MS // 1000 * 2
+
+
+def _segment(
+    ms: int, speech: bool, rng: np.random.Generator, noise_db: float, tone_db: float = -20.0
+) -> np.ndarray:
+    """A two-partial tone standing in for voiced speech, or silence, over white background noise."""
+    n = SAMPLE_RATE * ms // 1000
+    t = np.arange(n) / SAMPLE_RATE
+    audio = np.zeros(n)
+    if speech:
+        pitch = rng.uniform(120, 400)
+        amplitude = 10 ** ((tone_db + rng.uniform(-8, 4)) / 20) * 32768 * np.sqrt(2)
+        audio = amplitude * (
+            0.7 * np.sin(2 * np.pi * pitch * t) + 0.3 * np.sin(2 * np.pi * 2.1 * pitch * t)
+        )
+    audio += rng.normal(0, 10 ** (noise_db / 20) * 32768, n)
+    return np.clip(audio, -32768, 32767).astype(np.int16)
+
+
+def _fixture(seconds: int, noise_db: float, seed: int = 1) -> tuple[bytes, np.ndarray]:
+    """Random tones and silences of 200-1200 ms; returns PCM and per-frame speech labels."""
+    rng = np.random.default_rng(seed)
+    chunks, labels = [], []
+    while len(labels) * FRAME_MS < seconds * 1000:
+        ms = int(rng.integers(10, 60)) * FRAME_MS
+        speech = bool(labels) and bool(rng.random() < 0.4)
+        chunks.append(_segment(ms, speech, rng, noise_db))
+        labels += [speech] * (ms // FRAME_MS)
+    return np.concatenate(chunks).tobytes(), np.array(labels)
+
+
+def _script(*segments: tuple[int, bool], noise_db: float = -65.0) -> bytes:
+    rng = np.random.default_rng(7)
+    return np.concatenate(
+        [_segment(ms, speech, rng, noise_db) for ms, speech in segments]
+    ).tobytes()
+
+
+def _frames(pcm: bytes):
+    for offset in range(0, len(pcm), FRAME_BYTES):
+        yield pcm[offset : offset + FRAME_BYTES]
+
+
+@pytest.mark.parametrize(
+    ("noise_db", "min_accuracy"), [(-70.0, 0.98), (-55.0, 0.98), (-40.0, 0.95)]
+)
+def test_frame_accuracy_on_tones_and_silence(noise_db, min_accuracy):
+    pcm, labels = _fixture(60, noise_db)
+    vad = VoiceActivityDetector(VadConfig())
+
+    predicted = np.array([vad.process(frame).speech_frames == 1 for frame in _frames(pcm)])
+
+    assert (predicted == labels).mean() >= min_accuracy
+    # Once the noise floor has adapted, even a -40 dB background is not speech.
+    assert (predicted[500:] == labels[500:]).mean() >= 0.98
+
+
+def test_dropping_non_speech_saves_decode_work_at_a_small_cpu_cost():
+    pcm, labels = _fixture(60, noise_db=-55.0)
+    vad = VoiceActivityDetector(VadConfig())
+
+    started = time.process_time()
+    # Odd-sized chunks exercise the partial-frame remainder.
+    kept = b"".join(vad.process(pcm[i : i + 1234]).audio for i in range(0, len(pcm), 1234))
+    vad_cpu = time.process_time() - started
+
+    speech_share = labels.mean()
+    kept_share = len(kept) / len(pcm)
+    assert speech_share <= kept_share < speech_share + 0.2  # speech plus padding only
+    assert 1 - kept_share > 0.4  # decoding (linear in audio) does < 60% of the work
+    assert vad_cpu < 1.0  # 60 s of audio; a real-time decoder is far slower
+    assert vad.speech_ratio == pytest.approx(speech_share, abs=0.02)
+
+
+def test_end_of_utterance_waits_for_the_hangover():
+    config = VadConfig(hangover_ms=600)
+    vad = VoiceActivityDetector(config)
+    pcm = _script((500, False), (1000, True), (300, False), (500, True), (1500, False))
+
+    ends = [i for i, frame in enumerate(_frames(pcm)) if vad.process(frame).end_of_utterance]
+
+    # A 300 ms pause is not an endpoint; the final silence ends it after 600 ms.
+    assert ends == [(500 + 1000 + 300 + 500 + 600) // FRAME_MS - 1]
+
+
+def test_short_clicks_do_not_end_an_utterance():
+    vad = VoiceActivityDetector(VadConfig(min_speech_ms=100))
+    pcm = _script((300, False), (40, True), (1500, False))
+
+    assert not any(vad.process(frame).end_of_utterance for frame in _frames(pcm))
+
+
+def test_reset_drops_the_partial_frame():
+    vad = VoiceActivityDetector(VadConfig())
+    pcm = _script((1000, True))
+
+    vad.process(pcm[: FRAME_BYTES // 2])
+    vad.reset()
+    result = vad.process(pcm[FRAME_BYTES // 2 : FRAME_BYTES * 3 // 2])
+
+    assert vad.frames == result.frames == 1
+    assert result.audio == pcm[FRAME_BYTES // 2 : FRAME_BYTES * 3 // 2]
+
+
+def _speech_ratio_count() -> float:
+    return (
+        REGISTRY.get_sample_value(
+            "voice_platform_vad_speech_ratio_count", {"service": "session-orchestrator"}
+        )
+        or 0.0
+    )
+
+
+class RecordingTranscriber:
+    def __init__(self) -> None:
+        self.final_audio: list[int] = []
+
+    async def transcribe(self, meta, pcm: bytes, sample_rate: int, is_final: bool):
+        if is_final:
+            self.final_audio.append(len(pcm))
+        return "status report", 0.9
+
+
+def _audio_message(pcm: bytes, end_of_turn: bool = False) -> session_pb2.SessionMessage:
+    meta = {"session_id": "s1", "turn_id": "turn-1", "request_id": "r1", "domain": "starship"}
+    return session_pb2.SessionMessage(
+        audio=session_pb2.AudioFrame(
+            meta=meta, pcm=pcm, sample_rate=SAMPLE_RATE, channels=1, end_of_turn=end_of_turn
+        )
+    )
+
+
+def _final_transcripts(session: LiveSession) -> list[str]:
+    events = []
+    while not session._outgoing.empty():
+        item = session._outgoing.get_nowait()
+        if item is not None and item.event.event_type == "transcript.final":
+            events.append(item.event.text)
+    return events
+
+
+@pytest.mark.asyncio
+async def test_session_endpoints_turns_and_buffers_only_speech():
+    clients = RecordingTranscriber()
+    session = LiveSession(
+        clients, None, "starship", DurableWorkflowLauncher(None, "voice-platform"), vad=VadConfig()
+    )
+    speech_before = (
+        REGISTRY.get_sample_value(
+            "voice_platform_vad_frames_total", {"service": "session-orchestrator", "kind": "speech"}
+        )
+        or 0.0
+    )
+
+    for frame in _frames(_script((2000, False), (1200, True), (1000, False))):
+        await session.handle_message(_audio_message(frame))
+    # The client's own end of turn arrives after VAD already ended it.
+    await session.handle_message(_audio_message(b"", end_of_turn=True))
+
+    assert _final_transcripts(session) == ["status report"]
+    assert len(clients.final_audio) == 1
+    # 1.2 s of speech plus 200 ms padding either side, not the 4.2 s streamed.
+    assert clients.final_audio[0] == SAMPLE_RATE * 2 * 1600 // 1000
+    speech_after = REGISTRY.get_sample_value(
+        "voice_platform_vad_frames_total", {"service": "session-orchestrator", "kind": "speech"}
+    )
+    assert speech_after - speech_before == 1200 // FRAME_MS
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_end_of_turn_right_after_the_endpoint_observes_one_ratio():
+    session = LiveSession(
+        RecordingTranscriber(),
+        None,
+        "starship",
+        DurableWorkflowLauncher(None, "voice-platform"),
+        vad=VadConfig(),
+    )
+    before = _speech_ratio_count()
+
+    # The stream stops on the frame where the 600 ms hangover ends the utterance.
+    for frame in _frames(_script((500, False), (1000, True), (600, False))):
+        await session.handle_message(_audio_message(frame))
+    await session.handle_message(_audio_message(b"", end_of_turn=True))
+
+    assert _final_transcripts(session) == ["status report"]
+    assert _speech_ratio_count() == before + 1
+    await session.close()
+
+
+@pytest.mark.asyncio
+async def test_silent_turn_skips_stt():
+    clients = RecordingTranscriber()
+    session = LiveSession(
+        clients, None, "starship", DurableWorkflowLauncher(None, "voice-platform"), vad=VadConfig()
+    )
+    for frame in _frames(_script((1500, False))):
+        await session.handle_message(_audio_message(frame))
+    await session.handle_message(_audio_message(b"", end_of_turn=True))
+
+    assert clients.final_audio == []
+    assert _final_transcripts(session) == []
+    await session.close()
+
+
+class CountingModel:
+    def __init__(self) -> None:
+        self.samples: list[int] = []
+
+    def transcribe(self, audio, **kwargs):
+        self.samples.append(len(audio))
+        return [SimpleNamespace(text="status report")], SimpleNamespace(language_probability=0.1)
+
+
+async def _stream(pcm: bytes):
+    for frame in _frames(pcm):
+        yield stt_pb2.SttAudioChunk(pcm=frame, sample_rate=SAMPLE_RATE)
+    yield stt_pb2.SttAudioChunk(sample_rate=SAMPLE_RATE, end_of_turn=True)
+
+
+@pytest.mark.asyncio
+async def test_stt_service_does_not_decode_non_speech():
+    model = CountingModel()
+    transcriber = FasterWhisperTranscriber("tiny.en", "cpu", "int8")
+    transcriber._model = model
+    pool = DecodePool(transcriber, workers=1)
+    service = SpeechToTextService(pool, vad=VadConfig())
+
+    silent = [r async for r in service.StreamTranscribe(_stream(_script((3000, False))), None)]
+    spoken = [
+        r
+        async for r in service.StreamTranscribe(
+            _stream(_script((2000, False), (500, True), (2000, False))), None
+        )
+    ]
+    pool.shutdown()
+
+    assert silent[-1].text == "" and silent[-1].is_final
+    assert spoken[-1].text == "status report"
+    # Only the 500 ms of speech and its padding ever reached the model.
+    assert max(model.samples) <= SAMPLE_RATE * 900 // 1000